@@ -0,0 +1,369 @@
+import abc
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+import geminiUtils
+from geminiUtils import GEMINI_MODEL_NAME, analysis_events, build_analysis_prompt, estimate_tokens
+from extractive_analyzer import EXTRACTIVE_VERSION, analyze_extractive
+from model_usage import ANALYSIS_OVER_BUDGET, ANALYSIS_TOKEN_BUDGET, GEMINI_BUDGET_MODEL, estimate_cost_usd, record_call
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Analysis backends behind one interface, and the policy that picks one per
+# transcript from its length, the caller's priority and the cost cap. When a
+# Gemini backend is down or times out, the fallback backend (the local
+# extractive analyzer by default) answers instead.
+ANALYZER_BACKEND = os.getenv("ANALYZER_BACKEND", "auto")  # "auto", or a backend name to always use
+ANALYZER_SMALL_MODEL = os.getenv("ANALYZER_SMALL_MODEL", GEMINI_BUDGET_MODEL)
+# Transcripts up to this many estimated tokens go to ANALYZER_SMALL_MODEL (0 disables).
+ANALYZER_SMALL_TRANSCRIPT_TOKENS = int(os.getenv("ANALYZER_SMALL_TRANSCRIPT_TOKENS", "0"))
+# Estimated USD one normal-priority analysis may cost (0 disables); cheaper
+# backends are tried in turn, the local one last.
+ANALYZER_MAX_COST_USD = float(os.getenv("ANALYZER_MAX_COST_USD", "0"))
+ANALYZER_LOW_PRIORITY_BACKEND = os.getenv("ANALYZER_LOW_PRIORITY_BACKEND", "extractive")
+ANALYZER_FALLBACK = os.getenv("ANALYZER_FALLBACK", "extractive")  # or "none"
+EXPECTED_OUTPUT_TOKENS = 1000
+
+PRIORITIES = ["low", "normal", "high"]
+
+route_counts: Counter = Counter()
+
+
+class Analyzer(abc.ABC):
+    """
+    One analysis backend. analyze() returns the RESPONSE_SCHEMA fields, or an
+    error result flagged as in geminiUtils ("provider_unavailable",
+    "timed_out", "over_budget"). A result may name the model that actually
+    answered under "model" when that can differ from the backend's name.
+    """
+
+    name = "analyzer"
+    local = False
+
+    @abc.abstractmethod
+    def cache_version(self) -> str:
+        ...
+
+    def estimate_cost_usd(self, prompt_tokens: int) -> float:
+        return 0.0
+
+    @abc.abstractmethod
+    async def analyze(self, transcript_text: str, timeout: float = None, structured: bool = False) -> Dict[str, Any]:
+        ...
+
+    async def stream(self, transcript_text: str, timeout: float = None,
+                     structured: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream events as in geminiUtils.stream_summary_and_action_items_async.
+        Backends that cannot stream yield every event once the result is ready.
+        """
+        analysis = await self.analyze(transcript_text, timeout, structured=structured)
+        if "error" in analysis:
+            yield {"type": "error", **analysis}
+            return
+        for event in analysis_events(analysis):
+            yield event
+        yield {"type": "result", "analysis": analysis}
+
+
+class GeminiAnalyzer(Analyzer):
+    def __init__(self, model_name: str):
+        self.name = model_name
+
+    def cache_version(self) -> str:
+        return f"{self.name}:{geminiUtils.PROMPT_VERSION}"
+
+    def estimate_cost_usd(self, prompt_tokens: int) -> float:
+        return estimate_cost_usd(self.name, prompt_tokens, EXPECTED_OUTPUT_TOKENS)
+
+    async def analyze(self, transcript_text: str, timeout: float = None, structured: bool = False) -> Dict[str, Any]:
+        return await geminiUtils.get_summary_and_action_items_async(
+            transcript_text, timeout, structured=structured, model_name=self.name
+        )
+
+    def stream(self, transcript_text: str, timeout: float = None,
+               structured: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        return geminiUtils.stream_summary_and_action_items_async(
+            transcript_text, timeout, structured=structured, model_name=self.name
+        )
+
+
+class ExtractiveAnalyzer(Analyzer):
+    name = "extractive"
+    local = True
+
+    def cache_version(self) -> str:
+        return f"extractive:{EXTRACTIVE_VERSION}"
+
+    async def analyze(self, transcript_text: str, timeout: float = None, structured: bool = False) -> Dict[str, Any]:
+        started = time.perf_counter()
+        # CPU-bound; a long transcript should not stall the event loop.
+        analysis = await asyncio.to_thread(analyze_extractive, transcript_text)
+        record_call("analysis", self.name, time.perf_counter() - started)
+        return analysis
+
+
+_analyzers: Dict[str, Analyzer] = {ExtractiveAnalyzer.name: ExtractiveAnalyzer()}
+
+
+def get_analyzer(name: str) -> Analyzer:
+    if name not in _analyzers:
+        if not name.startswith("gemini"):
+            raise ValueError(f"Unknown analyzer {name!r}; use 'extractive' or a Gemini model name.")
+        _analyzers[name] = GeminiAnalyzer(name)
+    return _analyzers[name]
+
+
+def choose_analyzer(transcript_text: str, priority: str = "normal", structured: bool = False) -> Tuple[Analyzer, str]:
+    """
+    Picks the backend for one transcript and says why (counted in
+    route_counts):
+    - ANALYZER_BACKEND, when set, always wins ("configured")
+    - low priority work goes to ANALYZER_LOW_PRIORITY_BACKEND
+    - high priority work always gets GEMINI_MODEL_NAME
+    - small transcripts go to ANALYZER_SMALL_MODEL
+    - over ANALYZER_MAX_COST_USD, the cheapest backend within the cap
+    Gemini picks over ANALYSIS_TOKEN_BUDGET become GEMINI_BUDGET_MODEL
+    ("over_budget"), the model geminiUtils will actually call, so labels,
+    counts and cache keys name the model that answers.
+    """
+    analyzer, reason = _route(transcript_text, priority, structured)
+    if (not analyzer.local and ANALYSIS_TOKEN_BUDGET and ANALYSIS_OVER_BUDGET != "reject"
+            and analyzer.name != GEMINI_BUDGET_MODEL
+            and estimate_tokens(build_analysis_prompt(transcript_text, structured=structured)) > ANALYSIS_TOKEN_BUDGET):
+        analyzer, reason = get_analyzer(GEMINI_BUDGET_MODEL), "over_budget"
+    route_counts[(analyzer.name, reason)] += 1
+    return analyzer, reason
+
+
+def _route(transcript_text: str, priority: str, structured: bool) -> Tuple[Analyzer, str]:
+    if ANALYZER_BACKEND != "auto":
+        return get_analyzer(ANALYZER_BACKEND), "configured"
+    if priority == "low":
+        return get_analyzer(ANALYZER_LOW_PRIORITY_BACKEND), "low_priority"
+    default = get_analyzer(GEMINI_MODEL_NAME)
+    if priority == "high":
+        return default, "high_priority"
+
+    if ANALYZER_SMALL_TRANSCRIPT_TOKENS and estimate_tokens(transcript_text) <= ANALYZER_SMALL_TRANSCRIPT_TOKENS:
+        return get_analyzer(ANALYZER_SMALL_MODEL), "small_transcript"
+
+    if ANALYZER_MAX_COST_USD:
+        prompt_tokens = estimate_tokens(build_analysis_prompt(transcript_text, structured=structured))
+        if default.estimate_cost_usd(prompt_tokens) > ANALYZER_MAX_COST_USD:
+            cheaper = get_analyzer(ANALYZER_SMALL_MODEL)
+            if cheaper.estimate_cost_usd(prompt_tokens) <= ANALYZER_MAX_COST_USD:
+                return cheaper, "cost_cap"
+            return get_analyzer(ExtractiveAnalyzer.name), "cost_cap"
+
+    return default, "default"
+
+
+def _needs_fallback(analyzer: Analyzer, analysis: Dict[str, Any]) -> bool:
+    return (ANALYZER_FALLBACK != "none" and not analyzer.local and analyzer.name != ANALYZER_FALLBACK
+            and bool(analysis.get("provider_unavailable") or analysis.get("timed_out")))
+
+
+async def get_summary_and_action_items_async(transcript_text: str, timeout: float = None, structured: bool = False,
+                                             priority: str = "normal", analyzer: Optional[Analyzer] = None) -> Dict[str, Any]:
+    """
+    Analyzes a transcript with the routed backend (or `analyzer`). The result
+    names the backend that produced it under "analyzer"; when the chosen one
+    was down and the fallback answered, "fallback_from" names the original.
+    """
+    if analyzer is None:
+        analyzer, _ = choose_analyzer(transcript_text, priority, structured)
+
+    analysis = await analyzer.analyze(transcript_text, timeout, structured=structured)
+    if _needs_fallback(analyzer, analysis):
+        logger.warning(f"{analyzer.name} analysis failed ({analysis['error']}); falling back to {ANALYZER_FALLBACK}.")
+        failed, analyzer = analyzer, get_analyzer(ANALYZER_FALLBACK)
+        route_counts[(analyzer.name, "fallback")] += 1
+        analysis = await analyzer.analyze(transcript_text, timeout, structured=structured)
+        analysis.setdefault("fallback_from", failed.name)
+    if "error" not in analysis:
+        analysis["analyzer"] = analysis.pop("model", analyzer.name)
+    return analysis
+
+
+async def stream_summary_and_action_items_async(transcript_text: str, timeout: float = None, structured: bool = False,
+                                                priority: str = "normal",
+                                                analyzer: Optional[Analyzer] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming counterpart of get_summary_and_action_items_async. The fallback
+    only applies if the chosen backend fails before yielding any content.
+    """
+    if analyzer is None:
+        analyzer, _ = choose_analyzer(transcript_text, priority, structured)
+
+    started = False
+    failed = None
+    async for event in analyzer.stream(transcript_text, timeout, structured=structured):
+        if event["type"] == "error" and not started and _needs_fallback(analyzer, event):
+            logger.warning(f"{analyzer.name} analysis failed ({event['error']}); falling back to {ANALYZER_FALLBACK}.")
+            failed = analyzer
+            break
+        started = True
+        if event["type"] == "result":
+            event["analysis"]["analyzer"] = event.pop("model", analyzer.name)
+        yield event
+    if failed is None:
+        return
+
+    analyzer = get_analyzer(ANALYZER_FALLBACK)
+    route_counts[(analyzer.name, "fallback")] += 1
+    async for event in analyzer.stream(transcript_text, timeout, structured=structured):
+        if event["type"] == "result":
+            event["analysis"].update(analyzer=analyzer.name, fallback_from=failed.name)
+        yield event
+
+
+def route_snapshot() -> List[Dict[str, Any]]:
+    return [{"analyzer": name, "reason": reason, "count": count}
+            for (name, reason), count in sorted(route_counts.items())]
+
+
+# --- Benchmark: latency and agreement between backends ---
+
+def _terms(text: str) -> set:
+    return {w for w in re.findall(r"[a-z0-9]+", (text or "").lower()) if len(w) > 2}
+
+
+def _f1(matched: int, predicted: int, expected: int) -> Optional[float]:
+    if not predicted and not expected:
+        return None
+    if not matched:
+        return 0.0
+    precision, recall = matched / predicted, matched / expected
+    return 2 * precision * recall / (precision + recall)
+
+
+def _match(predicted: List[str], expected: List[str], threshold: float = 0.3) -> List[Tuple[int, int]]:
+    # Greedy one-to-one matching on word overlap (Jaccard).
+    pairs = []
+    for i, p in enumerate(predicted):
+        for j, e in enumerate(expected):
+            a, b = _terms(p), _terms(e)
+            if a and b:
+                pairs.append((len(a & b) / len(a | b), i, j))
+    matches, used_i, used_j = [], set(), set()
+    for score, i, j in sorted(pairs, reverse=True):
+        if score >= threshold and i not in used_i and j not in used_j:
+            matches.append((i, j))
+            used_i.add(i)
+            used_j.add(j)
+    return matches
+
+
+def compare_analyses(candidate: Dict[str, Any], reference: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """
+    Agreement of one analysis with a reference: summary word overlap (F1),
+    action item and decision matching (F1), how often matched action items
+    agree on the assignee, and speaker-set overlap (Jaccard).
+    """
+    summary_a, summary_b = _terms(candidate.get("summary")), _terms(reference.get("summary"))
+    cand_items, ref_items = candidate.get("action_items", []), reference.get("action_items", [])
+    item_matches = _match([i["task"] for i in cand_items], [i["task"] for i in ref_items])
+    cand_decisions = [d["description"] for d in candidate.get("key_decisions", [])]
+    ref_decisions = [d["description"] for d in reference.get("key_decisions", [])]
+    speakers_a = {s.lower() for s in candidate.get("speakers_detected") or []}
+    speakers_b = {s.lower() for s in reference.get("speakers_detected") or []}
+    assignee_agreement = [
+        (cand_items[i].get("assignee") or "").lower() == (ref_items[j].get("assignee") or "").lower()
+        for i, j in item_matches
+    ]
+    return {
+        "summary_f1": _f1(len(summary_a & summary_b), len(summary_a), len(summary_b)),
+        "action_items_f1": _f1(len(item_matches), len(cand_items), len(ref_items)),
+        "assignee_agreement": sum(assignee_agreement) / len(assignee_agreement) if assignee_agreement else None,
+        "decisions_f1": _f1(len(_match(cand_decisions, ref_decisions)), len(cand_decisions), len(ref_decisions)),
+        "speakers_jaccard": len(speakers_a & speakers_b) / len(speakers_a | speakers_b) if speakers_a | speakers_b else None,
+    }
+
+
+def _format_score(value: Optional[float]) -> str:
+    return "  n/a" if value is None else f"{value:5.2f}"
+
+
+async def _benchmark_main(paths: List[str], backends: List[str], reference: str, reference_dir: Optional[str],
+                          save_dir: Optional[str], runs: int):
+    totals: Dict[str, Dict[str, List[float]]] = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            transcript = f.read()
+        name = os.path.splitext(os.path.basename(path))[0]
+        results: Dict[str, Dict[str, Any]] = {}
+
+        for backend in dict.fromkeys(backends + ([] if reference_dir else [reference])):
+            analyzer = get_analyzer(backend)
+            latencies = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                analysis = await analyzer.analyze(transcript)
+                latencies.append((time.perf_counter() - started) * 1000)
+                if "error" in analysis:
+                    break
+            results[backend] = analysis
+            stats = totals.setdefault(backend, {"latency_ms": []})
+            if "error" in analysis:
+                print(f"{name} {backend}: failed: {analysis['error']}")
+                continue
+            stats["latency_ms"].append(sorted(latencies)[len(latencies) // 2])
+            if save_dir:
+                os.makedirs(save_dir, exist_ok=True)
+                with open(os.path.join(save_dir, f"{name}.{backend}.json"), "w", encoding="utf-8") as out:
+                    json.dump(analysis, out, indent=2)
+
+        if reference_dir:
+            saved = os.path.join(reference_dir, f"{name}.{reference}.json")
+            with open(saved if os.path.exists(saved) else os.path.join(reference_dir, f"{name}.json"), encoding="utf-8") as f:
+                reference_analysis = json.load(f)
+        else:
+            reference_analysis = results.get(reference, {"error": "missing"})
+        for backend in backends:
+            analysis = results[backend]
+            if "error" in analysis:
+                continue
+            line = f"{name} {backend}: {totals[backend]['latency_ms'][-1]:8.1f} ms"
+            if "error" not in reference_analysis and (reference_dir or backend != reference):
+                scores = compare_analyses(analysis, reference_analysis)
+                for key, value in scores.items():
+                    if value is not None:
+                        totals[backend].setdefault(key, []).append(value)
+                line += "  " + "  ".join(f"{k}={_format_score(v)}" for k, v in scores.items())
+            print(line)
+
+    print(f"Mean over {len(paths)} transcripts (reference: {reference_dir or reference}):")
+    for backend in backends:
+        stats = {key: values for key, values in totals.get(backend, {}).items() if values}
+        print(f"  {backend}: " + ("  ".join(f"{key}={sum(values) / len(values):.2f}" for key, values in stats.items())
+                                  or "no successful runs"))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(
+        description="Benchmark analysis backends on plain-text transcripts: median latency, and agreement with a "
+                    "reference backend (or saved reference analyses, <transcript>.<reference>.json or <transcript>.json)."
+    )
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--backends", default=f"extractive,{ANALYZER_SMALL_MODEL}",
+                        help="Comma-separated backends to compare.")
+    parser.add_argument("--reference", default=GEMINI_MODEL_NAME, help="Backend whose output is the reference.")
+    parser.add_argument("--reference-dir", help="Directory of saved reference analyses; skips calling --reference.")
+    parser.add_argument("--save-dir", help="Save every backend's analysis here as <transcript>.<backend>.json.")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per backend and transcript; the median is reported.")
+    args = parser.parse_args()
+    asyncio.run(_benchmark_main(args.paths, args.backends.split(","), args.reference, args.reference_dir,
+                                args.save_dir, args.runs))
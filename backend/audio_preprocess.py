@@ -0,0 +1,291 @@
+import argparse
+import asyncio
+import bisect
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from media_upload import MAX_MEDIA_SECONDS, UploadRejected
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Optional stage in front of transcription: decode the audio track with ffmpeg,
+# downmix to 16 kHz mono, cut long silences with an energy-based VAD and
+# re-encode compactly. A TimeMap records which stretches of the original were
+# kept so transcript timestamps can be mapped back afterwards.
+AUDIO_PREPROCESS = os.getenv("AUDIO_PREPROCESS", "false").lower() == "true"
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+PREPROCESS_CODEC = os.getenv("PREPROCESS_CODEC", "opus")  # opus or flac
+PREPROCESS_OPUS_BITRATE = os.getenv("PREPROCESS_OPUS_BITRATE", "24k")
+
+SAMPLE_RATE = 16000
+VAD_FRAME_MS = 30
+# Frames this far above the noise floor count as speech.
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "10"))
+# Frames quieter than this are always silence.
+VAD_SILENCE_FLOOR_DBFS = -60.0
+# Only silences at least this long are cut; shorter pauses are kept as they are.
+VAD_MIN_SILENCE_MS = int(os.getenv("VAD_MIN_SILENCE_MS", "1000"))
+# Audio kept on each side of speech so word edges are not clipped.
+VAD_PADDING_MS = 200
+
+PCM_CHUNK_SIZE = 1024 * 1024
+
+ENCODER_ARGS = {
+    "opus": ["-c:a", "libopus", "-b:a", PREPROCESS_OPUS_BITRATE, "-application", "voip", "-f", "ogg"],
+    "flac": ["-c:a", "flac", "-f", "flac"],
+}
+
+
+class PreprocessError(RuntimeError):
+    pass
+
+
+class TimeMap:
+    """
+    Maps times in the processed audio back to the original recording. Each
+    segment is [processed_start_ms, original_start_ms, duration_ms], in order.
+    """
+
+    def __init__(self, segments: List[List[int]]):
+        self.segments = segments
+        self._starts = [s[0] for s in segments]
+
+    def to_original(self, ms: float, is_end: bool = False) -> float:
+        if not self.segments:
+            return ms
+        # An end time on a segment boundary belongs to the segment before it.
+        find = bisect.bisect_left if is_end else bisect.bisect_right
+        index = max(find(self._starts, ms) - 1, 0)
+        processed_start, original_start, duration = self.segments[index]
+        return original_start + min(max(ms - processed_start, 0), duration)
+
+
+async def _run_ffmpeg(args: List[str], chunks: AsyncIterator[bytes]) -> bytes:
+    """
+    Pipes `chunks` through ffmpeg and returns its stdout.
+    """
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", *args,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+    except FileNotFoundError:
+        raise PreprocessError(f"{FFMPEG_BINARY} is not installed; it is required when AUDIO_PREPROCESS is enabled.")
+
+    async def feed():
+        try:
+            async for chunk in chunks:
+                proc.stdin.write(chunk)
+                await proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # ffmpeg gave up on the input; its exit status says why.
+        finally:
+            proc.stdin.close()
+
+    try:
+        _, output, errors = await asyncio.gather(feed(), proc.stdout.read(), proc.stderr.read())
+    except BaseException:
+        proc.kill()
+        await proc.wait()
+        raise
+    await proc.wait()
+    if proc.returncode:
+        raise PreprocessError(errors.decode("utf-8", "replace").strip() or f"ffmpeg exited with {proc.returncode}")
+    return output
+
+
+async def _iter_buffer(buffer, chunk_size: int = PCM_CHUNK_SIZE):
+    view = memoryview(buffer)
+    for offset in range(0, len(view), chunk_size):
+        yield view[offset:offset + chunk_size]
+
+
+async def decode_to_pcm(chunks: AsyncIterator[bytes], max_seconds: Optional[float] = None) -> np.ndarray:
+    """
+    Decodes any audio/video container ffmpeg can read from a pipe to 16 kHz
+    mono int16 samples. MP4s must have their index up front (faststart).
+    With `max_seconds`, decoding stops a second past it, so an over-long
+    recording is never decoded in full.
+    """
+    limit = ["-t", f"{max_seconds + 1:.3f}"] if max_seconds else []
+    pcm = await _run_ffmpeg(
+        ["-i", "pipe:0", "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), *limit, "-f", "s16le", "pipe:1"],
+        chunks
+    )
+    return np.frombuffer(pcm, dtype=np.int16)
+
+
+async def encode_pcm(samples: np.ndarray, codec: str = PREPROCESS_CODEC) -> bytes:
+    if codec not in ENCODER_ARGS:
+        raise PreprocessError(f"Unsupported PREPROCESS_CODEC: {codec}")
+    return await _run_ffmpeg(
+        ["-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1", "-i", "pipe:0", *ENCODER_ARGS[codec], "pipe:1"],
+        _iter_buffer(samples.tobytes())
+    )
+
+
+def detect_speech(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> List[Tuple[int, int]]:
+    """
+    Returns (start, end) sample ranges to keep. Frame energies are compared
+    with the recording's own noise floor; silences shorter than
+    VAD_MIN_SILENCE_MS are kept and speech is padded by VAD_PADDING_MS.
+    """
+    frame = sample_rate * VAD_FRAME_MS // 1000
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return [(0, len(samples))] if len(samples) else []
+
+    frames = samples[:n_frames * frame].reshape(n_frames, frame).astype(np.float32) / 32768.0
+    energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    noise_floor, loud = np.percentile(energy_db, [10, 95])
+    if loud - noise_floor < VAD_THRESHOLD_DB:
+        # No clear silence to separate from speech; keep everything above the floor.
+        voiced = energy_db > VAD_SILENCE_FLOOR_DBFS
+    else:
+        voiced = energy_db > max(noise_floor + VAD_THRESHOLD_DB, VAD_SILENCE_FLOOR_DBFS)
+
+    pad = VAD_PADDING_MS // VAD_FRAME_MS
+    if pad:
+        voiced = np.convolve(voiced, np.ones(2 * pad + 1), mode="same") > 0
+
+    edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    if not len(starts):
+        return []
+
+    # Merge runs separated by pauses too short to be worth cutting.
+    keep = np.concatenate(([True], starts[1:] - ends[:-1] >= VAD_MIN_SILENCE_MS // VAD_FRAME_MS))
+    group_starts = np.flatnonzero(keep)
+    starts = starts[group_starts]
+    ends = np.concatenate((ends[group_starts[1:] - 1], ends[-1:]))
+
+    ranges = [(int(s) * frame, int(e) * frame) for s, e in zip(starts, ends)]
+    if ranges[-1][1] == n_frames * frame:
+        ranges[-1] = (ranges[-1][0], len(samples))
+    return ranges
+
+
+def build_time_map(ranges: List[Tuple[int, int]], sample_rate: int = SAMPLE_RATE) -> TimeMap:
+    segments, processed = [], 0
+    for start, end in ranges:
+        segments.append([processed * 1000 // sample_rate, start * 1000 // sample_rate, (end - start) * 1000 // sample_rate])
+        processed += end - start
+    return TimeMap(segments)
+
+
+def remap_timestamps(transcript: Any, time_map: Optional[TimeMap]) -> Any:
+    """
+    Rewrites every {"start", "end"} millisecond pair in an AssemblyAI
+    transcript (words, utterances, sentiment results, entities, ...) in place
+    to original-recording time.
+    """
+    if time_map is None:
+        return transcript
+    if isinstance(transcript, dict):
+        if isinstance(transcript.get("start"), (int, float)) and isinstance(transcript.get("end"), (int, float)):
+            transcript["start"] = int(time_map.to_original(transcript["start"]))
+            transcript["end"] = int(time_map.to_original(transcript["end"], is_end=True))
+        for value in transcript.values():
+            if isinstance(value, (dict, list)):
+                remap_timestamps(value, time_map)
+    elif isinstance(transcript, list):
+        for item in transcript:
+            remap_timestamps(item, time_map)
+    return transcript
+
+
+async def decode_and_trim(chunks: AsyncIterator[bytes], trim: bool = True,
+                          max_seconds: Optional[float] = MAX_MEDIA_SECONDS) -> Dict[str, Any]:
+    """
+    Decodes media to 16 kHz mono samples and, if `trim`, cuts long silences.
+    Returns the kept samples, their TimeMap (None when untrimmed) and the
+    input size and original duration. Media longer than `max_seconds`, in
+    any container, raises UploadRejected.
+    """
+    input_bytes = 0
+
+    async def counted():
+        nonlocal input_bytes
+        async for chunk in chunks:
+            input_bytes += len(chunk)
+            yield chunk
+
+    samples = await decode_to_pcm(counted(), max_seconds)
+    if not len(samples):
+        raise PreprocessError("No audio track could be decoded from the upload.")
+
+    original_seconds = len(samples) / SAMPLE_RATE
+    if max_seconds and original_seconds > max_seconds:
+        raise UploadRejected(f"Media is over {max_seconds:.0f} seconds long; the limit is {max_seconds:.0f} seconds.")
+    time_map = None
+    if trim:
+        ranges = detect_speech(samples) or [(0, len(samples))]
+        time_map = build_time_map(ranges)
+        if len(ranges) > 1 or ranges[0] != (0, len(samples)):
+            samples = np.concatenate([samples[s:e] for s, e in ranges])
+    return {
+        "samples": samples,
+        "time_map": time_map,
+        "input_bytes": input_bytes,
+        "original_seconds": original_seconds,
+    }
+
+
+async def preprocess_audio(chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+    """
+    Decodes, trims and re-encodes media. Returns the encoded audio, its
+    TimeMap and size/duration stats for logging.
+    """
+    started = time.perf_counter()
+    decoded = await decode_and_trim(chunks)
+    audio = await encode_pcm(decoded["samples"])
+
+    elapsed = time.perf_counter() - started
+    original_seconds = decoded["original_seconds"]
+    stats = {
+        "input_bytes": decoded["input_bytes"],
+        "output_bytes": len(audio),
+        "original_seconds": round(original_seconds, 1),
+        "processed_seconds": round(len(decoded["samples"]) / SAMPLE_RATE, 1),
+        "processing_seconds": round(elapsed, 3),
+        "seconds_per_audio_minute": round(elapsed / (original_seconds / 60), 3) if original_seconds else 0.0,
+    }
+    logger.info(f"Preprocessed audio: {stats['input_bytes']} -> {stats['output_bytes']} bytes, "
+                f"{stats['original_seconds']}s -> {stats['processed_seconds']}s "
+                f"in {stats['processing_seconds']}s ({stats['seconds_per_audio_minute']}s per audio minute)")
+    return {"audio": audio, "time_map": decoded["time_map"], "stats": stats}
+
+
+async def _iter_path(path: str):
+    with open(path, "rb") as f:
+        while chunk := f.read(PCM_CHUNK_SIZE):
+            yield chunk
+
+
+async def _report_main(paths: List[str]):
+    totals = {"input_bytes": 0, "output_bytes": 0, "original_seconds": 0.0, "processing_seconds": 0.0}
+    for path in paths:
+        stats = (await preprocess_audio(_iter_path(path)))["stats"]
+        for key in totals:
+            totals[key] += stats[key]
+    if totals["original_seconds"]:
+        saved = 1 - totals["output_bytes"] / totals["input_bytes"]
+        per_minute = totals["processing_seconds"] / (totals["original_seconds"] / 60)
+        print(f"Total: {totals['input_bytes']} -> {totals['output_bytes']} bytes ({saved:.1%} saved), "
+              f"{per_minute:.3f}s of processing per audio minute")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the preprocessing stage on local media files and report bytes saved and processing cost per audio minute."
+    )
+    parser.add_argument("paths", nargs="+", help="Audio or video files.")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(_report_main(parser.parse_args().paths))
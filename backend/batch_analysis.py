@@ -0,0 +1,367 @@
+import argparse
+import asyncio
+import logging
+import os
+import time
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import aiofiles
+from dotenv import load_dotenv
+from pymongo import ReplaceOne, UpdateOne
+
+from analyzers import PRIORITIES
+from model_usage import track_usage
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Bulk analysis of many transcripts: a directory such as transcripts/, or
+# files and zips uploaded to POST /analyze/batch. A batch records the state
+# of every file in Mongo, so an interrupted run resumes with only the files
+# that have not been stored yet.
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_WRITE_SIZE = int(os.getenv("BATCH_WRITE_SIZE", "50"))
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "10000"))
+BATCH_MAX_EXTRACTED_BYTES = int(os.getenv("BATCH_MAX_EXTRACTED_BYTES", str(512 * 1024 * 1024)))
+
+TRANSCRIPT_EXTENSIONS = (".txt",)
+
+# analyze(transcript, priority) -> analysis dict, {"error": ...} on failure.
+AnalyzeFn = Callable[[str, str], Awaitable[Dict[str, Any]]]
+# build_meeting(meeting_id, transcript, analysis, model_usage) -> meeting document.
+BuildFn = Callable[[str, str, Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+# on_stored(meeting_doc, transcript), called once the meeting is written.
+StoredFn = Callable[[Dict[str, Any], str], None]
+
+
+class BatchInputError(ValueError):
+    pass
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def list_transcripts(directory: str) -> List[str]:
+    """
+    Transcript files under `directory`, recursively, as sorted relative paths.
+    """
+    names = []
+    for root, _, files in os.walk(directory):
+        for file_name in files:
+            if file_name.lower().endswith(TRANSCRIPT_EXTENSIONS):
+                names.append(os.path.relpath(os.path.join(root, file_name), directory))
+    if len(names) > BATCH_MAX_FILES:
+        raise BatchInputError(f"{directory} holds {len(names)} transcripts; the limit is {BATCH_MAX_FILES}.")
+    return sorted(names)
+
+
+def extract_zip(zip_path: str, dest_dir: str) -> List[str]:
+    """
+    Extracts the transcript files of a zip into `dest_dir` and returns their
+    paths relative to it. Members with absolute or parent-relative paths are
+    rejected, and the declared sizes are capped before anything is written.
+    """
+    try:
+        archive = zipfile.ZipFile(zip_path)
+    except zipfile.BadZipFile as e:
+        raise BatchInputError(f"Not a valid zip file: {e}")
+
+    with archive:
+        members = [m for m in archive.infolist() if not m.is_dir() and m.filename.lower().endswith(TRANSCRIPT_EXTENSIONS)]
+        if len(members) > BATCH_MAX_FILES:
+            raise BatchInputError(f"The zip holds {len(members)} transcripts; the limit is {BATCH_MAX_FILES}.")
+        if sum(m.file_size for m in members) > BATCH_MAX_EXTRACTED_BYTES:
+            raise BatchInputError(f"The zip expands to more than {BATCH_MAX_EXTRACTED_BYTES} bytes.")
+
+        names = []
+        for member in members:
+            name = os.path.normpath(member.filename)
+            if os.path.isabs(name) or name.startswith(".."):
+                raise BatchInputError(f"Unsafe path in zip: {member.filename}")
+            path = os.path.join(dest_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with archive.open(member) as source, open(path, "wb") as target:
+                while chunk := source.read(1024 * 1024):
+                    target.write(chunk)
+            names.append(name)
+    return names
+
+
+def batch_meeting_id(batch_id: str, name: str) -> str:
+    """
+    Stable per file, so re-running a file after an interruption overwrites
+    its meeting instead of adding a second one.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"batch:{batch_id}:{name}"))
+
+
+class BatchAnalyzer:
+    """
+    Runs batches of transcripts through `analyze` with at most `concurrency`
+    files in flight, writing meetings, transcripts and per-file state back
+    with one bulk upsert per collection every `write_size` files.
+    """
+
+    def __init__(self, batches_collection, items_collection, meetings_collection, transcripts_collection,
+                 analyze: AnalyzeFn, build_meeting: BuildFn, on_stored: Optional[StoredFn] = None,
+                 concurrency: int = BATCH_CONCURRENCY, write_size: int = BATCH_WRITE_SIZE):
+        self.batches = batches_collection
+        self.items = items_collection
+        self.meetings = meetings_collection
+        self.transcripts = transcripts_collection
+        self.analyze = analyze
+        self.build_meeting = build_meeting
+        self.on_stored = on_stored
+        self.concurrency = concurrency
+        self.write_size = write_size
+
+    async def ensure_indexes(self):
+        await self.batches.create_index("batch_id", unique=True)
+        await self.items.create_index([("batch_id", 1), ("name", 1)], unique=True)
+        await self.items.create_index([("batch_id", 1), ("status", 1)])
+
+    # --- Batches ---
+
+    async def create(self, source_dir: str, names: List[str], priority: str = "normal",
+                     batch_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Records a batch over `names` (paths relative to `source_dir`). Passing
+        an existing batch_id adds any new files to it and keeps the state of
+        those already known.
+        """
+        batch_id = batch_id or str(uuid.uuid4())
+        now = _now()
+        await self.batches.update_one(
+            {"batch_id": batch_id},
+            {
+                "$setOnInsert": {"batch_id": batch_id, "source_dir": os.path.abspath(source_dir),
+                                 "priority": priority, "created_at": now, "report": None},
+                "$set": {"status": "queued", "updated_at": now},
+            },
+            upsert=True
+        )
+        for start in range(0, len(names), self.write_size):
+            await self.items.bulk_write([
+                UpdateOne(
+                    {"batch_id": batch_id, "name": name},
+                    {"$setOnInsert": {"batch_id": batch_id, "name": name, "status": "pending",
+                                      "meeting_id": batch_meeting_id(batch_id, name), "error": None}},
+                    upsert=True
+                )
+                for name in names[start:start + self.write_size]
+            ], ordered=False)
+        return await self.get(batch_id)
+
+    async def get(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        batch = await self.batches.find_one({"batch_id": batch_id}, {"_id": 0})
+        if batch is None:
+            return None
+        counts = self.items.aggregate([{"$match": {"batch_id": batch_id}}, {"$group": {"_id": "$status", "n": {"$sum": 1}}}])
+        batch["files"] = {doc["_id"]: doc["n"] async for doc in counts}
+        return batch
+
+    # --- Running ---
+
+    async def run(self, batch_id: str) -> Dict[str, Any]:
+        """
+        Analyzes every file of the batch that is not stored yet, including
+        files that failed on an earlier run, and returns the run's report.
+        A run that is cancelled stays "running" until it is resumed.
+        """
+        batch = await self.batches.find_one({"batch_id": batch_id})
+        if batch is None:
+            raise BatchInputError(f"Batch {batch_id} not found.")
+        try:
+            return await self._run(batch)
+        except Exception as e:
+            await self.batches.update_one(
+                {"batch_id": batch_id},
+                {"$set": {"status": "failed", "error": str(e) or type(e).__name__, "updated_at": _now()}}
+            )
+            raise
+
+    async def _run(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        batch_id = batch["batch_id"]
+
+        todo = [doc async for doc in self.items.find({"batch_id": batch_id, "status": {"$ne": "done"}}, {"name": 1, "meeting_id": 1})]
+        report = {
+            "batch_id": batch_id,
+            "files": len(todo),
+            "analyzed": 0,
+            "failed": 0,
+            "skipped": await self.items.count_documents({"batch_id": batch_id, "status": "done"}),
+            "analyzers": {},
+            "failures": [],
+        }
+        await self.batches.update_one({"batch_id": batch_id}, {"$set": {"status": "running", "error": None, "updated_at": _now()}})
+        logger.info(f"Batch {batch_id}: {len(todo)} files to analyze, {report['skipped']} already done.")
+
+        started = time.perf_counter()
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in todo:
+            queue.put_nowait(item)
+        pending: List[Dict[str, Any]] = []
+        write_lock = asyncio.Lock()
+
+        async def flush():
+            async with write_lock:
+                if not pending:
+                    return
+                results = pending[:]
+                pending.clear()
+                await self._write(batch_id, results)
+                for result in results:
+                    if "error" in result:
+                        report["failed"] += 1
+                        report["failures"].append({"file": result["name"], "error": result["error"]})
+                    else:
+                        report["analyzed"] += 1
+                        analyzer = result["meeting"].get("analyzer") or "unknown"
+                        report["analyzers"][analyzer] = report["analyzers"].get(analyzer, 0) + 1
+                        if self.on_stored:
+                            self.on_stored(result["meeting"], result["transcript"])
+                done = report["analyzed"] + report["failed"]
+                elapsed = time.perf_counter() - started
+                logger.info(f"Batch {batch_id}: {done}/{report['files']} files, {report['failed']} failed, "
+                            f"{done / elapsed:.2f} files/s")
+
+        async def worker():
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                pending.append(await self._process(batch, item))
+                if len(pending) >= self.write_size:
+                    await flush()
+
+        await asyncio.gather(*(worker() for _ in range(max(1, min(self.concurrency, len(todo))))))
+        await flush()
+
+        elapsed = time.perf_counter() - started
+        report["seconds"] = round(elapsed, 3)
+        report["files_per_second"] = round((report["analyzed"] + report["failed"]) / elapsed, 2) if elapsed else 0.0
+        await self.batches.update_one(
+            {"batch_id": batch_id},
+            {"$set": {"status": "completed", "report": report, "updated_at": _now()}}
+        )
+        return report
+
+    async def _process(self, batch: Dict[str, Any], item: Dict[str, Any]) -> Dict[str, Any]:
+        name = item["name"]
+        try:
+            async with aiofiles.open(os.path.join(batch["source_dir"], name), "rb") as f:
+                transcript = (await f.read()).decode("utf-8")
+        except UnicodeDecodeError:
+            return {"name": name, "error": "Not a valid UTF-8 text file."}
+        except OSError as e:
+            return {"name": name, "error": f"Could not read file: {e}"}
+
+        if not transcript.strip():
+            return {"name": name, "error": "Transcript is empty."}
+
+        try:
+            with track_usage() as usage:
+                analysis = await self.analyze(transcript, batch.get("priority", "normal"))
+            if "error" in analysis:
+                return {"name": name, "error": analysis["error"]}
+            meeting = self.build_meeting(item["meeting_id"], transcript, analysis, usage.summary())
+        except Exception as e:
+            logger.exception(f"Batch {batch['batch_id']}: analysis of {name} failed: {e}")
+            return {"name": name, "error": str(e) or type(e).__name__}
+        return {"name": name, "meeting": meeting, "transcript": transcript}
+
+    async def _write(self, batch_id: str, results: List[Dict[str, Any]]):
+        """
+        Meetings and transcripts go first, then the file states: a run killed
+        in between re-analyzes those files and upserts the same meeting ids.
+        """
+        stored = [r for r in results if "meeting" in r]
+        if stored:
+            await self.meetings.bulk_write([
+                ReplaceOne({"meeting_id": r["meeting"]["meeting_id"]}, r["meeting"], upsert=True) for r in stored
+            ], ordered=False)
+            await self.transcripts.bulk_write([
+                ReplaceOne({"meeting_id": r["meeting"]["meeting_id"]},
+                           {"meeting_id": r["meeting"]["meeting_id"], "text": r["transcript"]}, upsert=True)
+                for r in stored
+            ], ordered=False)
+        now = _now()
+        await self.items.bulk_write([
+            UpdateOne(
+                {"batch_id": batch_id, "name": r["name"]},
+                {"$set": {"status": "failed", "error": r["error"], "updated_at": now} if "error" in r
+                 else {"status": "done", "error": None, "updated_at": now}}
+            )
+            for r in results
+        ], ordered=False)
+
+
+# --- CLI ---
+
+async def _batch_main(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    import main as api
+    from result_cache import MongoCache, CACHE_MONGO_ENABLED
+
+    mongo_db_url = os.getenv("MONGO_DB_URL")
+    db_name = os.getenv("DB_NAME")
+    if not mongo_db_url or not db_name:
+        raise ValueError("MONGO_DB_URL and DB_NAME must be set in environment variables.")
+
+    client = AsyncIOMotorClient(mongo_db_url)
+    try:
+        database = client[db_name]
+        if CACHE_MONGO_ENABLED:
+            api.result_cache.mongo = MongoCache(database["result_cache"])
+
+        runner = BatchAnalyzer(
+            database["analysis_batches"], database["analysis_batch_items"],
+            database["meetings"], database["meeting_transcripts"],
+            analyze=lambda transcript, priority: api.analyze_with_cache(transcript, priority=priority),
+            build_meeting=api.build_batch_meeting,
+            concurrency=args.concurrency,
+        )
+        await runner.ensure_indexes()
+
+        if args.resume:
+            batch = await runner.get(args.resume)
+            if batch is None:
+                raise BatchInputError(f"Batch {args.resume} not found.")
+            source_dir = args.directory or batch["source_dir"]
+            await runner.create(source_dir, list_transcripts(source_dir), batch["priority"], batch_id=args.resume)
+            batch_id = args.resume
+        else:
+            if not args.directory:
+                raise BatchInputError("Pass a directory of transcripts, or --resume with a batch id.")
+            batch_id = (await runner.create(args.directory, list_transcripts(args.directory), args.priority))["batch_id"]
+            logger.info(f"Started batch {batch_id}; resume it with --resume {batch_id} if interrupted.")
+
+        report = await runner.run(batch_id)
+        logger.info(f"Batch finished: {report['analyzed']} analyzed, {report['failed']} failed, "
+                    f"{report['skipped']} skipped in {report['seconds']}s ({report['files_per_second']} files/s)")
+        for failure in report["failures"]:
+            logger.info(f"  failed: {failure['file']}: {failure['error']}")
+        logger.info("New meetings are not in the RAG index yet; run python rag_ingest.py or POST /rag/backfill.")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Analyze every .txt transcript under a directory and store the meetings in Mongo. "
+                    "Files already stored by an interrupted run are skipped with --resume."
+    )
+    parser.add_argument("directory", nargs="?", help="Directory of transcripts, e.g. ../transcripts.")
+    parser.add_argument("--priority", default="normal", choices=PRIORITIES, help="Analysis priority for routing.")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="Files analyzed at once.")
+    parser.add_argument("--resume", metavar="BATCH_ID", help="Continue an interrupted batch; new files in its directory are added.")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(_batch_main(parser.parse_args()))
@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import logging
+import socket
+import time
+
+import aiosmtplib
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+import email_integration
+from email_integration import SMTPConnectionPool, build_email_message
+
+# Email throughput against a local aiosmtpd stand-in: the pooled sender the
+# outbox uses against connecting and logging in for every message. Each SMTP
+# reply is delayed by --latency-ms to stand in for the network round trip.
+
+
+class SlowSMTPHandler:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.logins = 0
+        self.delivered = 0
+
+    def authenticate(self, server, session, envelope, mechanism, auth_data):
+        self.logins += 1
+        return AuthResult(success=True)
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        await asyncio.sleep(self.latency)
+        session.host_name = hostname
+        return responses
+
+    async def handle_MAIL(self, server, session, envelope, address, mail_options):
+        await asyncio.sleep(self.latency)
+        envelope.mail_from = address
+        return "250 OK"
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        await asyncio.sleep(self.latency)
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.latency)
+        self.delivered += 1
+        return "250 Message accepted"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _send_pooled(pool: SMTPConnectionPool, message):
+    async with pool.connection() as smtp:
+        await smtp.send_message(message)
+
+
+async def _send_connecting(message):
+    smtp = aiosmtplib.SMTP(hostname=email_integration.SMTP_HOST, port=email_integration.SMTP_PORT, use_tls=False)
+    await smtp.connect()
+    await smtp.login(email_integration.EMAIL_ADDRESS, email_integration.EMAIL_PASSWORD)
+    await smtp.send_message(message)
+    await smtp.quit()
+
+
+async def _run(mode: str, args, handler: SlowSMTPHandler) -> dict:
+    pool = SMTPConnectionPool(size=args.concurrency)
+    slots = asyncio.Semaphore(args.concurrency)
+    logins, delivered = handler.logins, handler.delivered
+
+    async def send(i):
+        async with slots:
+            message = build_email_message(f"user{i}@example.com", f"Minutes {i}", "Summary of the meeting.")
+            await (_send_pooled(pool, message) if mode == "pooled" else _send_connecting(message))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(i) for i in range(args.messages)))
+    elapsed = time.perf_counter() - started
+    await pool.close()
+    return {"mode": mode, "seconds": elapsed, "logins": handler.logins - logins,
+            "delivered": handler.delivered - delivered}
+
+
+async def main(args):
+    handler = SlowSMTPHandler(args.latency_ms / 1000)
+    port = _free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port,
+                            authenticator=handler.authenticate, auth_require_tls=False)
+    controller.start()
+    email_integration.SMTP_HOST, email_integration.SMTP_PORT = "127.0.0.1", port
+    email_integration.SMTP_USE_TLS = False
+    email_integration.EMAIL_ADDRESS, email_integration.EMAIL_PASSWORD = "bot@example.com", "secret"
+    try:
+        print(f"{args.messages} messages, {args.concurrency} at a time, {args.latency_ms:g} ms per SMTP reply")
+        for mode in ("pooled", "connect-per-message"):
+            r = await _run(mode, args, handler)
+            print(f"  {r['mode']:<20} {r['seconds']:6.2f}s  {r['delivered'] / r['seconds']:7.1f} msg/s  "
+                  f"{r['logins']} logins")
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Email throughput: pooled SMTP connections vs connect-per-message.")
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=email_integration.SMTP_POOL_SIZE,
+                        help="Messages in flight; also the pool size.")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Delay added to each SMTP reply.")
+    # aiosmtpd warns about its own deprecated Session.login_data on every login.
+    logging.getLogger("mail.log").setLevel(logging.ERROR)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,123 @@
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import time
+from datetime import datetime, timedelta, timezone
+
+import main as api
+from main import EXPORT_BATCH_SIZE
+
+# Memory use of a large GET /meetings/export: the endpoint streams from the
+# Mongo cursor, so RSS should stay flat however many meetings go out.
+
+
+class SyntheticExportCursor:
+    """
+    Stands in for the Motor cursor: yields `count` generated meetings without
+    ever holding more than one, so the measured memory is the endpoint's own.
+    """
+
+    def __init__(self, count: int):
+        self.count = count
+        self.yielded = 0
+
+    def sort(self, *args):
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    async def close(self):
+        pass
+
+    async def __aiter__(self):
+        started = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        for i in range(self.count):
+            if i % EXPORT_BATCH_SIZE == 0:
+                await asyncio.sleep(0)  # a round trip to Mongo per batch
+            self.yielded += 1
+            yield {
+                "meeting_id": f"bench-{i:08d}",
+                "timestamp": started + timedelta(minutes=i),
+                "summary": f"Meeting {i}: the team reviewed the roadmap, agreed the budget and planned the release.",
+                "action_items": [{"task": f"Follow up on item {i}", "assignee": "Priya", "deadline": "Friday", "status": "new"}],
+                "key_decisions": [{"description": "Ship the update", "participants_involved": ["Sarah", "Tom"], "date_made": "2025-01-01"}],
+                "speakers_detected": ["Sarah", "Tom", "Priya"],
+                "tone_overview": "constructive",
+                "important_topics": ["roadmap", "budget"],
+            }
+
+
+async def main(args):
+    """
+    Streams GET /meetings/export over --documents synthetic meetings through
+    the ASGI app and samples RSS as the body goes out. The ASGI app is driven
+    directly: httpx's ASGITransport would buffer the whole response.
+    """
+    cursor = SyntheticExportCursor(args.documents)
+
+    class Meetings:
+        def find(self, query, projection=None):
+            return cursor
+
+    api.meetings_collection = Meetings()
+
+    def rss_mb():
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+    sent = {"bytes": 0, "status": None}
+    samples = []
+    query = b"gzip=true" if args.gzip else b""
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": "/meetings/export", "raw_path": b"/meetings/export", "root_path": "", "query_string": query,
+             "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 0), "server": ("bench", 80)}
+
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        # One empty request body, then nothing until the client disconnects.
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            sent["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            sent["bytes"] += len(message.get("body", b""))
+            if len(samples) < cursor.yielded * args.samples // args.documents:
+                samples.append((cursor.yielded, rss_mb()))
+
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    try:
+        await api.app(scope, receive, send)
+    finally:
+        finished.set()
+    elapsed = time.perf_counter() - started
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+    if sent["status"] != 200:
+        raise SystemExit(f"GET /meetings/export answered {sent['status']}")
+    print(f"{args.documents:,} meetings, {sent['bytes'] / 2 ** 20:,.0f} MB {'gzip' if args.gzip else 'NDJSON'} "
+          f"in {elapsed:.1f}s ({args.documents / elapsed:,.0f} meetings/s)")
+    print(f"  RSS before {rss_before:.1f} MB, peak growth {max(0.0, peak_rss - rss_before):.1f} MB")
+    for exported, rss in samples:
+        print(f"  after {exported:>10,} meetings: RSS {rss:7.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory benchmark of GET /meetings/export against a synthetic cursor.")
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--gzip", action="store_true", help="Export with gzip=true.")
+    parser.add_argument("--samples", type=int, default=8, help="RSS samples taken over the export.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    asyncio.run(main(args))
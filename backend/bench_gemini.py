@@ -0,0 +1,344 @@
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import time
+from typing import Dict, List
+
+import geminiUtils
+from geminiUtils import estimate_tokens
+from model_usage import GEMINI_BUDGET_MODEL
+
+# A stand-in for the Gemini model, used by the tests (see tests/conftest.py)
+# and by the benchmarks below, which run the analysis path without an API key.
+
+
+STUB_CHUNK_TOKENS = 20  # tokens per chunk when the stub streams
+
+
+class _StubUsage:
+    def __init__(self, prompt_tokens: int, output_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+        self.thoughts_token_count = 0
+
+
+class _StubResponse:
+    def __init__(self, text: str, prompt_tokens: int, output_tokens: int):
+        self.text = text
+        self.usage_metadata = _StubUsage(prompt_tokens, output_tokens)
+
+
+class StubModel:
+    """
+    Stands in for genai.GenerativeModel in benchmarks and tests. It answers
+    with a small valid analysis after a delay modelled on Gemini's: a fixed
+    time to first token, prompt processing, then output tokens at a steady
+    rate. Output grows with the prompt up to `max_output_tokens`.
+
+    `blocking=True` sleeps on the calling thread even in the async method,
+    reproducing an SDK call made straight from the event loop.
+    """
+
+    def __init__(self, first_token_seconds: float = 0.8, prompt_tokens_per_second: float = 20000,
+                 output_tokens_per_second: float = 150, max_output_tokens: int = 1500, blocking: bool = False):
+        self.first_token_seconds = first_token_seconds
+        self.prompt_tokens_per_second = prompt_tokens_per_second
+        self.output_tokens_per_second = output_tokens_per_second
+        self.max_output_tokens = max_output_tokens
+        self.blocking = blocking
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _shape(self, prompt: str):
+        prompt_tokens = estimate_tokens(prompt)
+        output_tokens = min(self.max_output_tokens, 200 + prompt_tokens // 20)
+        seconds = (self.first_token_seconds + prompt_tokens / self.prompt_tokens_per_second
+                   + output_tokens / self.output_tokens_per_second)
+        return seconds, prompt_tokens, output_tokens
+
+    def _response(self, prompt_tokens: int, output_tokens: int) -> _StubResponse:
+        analysis = {
+            "summary": f"Stub summary of a {prompt_tokens}-token prompt.",
+            "action_items": [{"task": "Send the stub report", "assignee": "A", "deadline": "Friday", "status": "new"}],
+            "key_decisions": [{"description": "Use the stub model", "participants_involved": ["A"], "date_made": "2025-01-01"}],
+            "speakers_detected": ["A"],
+            "tone_overview": "neutral",
+            "important_topics": ["benchmarking"],
+        }
+        return _StubResponse(json.dumps(analysis), prompt_tokens, output_tokens)
+
+    def _enter(self):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def generate_content(self, prompt: str, generation_config=None):
+        seconds, prompt_tokens, output_tokens = self._shape(prompt)
+        self._enter()
+        try:
+            time.sleep(seconds)
+        finally:
+            self.in_flight -= 1
+        return self._response(prompt_tokens, output_tokens)
+
+    async def generate_content_async(self, prompt: str, generation_config=None, stream: bool = False):
+        if stream:
+            return _StubStream(self, prompt)
+        if self.blocking:
+            return self.generate_content(prompt, generation_config)
+        seconds, prompt_tokens, output_tokens = self._shape(prompt)
+        self._enter()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.in_flight -= 1
+        return self._response(prompt_tokens, output_tokens)
+
+
+class _StubStream:
+    """
+    What generate_content_async(stream=True) returns: the stub's answer cut
+    into STUB_CHUNK_TOKENS-sized pieces. The first arrives after the time to
+    first token and prompt processing, the rest at the output token rate, so
+    the whole stream takes as long as the unstreamed call. Cuts fall anywhere,
+    including inside strings and escapes.
+    """
+
+    def __init__(self, stub: StubModel, prompt: str):
+        self.stub = stub
+        _, prompt_tokens, output_tokens = stub._shape(prompt)
+        self.usage_metadata = _StubUsage(prompt_tokens, output_tokens)
+
+    async def __aiter__(self):
+        stub = self.stub
+        usage = self.usage_metadata
+        text = stub._response(usage.prompt_token_count, usage.candidates_token_count).text
+        pieces = max(1, usage.candidates_token_count // STUB_CHUNK_TOKENS)
+        size = -(-len(text) // pieces)
+        stub._enter()
+        try:
+            await asyncio.sleep(stub.first_token_seconds + usage.prompt_token_count / stub.prompt_tokens_per_second)
+            for start in range(0, len(text), size):
+                if start:
+                    await asyncio.sleep(usage.candidates_token_count / stub.output_tokens_per_second / pieces)
+                yield _StubResponse(text[start:start + size], usage.prompt_token_count, usage.candidates_token_count)
+        finally:
+            stub.in_flight -= 1
+
+
+def use_stub_model(stub: StubModel, model_names: List[str] = None):
+    """
+    Routes every call for `model_names` (default: the default and budget
+    models) to `stub`.
+    """
+    for name in model_names or [geminiUtils.GEMINI_MODEL_NAME, GEMINI_BUDGET_MODEL]:
+        geminiUtils._models[name] = stub
+
+
+def synthetic_transcript(tokens: int, seed: int = 0) -> str:
+    speakers = ["Sarah", "Alex", "Priya", "Tom"]
+    lines, size, i = [], 0, 0
+    while size < tokens:
+        line = (f"{speakers[(i + seed) % len(speakers)]}: Item {i} of meeting {seed}: we should review the "
+                f"roadmap, confirm the budget and ship the update by Friday.")
+        lines.append(line)
+        size += estimate_tokens(line)
+        i += 1
+    return "\n".join(lines)
+
+
+async def _load_main(args):
+    """
+    Fires --requests POST /analyze/ requests, --concurrency at a time, at the
+    app in-process, with the stub answering for Gemini and storage skipped.
+    A cheap GET /cache/stats is polled throughout: its latency shows whether
+    the event loop stays free while analyses run.
+    """
+    import httpx
+    import main as api
+
+    stub = StubModel(first_token_seconds=args.latency, blocking=args.blocking)
+    use_stub_model(stub)
+
+    async def skip_store(meeting, transcript):
+        pass
+
+    api.store_meeting = skip_store
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies, probes = [], []
+        running = True
+
+        async def analyze(i):
+            async with semaphore:
+                started = time.perf_counter()
+                files = {"file": (f"t{i}.txt", synthetic_transcript(args.tokens, seed=i).encode(), "text/plain")}
+                response = await client.post("/analyze/?priority=high", files=files)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        async def probe():
+            while running:
+                started = time.perf_counter()
+                await client.get("/cache/stats")
+                probes.append(time.perf_counter() - started)
+                await asyncio.sleep(0.05)
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(analyze(i) for i in range(args.requests)))
+        wall = time.perf_counter() - started
+        running = False
+        await prober
+
+    per_call = stub._shape(geminiUtils.build_analysis_prompt(synthetic_transcript(args.tokens)))[0]
+    parallel = min(args.concurrency, geminiUtils.GEMINI_MAX_CONCURRENCY, args.requests)
+    latencies.sort()
+    probes.sort()
+    print(f"{args.requests} requests, concurrency {args.concurrency}, GEMINI_MAX_CONCURRENCY={geminiUtils.GEMINI_MAX_CONCURRENCY}, "
+          f"{'blocking' if args.blocking else 'async'} stub, {per_call:.2f}s per model call")
+    print(f"  wall clock {wall:.2f}s: {-(-args.requests // parallel) * per_call:.2f}s if {parallel} run in parallel, "
+          f"{args.requests * per_call:.2f}s if they run one after another")
+    print(f"  request latency p50 {latencies[len(latencies) // 2]:.2f}s, max {latencies[-1]:.2f}s; "
+          f"peak model calls in flight: {stub.max_in_flight}")
+    print(f"  GET /cache/stats during load: {len(probes)} answered (one per ~50 ms if the loop is free), "
+          f"p50 {probes[len(probes) // 2] * 1000:.1f} ms, max {probes[-1] * 1000:.1f} ms")
+
+
+def _svg_plot(path: str, series: Dict[str, List[tuple]], x_label: str, y_label: str):
+    # A dependency-free line chart; good enough to eyeball a trend.
+    width, height, pad = 640, 400, 60
+    points = [p for values in series.values() for p in values]
+    max_x = max(x for x, _ in points) or 1
+    max_y = max(y for _, y in points) or 1
+
+    def xy(x, y):
+        return pad + x / max_x * (width - 2 * pad), height - pad - y / max_y * (height - 2 * pad)
+
+    colors = ["#d62728", "#1f77b4", "#2ca02c", "#ff7f0e"]
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="sans-serif" font-size="12">',
+             f'<rect width="{width}" height="{height}" fill="white"/>',
+             f'<line x1="{pad}" y1="{height - pad}" x2="{width - pad}" y2="{height - pad}" stroke="black"/>',
+             f'<line x1="{pad}" y1="{pad}" x2="{pad}" y2="{height - pad}" stroke="black"/>',
+             f'<text x="{width / 2}" y="{height - 15}" text-anchor="middle">{x_label} (max {max_x:,})</text>',
+             f'<text x="15" y="{height / 2}" transform="rotate(-90 15 {height / 2})" text-anchor="middle">{y_label} (max {max_y:.1f})</text>']
+    for i, (name, values) in enumerate(series.items()):
+        color = colors[i % len(colors)]
+        coords = " ".join(f"{px:.1f},{py:.1f}" for px, py in (xy(x, y) for x, y in values))
+        parts.append(f'<polyline points="{coords}" fill="none" stroke="{color}" stroke-width="2"/>')
+        parts.append(f'<text x="{pad + 10}" y="{pad + 15 * i}" fill="{color}">{name}</text>')
+    parts.append("</svg>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(parts))
+
+
+async def _chunking_main(args):
+    """
+    Wall-clock time of single-shot vs chunked analysis against transcript
+    length, with the stub answering for Gemini. Writes a CSV and an SVG plot.
+    """
+    use_stub_model(StubModel(first_token_seconds=args.latency))
+    rows = []
+    for tokens in args.lengths:
+        transcript = synthetic_transcript(tokens)
+        row = {"tokens": tokens}
+        for mode, chunked in (("single", False), ("chunked", True)):
+            started = time.perf_counter()
+            result = await geminiUtils.get_summary_and_action_items_async(transcript, timeout=600, chunked=chunked)
+            row[mode] = time.perf_counter() - started
+            if "error" in result:
+                row[mode] = float("nan")
+                print(f"{tokens} tokens, {mode}: {result['error']}")
+        row["chunks"] = len(geminiUtils.split_transcript(transcript))
+        rows.append(row)
+        print(f"{tokens:>8} tokens: single {row['single']:6.2f}s  chunked {row['chunked']:6.2f}s ({row['chunks']} chunks)")
+
+    with open(f"{args.output}.csv", "w", encoding="utf-8") as f:
+        f.write("tokens,chunks,single_seconds,chunked_seconds\n")
+        f.writelines(f"{r['tokens']},{r['chunks']},{r['single']:.3f},{r['chunked']:.3f}\n" for r in rows)
+    _svg_plot(f"{args.output}.svg", {
+        "single-shot": [(r["tokens"], r["single"]) for r in rows],
+        "chunked": [(r["tokens"], r["chunked"]) for r in rows],
+    }, "transcript tokens", "wall-clock seconds")
+    print(f"Wrote {args.output}.csv and {args.output}.svg")
+
+
+async def _stream_main(args):
+    """
+    Time to first content of POST /analyze/ against POST /analyze/stream,
+    served by uvicorn on a local port with the stub answering for Gemini and
+    storage skipped. /analyze/ shows nothing until the whole analysis is
+    done; the stream should show the summary after about one model chunk.
+    """
+    import httpx
+    import uvicorn
+    import main as api
+
+    use_stub_model(StubModel(first_token_seconds=args.latency, output_tokens_per_second=args.tokens_per_second))
+
+    async def skip_store(meeting, transcript):
+        pass
+
+    api.store_meeting = skip_store
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    rows = {"/analyze/": [], "/analyze/stream": []}
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+            for run in range(args.runs):
+                # A new transcript per request, so no result comes from the cache.
+                for i, path in enumerate(rows):
+                    transcript = synthetic_transcript(args.tokens, seed=len(rows) * run + i)
+                    files = {"file": ("t.txt", transcript.encode(), "text/plain")}
+                    started = time.perf_counter()
+                    first = None
+                    async with client.stream("POST", path, files=files) as response:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if first is None and (path == "/analyze/" or line.startswith("event: delta")):
+                                first = time.perf_counter() - started
+                    rows[path].append((first, time.perf_counter() - started))
+    finally:
+        server.should_exit = True
+        await serving
+
+    print(f"{args.runs} runs per endpoint, {args.tokens}-token transcripts, stub time to first token "
+          f"{args.latency:g}s at {args.tokens_per_second:g} output tokens/s")
+    for path, values in rows.items():
+        firsts = sorted(v[0] for v in values)
+        totals = sorted(v[1] for v in values)
+        print(f"  {path:<16} first content p50 {firsts[len(firsts) // 2]:.2f}s   complete p50 {totals[len(totals) // 2]:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks of the analysis path against a stub Gemini model.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("load", help="Concurrent POST /analyze/ requests: are they served in parallel?")
+    load.add_argument("--requests", type=int, default=16)
+    load.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once.")
+    load.add_argument("--tokens", type=int, default=3000, help="Transcript length in estimated tokens.")
+    load.add_argument("--latency", type=float, default=0.8, help="Stub time to first token, in seconds.")
+    load.add_argument("--blocking", action="store_true", help="Block the event loop in the stub, as a sync SDK call would.")
+    chunking = commands.add_parser("chunking", help="Wall-clock time vs transcript length, single-shot and chunked.")
+    chunking.add_argument("--lengths", type=int, nargs="+", default=[2000, 8000, 16000, 32000, 64000, 128000])
+    chunking.add_argument("--latency", type=float, default=0.8, help="Stub time to first token, in seconds.")
+    chunking.add_argument("--output", default="chunking_benchmark", help="Output path prefix for the CSV and SVG.")
+    stream = commands.add_parser("stream", help="Time to first content: POST /analyze/ vs /analyze/stream over uvicorn.")
+    stream.add_argument("--runs", type=int, default=5)
+    stream.add_argument("--tokens", type=int, default=3000, help="Transcript length in estimated tokens.")
+    stream.add_argument("--latency", type=float, default=0.8, help="Stub time to first token, in seconds.")
+    stream.add_argument("--tokens-per-second", type=float, default=150, help="Stub output rate.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    mains = {"load": _load_main, "chunking": _chunking_main, "stream": _stream_main}
+    asyncio.run(mains[args.command](args))
@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Any, Dict
+
+from transcript_store import SENTIMENTS, ColumnarTranscript, write_transcript_file
+
+# Disk size and read time of a detailed transcript: the indented JSON file the
+# app used to write (<meeting_id>_detailed.json) against the columnar .tcol file.
+
+VOCABULARY = ["we", "should", "ship", "the", "update", "by", "Friday", "budget", "roadmap", "review",
+              "customer", "launch", "agreed", "next", "week", "docs", "team", "plan", "I", "think"]
+ENTITY_TYPES = ["date", "person_name", "organization", "location"]
+
+
+def synthetic_transcript(word_count: int, seed: int = 7) -> Dict[str, Any]:
+    """
+    An AssemblyAI-shaped response: about 2.3 words a second, four speakers,
+    an utterance and a sentiment result every ~12 words, an entity every ~40.
+    """
+    rng = random.Random(seed)
+    words, utterances, sentiments, entities = [], [], [], []
+    clock, i = 0, 0
+    while i < word_count:
+        speaker = rng.choice("ABCD")
+        turn = []
+        for _ in range(min(rng.randint(4, 20), word_count - i)):
+            duration = rng.randint(150, 500)
+            turn.append({"text": rng.choice(VOCABULARY), "start": clock, "end": clock + duration,
+                         "confidence": round(rng.uniform(0.6, 1.0), 4), "speaker": speaker})
+            clock += duration + rng.randint(0, 150)
+            if rng.random() < 1 / 40:
+                entities.append({"entity_type": rng.choice(ENTITY_TYPES), "text": turn[-1]["text"],
+                                 "start": turn[-1]["start"], "end": turn[-1]["end"]})
+        words += turn
+        i += len(turn)
+        text = " ".join(w["text"] for w in turn)
+        utterances.append({"speaker": speaker, "start": turn[0]["start"], "end": turn[-1]["end"],
+                           "confidence": 0.9, "text": text, "words": turn})
+        sentiments.append({"text": text, "start": turn[0]["start"], "end": turn[-1]["end"],
+                           "sentiment": rng.choice(SENTIMENTS), "confidence": round(rng.random(), 4), "speaker": speaker})
+        clock += rng.randint(200, 1500)
+    return {
+        "id": "bench", "status": "completed", "audio_duration": clock // 1000,
+        "text": " ".join(w["text"] for w in words), "words": words, "utterances": utterances,
+        "sentiment_analysis_results": sentiments, "entities": entities,
+    }
+
+
+def _median_ms(fn, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def main(args):
+    transcript = synthetic_transcript(args.words)
+    minutes = transcript["audio_duration"] / 60
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "bench_detailed.json")
+        tcol_path = os.path.join(directory, "bench.tcol")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(transcript, f, indent=4)
+        write_transcript_file(tcol_path, transcript)
+
+        def load_json():
+            with open(json_path, encoding="utf-8") as f:
+                return json.load(f)
+
+        middle = transcript["audio_duration"] * 500
+        print(f"{args.words:,} words ({minutes:.0f} min), {len(transcript['utterances']):,} utterances, "
+              f"{len(transcript['entities']):,} entities; median of {args.runs} runs")
+        print(f"  size: JSON {os.path.getsize(json_path) / 2 ** 20:.2f} MB, "
+              f"columnar {os.path.getsize(tcol_path) / 2 ** 20:.2f} MB")
+        print(f"  load the whole JSON file:           {_median_ms(load_json, args.runs):8.2f} ms")
+        print(f"  columnar, words in one minute:      "
+              f"{_median_ms(lambda: ColumnarTranscript(tcol_path).words(middle, middle + 60_000), args.runs):8.2f} ms")
+        print(f"  columnar, one speaker's utterances: "
+              f"{_median_ms(lambda: ColumnarTranscript(tcol_path).utterances(speaker='A'), args.runs):8.2f} ms")
+        print(f"  columnar, all sentiment results:    "
+              f"{_median_ms(lambda: ColumnarTranscript(tcol_path).annotations('sentiment'), args.runs):8.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indented JSON vs columnar transcript: disk size and read time.")
+    parser.add_argument("--words", type=int, default=25000, help="About 3 hours of speech at the default.")
+    parser.add_argument("--runs", type=int, default=5)
+    main(parser.parse_args())
@@ -1,26 +1,226 @@
+import asyncio
+import logging
 import os
-import smtplib
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from email.message import EmailMessage
+from typing import Any, Dict, List, Optional
+
+import aiosmtplib
 from dotenv import load_dotenv
+from pymongo import ReturnDocument
+
+from tracing import span
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 EMAIL_ADDRESS = os.getenv("EMAIL_USERNAME")
 EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
 
-def send_meeting_email(recipient: str, subject: str, body: str):
-    if not EMAIL_ADDRESS or not EMAIL_PASSWORD:
-        raise ValueError("Email credentials not set in environment variables.")
+# Override to point at a local SMTP server (e.g. aiosmtpd) for testing.
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "3"))
+
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+EMAIL_RETRY_BASE_SECONDS = 10.0
+EMAIL_LEASE_SECONDS = 120.0
+EMAIL_IDLE_POLL_SECONDS = 5.0
 
+# Failures of the connection itself; the pooled connection cannot be reused.
+SMTP_CONNECTION_ERRORS = (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPTimeoutError, ConnectionError, OSError)
+
+
+def build_email_message(recipient: str, subject: str, body: str) -> EmailMessage:
     msg = EmailMessage()
     msg["Subject"] = subject
     msg["From"] = EMAIL_ADDRESS
     msg["To"] = recipient
     msg.set_content(body)
+    return msg
+
+
+class SMTPConnectionPool:
+    """
+    Keeps up to `size` authenticated SMTP connections open and hands them out
+    one at a time, so a burst of emails does not reconnect and log in per message.
+    """
+
+    def __init__(self, size: int = SMTP_POOL_SIZE):
+        self.size = size
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(size)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        if not EMAIL_ADDRESS or not EMAIL_PASSWORD:
+            raise ValueError("Email credentials not set in environment variables.")
+        smtp = aiosmtplib.SMTP(hostname=SMTP_HOST, port=SMTP_PORT, use_tls=SMTP_USE_TLS)
+        await smtp.connect()
+        await smtp.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
+        return smtp
+
+    @asynccontextmanager
+    async def connection(self):
+        async with self._slots:
+            smtp = None
+            while not self._idle.empty():
+                candidate = self._idle.get_nowait()
+                if candidate.is_connected:
+                    smtp = candidate
+                    break
+            if smtp is None:
+                smtp = await self._connect()
+
+            try:
+                yield smtp
+            except Exception as e:
+                # A refused message leaves the session usable (the envelope is
+                # reset); only a broken connection is dropped.
+                if isinstance(e, SMTP_CONNECTION_ERRORS) or not smtp.is_connected:
+                    try:
+                        smtp.close()
+                    except Exception:
+                        pass
+                else:
+                    self._idle.put_nowait(smtp)
+                raise
+            else:
+                self._idle.put_nowait(smtp)
+
+    async def close(self):
+        while not self._idle.empty():
+            smtp = self._idle.get_nowait()
+            try:
+                await smtp.quit()
+            except Exception:
+                smtp.close()
+
+
+smtp_pool = SMTPConnectionPool()
+
+
+def _permanent_failure(e: Exception) -> bool:
+    """
+    True for 5xx replies (e.g. 550 no such user), which fail the same way on
+    every retry. 4xx replies and connection errors are worth retrying.
+    """
+    if isinstance(e, aiosmtplib.SMTPRecipientsRefused):
+        return all(r.code >= 500 for r in e.recipients)
+    return isinstance(e, aiosmtplib.SMTPResponseException) and e.code >= 500
+
+
+async def send_meeting_email(recipient: str, subject: str, body: str):
+    with span("export.email"):
+        async with smtp_pool.connection() as smtp:
+            await smtp.send_message(build_email_message(recipient, subject, body))
+
+
+class EmailOutbox:
+    """
+    Durable outbox in a Mongo collection. The API only inserts messages; a few
+    background senders (one per pooled connection) deliver them with retries,
+    so slow or failing SMTP never blocks a request.
+    """
+
+    def __init__(self, collection, senders: int = SMTP_POOL_SIZE):
+        self.collection = collection
+        self.senders = senders
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        await self.collection.create_index("outbox_id", unique=True)
+        await self.collection.create_index([("status", 1), ("next_attempt_at", 1)])
+        self._tasks = [asyncio.create_task(self._sender()) for _ in range(self.senders)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await smtp_pool.close()
+
+    async def enqueue(self, messages: List[Dict[str, str]], meeting_id: Optional[str] = None) -> List[str]:
+        """
+        Queues messages (each with recipient, subject, body) and returns their outbox ids.
+        """
+        now = datetime.now(timezone.utc)
+        docs = [{
+            "outbox_id": str(uuid.uuid4()),
+            "meeting_id": meeting_id,
+            "recipient": m["recipient"],
+            "subject": m["subject"],
+            "body": m["body"],
+            "status": "pending",
+            "attempts": 0,
+            "error": None,
+            "created_at": now,
+            "next_attempt_at": now,
+        } for m in messages]
+        if docs:
+            await self.collection.insert_many(docs)
+            self._wakeup.set()
+        return [d["outbox_id"] for d in docs]
+
+    async def get(self, outbox_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"outbox_id": outbox_id}, {"_id": 0, "body": 0})
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.now(timezone.utc)
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                # A sender that died mid-send leaves an expired lease behind.
+                {"status": "sending", "lease_expires_at": {"$lt": now}},
+            ]},
+            {"$set": {"status": "sending", "lease_expires_at": now + timedelta(seconds=EMAIL_LEASE_SECONDS)},
+             "$inc": {"attempts": 1}},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _deliver(self, doc: Dict[str, Any]):
+        try:
+            await send_meeting_email(doc["recipient"], doc["subject"], doc["body"])
+            update = {"status": "sent", "sent_at": datetime.now(timezone.utc), "error": None}
+        except Exception as e:
+            logger.warning(f"Email to {doc['recipient']} failed (attempt {doc['attempts']}): {e}")
+            if doc["attempts"] >= EMAIL_MAX_ATTEMPTS or _permanent_failure(e):
+                update = {"status": "failed", "error": str(e)}
+            else:
+                delay = EMAIL_RETRY_BASE_SECONDS * 2 ** (doc["attempts"] - 1)
+                update = {
+                    "status": "pending",
+                    "error": str(e),
+                    "next_attempt_at": datetime.now(timezone.utc) + timedelta(seconds=delay),
+                }
+        await self.collection.update_one({"outbox_id": doc["outbox_id"]}, {"$set": update})
+
+    async def _sender(self):
+        while True:
+            try:
+                doc = await self._claim()
+            except Exception as e:
+                logger.error(f"Email outbox error: {e}")
+                doc = None
+
+            if doc is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=EMAIL_IDLE_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
 
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465) as smtp:
-        smtp.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-        smtp.send_message(msg)
+            try:
+                await self._deliver(doc)
+            except Exception as e:
+                # The lease expires and the message is retried.
+                logger.error(f"Email outbox error for {doc['outbox_id']}: {e}")
 
 def format_meeting_analysis_for_email(meeting):
     summary = f"Meeting Summary:\n{meeting['summary']}\n\n"
@@ -0,0 +1,92 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Delivers one meeting to many destinations concurrently and keeps a delivery
+# log per export in Mongo, so a retry only re-sends what failed.
+#
+# A sender takes a target (channel id, email address, database id) and the
+# detail its last failed attempt returned (e.g. the Slack parts already
+# posted, so a retry resumes after them), and returns a result dict;
+# {"error": ...} or an exception marks the delivery failed.
+Sender = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+FAILED_STATUSES = {"failed", "pending"}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ExportFanout:
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("export_id", unique=True)
+        await self.collection.create_index([("meeting_id", 1), ("created_at", -1)])
+
+    async def create(self, meeting_id: str, targets: List[Dict[str, str]], options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Records a new export. `targets` are {"destination", "target"} pairs and
+        `options` whatever the senders need to render again on retry.
+        """
+        now = _now()
+        export = {
+            "export_id": str(uuid.uuid4()),
+            "meeting_id": meeting_id,
+            "options": options,
+            "created_at": now,
+            "updated_at": now,
+            "deliveries": [
+                {**t, "status": "pending", "attempts": 0, "latency_ms": None, "error": None, "detail": None}
+                for t in targets
+            ],
+        }
+        await self.collection.insert_one(dict(export))
+        return export
+
+    async def get(self, export_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"export_id": export_id}, {"_id": 0})
+
+    async def latest_for_meeting(self, meeting_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"meeting_id": meeting_id}, {"_id": 0}, sort=[("created_at", -1)])
+
+    async def list_for_meeting(self, meeting_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        cursor = self.collection.find({"meeting_id": meeting_id}, {"_id": 0}).sort("created_at", -1).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def run(self, export: Dict[str, Any], senders: Dict[str, Sender], only_failed: bool = False) -> Dict[str, Any]:
+        """
+        Delivers all (or only the failed) deliveries of an export concurrently,
+        timing each one, and persists the updated log.
+        """
+        async def deliver(delivery: Dict[str, Any]):
+            started = time.perf_counter()
+            delivery["attempts"] += 1
+            try:
+                progress = delivery.get("detail") if delivery["status"] == "failed" else None
+                result = await senders[delivery["destination"]](delivery["target"], progress or {})
+                if "error" in result:
+                    progress = {k: v for k, v in result.items() if k != "error"}
+                    delivery.update(status="failed", error=str(result["error"]), detail=progress or None)
+                else:
+                    delivery.update(status=result.pop("status", "delivered"), error=None, detail=result)
+            except Exception as e:
+                delivery.update(status="failed", error=str(e), detail=None)
+            delivery["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+        pending = [
+            d for d in export["deliveries"]
+            if not only_failed or d["status"] in FAILED_STATUSES
+        ]
+        await asyncio.gather(*(deliver(d) for d in pending))
+
+        export["updated_at"] = _now()
+        await self.collection.update_one(
+            {"export_id": export["export_id"]},
+            {"$set": {"deliveries": export["deliveries"], "updated_at": export["updated_at"]}}
+        )
+        return export
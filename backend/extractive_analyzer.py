@@ -0,0 +1,370 @@
+import math
+import re
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+# CPU-only analysis that needs no network or model: the summary is the
+# highest-ranked transcript sentences, and action items, statuses, deadlines
+# and decisions come from phrasing rules. Far rougher than Gemini, but it takes
+# milliseconds and costs nothing, so it backs low-priority work and keeps
+# analysis running while Gemini is unavailable. Output follows RESPONSE_SCHEMA.
+
+# Bump when the rules change so cached extractive analyses are not reused.
+EXTRACTIVE_VERSION = "1"
+
+SUMMARY_MAX_SENTENCES = 5
+SUMMARY_SENTENCE_RATIO = 0.25
+MIN_SENTENCE_WORDS = 4
+MAX_TOPICS = 5
+MAX_TASK_CHARS = 200
+
+# "Name: text", "[Name]: text", and the compact diarized "[00:12] A: text (+)".
+TURN_PATTERN = re.compile(r"^\s*(?:\[\d{1,2}:\d{2}(?::\d{2})?\]\s*)?\[?([A-Z][\w .'-]{0,40}?)\]?:\s*(.*)$")
+SENTIMENT_MARK_PATTERN = re.compile(r"\s*\(([+-])\)\s*$")
+SENTENCE_BOUNDARY_PATTERN = re.compile(r"(?<=[.!?])\s+")
+WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9'-]*")
+
+STOPWORDS = set("""
+a about above after again all also am an and any are as at be because been before being below between both but by
+can could did do does doing done don't down during each either even ever every few for from further get gets getting
+go goes going gone got great had has have having he her here hers him his how i i'd i'll i'm i've if in into is it
+it's its just know let let's like ll make me might more most much must my need needs no nor not now of off ok okay on
+once one only or other our ours out over own please re really right said same say see she should so some still such
+sure take than thank thanks that that's the their them then there these they thing things think this those through
+to too up us very want was we we'll we're we've well were what when where which while who whom why will with would
+yeah yes you you'll your yours good morning everyone hi hello
+""".split())
+# Not topics: scheduling words and meeting choreography.
+TOPIC_STOPWORDS = STOPWORDS | set("""
+today tomorrow yesterday week weeks month day days next last end friday monday tuesday wednesday thursday
+saturday sunday call meeting action item items begin start regroup reviewing heads-up
+""".split())
+
+COMMITMENT_PATTERN = re.compile(
+    r"\b(?:i'll|i will|i'm going to|i am going to|i can|i need to|i have to|i should|let me)\s+(?:need to\s+|also\s+)?(.+)",
+    re.IGNORECASE)
+REQUEST_PATTERN = re.compile(
+    r"^(?:(?:ok(?:ay)?|so|and|also|great),?\s+)?(?:([A-Z][a-z]+),\s+)?(?:please|can you|could you|would you|make sure(?: to)?)\s+(.+)",
+    re.IGNORECASE)
+TEAM_TASK_PATTERN = re.compile(
+    r"\b(?:we need to|we should|we must|let's|let us|someone (?:needs|has) to|can we)\s+(?:assign someone to\s+)?(.+)",
+    re.IGNORECASE)
+DELEGATION_PATTERN = re.compile(r"\b([A-Z][a-z]+) to ([a-z][^;.]+)")
+COMPLETED_PATTERN = re.compile(
+    r"\bi(?:'ve| have)?\s+(?:completed|finished|wrapped up|shipped|delivered)\s+(.+)", re.IGNORECASE)
+IN_PROGRESS_PATTERN = re.compile(r"\bi'm (?:still )?(?:working on|in the middle of)\s+(.+)", re.IGNORECASE)
+DECISION_PATTERN = re.compile(
+    r"\b(?:we(?:'ve)? (?:decided|agreed|approved|chose|are going with|will go with)|decided to|agreed to|"
+    r"the decision (?:is|was)|it's decided|approved)\b", re.IGNORECASE)
+# Meeting choreography ("let's begin", "let's regroup Monday") is not a task.
+PROCEDURAL_PATTERN = re.compile(
+    r"^(?:begin|start|get started|kick off|move on|wrap up|regroup|recap|continue|go over|review last|meet)\b",
+    re.IGNORECASE)
+# "I can do that": the task is whatever was just asked for.
+REFERENCE_TASK_PATTERN = re.compile(r"^(?:do|take|handle|own|pick up|look into)\s+(?:that|it|this)\b", re.IGNORECASE)
+
+WEEKDAY = r"(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+DEADLINE_PATTERN = re.compile(
+    r"\b(?:(?:by|until|before|due|no later than)\s+(?:the\s+)?"
+    r"((?:end of (?:the\s+)?(?:day|week|month|quarter|sprint))|(?:next\s+)?[\w']+ (?:call|meeting|sync|review|demo)|"
+    r"(?:this|next)\s+\w+|" + WEEKDAY + r"|tomorrow|today|\d{4}-\d{2}-\d{2}|[a-z]+ \d{1,2}(?:st|nd|rd|th)?)"
+    r"|((?:by |until )?end of (?:the\s+)?(?:day|week|month|quarter|sprint)|next week|next month|tomorrow|this week))\b",
+    re.IGNORECASE)
+
+POSITIVE_WORDS = set("great good excellent glad happy agreed approved ready completed done progress thanks awesome "
+                     "perfect nice success successful improved excited".split())
+NEGATIVE_WORDS = set("blocked blocker issue issues problem problems concern concerned delay delayed risk late "
+                     "behind fail failed failing bug bugs worried unfortunately cannot can't urgent".split())
+
+
+def _normalize(text: str) -> str:
+    return text.replace("’", "'").replace("‘", "'").replace("—", " - ")
+
+
+def _words(text: str) -> List[str]:
+    return [w[:-2] if w.endswith("'s") else w for w in WORD_PATTERN.findall(text.lower())]
+
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def _content_words(text: str, exclude: set = frozenset()) -> List[str]:
+    return [w for w in _words(text) if w not in STOPWORDS and w not in exclude and len(w) > 2]
+
+
+def parse_turns(transcript_text: str) -> List[Dict[str, Any]]:
+    """
+    Speaker turns from a "Name: text" (or compact diarized) transcript. Text
+    without speaker labels becomes turns with speaker None.
+    """
+    turns = []
+    for line in _normalize(transcript_text).splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = TURN_PATTERN.match(line)
+        if match and match.group(1) != "Entities":
+            speaker, text = match.group(1).strip(), match.group(2)
+        elif match:
+            continue
+        elif turns and turns[-1]["speaker"] is None:
+            turns[-1]["text"] += " " + line
+            continue
+        else:
+            speaker, text = None, line
+        mark = SENTIMENT_MARK_PATTERN.search(text)
+        turns.append({
+            "speaker": speaker,
+            "text": SENTIMENT_MARK_PATTERN.sub("", text).strip(),
+            "sentiment": {"+": 1, "-": -1}[mark.group(1)] if mark else 0,
+        })
+    return turns
+
+
+def _sentences(turns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    sentences = []
+    for turn_index, turn in enumerate(turns):
+        for text in SENTENCE_BOUNDARY_PATTERN.split(turn["text"]):
+            text = text.strip()
+            if text:
+                sentences.append({"speaker": turn["speaker"], "text": text, "turn": turn_index, "index": len(sentences)})
+    return sentences
+
+
+# --- Summary and topics ---
+
+def rank_sentences(sentences: List[Dict[str, Any]], names: set) -> List[Dict[str, Any]]:
+    """
+    Scores sentences by the transcript-wide frequency of their content words,
+    length-normalized, with a boost for sentences stating tasks or decisions.
+    """
+    frequencies = Counter(w for s in sentences for w in _content_words(s["text"], names))
+    top = max(frequencies.values(), default=1)
+    ranked = []
+    for sentence in sentences:
+        words = _content_words(sentence["text"], names)
+        if len(_words(sentence["text"])) < MIN_SENTENCE_WORDS or not words:
+            continue
+        score = sum(frequencies[w] / top for w in set(words)) / math.sqrt(len(words))
+        if DECISION_PATTERN.search(sentence["text"]):
+            score *= 2.0
+        elif COMMITMENT_PATTERN.search(sentence["text"]):
+            score *= 1.3
+        ranked.append((score, sentence))
+    ranked.sort(key=lambda pair: (-pair[0], pair[1]["index"]))
+    return [sentence for _, sentence in ranked]
+
+
+def build_summary(sentences: List[Dict[str, Any]], names: set) -> str:
+    ranked = rank_sentences(sentences, names)
+    count = min(SUMMARY_MAX_SENTENCES, max(2, round(len(sentences) * SUMMARY_SENTENCE_RATIO)))
+    chosen = sorted(ranked[:count], key=lambda s: s["index"])
+    if not chosen:
+        return " ".join(s["text"] for s in sentences[:SUMMARY_MAX_SENTENCES])
+    return " ".join(f"{s['speaker']}: {s['text']}" if s["speaker"] else s["text"] for s in chosen)
+
+
+def extract_topics(sentences: List[Dict[str, Any]], names: set) -> List[str]:
+    """
+    Most frequent content-word pairs, then single words, as topic labels.
+    """
+    unigrams, bigrams, first_seen = Counter(), Counter(), {}
+    for sentence in sentences:
+        words = _words(sentence["text"])
+        for i, word in enumerate(words):
+            if word in TOPIC_STOPWORDS or word in names or len(word) <= 2:
+                continue
+            unigrams[word] += 1
+            first_seen.setdefault(word, sentence["index"])
+            if i + 1 < len(words) and words[i + 1] not in TOPIC_STOPWORDS and words[i + 1] not in names and len(words[i + 1]) > 2:
+                pair = f"{word} {words[i + 1]}"
+                bigrams[pair] += 1
+                first_seen.setdefault(pair, sentence["index"])
+
+    topics: List[str] = []
+    covered = set()
+    candidates = sorted(bigrams, key=lambda p: (-bigrams[p], first_seen[p])) + \
+        sorted(unigrams, key=lambda w: (-unigrams[w], first_seen[w]))
+    for candidate in candidates:
+        parts = candidate.split()
+        if covered.intersection(parts):
+            continue
+        topics.append(candidate.title())
+        covered.update(parts)
+        if len(topics) >= MAX_TOPICS:
+            break
+    return topics
+
+
+# --- Action items and decisions ---
+
+def find_deadline(text: str) -> Optional[str]:
+    match = DEADLINE_PATTERN.search(text)
+    if not match:
+        return None
+    return (match.group(1) or match.group(2)).strip()
+
+
+def _clean_task(text: str) -> str:
+    text = DEADLINE_PATTERN.sub("", text)
+    text = re.sub(r"\b(?:accordingly|as well|too|first|then)\b", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"\s+", " ", text).strip(" ,;:.!?-")
+    text = re.sub(r"^(?:to|and|that|it|the|an?)\s+", "", text, flags=re.IGNORECASE)
+    return (text[:1].upper() + text[1:])[:MAX_TASK_CHARS]
+
+
+def _action_item(task: str, assignee: Optional[str], deadline: Optional[str], status: str = "new",
+                 recap: bool = False) -> Dict[str, Any]:
+    item = {"task": task, "status": status}
+    if recap:
+        item["recap"] = True
+    if assignee:
+        item["assignee"] = assignee
+    if deadline:
+        item["deadline"] = deadline
+    return item
+
+
+def _task_overlap(a: Dict[str, Any], b: Dict[str, Any]) -> float:
+    words_a = {_stem(w) for w in _content_words(a["task"])}
+    words_b = {_stem(w) for w in _content_words(b["task"])}
+    if not words_a or not words_b:
+        return 0.0
+    overlap = len(words_a & words_b)
+    return 1.0 if overlap == min(len(words_a), len(words_b)) else overlap / len(words_a | words_b)
+
+
+def _merge_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Recaps ("action items: Sam to finish the API") repeat earlier
+    # commitments, so a recap item only needs to share a word with an
+    # earlier task of the same person.
+    merged: List[Dict[str, Any]] = []
+    for item in items:
+        recap = item.pop("recap", False)
+        candidates = [
+            (_task_overlap(m, item), m) for m in merged
+            if not m.get("assignee") or not item.get("assignee") or m["assignee"] == item["assignee"]
+        ]
+        overlap, same = max(candidates, key=lambda pair: pair[0], default=(0.0, None))
+        if same is None or overlap < (0.2 if recap and same.get("assignee") else 0.5):
+            merged.append(item)
+            continue
+        for key in ("assignee", "deadline"):
+            if not same.get(key) and item.get(key):
+                same[key] = item[key]
+        if not recap and len(item["task"]) > len(same["task"]) and same["status"] == "new":
+            same["task"] = item["task"]
+    return merged
+
+
+def extract_action_items(sentences: List[Dict[str, Any]], speakers: List[str]) -> List[Dict[str, Any]]:
+    items: List[Dict[str, Any]] = []
+    open_request: Optional[Dict[str, Any]] = None  # last unassigned ask, for "I can do that"
+    addressed: Optional[str] = None  # "Okay, Sam." addresses the next sentence
+
+    for sentence in sentences:
+        text, speaker = sentence["text"], sentence["speaker"]
+        deadline = find_deadline(text)
+        bare = text.rstrip(".!? ")
+        if bare.split(",")[-1].strip() in speakers and len(_words(bare)) <= 3:
+            addressed = bare.split(",")[-1].strip()
+            continue
+
+        if match := COMPLETED_PATTERN.search(text):
+            task = _clean_task(match.group(1).split(",")[0])
+            items.append(_action_item(task, speaker, None, "completed"))
+        elif match := IN_PROGRESS_PATTERN.search(text):
+            task = _clean_task(match.group(1))
+            items.append(_action_item(task, speaker, deadline, "in-progress"))
+        elif match := COMMITMENT_PATTERN.search(text):
+            rest = match.group(1)
+            if REFERENCE_TASK_PATTERN.match(rest) and open_request and open_request.get("speaker") != speaker:
+                open_request["item"]["assignee"] = speaker
+                open_request["item"]["deadline"] = open_request["item"].get("deadline") or deadline
+                open_request = None
+            elif re.match(r"(?:need )?until\b", rest, re.IGNORECASE):
+                # "I'll need until Friday to wrap it up" sets a deadline on the speaker's last task.
+                previous = next((i for i in reversed(items) if i.get("assignee") == speaker), None)
+                if previous and deadline:
+                    previous["deadline"] = deadline
+            elif not REFERENCE_TASK_PATTERN.match(rest):
+                items.append(_action_item(_clean_task(rest), speaker, deadline))
+        elif match := REQUEST_PATTERN.search(text):
+            assignee = match.group(1) if match.group(1) in speakers else addressed
+            task = _clean_task(match.group(2))
+            if REFERENCE_TASK_PATTERN.match(match.group(2)) or re.match(r"prioritize (?:that|it|this)", match.group(2), re.IGNORECASE):
+                previous = next((i for i in reversed(items) if i.get("assignee") == assignee), None)
+                if previous and deadline and not previous.get("deadline"):
+                    previous["deadline"] = deadline
+            else:
+                item = _action_item(task, assignee, deadline)
+                items.append(item)
+                if not assignee:
+                    open_request = {"item": item, "speaker": speaker}
+        elif (match := TEAM_TASK_PATTERN.search(text)) and not PROCEDURAL_PATTERN.match(match.group(1)):
+            item = _action_item(_clean_task(match.group(1)), None, deadline)
+            items.append(item)
+            open_request = {"item": item, "speaker": speaker}
+
+        for name, task in DELEGATION_PATTERN.findall(text):
+            if name in speakers:
+                for part in re.split(r"\band\b", task):
+                    if _clean_task(part):
+                        items.append(_action_item(_clean_task(part), name, find_deadline(part), recap=True))
+        addressed = None
+
+    return _merge_items([item for item in items if len(_words(item["task"])) >= 2])
+
+
+def extract_decisions(sentences: List[Dict[str, Any]], speakers: List[str]) -> List[Dict[str, Any]]:
+    decisions = []
+    for sentence in sentences:
+        if not DECISION_PATTERN.search(sentence["text"]):
+            continue
+        participants = [sentence["speaker"]] if sentence["speaker"] else []
+        participants += [s for s in speakers if s not in participants and re.search(rf"\b{re.escape(s)}\b", sentence["text"])]
+        decisions.append({
+            "description": sentence["text"],
+            "participants_involved": participants,
+            # Plain transcripts carry no meeting date; the analysis date stands in.
+            "date_made": date.today().isoformat(),
+        })
+    return decisions
+
+
+def describe_tone(turns: List[Dict[str, Any]], action_item_count: int) -> str:
+    words = [w for turn in turns for w in _words(turn["text"])]
+    score = sum(w in POSITIVE_WORDS for w in words) - sum(w in NEGATIVE_WORDS for w in words)
+    score += sum(turn["sentiment"] for turn in turns)
+    mood = "positive" if score > 1 else "tense" if score < -1 else "neutral"
+    if action_item_count >= 2:
+        return f"Goal-oriented and {mood}"
+    return mood.capitalize()
+
+
+def analyze_extractive(transcript_text: str) -> Dict[str, Any]:
+    """
+    Analyzes a transcript without any model call. Returns the same fields as
+    a Gemini analysis, or {"error": ...} for an empty transcript.
+    """
+    turns = parse_turns(transcript_text or "")
+    sentences = _sentences(turns)
+    if not sentences:
+        return {"error": "No transcript text provided for summarization."}
+
+    speakers = list(dict.fromkeys(t["speaker"] for t in turns if t["speaker"]))
+    names = {w for s in speakers for w in _words(s)}
+    action_items = extract_action_items(sentences, speakers)
+    return {
+        "summary": build_summary(sentences, names),
+        "action_items": action_items,
+        "key_decisions": extract_decisions(sentences, speakers),
+        "speakers_detected": speakers,
+        "tone_overview": describe_tone(turns, len(action_items)),
+        "important_topics": extract_topics(sentences, names),
+    }
@@ -1,68 +1,140 @@
 import google.generativeai as genai
+import asyncio
+import logging
 import os
 import json
+import re
+import time
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List
 from dotenv import load_dotenv
 from datetime import datetime
 
+from structured_transcript import COMPACT_FORMAT_NOTE
+from model_usage import record_call, check_token_budget
+from tracing import span
+from resilience import ProviderUnavailable, gemini_caller
+from partial_json import PartialJSONParser, PartialJSONError
+
 load_dotenv()
+
+logger = logging.getLogger(__name__)
+
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("gemini-2.5-flash")  # or gemini-pro
+GEMINI_MODEL_NAME = "gemini-2.5-flash"  # or gemini-pro
+model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+_models = {GEMINI_MODEL_NAME: model}
 
-def get_summary_and_action_items(transcript_text: str):
-    if not transcript_text:
-        return {"error": "No transcript text provided for summarization."}
+# Bump when the prompt or schema changes so cached analyses are not reused.
+PROMPT_VERSION = "3"
 
-    response_schema = {
-        "type": "OBJECT",
-        "properties": {
-            "summary": {"type": "STRING"},
-            "action_items": {
-                "type": "ARRAY",
-                "items": {
-                    "type": "OBJECT",
-                    "properties": {
-                        "task": {"type": "STRING"},
-                        "assignee": {"type": "STRING"},
-                        "deadline": {"type": "STRING"},
-                        "status": {"type": "STRING", "enum": ["new", "in-progress", "completed"]}
-                    },
-                    "required": ["task", "status"]
-                }
-            },
-            "key_decisions": {
-                "type": "ARRAY",
-                "items": {
-                    "type": "OBJECT",
-                    "properties": {
-                        "description": {"type": "STRING"},
-                        "participants_involved": {"type": "ARRAY", "items": {"type": "STRING"}},
-                        "date_made": {"type": "STRING"}
-                    },
-                    "required": ["description", "date_made"]
-                }
-            },
-            "speakers_detected": {
-                "type": "ARRAY",
-                "items": {"type": "STRING"},
-                "description": "Names or identifiers of speakers who contributed"
-            },
-            "tone_overview": {
-                "type": "STRING",
-                "description": "Overall tone or sentiment of the meeting"
-            },
-            "important_topics": {
-                "type": "ARRAY",
-                "items": {"type": "STRING"},
-                "description": "Major themes or topics discussed"
+RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "summary": {"type": "STRING"},
+        "action_items": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "task": {"type": "STRING"},
+                    "assignee": {"type": "STRING"},
+                    "deadline": {"type": "STRING"},
+                    "status": {"type": "STRING", "enum": ["new", "in-progress", "completed"]}
+                },
+                "required": ["task", "status"]
             }
         },
-        "required": ["summary", "action_items", "key_decisions"]
-    }
+        "key_decisions": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "description": {"type": "STRING"},
+                    "participants_involved": {"type": "ARRAY", "items": {"type": "STRING"}},
+                    "date_made": {"type": "STRING"}
+                },
+                "required": ["description", "date_made"]
+            }
+        },
+        "speakers_detected": {
+            "type": "ARRAY",
+            "items": {"type": "STRING"},
+            "description": "Names or identifiers of speakers who contributed"
+        },
+        "tone_overview": {
+            "type": "STRING",
+            "description": "Overall tone or sentiment of the meeting"
+        },
+        "important_topics": {
+            "type": "ARRAY",
+            "items": {"type": "STRING"},
+            "description": "Major themes or topics discussed"
+        }
+    },
+    "required": ["summary", "action_items", "key_decisions"]
+}
 
 
-    prompt = f"""
-    You are an advanced meeting assistant with smart context awareness.
+GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": RESPONSE_SCHEMA
+}
+
+# Streamed analyses ask for the fields in this order so the summary can be
+# shown first. This SDK's Schema cannot express property ordering and Gemini
+# emits schema properties alphabetically (summary would come fifth), so the
+# streamed call describes the shape in the prompt instead of response_schema.
+STREAM_FIELD_ORDER = ("summary", "action_items", "key_decisions", "speakers_detected", "tone_overview", "important_topics")
+STREAM_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+STREAM_SCHEMA_NOTE = """Return one JSON object with exactly these keys, in this order:
+    "summary": string,
+    "action_items": [{"task": string, "assignee": string, "deadline": string, "status": "new" | "in-progress" | "completed"}],
+    "key_decisions": [{"description": string, "participants_involved": [string], "date_made": string}],
+    "speakers_detected": [string],
+    "tone_overview": string,
+    "important_topics": [string]"""
+
+# Bounds for the async analysis path. Gemini calls can take many seconds, so
+# they are awaited off the event loop and capped per worker.
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "120"))
+
+# Transcripts estimated above this many tokens are analyzed in chunks.
+GEMINI_CHUNK_TOKEN_BUDGET = int(os.getenv("GEMINI_CHUNK_TOKEN_BUDGET", "12000"))
+CHARS_PER_TOKEN = 4
+MAX_MERGED_TOPICS = 5
+
+# A turn may start with a "[mm:ss]" timestamp, as in the compact diarized format.
+SPEAKER_TURN_PATTERN = re.compile(r"^\s*(?:\[\d{1,2}:\d{2}(?::\d{2})?\]\s*)?(\[[^\]]{1,60}\]|[A-Z][\w .'-]{0,40}):")
+SENTENCE_BOUNDARY_PATTERN = re.compile(r"(?<=[.!?])\s+")
+STATUS_PROGRESS = {"new": 0, "in-progress": 1, "completed": 2}
+
+_analysis_semaphore = None
+
+
+def _get_analysis_semaphore() -> asyncio.Semaphore:
+    # Created lazily so it binds to the running event loop, not the import-time one.
+    global _analysis_semaphore
+    if _analysis_semaphore is None:
+        _analysis_semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+    return _analysis_semaphore
 
+
+def _get_model(model_name: str = None):
+    model_name = model_name or GEMINI_MODEL_NAME
+    if model_name not in _models:
+        _models[model_name] = genai.GenerativeModel(model_name)
+    return _models[model_name]
+
+
+def build_analysis_prompt(transcript_text: str, part: str = None, structured: bool = False, stream: bool = False) -> str:
+    scope = f"\n    This transcript is {part} of a longer meeting; analyze only this part.\n" if part else ""
+    transcript_format = f"\n    {COMPACT_FORMAT_NOTE}\n" if structured else ""
+    schema = f"\n    {STREAM_SCHEMA_NOTE}\n" if stream else ""
+    return f"""
+    You are an advanced meeting assistant with smart context awareness.
+    {scope}{transcript_format}
     TRANSCRIPT:
     ---
     {transcript_text}
@@ -78,31 +150,503 @@ def get_summary_and_action_items(transcript_text: str):
 
     Make sure to return valid JSON following this schema exactly.
     Avoid hallucinations and use only transcript data.
-    """
+    {schema}"""
 
 
+def _parse_analysis_response(response):
+    if not response or not response.text:
+        logger.warning("❌ No response text from Gemini.")
+        return {"error": "Empty response from Gemini"}
+
+    try:
+        return json.loads(response.text)
+    except json.JSONDecodeError as e:
+        logger.warning(f"❌ JSON Decode Error on a {len(response.text)}-character Gemini response: {e}")
+        return {"error": f"Invalid JSON format from Gemini: {e}"}
+
+
+def get_summary_and_action_items(transcript_text: str, structured: bool = False):
+    """
+    Blocking analysis call. Prefer get_summary_and_action_items_async from
+    request handlers so the event loop is not held for the whole model call.
+    """
+    if not transcript_text:
+        return {"error": "No transcript text provided for summarization."}
+
+    started = time.perf_counter()
     try:
         response = model.generate_content(
-            prompt,
-            generation_config={
-                "response_mime_type": "application/json",
-                "response_schema": response_schema
-            }
+            build_analysis_prompt(transcript_text, structured=structured),
+            generation_config=GENERATION_CONFIG
+        )
+        record_call("analysis", GEMINI_MODEL_NAME, time.perf_counter() - started, response=response)
+        return _parse_analysis_response(response)
+
+    except Exception as e:
+        record_call("analysis", GEMINI_MODEL_NAME, time.perf_counter() - started, error=e)
+        logger.error(f"🔥 General Gemini Error: {e}")
+        return {"error": f"Could not generate summary and action items: {e}"}
+
+
+async def _generate_async(prompt: str, timeout: float, generation_config=None,
+                          operation: str = "generate", model_name: str = None):
+    """
+    The one place async Gemini calls are made. Transient failures are retried
+    (and slow calls optionally hedged) within `timeout` seconds overall; each
+    call's tokens, latency, attempts and estimated cost are recorded under
+    `operation`. Raises ProviderUnavailable while Gemini's circuit is open.
+    """
+    model_name = model_name or GEMINI_MODEL_NAME
+    gemini_model = _get_model(model_name)
+
+    async def attempt(attempt_timeout):
+        # A slot is held per attempt, not across retry back-offs.
+        async with _get_analysis_semaphore():
+            return await gemini_model.generate_content_async(prompt, generation_config=generation_config)
+
+    with span("gemini.generate", operation=operation, model=model_name) as call_span:
+        stats = {}
+        started = time.perf_counter()
+        try:
+            response = await gemini_caller.call(attempt, timeout, stats=stats)
+        except BaseException as e:
+            record_call(operation, model_name, time.perf_counter() - started, error=e, attempts=stats.get("attempts", 0))
+            raise
+        call = record_call(operation, model_name, time.perf_counter() - started, response=response,
+                           attempts=stats["attempts"])
+        call_span.set_attribute("attempts", stats["attempts"])
+        call_span.set_attribute("hedged", stats["hedged"])
+        call_span.set_attribute("gen_ai.usage.input_tokens", call["prompt_tokens"])
+        call_span.set_attribute("gen_ai.usage.output_tokens", call["output_tokens"])
+        return response
+
+
+async def _analyze_async(transcript_text: str, timeout: float, part: str = None, structured: bool = False,
+                         model_name: str = None):
+    try:
+        response = await _generate_async(
+            build_analysis_prompt(transcript_text, part=part, structured=structured),
+            timeout,
+            generation_config=GENERATION_CONFIG,
+            operation="analysis",
+            model_name=model_name
+        )
+        return _parse_analysis_response(response)
+
+    except ProviderUnavailable as e:
+        return {"error": str(e), "provider_unavailable": True, "retry_after": e.retry_after}
+
+    except asyncio.TimeoutError:
+        logger.warning(f"⏱️ Gemini call timed out after {timeout}s")
+        return {"error": f"Gemini analysis timed out after {timeout} seconds.", "timed_out": True}
+
+    except Exception as e:
+        logger.error(f"🔥 General Gemini Error: {e}")
+        return {"error": f"Could not generate summary and action items: {e}"}
+
+
+async def get_summary_and_action_items_async(transcript_text: str, timeout: float = None, chunked: bool = None,
+                                             structured: bool = False, model_name: str = None):
+    """
+    Non-blocking analysis call. At most GEMINI_MAX_CONCURRENCY calls run at once
+    per process and each is abandoned after `timeout` seconds. Cancelling the
+    awaiting task (e.g. on client disconnect) cancels the in-flight request.
+
+    Transcripts over GEMINI_CHUNK_TOKEN_BUDGET are analyzed in chunks unless
+    `chunked` is given explicitly. Pass `structured=True` for transcripts in
+    the compact diarized format from structured_transcript.
+
+    Transcripts over ANALYSIS_TOKEN_BUDGET are rejected or sent to the
+    cheaper GEMINI_BUDGET_MODEL before any call is made; a rejection is an
+    error result with "over_budget": True. `model_name` overrides
+    GEMINI_MODEL_NAME for transcripts within budget. Successful results name
+    the model that answered under "model".
+    """
+    if not transcript_text:
+        return {"error": "No transcript text provided for summarization."}
+
+    timeout = GEMINI_TIMEOUT_SECONDS if timeout is None else timeout
+    route = check_token_budget(estimate_tokens(build_analysis_prompt(transcript_text, structured=structured)),
+                               model_name or GEMINI_MODEL_NAME)
+    if "error" in route:
+        return {"error": route["error"], "over_budget": True}
+
+    if chunked is None:
+        chunked = estimate_tokens(transcript_text) > GEMINI_CHUNK_TOKEN_BUDGET
+
+    if chunked:
+        analysis = await get_summary_and_action_items_chunked_async(
+            transcript_text, timeout=timeout, structured=structured, model_name=route["model"]
         )
+    else:
+        analysis = await _analyze_async(transcript_text, timeout, structured=structured, model_name=route["model"])
+    if "error" not in analysis:
+        analysis["model"] = route["model"]
+    return analysis
+
 
+async def answer_from_context_async(question: str, contexts: List[str], timeout: float = None):
+    """
+    Answers a question about meetings using only the retrieved context passages.
+    """
+    timeout = GEMINI_TIMEOUT_SECONDS if timeout is None else timeout
+    context_block = "\n\n".join(f"[{i}] {c}" for i, c in enumerate(contexts, start=1))
+    prompt = f"""
+    You are a meeting assistant answering questions about past meetings.
+    Use only the context passages below. If they do not contain the answer, say so.
+
+    CONTEXT:
+    ---
+    {context_block}
+    ---
+
+    QUESTION: {question}
+    """
+    try:
+        response = await _generate_async(prompt, timeout, operation="rag_answer")
         if not response or not response.text:
-            print("❌ No response text from Gemini.")
             return {"error": "Empty response from Gemini"}
+        return {"answer": response.text.strip()}
 
-        print("✅ Raw response from Gemini:\n", response.text)
-        parsed_json = json.loads(response.text)
-        return parsed_json
+    except ProviderUnavailable as e:
+        return {"error": str(e), "provider_unavailable": True, "retry_after": e.retry_after}
 
-    except json.JSONDecodeError as e:
-        print("❌ JSON Decode Error:", e)
-        print("🔍 Response text that failed:\n", response.text)
-        return {"error": f"Invalid JSON format from Gemini: {e}"}
+    except asyncio.TimeoutError:
+        return {"error": f"Gemini answer timed out after {timeout} seconds."}
 
     except Exception as e:
-        print("🔥 General Gemini Error:", e)
-        return {"error": f"Could not generate summary and action items: {e}"}
+        logger.error(f"🔥 Gemini RAG answer error: {e}")
+        return {"error": f"Could not generate an answer: {e}"}
+
+
+# --- Chunked (map-reduce) analysis for long transcripts ---
+
+def estimate_tokens(text: str) -> int:
+    # Rough heuristic for English text; good enough for budgeting chunks.
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _split_speaker_turns(transcript_text: str) -> List[str]:
+    """
+    Groups lines into speaker turns ("John: ..." or "[John]: ..."). Lines that
+    do not start a new turn are kept with the previous one.
+    """
+    turns = []
+    for line in transcript_text.splitlines():
+        if not line.strip():
+            continue
+        if SPEAKER_TURN_PATTERN.match(line) or not turns:
+            turns.append(line)
+        else:
+            turns[-1] += "\n" + line
+    return turns
+
+
+def _split_oversized(text: str, max_tokens: int) -> List[str]:
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces, current = [], ""
+    for sentence in SENTENCE_BOUNDARY_PATTERN.split(text):
+        while len(sentence) > max_chars:
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_transcript(transcript_text: str, max_tokens: int = None) -> List[str]:
+    """
+    Splits a transcript into chunks of at most ~max_tokens, breaking between
+    speaker turns where possible and between sentences otherwise.
+    """
+    max_tokens = max_tokens or GEMINI_CHUNK_TOKEN_BUDGET
+    chunks, current, current_tokens = [], [], 0
+
+    for turn in _split_speaker_turns(transcript_text):
+        turn_tokens = estimate_tokens(turn)
+        pieces = [turn] if turn_tokens <= max_tokens else _split_oversized(turn, max_tokens)
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece)
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _normalize_key(text: str) -> str:
+    return re.sub(r"\W+", " ", (text or "").lower()).strip()
+
+
+def _ordered_union(values: List[str]) -> List[str]:
+    seen, merged = set(), []
+    for value in values:
+        key = _normalize_key(value)
+        if key and key not in seen:
+            seen.add(key)
+            merged.append(value)
+    return merged
+
+
+def merge_analysis_results(results: List[dict], summary: str = None) -> dict:
+    """
+    Reduce step: merges per-chunk analyses into one MeetingAnalysisResult-shaped
+    dict, de-duplicating action items, decisions, speakers and topics.
+    """
+    action_items = {}
+    for item in (i for r in results for i in r.get("action_items", [])):
+        key = _normalize_key(item.get("task"))
+        if key not in action_items:
+            action_items[key] = dict(item)
+        else:
+            # Later chunks often fill in an assignee or deadline mentioned afterwards.
+            existing = action_items[key]
+            for field in ("assignee", "deadline"):
+                if not existing.get(field) and item.get(field):
+                    existing[field] = item[field]
+            if item.get("status") in STATUS_PROGRESS and \
+                    STATUS_PROGRESS[item["status"]] > STATUS_PROGRESS.get(existing.get("status"), 0):
+                existing["status"] = item["status"]
+
+    key_decisions = {}
+    for decision in (d for r in results for d in r.get("key_decisions", [])):
+        key = _normalize_key(decision.get("description"))
+        if key not in key_decisions:
+            key_decisions[key] = dict(decision)
+        else:
+            existing = key_decisions[key]
+            existing["participants_involved"] = _ordered_union(
+                existing.get("participants_involved", []) + decision.get("participants_involved", [])
+            )
+
+    topic_counts = Counter()
+    topic_labels = {}
+    for topic in (t for r in results for t in r.get("important_topics") or []):
+        key = _normalize_key(topic)
+        topic_counts[key] += 1
+        topic_labels.setdefault(key, topic)
+
+    tones = Counter(r["tone_overview"] for r in results if r.get("tone_overview"))
+
+    return {
+        "summary": summary or " ".join(r.get("summary", "") for r in results).strip(),
+        "action_items": list(action_items.values()),
+        "key_decisions": list(key_decisions.values()),
+        "speakers_detected": _ordered_union([s for r in results for s in r.get("speakers_detected") or []]),
+        "tone_overview": tones.most_common(1)[0][0] if tones else None,
+        "important_topics": [topic_labels[k] for k, _ in topic_counts.most_common(MAX_MERGED_TOPICS)],
+    }
+
+
+async def _combine_summaries(summaries: List[str], timeout: float, model_name: str = None) -> str:
+    prompt = f"""
+    The following are summaries of consecutive parts of one meeting, in order.
+    Combine them into a single concise summary of the whole meeting.
+    Return plain text only.
+
+    {chr(10).join(f"Part {i}: {s}" for i, s in enumerate(summaries, start=1))}
+    """
+    try:
+        response = await _generate_async(prompt, timeout, operation="summary_merge", model_name=model_name)
+        if response and response.text:
+            return response.text.strip()
+    except asyncio.TimeoutError:
+        logger.warning(f"⏱️ Gemini summary merge timed out after {timeout}s")
+    except Exception as e:
+        logger.error(f"🔥 Gemini summary merge error: {e}")
+    return " ".join(summaries)
+
+
+async def get_summary_and_action_items_chunked_async(transcript_text: str, max_tokens: int = None, timeout: float = None,
+                                                     structured: bool = False, model_name: str = None):
+    """
+    Map-reduce analysis: chunks are analyzed concurrently (still bounded by
+    GEMINI_MAX_CONCURRENCY), then merged into a single result.
+    """
+    if not transcript_text:
+        return {"error": "No transcript text provided for summarization."}
+
+    timeout = GEMINI_TIMEOUT_SECONDS if timeout is None else timeout
+    chunks = split_transcript(transcript_text, max_tokens)
+    if len(chunks) == 1:
+        return await _analyze_async(chunks[0], timeout, structured=structured, model_name=model_name)
+
+    logger.info(f"Analyzing transcript in {len(chunks)} chunks.")
+    results = await asyncio.gather(*(
+        _analyze_async(chunk, timeout, part=f"part {i} of {len(chunks)}", structured=structured, model_name=model_name)
+        for i, chunk in enumerate(chunks, start=1)
+    ))
+
+    unavailable = next((r for r in results if r.get("provider_unavailable")), None)
+    if unavailable:
+        return unavailable
+    errors = [r["error"] for r in results if "error" in r]
+    if errors:
+        return {"error": f"{len(errors)} of {len(chunks)} transcript chunks failed: {errors[0]}"}
+
+    summary = await _combine_summaries([r.get("summary", "") for r in results], timeout, model_name=model_name)
+    return merge_analysis_results(results, summary=summary)
+
+
+# --- Streaming analysis ---
+
+def _chunk_text(chunk) -> str:
+    # The last chunk of a stream may carry only usage metadata and no text.
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+async def _generate_stream_async(prompt: str, timeout: float, generation_config=None,
+                                 operation: str = "generate_stream", model_name: str = None) -> AsyncIterator[str]:
+    """
+    Streaming counterpart of _generate_async, yielding text as Gemini writes
+    it. Opening the stream, up to its first chunk, is retried like any other
+    call; once text has been yielded a failure is raised, not retried. A
+    concurrency slot is taken per attempt, as in _generate_async, and the
+    successful attempt keeps it until the stream ends. `timeout` covers the
+    whole stream.
+    """
+    model_name = model_name or GEMINI_MODEL_NAME
+    gemini_model = _get_model(model_name)
+    semaphore = _get_analysis_semaphore()
+
+    async def attempt(attempt_timeout):
+        # Released here if the attempt fails, so retry back-offs hold no slot;
+        # on success the slot passes to the caller below.
+        await semaphore.acquire()
+        try:
+            response = await gemini_model.generate_content_async(prompt, generation_config=generation_config, stream=True)
+            chunks = response.__aiter__()
+            try:
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                first = None
+        except BaseException:
+            semaphore.release()
+            raise
+        return response, chunks, first
+
+    with span("gemini.generate", operation=operation, model=model_name, stream=True) as call_span:
+        stats = {}
+        started = time.perf_counter()
+        response = None
+        try:
+            response, chunks, first = await gemini_caller.call(attempt, timeout, hedge=False, stats=stats)
+            try:
+                call_span.set_attribute("first_chunk_ms", round((time.perf_counter() - started) * 1000, 1))
+                if first is not None:
+                    yield _chunk_text(first)
+                    while True:
+                        remaining = started + timeout - time.perf_counter()
+                        if remaining <= 0:
+                            raise asyncio.TimeoutError(f"Gemini stream exceeded its {timeout}s deadline.")
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), remaining)
+                        except StopAsyncIteration:
+                            break
+                        yield _chunk_text(chunk)
+            finally:
+                semaphore.release()
+        except BaseException as e:
+            record_call(operation, model_name, time.perf_counter() - started, response=response, error=e,
+                        attempts=stats.get("attempts", 0))
+            raise
+        call = record_call(operation, model_name, time.perf_counter() - started, response=response,
+                           attempts=stats["attempts"])
+        call_span.set_attribute("attempts", stats["attempts"])
+        call_span.set_attribute("gen_ai.usage.input_tokens", call["prompt_tokens"])
+        call_span.set_attribute("gen_ai.usage.output_tokens", call["output_tokens"])
+
+
+def analysis_events(analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    The events a streamed analysis would have produced, for results that
+    were computed in one piece (cached or chunked analyses).
+    """
+    events = []
+    for name in STREAM_FIELD_ORDER:
+        if name not in analysis:
+            continue
+        value = analysis[name]
+        if name == "summary":
+            events.append({"type": "delta", "field": name, "text": value})
+        elif isinstance(value, list):
+            events.extend({"type": "item", "field": name, "index": i, "value": v} for i, v in enumerate(value))
+        events.append({"type": "field", "field": name, "value": value})
+    return events
+
+
+async def stream_summary_and_action_items_async(transcript_text: str, timeout: float = None, structured: bool = False,
+                                                model_name: str = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming analysis. Yields PartialJSONParser events as Gemini writes the
+    result: "delta" events with summary text, an "item" event per action
+    item, decision, speaker and topic, and a "field" event as each field
+    completes. Ends with {"type": "result", "analysis": ..., "model": ...},
+    naming the model that answered, or with an
+    {"type": "error", ...} event carrying the same flags as the error results
+    of get_summary_and_action_items_async.
+
+    Transcripts that would be chunked are analyzed in one piece and their
+    events are yielded once the merged result is ready.
+    """
+    if not transcript_text:
+        yield {"type": "error", "error": "No transcript text provided for summarization."}
+        return
+
+    timeout = GEMINI_TIMEOUT_SECONDS if timeout is None else timeout
+    prompt = build_analysis_prompt(transcript_text, structured=structured, stream=True)
+    route = check_token_budget(estimate_tokens(prompt), model_name or GEMINI_MODEL_NAME)
+    if "error" in route:
+        yield {"type": "error", "error": route["error"], "over_budget": True}
+        return
+
+    if estimate_tokens(transcript_text) > GEMINI_CHUNK_TOKEN_BUDGET:
+        analysis = await get_summary_and_action_items_chunked_async(
+            transcript_text, timeout=timeout, structured=structured, model_name=route["model"]
+        )
+        if "error" in analysis:
+            yield {"type": "error", **analysis}
+            return
+        for event in analysis_events(analysis):
+            yield event
+        yield {"type": "result", "analysis": analysis, "model": route["model"]}
+        return
+
+    parser = PartialJSONParser(stream_strings=("summary",))
+    try:
+        async for text in _generate_stream_async(prompt, timeout, generation_config=STREAM_GENERATION_CONFIG,
+                                                 operation="analysis_stream", model_name=route["model"]):
+            for event in parser.feed(text):
+                yield event
+    except ProviderUnavailable as e:
+        yield {"type": "error", "error": str(e), "provider_unavailable": True, "retry_after": e.retry_after}
+        return
+    except asyncio.TimeoutError:
+        logger.warning(f"⏱️ Gemini stream timed out after {timeout}s")
+        yield {"type": "error", "error": f"Gemini analysis timed out after {timeout} seconds.", "timed_out": True}
+        return
+    except (PartialJSONError, json.JSONDecodeError) as e:
+        logger.warning(f"❌ Unparseable streamed Gemini response: {e}")
+        yield {"type": "error", "error": f"Invalid JSON format from Gemini: {e}"}
+        return
+    except Exception as e:
+        logger.error(f"🔥 General Gemini Error: {e}")
+        yield {"type": "error", "error": f"Could not generate summary and action items: {e}"}
+        return
+
+    if not parser.complete:
+        yield {"type": "error", "error": "Gemini's streamed response ended before the JSON object was complete."}
+        return
+    yield {"type": "result", "analysis": parser.fields, "model": route["model"]}
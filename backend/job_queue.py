@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from pymongo import ReturnDocument
+
+from tracing import span
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Stages a job moves through, in order. A job document records the last
+# finished stage, so a restarted worker picks up from there instead of
+# re-running (and re-paying for) earlier stages.
+JOB_STAGES = ["uploaded", "transcribed", "analyzed", "stored"]
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_SWEEP_SECONDS = float(os.getenv("JOB_SWEEP_SECONDS", "60"))
+# Claims per job. A job whose lease keeps lapsing (it crashes or hangs its
+# worker every time) is failed instead of being re-queued forever.
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+TERMINAL_STATUSES = {"completed", "failed"}
+
+# handler(job, save) -> fields to persist once the stage finishes.
+# `save(fields)` persists partial progress mid-stage (e.g. a transcript id).
+SaveFn = Callable[[Dict[str, Any]], Awaitable[None]]
+StageHandler = Callable[[Dict[str, Any], SaveFn], Awaitable[Dict[str, Any]]]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobQueue:
+    """
+    Mongo-backed job queue with an in-process worker pool.
+
+    Jobs are claimed with a lease that workers keep renewing; jobs whose lease
+    lapses (the worker crashed or the process was killed) are re-queued by the
+    sweeper and resume from their last finished stage, up to JOB_MAX_ATTEMPTS
+    claims in all.
+    """
+
+    def __init__(self, collection, stages: List[Tuple[str, StageHandler]], workers: int = JOB_WORKERS):
+        self.collection = collection
+        self.stages = stages
+        self.workers = workers
+        self.worker_id = str(uuid.uuid4())
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._pending: Set[str] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    # --- Lifecycle ---
+
+    async def start(self):
+        await self.collection.create_index("job_id", unique=True)
+        await self.collection.create_index([("status", 1), ("lease_expires_at", 1)])
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+        logger.info(f"Job queue started with {self.workers} workers.")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # --- Public API ---
+
+    async def create_job(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        now = _now()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "status": "queued",
+            "stage": JOB_STAGES[0],
+            "stage_completed_at": {JOB_STAGES[0]: now},
+            "error": None,
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now,
+            "lease_owner": None,
+            "lease_expires_at": None,
+            **fields,
+        }
+        await self.collection.insert_one(dict(job))
+        self._publish(job)
+        self._enqueue(job["job_id"])
+        return job
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"job_id": job_id}, {"_id": 0})
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id)
+        if subscribers:
+            subscribers.discard(queue)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+    # --- Internals ---
+
+    def _enqueue(self, job_id: str):
+        if job_id not in self._pending:
+            self._pending.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    def _publish(self, job: Dict[str, Any]):
+        for queue in self._subscribers.get(job["job_id"], ()):
+            queue.put_nowait(job)
+
+    async def _claim(self, job_id: str) -> Optional[Dict[str, Any]]:
+        now = _now()
+        return await self.collection.find_one_and_update(
+            {
+                "job_id": job_id,
+                "attempts": {"$lt": JOB_MAX_ATTEMPTS},
+                "$or": [
+                    {"status": "queued"},
+                    {"status": "running", "lease_expires_at": {"$lt": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "lease_owner": self.worker_id,
+                    "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _give_up(self, job_id: str):
+        now = _now()
+        job = await self.collection.find_one_and_update(
+            {"job_id": job_id, "status": "running", "lease_expires_at": {"$lt": now}},
+            {"$set": {
+                "status": "failed",
+                "error": f"Gave up after {JOB_MAX_ATTEMPTS} attempts; the lease lapsed each time.",
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "updated_at": now,
+            }},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+        if job is not None:
+            logger.error(f"Job {job_id} failed: {job['error']}")
+            self._publish(job)
+
+    async def _update(self, job: Dict[str, Any], fields: Dict[str, Any]):
+        fields = {**fields, "updated_at": _now()}
+        await self.collection.update_one({"job_id": job["job_id"]}, {"$set": fields})
+        job.update(fields)
+        self._publish(job)
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            await self.collection.update_one(
+                {"job_id": job_id, "lease_owner": self.worker_id},
+                {"$set": {"lease_expires_at": _now() + timedelta(seconds=JOB_LEASE_SECONDS)}},
+            )
+
+    async def _run(self, job_id: str):
+        job = await self._claim(job_id)
+        if job is None:
+            return  # Already finished, or another worker holds it.
+
+        self._publish(job)
+
+        async def save(fields):
+            await self._update(job, fields)
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        # One trace per run; a resumed job starts a new trace from its last stage.
+        with span("job", job_id=job_id, resumed_from=job["stage"]) as job_span:
+            try:
+                done_index = JOB_STAGES.index(job["stage"])
+                for stage, handler in self.stages:
+                    if JOB_STAGES.index(stage) <= done_index:
+                        continue
+
+                    with span(f"job.{stage}", job_id=job_id):
+                        result = await handler(job, save) or {}
+                    await self._update(job, {
+                        **result,
+                        "stage": stage,
+                        "stage_completed_at": {**job.get("stage_completed_at", {}), stage: _now()},
+                    })
+                    logger.info(f"Job {job_id} reached stage '{stage}'.")
+
+                await self._update(job, {"status": "completed", "lease_owner": None, "lease_expires_at": None})
+            except asyncio.CancelledError:
+                # Shutting down: leave the job leased so the sweeper resumes it.
+                raise
+            except Exception as e:
+                job_span.set_error(e)
+                logger.error(f"Job {job_id} failed after stage '{job.get('stage')}': {e}")
+                await self._update(job, {"status": "failed", "error": str(e), "lease_owner": None, "lease_expires_at": None})
+            finally:
+                heartbeat.cancel()
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            self._pending.discard(job_id)
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker error for {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _sweeper(self):
+        while True:
+            try:
+                cursor = self.collection.find(
+                    {
+                        "$or": [
+                            {"status": "queued"},
+                            {"status": "running", "lease_expires_at": {"$lt": _now()}},
+                        ]
+                    },
+                    {"job_id": 1, "attempts": 1},
+                )
+                async for doc in cursor:
+                    if doc.get("attempts", 0) >= JOB_MAX_ATTEMPTS:
+                        await self._give_up(doc["job_id"])
+                    else:
+                        self._enqueue(doc["job_id"])
+            except Exception as e:
+                logger.error(f"Job sweeper error: {e}")
+            await asyncio.sleep(JOB_SWEEP_SECONDS)
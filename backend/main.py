@@ -1,27 +1,94 @@
 from datetime import datetime, timezone
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from grpc import Status
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Query, Depends
 from fastapi import status 
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 import aiofiles
+import asyncio
+import json
+import logging
 import os
+import shutil
+import time
 import uuid
+import zlib
 
-from geminiUtils import get_summary_and_action_items
-from transcriptionUtils import transcribe_audio
+from geminiUtils import answer_from_context_async, analysis_events
+from analyzers import (
+    PRIORITIES,
+    Analyzer,
+    choose_analyzer,
+    get_analyzer,
+    get_summary_and_action_items_async,
+    route_snapshot,
+    stream_summary_and_action_items_async,
+)
+from transcriptionUtils import (
+    prepare_media,
+    transcribe_prepared,
+    transcribe_file,
+    submit_transcription,
+    wait_for_transcription,
+    notify_transcription_complete,
+    close_http_client as close_transcription_client,
+    ASSEMBLYAI_WEBHOOK_SECRET,
+    WEBHOOK_AUTH_HEADER,
+)
+
+from slack_integration import send_slack_message, send_slack_messages_bulk, format_meeting_analysis_for_slack
 
-from slack_integration import send_slack_message, format_meeting_analysis_for_slack
+from email_integration import EmailOutbox, format_meeting_analysis_for_email
 
-from email_integration import send_meeting_email, format_meeting_analysis_for_email
+from notion_integration import NotionExporter
+from export_fanout import ExportFanout
+
+from audio_preprocess import PreprocessError, TimeMap, remap_timestamps
+from segmented_transcription import SEGMENTED_TRANSCRIPTION
+from transcript_store import TranscriptStore, TranscriptNotFound
+from structured_transcript import COMPACT_FORMAT_VERSION, compact_transcript
+from model_usage import track_usage, usage_stats
+from app_logging import DroppingQueueHandler, configure_logging, stop_logging
+from tracing import span, SPAN_KIND_SERVER
+from metrics import first_content_latency, request_latency, stage_latency, render_counters
+from resilience import ProviderUnavailable, provider_health
+from media_upload import (
+    InvalidUpload,
+    MediaStream,
+    MultipartUpload,
+    UploadRejected,
+    check_content_length,
+    UPLOAD_SPOOL_BYTES,
+)
+from job_queue import JobQueue, TERMINAL_STATUSES
+from batch_analysis import BatchAnalyzer, BatchInputError, extract_zip, BATCH_MAX_FILES, TRANSCRIPT_EXTENSIONS
+import rag_index
+from rag_ingest import IngestPipeline, backfill
+from meeting_queries import (
+    EXPORT_SORT,
+    MEETING_SORT,
+    MEETING_VIEWS,
+    apply_cursor,
+    apply_since,
+    build_meeting_filter,
+    build_projection,
+    encode_cursor,
+    ensure_meeting_indexes,
+)
+from search_index import InvertedIndex, SEARCH_BACKEND, build_highlights, ensure_text_index
+from result_cache import ResultCache, MemoryCache, MongoCache, sha256_hex, CACHE_MONGO_ENABLED
 
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.formparsers import MultiPartParser
+from starlette.routing import Match
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(
     title="Meeting Analysis API",
     description="API for transcribing audio/video meetings and analyzing them to extract summaries, action items, and key decisions.",
@@ -40,6 +107,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Multipart uploads stay in memory up to UPLOAD_SPOOL_BYTES, then spill to a temp file.
+MultiPartParser.spool_max_size = UPLOAD_SPOOL_BYTES
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """
+    Refuses bodies over MAX_UPLOAD_BYTES from their Content-Length, before
+    the multipart parser spools any of it.
+    """
+    try:
+        check_content_length(request.headers.get("content-length"))
+    except UploadRejected as e:
+        return JSONResponse(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, content={"detail": str(e)})
+    return await call_next(request)
+
+def route_template(request: Request) -> str:
+    """
+    The matched route's path (e.g. /meetings/{meeting_id}), so latency labels
+    do not grow with every id.
+    """
+    route = request.scope.get("route")
+    if route is None:
+        route = next((r for r in app.router.routes if r.matches(request.scope)[0] == Match.FULL), None)
+    return getattr(route, "path", "unmatched")
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    Runs each request in a server span, so pipeline stages become its child
+    spans, and records its latency by route.
+    """
+    started = time.perf_counter()
+    status_code = 500
+    with span("http.request", kind=SPAN_KIND_SERVER, **{"http.request.method": request.method, "url.path": request.url.path}) as request_span:
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            route = route_template(request)
+            request_span.name = f"{request.method} {route}"
+            request_span.set_attribute("http.route", route)
+            request_span.set_attribute("http.response.status_code", status_code)
+            request_latency.observe(time.perf_counter() - started, method=request.method, route=route, status=status_code)
+
 class ActionItem(BaseModel):
     task: str
     assignee: Optional[str] = None
@@ -63,24 +175,94 @@ class MeetingAnalysisResult(BaseModel):
     speakers_detected: Optional[List[str]] = None  
     tone_overview: Optional[str] = None          
     important_topics: Optional[List[str]] = None  
+    model_usage: Optional[Dict[str, Any]] = Field(None, description="Tokens, latency and estimated cost of the model calls behind this analysis.")
+    analyzer: Optional[str] = Field(None, description="Backend that produced the analysis: a Gemini model name or 'extractive'.")
 
 class RAGQuery(BaseModel):
     query: str = Field(..., description="The natural language query for the RAG system.")
-    meeting_id: Optional[str] = Field(None, description="Optional: Filter query to a specific meeting ID. (Currently global search)")
+    meeting_id: Optional[str] = Field(None, description="Optional: Filter query to a specific meeting ID.")
+    top_k: int = Field(rag_index.RAG_TOP_K, ge=1, le=50, description="Number of passages to retrieve.")
 
 class RAGResponse(BaseModel):
     answer: str
     source_documents: List[dict]
 
+class MeetingPage(BaseModel):
+    items: List[Dict[str, Any]] = Field(..., description="Meetings, with only the requested fields when a view or fields is given.")
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to fetch the next page; null on the last page.")
+
+class SearchHit(BaseModel):
+    meeting_id: str
+    timestamp: str
+    summary: str
+    score: float
+    highlights: Dict[str, List[str]] = Field({}, description="Matching snippets per field, with query terms wrapped in <mark>.")
+
+class SearchResponse(BaseModel):
+    query: str
+    items: List[SearchHit]
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str = Field(..., description="queued, running, completed or failed.")
+    stage: str = Field(..., description="Last finished stage: uploaded, transcribed, analyzed or stored.")
+    stage_completed_at: Dict[str, datetime] = {}
+    filename: Optional[str] = None
+    meeting_title: Optional[str] = None
+    meeting_id: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: datetime
+    updated_at: datetime
+
 client: AsyncIOMotorClient = None
 database = None
 meetings_collection = None
+jobs_collection = None
+transcripts_collection = None
+job_queue: JobQueue = None
+ingest_pipeline: IngestPipeline = None
+memory_search_index: Optional[InvertedIndex] = None
+email_outbox: EmailOutbox = None
+notion_exporter: NotionExporter = None
+export_fanout: ExportFanout = None
+backfill_task: Optional[asyncio.Task] = None
+backfill_report: Optional[Dict[str, Any]] = None
+batch_analyzer: BatchAnalyzer = None
+batch_tasks: Dict[str, asyncio.Task] = {}
+result_cache = ResultCache(MemoryCache())
+transcript_store = TranscriptStore()
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+EXPORT_BATCH_SIZE = 500
+EXPORT_FLUSH_BYTES = 64 * 1024
+JOB_EVENTS_POLL_SECONDS = 5.0
 
 class SlackExportRequest(BaseModel):
     meeting_analysis: MeetingAnalysisResult = Field(..., description="The MeetingAnalysisResult object to be exported.")
     slack_channel_id: str = Field(..., description="The ID of the Slack channel or user to send the message to.")
     export_format: str = Field("summary_and_tasks", description="Specifies what content to export.", enum=["summary_only", "tasks_only", "summary_and_tasks"])
 
+class SlackBulkExportRequest(BaseModel):
+    meeting_ids: List[str] = Field(..., min_length=1, description="IDs of stored meetings to export.")
+    slack_channel_ids: List[str] = Field(..., min_length=1, description="Slack channels or users to send each meeting to.")
+    export_format: str = Field("summary_and_tasks", description="Specifies what content to export.", enum=["summary_only", "tasks_only", "summary_and_tasks"])
+
+class EmailBulkExportRequest(BaseModel):
+    meeting_id: str = Field(..., description="ID of the stored meeting to send.")
+    recipients: List[str] = Field(..., min_length=1, description="Email addresses to send the summary to.")
+    subject: str = Field("Meeting Summary", description="Email subject line.")
+
+class NotionBulkExportRequest(BaseModel):
+    meeting_ids: List[str] = Field(..., min_length=1, description="IDs of stored meetings to export.")
+
+class ExportFanoutRequest(BaseModel):
+    slack_channel_ids: List[str] = Field([], description="Slack channels or users to send the meeting to.")
+    export_format: str = Field("summary_and_tasks", description="Slack content to export.", enum=["summary_only", "tasks_only", "summary_and_tasks"])
+    email_recipients: List[str] = Field([], description="Email addresses to send the summary to.")
+    email_subject: str = Field("Meeting Summary", description="Email subject line.")
+    notion: bool = Field(False, description="Create or update the meeting's Notion page.")
+
 # --- Application Lifecycle Events ---
 
 @app.on_event("startup")
@@ -88,7 +270,8 @@ async def startup_db_client():
     """
     Connects to the MongoDB database when the FastAPI application starts.
     """
-    global client, database, meetings_collection
+    global client, database, meetings_collection, jobs_collection, transcripts_collection, job_queue, ingest_pipeline, email_outbox, notion_exporter, export_fanout, batch_analyzer
+    configure_logging()
     mongo_db_url = os.getenv("MONGO_DB_URL")
     db_name = os.getenv("DB_NAME")
 
@@ -99,72 +282,665 @@ async def startup_db_client():
         client = AsyncIOMotorClient(mongo_db_url)
         database = client[db_name]
         meetings_collection = database["meetings"] 
-        print(f"Connected to MongoDB: {db_name}")
+        jobs_collection = database["jobs"]
+        transcripts_collection = database["meeting_transcripts"]
+        logger.info(f"Connected to MongoDB: {db_name}")
     except Exception as e:
-        print(f"Failed to connect to MongoDB: {e}")
+        logger.error(f"Failed to connect to MongoDB: {e}")
         raise
 
+    await ensure_meeting_indexes(meetings_collection)
+    if SEARCH_BACKEND == "memory":
+        await load_memory_search_index()
+    else:
+        await ensure_text_index(meetings_collection)
+
+    if CACHE_MONGO_ENABLED:
+        result_cache.mongo = MongoCache(database["result_cache"])
+        await result_cache.mongo.ensure_indexes()
+
+    rag_index.load_index()
+    await transcripts_collection.create_index("meeting_id", unique=True)
+    ingest_pipeline = IngestPipeline(database["rag_index_state"], transcripts_collection)
+    await ingest_pipeline.start()
+
+    email_outbox = EmailOutbox(database["email_outbox"])
+    await email_outbox.start()
+    notion_exporter = NotionExporter(database["notion_pages"])
+    await notion_exporter.ensure_indexes()
+    export_fanout = ExportFanout(database["export_deliveries"])
+    await export_fanout.ensure_indexes()
+    batch_analyzer = BatchAnalyzer(
+        database["analysis_batches"], database["analysis_batch_items"], meetings_collection, transcripts_collection,
+        analyze=lambda transcript, priority: analyze_with_cache(transcript, priority=priority),
+        build_meeting=build_batch_meeting,
+        on_stored=index_stored_meeting,
+    )
+    await batch_analyzer.ensure_indexes()
+
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    job_queue = JobQueue(jobs_collection, stages=[
+        ("transcribed", transcribe_job_stage),
+        ("analyzed", analyze_job_stage),
+        ("stored", store_job_stage),
+    ])
+    await job_queue.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     """
     Closes the MongoDB connection when the FastAPI application shuts down.
     """
     global client
+    if job_queue:
+        await job_queue.stop()
+    if backfill_task:
+        backfill_task.cancel()
+    for task in batch_tasks.values():
+        task.cancel()
+    if ingest_pipeline:
+        await ingest_pipeline.stop()
+    if email_outbox:
+        await email_outbox.stop()
+    await close_transcription_client()
     if client:
         client.close()
-        print("Disconnected from MongoDB.")
+        logger.info("Disconnected from MongoDB.")
+    stop_logging()
 
 
-# --- API Endpoints ---
+# --- Helpers ---
 
-@app.post("/analyze/", summary="Analyze a pre-existing transcript")
-async def analyze_transcript(file: UploadFile = File(..., description="Text file containing the meeting transcript.")):
+CLIENT_DISCONNECT_POLL_SECONDS = 0.5
+
+async def run_until_disconnect(request: Request, coro):
     """
-    Accepts a plain text file containing a meeting transcript and processes it
-    to generate a summary, action items, and key decisions.
+    Awaits `coro` but cancels it if the client goes away first, so abandoned
+    requests stop holding a Gemini/AssemblyAI slot.
     """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=CLIENT_DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                logger.info("Client disconnected, cancelled in-flight analysis.")
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def build_meeting_analysis(
+    meeting_id: str,
+    transcript: str,
+    analysis: Dict[str, Any],
+    timestamp: Optional[str] = None,
+    full_transcript_path: Optional[str] = None,
+    model_usage: Optional[Dict[str, Any]] = None
+) -> MeetingAnalysisResult:
+    return MeetingAnalysisResult(
+        meeting_id=meeting_id,
+        timestamp=timestamp or datetime.now(timezone.utc).isoformat(),
+        summary=analysis.get("summary", "No summary could be generated."),
+        action_items=[ActionItem(**item) for item in analysis.get("action_items", [])],
+        key_decisions=[KeyDecision(**item) for item in analysis.get("key_decisions", [])],
+        raw_transcript_preview=transcript[:500] + "..." if len(transcript) > 500 else transcript,
+        full_transcript_path=full_transcript_path,
+        speakers_detected=analysis.get("speakers_detected"),
+        tone_overview=analysis.get("tone_overview"),
+        important_topics=analysis.get("important_topics"),
+        model_usage=model_usage,
+        analyzer=analysis.get("analyzer")
+    )
+
+
+def provider_unavailable_error(detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=detail,
+        headers={"Retry-After": str(max(int(retry_after), 1))}
+    )
+
+
+def analysis_cache_key(transcript: str, analyzer: Analyzer) -> str:
+    return f"{sha256_hex(transcript.encode('utf-8'))}:{analyzer.cache_version()}"
+
+
+async def analyze_with_cache(transcript: str, request: Optional[Request] = None,
+                             structured: bool = False, priority: str = "normal") -> Dict[str, Any]:
+    """
+    Runs the routed analysis backend unless an identical transcript was
+    already analyzed by the same backend and prompt version. Errors are never
+    cached; a fallback result is cached under the backend that produced it.
+    `structured` marks a compact speaker-aware transcript.
+    """
+    with span("analysis", structured=structured) as analysis_span:
+        analyzer, reason = choose_analyzer(transcript, priority, structured)
+        analysis_span.set_attribute("analyzer", analyzer.name)
+        analysis_span.set_attribute("route", reason)
+        cached = await result_cache.get("analysis", analysis_cache_key(transcript, analyzer))
+        analysis_span.set_attribute("cache_hit", cached is not None)
+        if cached is not None:
+            return {"analyzer": analyzer.name, **cached}
+
+        pending = get_summary_and_action_items_async(transcript, structured=structured, analyzer=analyzer)
+        analysis = await (run_until_disconnect(request, pending) if request else pending)
+        if "error" in analysis:
+            analysis_span.set_error(analysis["error"])
+        else:
+            await result_cache.set("analysis", analysis_cache_key(transcript, get_analyzer(analysis["analyzer"])), analysis)
+        return analysis
+
+
+def raise_for_analysis_error(analysis: Dict[str, Any]):
+    if analysis.get("provider_unavailable"):
+        raise provider_unavailable_error(analysis["error"], analysis["retry_after"])
+    if analysis.get("over_budget"):
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=analysis["error"])
+    if "error" in analysis:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=analysis["error"])
+
+
+async def store_meeting(meeting: MeetingAnalysisResult, transcript: str):
+    """
+    Persists a meeting and its full transcript, then queues it for RAG
+    indexing. Upserts on meeting_id, so storing the same meeting twice is safe.
+    """
+    meeting_doc = meeting.model_dump(by_alias=True)
+    with span("db_insert", meeting_id=meeting.meeting_id):
+        await meetings_collection.replace_one({"meeting_id": meeting.meeting_id}, meeting_doc, upsert=True)
+        await transcripts_collection.replace_one(
+            {"meeting_id": meeting.meeting_id},
+            {"meeting_id": meeting.meeting_id, "text": transcript},
+            upsert=True
+        )
+    index_stored_meeting(meeting_doc, transcript)
+
+
+def index_stored_meeting(meeting_doc: Dict[str, Any], transcript: str):
+    """
+    Queues a stored meeting for RAG indexing and adds it to the in-memory
+    search index when that backend is in use.
+    """
+    ingest_pipeline.submit(meeting_doc["meeting_id"], transcript, meeting_doc)
+    if memory_search_index is not None:
+        memory_search_index.add(meeting_doc["meeting_id"], meeting_doc)
+
+
+def build_batch_meeting(meeting_id: str, transcript: str, analysis: Dict[str, Any],
+                        model_usage: Dict[str, Any]) -> Dict[str, Any]:
+    return build_meeting_analysis(meeting_id, transcript, analysis, model_usage=model_usage).model_dump(by_alias=True)
+
+
+async def load_memory_search_index():
+    global memory_search_index
+    memory_search_index = InvertedIndex()
+    projection = {"_id": 0, "meeting_id": 1, "summary": 1, "important_topics": 1, "action_items.task": 1, "key_decisions.description": 1}
+    async for doc in meetings_collection.find({}, projection).batch_size(EXPORT_BATCH_SIZE):
+        memory_search_index.add(doc["meeting_id"], doc)
+    logger.info(f"Loaded in-memory search index with {len(memory_search_index)} meetings.")
+
+
+def build_export_senders(meeting_doc: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    One sender per destination for the fan-out export. Each destination's
+    format is rendered here once and shared by all of its targets.
+    """
+    meeting = MeetingAnalysisResult(**meeting_doc).model_dump()
+    slack_text = format_meeting_analysis_for_slack(meeting, options["export_format"])
+    email_body = format_meeting_analysis_for_email(meeting)
+
+    async def send_slack(channel_id: str, progress: Dict[str, Any]):
+        return await send_slack_message(channel_id=channel_id, message_text=slack_text, resume=progress)
+
+    async def send_email(recipient: str, progress: Dict[str, Any]):
+        outbox_ids = await email_outbox.enqueue(
+            [{"recipient": recipient, "subject": options["email_subject"], "body": email_body}],
+            meeting_id=meeting["meeting_id"]
+        )
+        # The outbox owns retries from here on.
+        return {"status": "queued", "outbox_id": outbox_ids[0]}
+
+    async def send_notion(database_id: str, progress: Dict[str, Any]):
+        return await notion_exporter.upsert_meeting_page(meeting)
+
+    return {"slack": send_slack, "email": send_email, "notion": send_notion}
+
+def summarize_export(export: Dict[str, Any]) -> Dict[str, Any]:
+    failed = [d for d in export["deliveries"] if d["status"] == "failed"]
+    total = len(export["deliveries"])
+    return {
+        "message": f"{total - len(failed)} of {total} deliveries succeeded.",
+        "export_id": export["export_id"],
+        "meeting_id": export["meeting_id"],
+        "deliveries": export["deliveries"],
+    }
+
+async def transcribe_and_store_stream(request: Request, chunks, priority: str = "normal") -> MeetingAnalysisResult:
+    """
+    Streams media straight to AssemblyAI while hashing and size-checking it,
+    then transcribes (unless the same media was seen before), analyzes and
+    stores the meeting. The media itself is never written to local disk; only
+    the compact detailed transcript is.
+    """
+    meeting_id = str(uuid.uuid4())
+    full_transcript_path = None
+    try:
+        media = MediaStream(chunks)
+        with span("upload") as upload_span:
+            prepared = await prepare_media(media)
+            upload_span.set_attribute("bytes", media.size)
+        logger.info(f"Received {media.size} bytes of media (sha256 {media.sha256[:12]}).")
+
+        # The media has been consumed by now, but a repeated file still skips transcription.
+        raw_transcript_text = await result_cache.get("transcript", media.sha256)
+        analysis_text = await result_cache.get("transcript_compact", f"{media.sha256}:{COMPACT_FORMAT_VERSION}")
+        if not raw_transcript_text:
+            with span("transcription"):
+                transcript = await transcribe_prepared(prepared)
+            raw_transcript_text = transcript.get("text") or ""
+            analysis_text = compact_transcript(transcript)
+            if raw_transcript_text:
+                await result_cache.set("transcript", media.sha256, raw_transcript_text)
+                if analysis_text:
+                    await result_cache.set("transcript_compact", f"{media.sha256}:{COMPACT_FORMAT_VERSION}", analysis_text)
+                full_transcript_path = await transcript_store.save(meeting_id, transcript)
+        if not raw_transcript_text:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Transcription failed or returned empty text. No speech detected or an error occurred."
+            )
+
+        # Gemini gets the speaker-aware transcript when diarization produced one;
+        # the flat text is still what gets stored and indexed.
+        with track_usage() as usage:
+            analysis_result_data = await analyze_with_cache(
+                analysis_text or raw_transcript_text, request, structured=bool(analysis_text), priority=priority
+            )
+        raise_for_analysis_error(analysis_result_data)
+
+        meeting_analysis_object = build_meeting_analysis(
+            meeting_id=meeting_id,
+            transcript=raw_transcript_text,
+            analysis=analysis_result_data,
+            full_transcript_path=full_transcript_path,
+            model_usage=usage.summary()
+        )
+
+        await store_meeting(meeting_analysis_object, raw_transcript_text)
+        logger.info(f"Meeting analysis result for ID {meeting_id} stored in MongoDB.")
+
+        return meeting_analysis_object
+
+    except UploadRejected as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except InvalidUpload as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except PreprocessError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Could not preprocess audio: {e}")
+    except ProviderUnavailable as e:
+        raise provider_unavailable_error(str(e), e.retry_after)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"An unexpected error occurred during transcription and analysis: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An internal server error occurred: {e}"
+        )
+
+def validate_media_upload(content_type: Optional[str]):
+    allowed_content_types = ["audio/", "video/"]
+    if not content_type or not any(content_type.startswith(t) for t in allowed_content_types):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported file type: {content_type}. Please upload an audio or video file."
+        )
+
+# Media endpoints read the multipart body themselves (MultipartUpload), so the
+# form is described here for the OpenAPI docs instead of with File(...).
+MEDIA_UPLOAD_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["file"],
+            "properties": {"file": {"type": "string", "format": "binary", "description": "Audio or video file of the meeting."}},
+        }}},
+    }
+}
+
+async def open_media_upload(request: Request) -> MultipartUpload:
+    """
+    Starts reading the "file" field of a multipart media upload and checks
+    its content type. Nothing is spooled; the file is read as it is consumed.
+    """
+    try:
+        upload = MultipartUpload(request.headers.get("content-type", ""), request.stream())
+        found = await upload.open()
+    except InvalidUpload as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not found:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="The form has no 'file' field.")
+    validate_media_upload(upload.content_type)
+    return upload
+
+
+# --- Background Job Stages ---
+# Each stage returns the fields to persist on the job document. Stages must be
+# safe to re-run: a job resumed after a crash repeats the unfinished stage.
+
+async def transcribe_job_stage(job: Dict[str, Any], save) -> Dict[str, Any]:
+    media_sha256 = job.get("media_sha256")
+    cached_transcript = media_sha256 and await result_cache.get("transcript", media_sha256)
+    if cached_transcript:
+        return {
+            "transcript_text": cached_transcript,
+            "analysis_text": await result_cache.get("transcript_compact", f"{media_sha256}:{COMPACT_FORMAT_VERSION}"),
+        }
+
+    if SEGMENTED_TRANSCRIPTION:
+        # Several AssemblyAI jobs per file; a resumed job starts them over.
+        with span("transcription", segmented=True):
+            transcript = await transcribe_file(job["file_path"])
+        return await transcript_job_fields(job, transcript)
+
+    transcript_id = job.get("transcript_id")
+    if not transcript_id:
+        with span("upload"):
+            transcript_id, time_map = await submit_transcription(job["file_path"])
+        # Persist before waiting so a restart re-attaches instead of re-uploading.
+        await save({"transcript_id": transcript_id, "time_map": time_map.segments if time_map else None})
+
+    with span("transcription", transcript_id=transcript_id):
+        transcript = await wait_for_transcription(transcript_id)
+    if job.get("time_map"):
+        remap_timestamps(transcript, TimeMap(job["time_map"]))
+    return await transcript_job_fields(job, transcript)
+
+
+async def transcript_job_fields(job: Dict[str, Any], transcript: Dict[str, Any]) -> Dict[str, Any]:
+    transcript_text = transcript.get("text")
+    if not transcript_text:
+        raise ValueError("Transcription failed or returned empty text. No speech detected or an error occurred.")
+    analysis_text = compact_transcript(transcript)
+    if job.get("media_sha256"):
+        await result_cache.set("transcript", job["media_sha256"], transcript_text)
+        if analysis_text:
+            await result_cache.set("transcript_compact", f"{job['media_sha256']}:{COMPACT_FORMAT_VERSION}", analysis_text)
+    full_transcript_path = await transcript_store.save(job["meeting_id"], transcript)
+    return {"transcript_text": transcript_text, "analysis_text": analysis_text, "full_transcript_path": full_transcript_path}
+
+
+async def analyze_job_stage(job: Dict[str, Any], save) -> Dict[str, Any]:
+    analysis_text = job.get("analysis_text")
+    with track_usage() as usage:
+        analysis = await analyze_with_cache(analysis_text or job["transcript_text"], structured=bool(analysis_text),
+                                            priority=job.get("priority", "normal"))
+    if "error" in analysis:
+        raise ValueError(analysis["error"])
+    return {"analysis": analysis, "model_usage": usage.summary()}
+
+
+async def store_job_stage(job: Dict[str, Any], save) -> Dict[str, Any]:
+    meeting_analysis_object = build_meeting_analysis(
+        meeting_id=job["meeting_id"],
+        transcript=job["transcript_text"],
+        analysis=job["analysis"],
+        full_transcript_path=job.get("full_transcript_path"),
+        model_usage=job.get("model_usage")
+    )
+    await store_meeting(meeting_analysis_object, job["transcript_text"])
+    if os.path.exists(job["file_path"]):
+        os.remove(job["file_path"])
+    logger.info(f"Job {job['job_id']} stored meeting {job['meeting_id']}.")
+    return {}
+
+
+# --- API Endpoints ---
+
+async def read_transcript_upload(file: UploadFile) -> str:
     content = await file.read()
     try:
-        transcript = content.decode("utf-8")
+        return content.decode("utf-8")
     except UnicodeDecodeError:
         raise HTTPException(
             status_code=400,
             detail="Could not decode transcript file. Please ensure it's a valid UTF-8 text file."
         )
 
-    analysis_result = get_summary_and_action_items(transcript)
+PRIORITY_DESCRIPTION = "low: local extractive analysis; normal: routed by transcript length and cost; high: always the default Gemini model."
+
+@app.post("/analyze/", summary="Analyze a pre-existing transcript")
+async def analyze_transcript(
+    request: Request,
+    file: UploadFile = File(..., description="Text file containing the meeting transcript."),
+    priority: str = Query("normal", enum=PRIORITIES, description=PRIORITY_DESCRIPTION)
+):
+    """
+    Accepts a plain text file containing a meeting transcript and processes it
+    to generate a summary, action items, and key decisions.
+    """
+    transcript = await read_transcript_upload(file)
+    started = time.perf_counter()
 
-    if "error" in analysis_result:
-        raise HTTPException(status_code=500, detail=analysis_result["error"])
+    with track_usage() as usage:
+        analysis_result = await analyze_with_cache(transcript, request, priority=priority)
+    raise_for_analysis_error(analysis_result)
 
-    meeting_id = str(uuid.uuid4())
-    timestamp = datetime.now(timezone.utc).isoformat()
-    
-    meeting_analysis_object = MeetingAnalysisResult(
-        meeting_id=meeting_id,
-        timestamp=timestamp,
-        summary=analysis_result.get("summary", "No summary could be generated."),
-        action_items=[ActionItem(**item) for item in analysis_result.get("action_items", [])],
-        key_decisions=[KeyDecision(**item) for item in analysis_result.get("key_decisions", [])],
-        raw_transcript_preview=transcript[:500] + "..." if len(transcript) > 500 else transcript,
-        speakers_detected=analysis_result.get("speakers_detected"),
-        tone_overview=analysis_result.get("tone_overview"),
-        important_topics=analysis_result.get("important_topics")
+    meeting_analysis_object = build_meeting_analysis(
+        meeting_id=str(uuid.uuid4()),
+        transcript=transcript,
+        analysis=analysis_result,
+        model_usage=usage.summary()
     )
-    
-    # rag_metadata = meeting_analysis_object.model_dump(exclude={"raw_transcript_preview"})
-    # await create_and_store_embeddings_simple(
-    #     meeting_id=meeting_analysis_object.meeting_id,
-    #     full_text_content=transcript,
-    #     metadata=rag_metadata
-    # )
+
+    await store_meeting(meeting_analysis_object, transcript)
+    first_content_latency.observe(time.perf_counter() - started, endpoint="/analyze/")
 
     return meeting_analysis_object
 
-@app.post("/transcribe-and-analyze/", response_model=MeetingAnalysisResult, summary="Transcribe Audio/Video and Analyze Meeting")
+ANALYSIS_STREAM_FORMATS = ["sse", "ndjson"]
+
+async def produce_streamed_analysis(transcript: str, events: asyncio.Queue, priority: str = "normal"):
+    """
+    Runs a streamed analysis in its own task, putting each event on `events`
+    and then None. Ends with a "result" event holding the stored meeting, or
+    an "error" event. A cached analysis is replayed at once.
+    """
+    try:
+        with track_usage() as usage, span("analysis", stream=True) as analysis_span:
+            analyzer, reason = choose_analyzer(transcript, priority)
+            analysis_span.set_attribute("analyzer", analyzer.name)
+            analysis_span.set_attribute("route", reason)
+            cached = await result_cache.get("analysis", analysis_cache_key(transcript, analyzer))
+            analysis_span.set_attribute("cache_hit", cached is not None)
+            if cached is not None:
+                for event in analysis_events(cached):
+                    events.put_nowait(event)
+                analysis = {"analyzer": analyzer.name, **cached}
+            else:
+                analysis = None
+                async for event in stream_summary_and_action_items_async(transcript, analyzer=analyzer):
+                    if event["type"] == "error":
+                        analysis_span.set_error(event["error"])
+                        events.put_nowait(event)
+                        return
+                    if event["type"] == "result":
+                        analysis = event["analysis"]
+                    else:
+                        events.put_nowait(event)
+                await result_cache.set("analysis", analysis_cache_key(transcript, get_analyzer(analysis["analyzer"])), analysis)
+
+        meeting = build_meeting_analysis(
+            meeting_id=str(uuid.uuid4()),
+            transcript=transcript,
+            analysis=analysis,
+            model_usage=usage.summary()
+        )
+        await store_meeting(meeting, transcript)
+        events.put_nowait({"type": "result", "meeting": meeting.model_dump(by_alias=True)})
+    except Exception as e:
+        logger.error(f"Streamed analysis failed: {e}")
+        events.put_nowait({"type": "error", "error": f"Could not complete the analysis: {e}"})
+    finally:
+        events.put_nowait(None)
+
+
+def format_stream_event(event: Dict[str, Any], output_format: str) -> str:
+    if output_format == "ndjson":
+        return json.dumps(event, default=str) + "\n"
+    payload = {k: v for k, v in event.items() if k != "type"}
+    return f"event: {event['type']}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+@app.post("/analyze/stream", summary="Analyze a pre-existing transcript, streaming results as they are generated")
+async def analyze_transcript_stream(
+    request: Request,
+    file: UploadFile = File(..., description="Text file containing the meeting transcript."),
+    output_format: str = Query("sse", alias="format", enum=ANALYSIS_STREAM_FORMATS, description="Server-sent events or newline-delimited JSON."),
+    priority: str = Query("normal", enum=PRIORITIES, description=PRIORITY_DESCRIPTION)
+):
+    """
+    Same analysis as /analyze/, streamed while Gemini writes it so the summary
+    can be shown before the rest is ready. Events, in order:
+    - `delta`: a piece of the summary text as it is generated
+    - `item`: one action item, key decision, speaker or topic, as soon as it is parsed
+    - `field`: a top-level field once its value is complete
+    - `result`: the stored MeetingAnalysisResult
+
+    Failures before any content (budget, Gemini unavailable) are returned as
+    HTTP errors like /analyze/; later ones end the stream with an `error` event.
+    """
+    transcript = await read_transcript_upload(file)
+    started = time.perf_counter()
+
+    events: asyncio.Queue = asyncio.Queue()
+    producer = asyncio.create_task(produce_streamed_analysis(transcript, events, priority))
+    try:
+        first = await run_until_disconnect(request, events.get())
+        if first["type"] == "error":
+            raise_for_analysis_error(first)
+    except BaseException:
+        producer.cancel()
+        raise
+    first_content_latency.observe(time.perf_counter() - started, endpoint="/analyze/stream")
+
+    async def event_stream():
+        event = first
+        try:
+            while event is not None:
+                yield format_stream_event(event, output_format)
+                event = await events.get()
+        finally:
+            # A disconnected client stops the Gemini stream too.
+            producer.cancel()
+
+    media_type = "application/x-ndjson" if output_format == "ndjson" else "text/event-stream"
+    return StreamingResponse(event_stream(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+# --- Batch analysis ---
+
+async def save_upload(file: UploadFile, path: str):
+    async with aiofiles.open(path, "wb") as out_file:
+        while content := await file.read(1024 * 1024):
+            await out_file.write(content)
+
+
+def unique_name(name: str, taken: set, index: int) -> str:
+    return f"{index}-{name}" if name in taken else name
+
+
+def start_batch_run(batch_id: str):
+    async def run():
+        try:
+            await batch_analyzer.run(batch_id)
+        except Exception as e:
+            logger.exception(f"Batch {batch_id} failed: {e}")
+        finally:
+            batch_tasks.pop(batch_id, None)
+
+    batch_tasks[batch_id] = asyncio.create_task(run())
+
+
+@app.post("/analyze/batch", status_code=status.HTTP_202_ACCEPTED, summary="Analyze many transcripts uploaded as text files or zips")
+async def analyze_transcript_batch(
+    files: List[UploadFile] = File(..., description="Transcript .txt files and/or .zip archives of them."),
+    priority: str = Query("normal", enum=PRIORITIES, description=PRIORITY_DESCRIPTION)
+):
+    """
+    Saves the uploads (extracting zips) and returns a batch id immediately.
+    The transcripts are then analyzed in the background with bounded
+    concurrency; poll GET /analyze/batch/{batch_id} for progress and the
+    final report.
+    """
+    batch_id = str(uuid.uuid4())
+    batch_dir = os.path.join(UPLOAD_DIR, "batches", batch_id)
+    os.makedirs(batch_dir, exist_ok=True)
+    names: List[str] = []
+    try:
+        for index, file in enumerate(files):
+            file_name = os.path.basename(file.filename or f"upload-{index}.txt")
+            if file_name.lower().endswith(".zip"):
+                zip_path = os.path.join(batch_dir, f".upload-{index}.zip")
+                await save_upload(file, zip_path)
+                folder = unique_name(file_name[:-4], set(os.listdir(batch_dir)), index)
+                members = await asyncio.to_thread(extract_zip, zip_path, os.path.join(batch_dir, folder))
+                os.remove(zip_path)
+                names.extend(os.path.join(folder, member) for member in members)
+            elif file_name.lower().endswith(TRANSCRIPT_EXTENSIONS):
+                name = unique_name(file_name, set(names), index)
+                await save_upload(file, os.path.join(batch_dir, name))
+                names.append(name)
+            else:
+                raise BatchInputError(f"{file.filename}: expected a .txt transcript or a .zip of transcripts.")
+        if not names:
+            raise BatchInputError("No .txt transcripts found in the upload.")
+        if len(names) > BATCH_MAX_FILES:
+            raise BatchInputError(f"The upload holds {len(names)} transcripts; the limit is {BATCH_MAX_FILES}.")
+    except BatchInputError as e:
+        shutil.rmtree(batch_dir, ignore_errors=True)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        shutil.rmtree(batch_dir, ignore_errors=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Could not save upload: {e}")
+
+    batch = await batch_analyzer.create(batch_dir, names, priority, batch_id=batch_id)
+    start_batch_run(batch_id)
+    return batch
+
+
+@app.get("/analyze/batch/{batch_id}", summary="Progress and report of a batch analysis")
+async def get_batch_status(batch_id: str):
+    batch = await batch_analyzer.get(batch_id)
+    if not batch:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found.")
+    return batch
+
+
+@app.post("/analyze/batch/{batch_id}/resume", status_code=status.HTTP_202_ACCEPTED, summary="Continue an interrupted batch analysis")
+async def resume_batch(batch_id: str):
+    """
+    Re-runs the files of a batch that were not stored yet, including those
+    that failed. Files already stored are skipped.
+    """
+    batch = await batch_analyzer.get(batch_id)
+    if not batch:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found.")
+    if batch_id in batch_tasks:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="This batch is already running.")
+    start_batch_run(batch_id)
+    return batch
+
+
+@app.post("/transcribe-and-analyze/", response_model=MeetingAnalysisResult, summary="Transcribe Audio/Video and Analyze Meeting",
+          openapi_extra=MEDIA_UPLOAD_FORM)
 async def transcribe_and_analyze(
-    file: UploadFile = File(..., description="Audio or video file of the meeting."),
-    meeting_title: Optional[str] = None 
+    request: Request,
+    meeting_title: Optional[str] = None,
+    priority: str = Query("normal", enum=PRIORITIES, description=PRIORITY_DESCRIPTION)
 ):
     """
     Accepts an audio or video file, transcribes it using AssemblyAI,
@@ -174,90 +950,205 @@ async def transcribe_and_analyze(
     - Key decisions (with decision date & involved speakers)
 
     The results are stored persistently in MongoDB.
+
+    The file is read from the multipart body as it arrives and streamed to
+    AssemblyAI; it is not spooled to memory or disk. MAX_MEDIA_SECONDS is
+    enforced up front for WAV files only. Other containers are checked when
+    they are decoded (AUDIO_PREPROCESS or SEGMENTED_TRANSCRIPTION); otherwise
+    their length is not checked.
     """
+    upload = await open_media_upload(request)
+    return await transcribe_and_store_stream(request, upload, priority)
 
-    # Validate file type 
-    allowed_content_types = ["audio/", "video/"]
-    if not any(file.content_type.startswith(t) for t in allowed_content_types):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unsupported file type: {file.content_type}. Please upload an audio or video file."
-        )
+@app.post("/transcribe-and-analyze/stream", response_model=MeetingAnalysisResult, summary="Transcribe and analyze a raw media request body")
+async def transcribe_and_analyze_stream(
+    request: Request,
+    meeting_title: Optional[str] = None,
+    priority: str = Query("normal", enum=PRIORITIES, description=PRIORITY_DESCRIPTION)
+):
+    """
+    Same as /transcribe-and-analyze/, but the request body is the media file
+    itself (Content-Type audio/* or video/*). The body is forwarded to
+    AssemblyAI as it arrives and never touches the local disk. The duration
+    limit applies as for /transcribe-and-analyze/.
+    """
+    validate_media_upload(request.headers.get("content-type"))
+    return await transcribe_and_store_stream(request, request.stream(), priority)
 
-    # Save the uploaded file temporarily
-    unique_filename = f"{uuid.uuid4()}_{file.filename}"
-    # Before saving the file
-    os.makedirs("temp", exist_ok=True)  # Ensure temp directory exists
-    temp_file_path = os.path.join("temp", unique_filename)
-    # temp_file_path = f"/tmp/{unique_filename}"
+@app.post("/jobs", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED, summary="Queue an audio/video file for background transcription and analysis",
+          openapi_extra=MEDIA_UPLOAD_FORM)
+async def create_transcription_job(
+    request: Request,
+    meeting_title: Optional[str] = None,
+    priority: str = Query("normal", enum=PRIORITIES, description=PRIORITY_DESCRIPTION)
+):
+    """
+    Saves the upload and returns a job id immediately. A background worker then
+    transcribes, analyzes and stores the meeting; poll GET /jobs/{job_id} or
+    follow GET /jobs/{job_id}/events for progress. The file is written
+    straight from the request body to UPLOAD_DIR, without a spooled copy.
+    """
+    upload = await open_media_upload(request)
 
+    file_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}_{os.path.basename(upload.filename or 'upload')}")
+    media = MediaStream(upload)
     try:
-        async with aiofiles.open(temp_file_path, 'wb') as out_file:
-            while content := await file.read(1024 * 1024): # Read in chunks of 1MB
+        async with aiofiles.open(file_path, 'wb') as out_file:
+            async for content in media:
                 await out_file.write(content)
+    except (UploadRejected, InvalidUpload) as e:
+        os.remove(file_path)
+        code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE if isinstance(e, UploadRejected) else status.HTTP_400_BAD_REQUEST
+        raise HTTPException(status_code=code, detail=str(e))
+    except Exception as e:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Could not save upload: {e}")
 
-        print(f"File saved temporarily at: {temp_file_path}")
+    job = await job_queue.create_job({
+        "file_path": file_path,
+        "filename": upload.filename,
+        "meeting_title": meeting_title,
+        "meeting_id": str(uuid.uuid4()),
+        "media_sha256": media.sha256,
+        "priority": priority,
+    })
+    return JobStatus(**job)
 
-        # Transcribe the audio/video file using AssemblyAI
-        raw_transcript_text = await transcribe_audio(temp_file_path)
-        if not raw_transcript_text:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Transcription failed or returned empty text. No speech detected or an error occurred."
-            )
 
-        # Process the raw transcript using Gemini for summary, action items, and key decisions
-        analysis_result_data = get_summary_and_action_items(raw_transcript_text)
+@app.get("/jobs/{job_id}", response_model=JobStatus, summary="Get the status of a background job")
+async def get_job_status(job_id: str):
+    job = await job_queue.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return JobStatus(**job)
 
-        if "error" in analysis_result_data:
-            raise HTTPException(status_code=Status.HTTP_500_INTERNAL_SERVER_ERROR, detail=analysis_result_data["error"])
 
-        # Construct the MeetingAnalysisResult Pydantic model instance
-        meeting_id = str(uuid.uuid4())
-        timestamp = datetime.now(timezone.utc).isoformat()
+@app.get("/jobs/{job_id}/events", summary="Stream job progress as server-sent events")
+async def stream_job_events(request: Request, job_id: str):
+    """
+    Emits a `progress` event with the job status whenever it changes, ending
+    once the job completes or fails.
+    """
+    job = await job_queue.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
 
-        summary = analysis_result_data.get("summary", "No summary could be generated.")
-        action_items_list = [ActionItem(**item) for item in analysis_result_data.get("action_items", [])]
-        key_decisions_list = [KeyDecision(**item) for item in analysis_result_data.get("key_decisions", [])]
+    async def event_stream():
+        updates = job_queue.subscribe(job_id)
+        current = job
+        last_sent = None
+        try:
+            while True:
+                payload = JobStatus(**current).model_dump_json()
+                if payload != last_sent:
+                    yield f"event: progress\ndata: {payload}\n\n"
+                    last_sent = payload
+                if current["status"] in TERMINAL_STATUSES or await request.is_disconnected():
+                    break
+                try:
+                    current = await asyncio.wait_for(updates.get(), timeout=JOB_EVENTS_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    # The job may be running in another process; fall back to Mongo.
+                    current = await job_queue.get_job(job_id) or current
+                    yield ": keep-alive\n\n"
+        finally:
+            job_queue.unsubscribe(job_id, updates)
 
-        meeting_analysis_object = MeetingAnalysisResult(
-            meeting_id=meeting_id,
-            timestamp=timestamp,
-            summary=summary,
-            action_items=action_items_list,
-            key_decisions=key_decisions_list,
-            raw_transcript_preview=raw_transcript_text[:500] + "..." if len(raw_transcript_text) > 500 else raw_transcript_text,
-            full_transcript_path=temp_file_path,
-            speakers_detected=analysis_result_data.get("speakers_detected"),
-            tone_overview=analysis_result_data.get("tone_overview"),
-            important_topics=analysis_result_data.get("important_topics")
-        )
-        
-        # rag_metadata = meeting_analysis_object.model_dump(exclude={"raw_transcript_preview", "full_transcript_path"})
-        # await create_and_store_embeddings_simple(
-        #     meeting_id=meeting_analysis_object.meeting_id,
-        #     full_text_content=raw_transcript_text, 
-        #     metadata=rag_metadata
-        # )
-
-        # Store the analysis result in MongoDB
-        await meetings_collection.insert_one(meeting_analysis_object.model_dump(by_alias=True))
-        print(f"Meeting analysis result for ID {meeting_id} stored in MongoDB.")
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
-        return meeting_analysis_object
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"An unexpected error occurred during transcription and analysis: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An internal server error occurred: {e}"
-        )
-    finally:
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
-            print(f"Cleaned up temporary file: {temp_file_path}")
+@app.get("/cache/stats", summary="Transcription and analysis cache hit/miss counters")
+async def get_cache_stats():
+    return result_cache.stats()
+
+
+@app.get("/health/providers", summary="Health of the Gemini and AssemblyAI integrations")
+async def get_provider_health():
+    """
+    Circuit state, recent latency and failure/retry/hedge counters per
+    provider, for this worker. Responds 503 while any circuit is open.
+    """
+    health = provider_health()
+    degraded = any(p["circuit"] == "open" for p in health.values())
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE if degraded else status.HTTP_200_OK, content=health)
+
+
+@app.get("/metrics", response_class=PlainTextResponse, summary="Prometheus metrics")
+async def get_prometheus_metrics():
+    """
+    Latency histograms per pipeline stage and per endpoint, and model token,
+    cost and call counters, for this worker in Prometheus text format.
+    """
+    usage = usage_stats.snapshot()["calls"]
+
+    def model_labels(call):
+        return {"model": call["model"], "operation": call["operation"]}
+
+    lines = stage_latency.render() + request_latency.render() + first_content_latency.render()
+    lines += render_counters("model_calls_total", "Model calls made.", [(model_labels(c), c["calls"]) for c in usage])
+    lines += render_counters("model_call_errors_total", "Model calls that failed.", [(model_labels(c), c["errors"]) for c in usage])
+    lines += render_counters("model_tokens_total", "Model tokens used.", [
+        ({**model_labels(c), "kind": kind}, c[f"{kind}_tokens"]) for c in usage for kind in ("prompt", "output")
+    ])
+    lines += render_counters("model_cost_usd_total", "Estimated model cost in USD.", [(model_labels(c), c["cost_usd"]) for c in usage])
+    providers = provider_health().values()
+    lines += render_counters("provider_circuit_open", "1 while the provider's circuit breaker is open.",
+                             [({"provider": p["provider"]}, int(p["circuit"] == "open")) for p in providers], metric_type="gauge")
+    lines += render_counters("provider_retries_total", "Provider call attempts that were retried.",
+                             [({"provider": p["provider"]}, p["retries"]) for p in providers])
+    lines += render_counters("provider_hedges_total", "Hedged duplicate provider calls.",
+                             [({"provider": p["provider"]}, p["hedges"]) for p in providers])
+    lines += render_counters("analysis_routes_total", "Analyses routed to each backend, by routing reason.",
+                             [({"analyzer": r["analyzer"], "reason": r["reason"]}, r["count"]) for r in route_snapshot()])
+    lines += render_counters("log_records_dropped_total", "Log records dropped because the log queue was full.",
+                             [({}, DroppingQueueHandler.dropped)])
+    return "\n".join(lines) + "\n"
+
+
+@app.get("/metrics/usage", summary="Model token usage, latency and estimated cost")
+async def get_model_metrics(since: Optional[datetime] = Query(None, description="Only count meetings analyzed after this time.")):
+    """
+    `process` covers every model call this worker made since it started,
+    by model and operation. `meetings` aggregates the usage stored with each
+    meeting, across all workers.
+    """
+    pipeline = [
+        {"$match": apply_since({"model_usage": {"$ne": None}}, since)},
+        {"$group": {
+            "_id": None,
+            "meetings": {"$sum": 1},
+            "calls": {"$sum": "$model_usage.calls"},
+            "retries": {"$sum": "$model_usage.retries"},
+            "prompt_tokens": {"$sum": "$model_usage.prompt_tokens"},
+            "output_tokens": {"$sum": "$model_usage.output_tokens"},
+            "cost_usd": {"$sum": "$model_usage.cost_usd"},
+            "avg_cost_usd": {"$avg": "$model_usage.cost_usd"},
+            "avg_latency_ms": {"$avg": "$model_usage.latency_ms"},
+            "max_cost_usd": {"$max": "$model_usage.cost_usd"},
+        }},
+        {"$project": {"_id": 0}},
+    ]
+    totals = await meetings_collection.aggregate(pipeline).to_list(length=1)
+    return {"process": usage_stats.snapshot(), "meetings": totals[0] if totals else {"meetings": 0}}
+
+
+@app.post("/webhooks/assemblyai", summary="AssemblyAI transcription completion webhook")
+async def assemblyai_webhook(request: Request):
+    """
+    Receives AssemblyAI's completion callback and wakes the task waiting on
+    that transcript, so it does not have to wait for its next poll.
+    """
+    if ASSEMBLYAI_WEBHOOK_SECRET and request.headers.get(WEBHOOK_AUTH_HEADER) != ASSEMBLYAI_WEBHOOK_SECRET:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid webhook secret")
+
+    payload = await request.json()
+    transcript_id = payload.get("transcript_id")
+    if not transcript_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing transcript_id")
+
+    waiting = notify_transcription_complete(transcript_id)
+    return {"transcript_id": transcript_id, "status": payload.get("status"), "waiting": waiting}
 
 @app.post("/query-rag/", response_model=RAGResponse, summary="Query the RAG system for meeting insights")
 async def query_meeting_insights(rag_query: RAGQuery):
@@ -266,36 +1157,200 @@ async def query_meeting_insights(rag_query: RAGQuery):
     leveraging indexed transcripts, summaries, action items, and external documents.
     """
     try:
-        result = await query_rag_simple(rag_query.query, rag_query.meeting_id)
+        passages = await rag_index.retrieve(rag_query.query, rag_query.meeting_id, k=rag_query.top_k)
+        if not passages:
+            return RAGResponse(answer="Could not find a relevant answer.", source_documents=[])
+
+        result = await answer_from_context_async(rag_query.query, [p["text"] for p in passages])
+        if result.get("provider_unavailable"):
+            raise provider_unavailable_error(result["error"], result["retry_after"])
+        if "error" in result:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=result["error"])
 
         formatted_sources = []
-        if result.get("source_documents"):
-            for doc in result["source_documents"]:
-                formatted_sources.append({
-                    "page_content_preview": doc.page_content[:200] + "...",
-                    "metadata": doc.metadata
-                })
+        for passage in passages:
+            text = passage["text"]
+            formatted_sources.append({
+                "page_content_preview": text[:200] + "..." if len(text) > 200 else text,
+                "metadata": {k: v for k, v in passage.items() if k != "text"}
+            })
 
         return RAGResponse(
-            answer=result.get("result", "Could not find a relevant answer."),
+            answer=result.get("answer", "Could not find a relevant answer."),
             source_documents=formatted_sources
         )
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error during RAG query: {e}")
+        logger.exception(f"Error during RAG query: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error querying RAG: {e}")
 
 
-@app.get("/meetings/", response_model=List[MeetingAnalysisResult], summary="Get all meeting analysis results")
-async def get_all_meetings():
+@app.post("/rag/backfill", status_code=status.HTTP_202_ACCEPTED, summary="Index stored meetings missing from the RAG index")
+async def start_rag_backfill():
     """
-    Retrieves all stored meeting analysis results from the database.
+    Starts a background backfill that embeds every stored meeting not yet on
+    the current index version. Safe to re-run; finished meetings are skipped.
     """
-    meetings = []
-    cursor = meetings_collection.find({})
-    for doc in await cursor.to_list(length=100): # Limiting to 100 
-        doc.pop("_id", None) # MongoDB's _id field is not part of the Pydantic model
-        meetings.append(MeetingAnalysisResult(**doc))
-    return meetings
+    global backfill_task, backfill_report
+    if backfill_task and not backfill_task.done():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A backfill is already running.")
+
+    async def run():
+        global backfill_report
+        try:
+            backfill_report = {"status": "completed", **await backfill(meetings_collection, ingest_pipeline)}
+        except Exception as e:
+            logger.exception(f"RAG backfill failed: {e}")
+            backfill_report = {"status": "failed", "error": str(e)}
+
+    backfill_report = {"status": "running"}
+    backfill_task = asyncio.create_task(run())
+    return backfill_report
+
+
+@app.get("/rag/backfill", summary="Status of the last RAG backfill")
+async def get_rag_backfill_status():
+    return backfill_report or {"status": "not_started"}
+
+
+def meeting_filters(
+    start: Optional[datetime] = Query(None, description="Only meetings at or after this time (ISO 8601)."),
+    end: Optional[datetime] = Query(None, description="Only meetings before this time (ISO 8601)."),
+    speaker: Optional[str] = Query(None, description="Only meetings where this speaker was detected."),
+    topic: Optional[str] = Query(None, description="Only meetings with this important topic."),
+    action_status: Optional[str] = Query(None, description="Only meetings with an action item in this status.", enum=["new", "in-progress", "completed"]),
+) -> Dict[str, Any]:
+    return build_meeting_filter(start, end, speaker, topic, action_status)
+
+
+def parse_meeting_fields(view: str, fields: Optional[str]) -> Optional[List[str]]:
+    if fields:
+        return [f.strip() for f in fields.split(",") if f.strip()]
+    return MEETING_VIEWS.get(view)
+
+
+@app.get("/meetings/", response_model=MeetingPage, summary="List meeting analysis results")
+async def get_all_meetings(
+    limit: int = Query(50, ge=1, le=200, description="Page size."),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page."),
+    view: str = Query("full", enum=["full", "list"], description="'list' returns only id, timestamp and summary."),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; overrides view."),
+    filters: Dict[str, Any] = Depends(meeting_filters),
+):
+    """
+    Lists stored meetings newest first, one page at a time. Pass the returned
+    next_cursor to fetch the following page; it is null on the last page.
+    """
+    selected_fields = parse_meeting_fields(view, fields)
+    try:
+        projection = build_projection(selected_fields, list(MeetingAnalysisResult.model_fields))
+        query = apply_cursor(filters, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    docs = await meetings_collection.find(query, projection).sort(MEETING_SORT).limit(limit + 1).to_list(length=limit + 1)
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+
+    if selected_fields is None:
+        items = [MeetingAnalysisResult(**doc).model_dump() for doc in docs]
+    else:
+        items = docs
+
+    return MeetingPage(items=items, next_cursor=encode_cursor(docs[-1]) if has_more else None)
+
+
+@app.get("/meetings/export", summary="Stream meetings as NDJSON")
+async def export_meetings(
+    since: Optional[datetime] = Query(None, description="Only meetings stored after this timestamp; pass the last exported timestamp for incremental pulls."),
+    gzip: bool = Query(False, description="Gzip-compress the stream."),
+    view: str = Query("full", enum=["full", "list"]),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to export; overrides view."),
+    filters: Dict[str, Any] = Depends(meeting_filters),
+):
+    """
+    Streams every matching meeting as one JSON object per line, oldest first,
+    straight from the Mongo cursor so memory use does not grow with the export.
+    """
+    try:
+        projection = build_projection(parse_meeting_fields(view, fields), list(MeetingAnalysisResult.model_fields))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    cursor = meetings_collection.find(apply_since(filters, since), projection).sort(EXPORT_SORT).batch_size(EXPORT_BATCH_SIZE)
+
+    async def ndjson_stream():
+        compressor = zlib.compressobj(wbits=31) if gzip else None  # wbits=31: gzip container
+        buffer = []
+        buffered_bytes = 0
+        try:
+            async for doc in cursor:
+                line = (json.dumps(doc, default=str) + "\n").encode("utf-8")
+                buffer.append(line)
+                buffered_bytes += len(line)
+                if buffered_bytes >= EXPORT_FLUSH_BYTES:
+                    chunk = b"".join(buffer)
+                    buffer, buffered_bytes = [], 0
+                    chunk = compressor.compress(chunk) if compressor else chunk
+                    if chunk:
+                        yield chunk
+            chunk = b"".join(buffer)
+            if compressor:
+                chunk = compressor.compress(chunk) + compressor.flush()
+            if chunk:
+                yield chunk
+        finally:
+            await cursor.close()
+
+    headers = {"Content-Disposition": "attachment; filename=meetings.ndjson" + (".gz" if gzip else "")}
+    media_type = "application/gzip" if gzip else "application/x-ndjson"
+    return StreamingResponse(ndjson_stream(), media_type=media_type, headers=headers)
+
+
+@app.get("/meetings/search", response_model=SearchResponse, summary="Full-text search over meeting analyses")
+async def search_meetings(
+    q: str = Query(..., min_length=1, description="Search terms."),
+    limit: int = Query(10, ge=1, le=50),
+    filters: Dict[str, Any] = Depends(meeting_filters),
+):
+    """
+    Searches summaries, topics, action items and key decisions, best match
+    first, and returns highlighted snippets of where each meeting matched.
+    """
+    projection = {"_id": 0, "meeting_id": 1, "timestamp": 1, "summary": 1, "important_topics": 1, "action_items": 1, "key_decisions": 1}
+
+    if memory_search_index is not None:
+        # Hits are checked against the Mongo-side filters a batch at a time,
+        # best first, until a full page passes or the hits run out.
+        docs = []
+        for ranked in memory_search_index.search_batches(q, limit * 5 if filters else limit):
+            scores = dict(ranked)
+            query = {"meeting_id": {"$in": list(scores)}, **filters}
+            found = await meetings_collection.find(query, projection).to_list(length=len(scores))
+            for doc in found:
+                doc["score"] = scores[doc["meeting_id"]]
+            docs.extend(sorted(found, key=lambda d: d["score"], reverse=True))
+            if len(docs) >= limit:
+                break
+        docs = docs[:limit]
+    else:
+        query = {"$text": {"$search": q}, **filters}
+        projection["score"] = {"$meta": "textScore"}
+        cursor = meetings_collection.find(query, projection).sort([("score", {"$meta": "textScore"})]).limit(limit)
+        docs = await cursor.to_list(length=limit)
+
+    items = [
+        SearchHit(
+            meeting_id=doc["meeting_id"],
+            timestamp=doc["timestamp"],
+            summary=doc.get("summary", ""),
+            score=doc["score"],
+            highlights=build_highlights(doc, q)
+        )
+        for doc in docs
+    ]
+    return SearchResponse(query=q, items=items)
 
 
 @app.get("/meetings/{meeting_id}", response_model=MeetingAnalysisResult, summary="Get a specific meeting analysis result by ID")
@@ -309,12 +1364,51 @@ async def get_meeting_by_id(meeting_id: str):
         return MeetingAnalysisResult(**meeting_doc)
     else:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found")
-    
-    
+
+def open_stored_transcript(meeting_id: str):
+    try:
+        return transcript_store.open(meeting_id)
+    except TranscriptNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No detailed transcript stored for this meeting")
+
+@app.get("/meetings/{meeting_id}/transcript/words", summary="Word-level timings for a time range of a meeting")
+async def get_transcript_words(
+    meeting_id: str,
+    start_ms: Optional[int] = Query(None, ge=0, description="Range start, in milliseconds from the start of the recording."),
+    end_ms: Optional[int] = Query(None, ge=0, description="Range end (exclusive), in milliseconds."),
+):
+    transcript = open_stored_transcript(meeting_id)
+    return {"meeting_id": meeting_id, "words": transcript.words(start_ms, end_ms)}
+
+@app.get("/meetings/{meeting_id}/transcript/utterances", summary="Utterances of a meeting, by speaker and/or time range")
+async def get_transcript_utterances(
+    meeting_id: str,
+    speaker: Optional[str] = Query(None, description="Speaker label, e.g. A."),
+    start_ms: Optional[int] = Query(None, ge=0),
+    end_ms: Optional[int] = Query(None, ge=0),
+):
+    transcript = open_stored_transcript(meeting_id)
+    return {
+        "meeting_id": meeting_id,
+        "speakers": transcript.header["speakers"],
+        "utterances": transcript.utterances(speaker, start_ms, end_ms),
+    }
+
+@app.get("/meetings/{meeting_id}/transcript/annotations", summary="Sentiment results or entities for a time range of a meeting")
+async def get_transcript_annotations(
+    meeting_id: str,
+    kind: str = Query("sentiment", enum=["sentiment", "entity"]),
+    start_ms: Optional[int] = Query(None, ge=0),
+    end_ms: Optional[int] = Query(None, ge=0),
+):
+    transcript = open_stored_transcript(meeting_id)
+    return {"meeting_id": meeting_id, "kind": kind, "results": transcript.annotations(kind, start_ms, end_ms)}
+
+
 # --- Integration Endpoints ---
 
 @app.post("/export/slack", summary="Export meeting analysis to Slack")
-def export_to_slack(request: SlackExportRequest):
+async def export_to_slack(request: SlackExportRequest):
     """
     Exports the meeting summary and action items to a specified Slack channel.
     """
@@ -323,7 +1417,7 @@ def export_to_slack(request: SlackExportRequest):
         request.export_format
     )
 
-    slack_response = send_slack_message(
+    slack_response = await send_slack_message(
         channel_id=request.slack_channel_id,
         message_text=message_text
     )
@@ -333,21 +1427,164 @@ def export_to_slack(request: SlackExportRequest):
 
     return {"message": "Content successfully exported to Slack.", "slack_response": slack_response}
 
-@app.post("/export/email", summary="Export meeting analysis via Email")
+@app.post("/export/slack/bulk", summary="Export one or many meetings to many Slack channels")
+async def export_to_slack_bulk(request: SlackBulkExportRequest):
+    """
+    Sends every requested meeting to every requested channel concurrently and
+    reports the outcome of each delivery. Meetings are loaded from MongoDB.
+    """
+    meeting_docs = await meetings_collection.find(
+        {"meeting_id": {"$in": request.meeting_ids}}, {"_id": 0}
+    ).to_list(length=len(request.meeting_ids))
+    found = {doc["meeting_id"]: doc for doc in meeting_docs}
+    missing = [m for m in request.meeting_ids if m not in found]
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Meetings not found: {', '.join(missing)}")
+
+    # Format each meeting once, however many channels it goes to.
+    messages = {
+        meeting_id: format_meeting_analysis_for_slack(MeetingAnalysisResult(**doc).model_dump(), request.export_format)
+        for meeting_id, doc in found.items()
+    }
+    results = await send_slack_messages_bulk([
+        {"meeting_id": meeting_id, "channel_id": channel_id, "message_text": messages[meeting_id]}
+        for meeting_id in request.meeting_ids
+        for channel_id in request.slack_channel_ids
+    ])
+
+    failed = [r for r in results if "error" in r]
+    return {
+        "message": f"{len(results) - len(failed)} of {len(results)} Slack deliveries succeeded.",
+        "results": results
+    }
+
+@app.post("/export/email", status_code=status.HTTP_202_ACCEPTED, summary="Export meeting analysis via Email")
 async def export_to_email(recipient: str, meeting_analysis: MeetingAnalysisResult):
+    """
+    Queues the email in the outbox and returns immediately; delivery happens in
+    the background over pooled SMTP connections.
+    """
     body = format_meeting_analysis_for_email(meeting_analysis.model_dump())
-    send_meeting_email(recipient, subject="Meeting Summary", body=body)
-    return {"message": "Email sent successfully"}
+    outbox_ids = await email_outbox.enqueue(
+        [{"recipient": recipient, "subject": "Meeting Summary", "body": body}],
+        meeting_id=meeting_analysis.meeting_id
+    )
+    return {"message": "Email queued for delivery", "outbox_id": outbox_ids[0]}
+
+@app.post("/export/email/bulk", status_code=status.HTTP_202_ACCEPTED, summary="Email one meeting's summary to many recipients")
+async def export_to_email_bulk(request: EmailBulkExportRequest):
+    meeting_doc = await meetings_collection.find_one({"meeting_id": request.meeting_id}, {"_id": 0})
+    if not meeting_doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found")
+
+    # Render once; every recipient gets the same body.
+    body = format_meeting_analysis_for_email(MeetingAnalysisResult(**meeting_doc).model_dump())
+    recipients = list(dict.fromkeys(request.recipients))
+    outbox_ids = await email_outbox.enqueue(
+        [{"recipient": r, "subject": request.subject, "body": body} for r in recipients],
+        meeting_id=request.meeting_id
+    )
+    return {
+        "message": f"{len(outbox_ids)} emails queued for delivery",
+        "deliveries": [{"recipient": r, "outbox_id": o} for r, o in zip(recipients, outbox_ids)]
+    }
+
+@app.get("/export/email/{outbox_id}", summary="Get the delivery status of a queued email")
+async def get_email_status(outbox_id: str):
+    doc = await email_outbox.get(outbox_id)
+    if not doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Email not found")
+    return doc
 
 
 @app.post("/export/notion", summary="Export meeting analysis to Notion")
 async def export_to_notion(meeting_analysis: MeetingAnalysisResult):
+    """
+    Creates the meeting's Notion page, or updates it if the meeting was
+    exported before.
+    """
     try:
-        create_meeting_page(os.getenv("NOTION_DB_ID"), meeting_analysis.model_dump())
-        return {"message": "Meeting data pushed to Notion"}
+        result = await notion_exporter.upsert_meeting_page(meeting_analysis.model_dump())
+        return {"message": f"Meeting data pushed to Notion ({result['action']})", **result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/export/notion/bulk", summary="Export many stored meetings to Notion")
+async def export_to_notion_bulk(request: NotionBulkExportRequest):
+    """
+    Upserts every requested meeting into Notion under the shared rate limit.
+    Streams NDJSON progress: one line per meeting as it finishes, then a
+    final summary line.
+    """
+    meeting_docs = await meetings_collection.find(
+        {"meeting_id": {"$in": request.meeting_ids}}, {"_id": 0}
+    ).to_list(length=len(request.meeting_ids))
+    found = {doc["meeting_id"] for doc in meeting_docs}
+    missing = [m for m in request.meeting_ids if m not in found]
+
+    async def progress_stream():
+        progress: asyncio.Queue = asyncio.Queue()
+        meetings = [MeetingAnalysisResult(**doc).model_dump() for doc in meeting_docs]
+        export = asyncio.create_task(notion_exporter.export_many(meetings, on_progress=progress.put))
+        total = len(meetings)
+        done = failed = 0
+        try:
+            for meeting_id in missing:
+                yield json.dumps({"meeting_id": meeting_id, "error": "Meeting not found"}) + "\n"
+            while done < total:
+                result = await progress.get()
+                done += 1
+                failed += "error" in result
+                yield json.dumps({**result, "progress": f"{done}/{total}"}) + "\n"
+            await export
+            yield json.dumps({"summary": {"exported": done - failed, "failed": failed, "not_found": len(missing)}}) + "\n"
+        finally:
+            if not export.done():
+                export.cancel()
+
+    return StreamingResponse(progress_stream(), media_type="application/x-ndjson")
+
+@app.post("/export/{meeting_id}", summary="Export a stored meeting to Slack, email and Notion at once")
+async def export_meeting(meeting_id: str, request: ExportFanoutRequest):
+    """
+    Loads the meeting once and delivers it to every requested destination
+    concurrently. Each delivery's status and latency is recorded in a delivery
+    log; POST /export/{meeting_id}/retry re-sends only the failed ones.
+    """
+    targets = (
+        [{"destination": "slack", "target": c} for c in dict.fromkeys(request.slack_channel_ids)]
+        + [{"destination": "email", "target": r} for r in dict.fromkeys(request.email_recipients)]
+        + ([{"destination": "notion", "target": notion_exporter.database_id or ""}] if request.notion else [])
+    )
+    if not targets:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No export destinations requested.")
+
+    meeting_doc = await meetings_collection.find_one({"meeting_id": meeting_id}, {"_id": 0})
+    if not meeting_doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found")
+
+    options = {"export_format": request.export_format, "email_subject": request.email_subject}
+    export = await export_fanout.create(meeting_id, targets, options)
+    export = await export_fanout.run(export, build_export_senders(meeting_doc, options))
+    return summarize_export(export)
+
+@app.post("/export/{meeting_id}/retry", summary="Re-send the failed deliveries of a meeting export")
+async def retry_meeting_export(meeting_id: str, export_id: Optional[str] = Query(None, description="Export to retry; defaults to the meeting's latest export.")):
+    export = await export_fanout.get(export_id) if export_id else await export_fanout.latest_for_meeting(meeting_id)
+    if not export or export["meeting_id"] != meeting_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export not found")
+
+    meeting_doc = await meetings_collection.find_one({"meeting_id": meeting_id}, {"_id": 0})
+    if not meeting_doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found")
+
+    export = await export_fanout.run(export, build_export_senders(meeting_doc, export["options"]), only_failed=True)
+    return summarize_export(export)
+
+@app.get("/export/{meeting_id}/deliveries", summary="Delivery log of a meeting's exports")
+async def get_meeting_exports(meeting_id: str, limit: int = Query(20, ge=1, le=100)):
+    return {"meeting_id": meeting_id, "exports": await export_fanout.list_for_meeting(meeting_id, limit)}
+
 
 
 import os
@@ -0,0 +1,340 @@
+import hashlib
+import os
+import struct
+from typing import AsyncIterator, Dict, List, Optional
+
+from dotenv import load_dotenv
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+load_dotenv()
+
+# Uploads are streamed straight through to the transcription provider instead
+# of being copied to disk first. MultipartUpload pulls the file out of a
+# multipart body as it arrives; MediaStream hashes and counts the bytes as
+# they pass and aborts as soon as a limit is crossed.
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(2 * 1024 * 1024 * 1024)))
+# Checked from the header for WAV uploads; other containers are only checked
+# when they are decoded (AUDIO_PREPROCESS or SEGMENTED_TRANSCRIPTION).
+MAX_MEDIA_SECONDS = float(os.getenv("MAX_MEDIA_SECONDS", str(4 * 60 * 60)))
+# Multipart uploads parsed by Starlette's form parser (transcript uploads) are
+# held in memory up to this size before spilling to a temporary file.
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(8 * 1024 * 1024)))
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Enough to cover a WAV header with a few metadata chunks before "data".
+HEADER_SNIFF_BYTES = 4096
+
+
+class UploadRejected(ValueError):
+    pass
+
+
+class InvalidUpload(ValueError):
+    pass
+
+
+def check_content_length(content_length: Optional[str], max_bytes: int = MAX_UPLOAD_BYTES):
+    """
+    Rejects an upload from its Content-Length before any of the body is read.
+    """
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise UploadRejected(f"Upload is {int(content_length)} bytes; the limit is {max_bytes} bytes.")
+
+
+def wav_duration_seconds(header: bytes) -> Optional[float]:
+    """
+    Duration of a PCM WAV file from its header, or None for other formats.
+    """
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    offset, byte_rate = 12, None
+    while offset + 8 <= len(header):
+        chunk_id, chunk_size = header[offset:offset + 4], struct.unpack("<I", header[offset + 4:offset + 8])[0]
+        if chunk_id == b"fmt " and offset + 20 <= len(header):
+            byte_rate = struct.unpack("<I", header[offset + 16:offset + 20])[0]
+        elif chunk_id == b"data":
+            return chunk_size / byte_rate if byte_rate else None
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+class MultipartUpload:
+    """
+    Streams one file field out of a multipart/form-data request body as the
+    body arrives. Unlike Starlette's form parser, nothing is spooled to memory
+    or a temporary file. Fields before the file are skipped, and reading stops
+    when the file ends.
+
+    Await open() first: it reads up to the file's part headers and fills in
+    `filename` and `content_type`. Then iterate the upload for the file's bytes.
+    """
+
+    def __init__(self, content_type: str, body: AsyncIterator[bytes], field_name: str = "file"):
+        self.body = body.__aiter__()
+        self.field_name = field_name
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self._pending: List[bytes] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_file = False
+        self._found = False
+        self._done = False
+
+        mime, options = parse_options_header(content_type)
+        if mime != b"multipart/form-data" or not options.get(b"boundary"):
+            raise InvalidUpload("Expected a multipart/form-data body.")
+        self._parser = MultipartParser(options[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+        })
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if self._found or options.get(b"name", b"").decode("utf-8", "replace") != self.field_name:
+            return
+        self._found = self._in_file = True
+        filename = options.get(b"filename")
+        self.filename = filename.decode("utf-8", "replace") if filename is not None else None
+        self.content_type = self._headers.get(b"content-type", b"").decode("latin-1") or None
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file and end > start:
+            self._pending.append(data[start:end])
+
+    def _on_part_end(self):
+        if self._in_file:
+            self._in_file = False
+            self._done = True
+
+    async def _read_more(self) -> bool:
+        try:
+            chunk = await self.body.__anext__()
+        except StopAsyncIteration:
+            return False
+        if chunk:
+            try:
+                self._parser.write(chunk)
+            except MultipartParseError as e:
+                raise InvalidUpload(f"Malformed multipart body: {e}")
+        return True
+
+    async def open(self) -> bool:
+        """
+        Reads until the file field starts; False if the body has no such field.
+        """
+        while not self._found:
+            if not await self._read_more():
+                return False
+        return True
+
+    async def __aiter__(self):
+        while True:
+            pending, self._pending = self._pending, []
+            for data in pending:
+                yield data
+            if self._done:
+                return
+            if not await self._read_more():
+                raise InvalidUpload("The upload ended before the file was complete.")
+
+
+class MediaStream:
+    """
+    Wraps an async iterator of upload chunks. Iterating it yields the same
+    chunks while computing their SHA-256 and size, raising UploadRejected once
+    the size limit (or, for WAV, the duration limit) is exceeded.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes],
+                 max_bytes: int = MAX_UPLOAD_BYTES, max_seconds: float = MAX_MEDIA_SECONDS):
+        self.chunks = chunks
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.size = 0
+        self.duration_seconds: Optional[float] = None
+        self._hasher = hashlib.sha256()
+        self._header = b""
+
+    @property
+    def sha256(self) -> str:
+        return self._hasher.hexdigest()
+
+    def _check_duration(self):
+        self.duration_seconds = wav_duration_seconds(self._header)
+        if self.duration_seconds is not None and self.duration_seconds > self.max_seconds:
+            raise UploadRejected(
+                f"Media is {self.duration_seconds:.0f} seconds long; the limit is {self.max_seconds:.0f} seconds."
+            )
+
+    async def __aiter__(self):
+        sniffing = True
+        async for chunk in self.chunks:
+            if not chunk:
+                continue
+            if sniffing:
+                self._header += chunk[:HEADER_SNIFF_BYTES - len(self._header)]
+                if len(self._header) >= HEADER_SNIFF_BYTES:
+                    sniffing = False
+                    self._check_duration()
+            self.size += len(chunk)
+            if self.size > self.max_bytes:
+                raise UploadRejected(f"Upload exceeds the limit of {self.max_bytes} bytes.")
+            self._hasher.update(chunk)
+            yield chunk
+        if sniffing:
+            self._check_duration()
+
+
+# --- Benchmark: memory and disk I/O of a large upload ---
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def _disk_write_mb() -> float:
+    # Bytes this process caused to be written to storage (includes temp files).
+    with open("/proc/self/io") as f:
+        fields = dict(line.split(": ") for line in f.read().splitlines())
+    return int(fields["write_bytes"]) / 2 ** 20
+
+
+async def _multipart_body(boundary: str, size: int, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    yield (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"meeting.mp3\"\r\n"
+           f"Content-Type: audio/mpeg\r\n\r\n").encode()
+    block = os.urandom(chunk_size)
+    for offset in range(0, size, chunk_size):
+        yield block[:min(chunk_size, size - offset)]
+    yield f"\r\n--{boundary}--\r\n".encode()
+
+
+async def _raw_body(size: int, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    block = os.urandom(chunk_size)
+    for offset in range(0, size, chunk_size):
+        yield block[:min(chunk_size, size - offset)]
+
+
+async def _benchmark_child(mode: str, size: int) -> dict:
+    """
+    Posts a `size`-byte upload through the app in-process. The AssemblyAI
+    upload is replaced by a sink that drains the stream, and analysis by the
+    stub model. "form" posts the same body to a route that takes
+    UploadFile, i.e. Starlette's spooling form parser.
+    """
+    import tempfile
+    import time
+
+    import httpx
+    from fastapi import FastAPI, File, UploadFile
+
+    import main
+    from bench_gemini import StubModel, use_stub_model
+    from transcript_store import TranscriptStore
+
+    received = {"bytes": 0}
+
+    async def drain(chunks):
+        async for chunk in chunks:
+            received["bytes"] += len(chunk)
+        return {"audio_url": "bench://upload", "time_map": None}
+
+    async def transcribe(prepared):
+        return {"text": "Sarah: The benchmark upload arrived.", "utterances": []}
+
+    async def skip_store(meeting, transcript):
+        pass
+
+    main.prepare_media = drain
+    main.transcribe_prepared = transcribe
+    main.store_meeting = skip_store
+    scratch = tempfile.TemporaryDirectory()
+    main.transcript_store = TranscriptStore(scratch.name)
+    use_stub_model(StubModel(first_token_seconds=0.01, output_tokens_per_second=1e6))
+
+    form_app = FastAPI()
+
+    @form_app.post("/form")
+    async def form(file: UploadFile = File(...)):
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            received["bytes"] += len(chunk)
+        return {}
+
+    boundary = "benchmark-boundary"
+    if mode == "raw":
+        app, path, headers, body = main.app, "/transcribe-and-analyze/stream", {"content-type": "audio/mpeg"}, _raw_body(size)
+    else:
+        app = form_app if mode == "form" else main.app
+        path = "/form" if mode == "form" else "/transcribe-and-analyze/"
+        headers = {"content-type": f"multipart/form-data; boundary={boundary}"}
+        body = _multipart_body(boundary, size)
+
+    rss_before, disk_before = _rss_mb(), _disk_write_mb()
+    started = time.perf_counter()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        response = await client.post(path, content=body, headers=headers)
+    elapsed = time.perf_counter() - started
+    scratch.cleanup()
+    response.raise_for_status()
+
+    import resource
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    return {
+        "mode": mode,
+        "received_mb": received["bytes"] / 2 ** 20,
+        "seconds": elapsed,
+        "rss_growth_mb": max(0.0, peak_rss - rss_before),
+        "disk_write_mb": _disk_write_mb() - disk_before,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import json
+    import logging
+    import subprocess
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Upload benchmark: peak RSS growth and disk writes while a large file passes through the "
+                    "media endpoints (AssemblyAI and Gemini are stubbed). Each mode runs in its own process."
+    )
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--modes", nargs="+", default=["multipart", "raw", "form"], choices=["multipart", "raw", "form"],
+                        help="multipart: /transcribe-and-analyze/; raw: /transcribe-and-analyze/stream; "
+                             "form: the same multipart body parsed by Starlette's UploadFile, for comparison.")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        logging.basicConfig(level=logging.WARNING)
+        print(json.dumps(asyncio.run(_benchmark_child(args.child, args.size_mb * 2 ** 20))))
+        sys.exit(0)
+
+    print(f"{'mode':<10} {'MB in':>8} {'seconds':>8} {'peak RSS +MB':>13} {'disk write MB':>14}")
+    for mode in args.modes:
+        output = subprocess.run([sys.executable, "-W", "ignore", __file__, "--child", mode, "--size-mb", str(args.size_mb)],
+                                capture_output=True, text=True, check=True).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        print(f"{r['mode']:<10} {r['received_mb']:8.0f} {r['seconds']:8.1f} {r['rss_growth_mb']:13.1f} {r['disk_write_mb']:14.1f}")
@@ -0,0 +1,123 @@
+import base64
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+
+logger = logging.getLogger(__name__)
+
+# Query helpers for listing meetings: filters, keyset cursors and projections.
+# Meetings are ordered newest first by (timestamp, meeting_id); both are
+# stored as strings, and ISO-8601 UTC timestamps sort correctly as strings.
+MEETING_SORT = [("timestamp", DESCENDING), ("meeting_id", DESCENDING)]
+# Exports run oldest first so the last exported timestamp is the next `since`.
+EXPORT_SORT = [("timestamp", ASCENDING), ("meeting_id", ASCENDING)]
+
+MEETING_INDEXES = [
+    ([("meeting_id", ASCENDING)], {"unique": True}),
+    (MEETING_SORT, {}),
+    ([("speakers_detected", ASCENDING), ("timestamp", DESCENDING)], {}),
+    ([("important_topics", ASCENDING), ("timestamp", DESCENDING)], {}),
+    ([("action_items.status", ASCENDING), ("timestamp", DESCENDING)], {}),
+]
+
+# Named projections. "list" is enough for an index page.
+MEETING_VIEWS = {
+    "list": ["meeting_id", "timestamp", "summary"],
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+async def ensure_meeting_indexes(collection):
+    for keys, options in MEETING_INDEXES:
+        try:
+            await collection.create_index(keys, **options)
+        except Exception as e:
+            # e.g. duplicate meeting_ids in old data; listing still works without it.
+            logger.warning(f"Could not create meetings index {keys}: {e}")
+
+
+def _to_utc_iso(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def build_meeting_filter(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    speaker: Optional[str] = None,
+    topic: Optional[str] = None,
+    action_status: Optional[str] = None,
+) -> Dict[str, Any]:
+    query: Dict[str, Any] = {}
+    if start or end:
+        query["timestamp"] = {}
+        if start:
+            query["timestamp"]["$gte"] = _to_utc_iso(start)
+        if end:
+            query["timestamp"]["$lt"] = _to_utc_iso(end)
+    if speaker:
+        query["speakers_detected"] = speaker
+    if topic:
+        query["important_topics"] = topic
+    if action_status:
+        query["action_items.status"] = action_status
+    return query
+
+
+def apply_since(query: Dict[str, Any], since: Optional[datetime]) -> Dict[str, Any]:
+    """
+    Restricts `query` to meetings stored after the `since` watermark.
+    """
+    if not since:
+        return query
+    after_since = {"timestamp": {"$gt": _to_utc_iso(since)}}
+    return {"$and": [query, after_since]} if query else after_since
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    raw = json.dumps([doc["timestamp"], doc["meeting_id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        timestamp, meeting_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(timestamp), str(meeting_id)
+    except Exception:
+        raise InvalidCursor("Invalid pagination cursor.")
+
+
+def apply_cursor(query: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+    """
+    Restricts `query` to meetings strictly after `cursor` in MEETING_SORT order.
+    """
+    if not cursor:
+        return query
+    timestamp, meeting_id = decode_cursor(cursor)
+    after_cursor = {"$or": [
+        {"timestamp": {"$lt": timestamp}},
+        {"timestamp": timestamp, "meeting_id": {"$lt": meeting_id}},
+    ]}
+    return {"$and": [query, after_cursor]} if query else after_cursor
+
+
+def build_projection(fields: Optional[List[str]], allowed: List[str]) -> Dict[str, int]:
+    """
+    Mongo projection for the requested fields (all fields when none are given).
+    The sort keys are always included so a cursor can be built from any row.
+    """
+    if not fields:
+        return {"_id": 0}
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    projection = {f: 1 for f in fields}
+    projection.update({"_id": 0, "meeting_id": 1, "timestamp": 1})
+    return projection
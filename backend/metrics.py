@@ -0,0 +1,75 @@
+import bisect
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+# Minimal Prometheus text-format metrics: latency histograms per pipeline
+# stage and per endpoint, rendered by GET /metrics. Values are per process.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str],
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(counts), total[0]) for key, (counts, total) in self._series.items())
+        for key, counts, total in series:
+            labels = dict(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{format_labels({**labels, 'le': bound})} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{format_labels({**labels, 'le': '+Inf'})} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {cumulative}")
+        return lines
+
+
+def render_counters(name: str, help_text: str, samples: List[Tuple[Dict[str, str], float]],
+                    metric_type: str = "counter") -> List[str]:
+    """
+    Renders values kept elsewhere (e.g. model usage totals) as one metric.
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    lines.extend(f"{name}{format_labels(labels)} {value}" for labels, value in samples)
+    return lines
+
+
+stage_latency = Histogram(
+    "pipeline_stage_duration_seconds", "Duration of traced pipeline stages.", ["stage"]
+)
+request_latency = Histogram(
+    "http_request_duration_seconds", "Duration of HTTP requests by route.", ["method", "route", "status"]
+)
+first_content_latency = Histogram(
+    "analysis_first_content_seconds",
+    "Time from receiving a transcript until the first analysis content is sent.", ["endpoint"]
+)
@@ -0,0 +1,169 @@
+import logging
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Token, latency and cost accounting for model calls. Every call is recorded
+# in process-wide totals and, inside a track_usage() block, in a ledger that
+# is stored with the meeting being analyzed.
+
+# USD per million tokens (input, output). Thinking tokens are billed as output.
+MODEL_PRICES_USD_PER_MTOK = {
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-pro": (1.25, 10.00),
+    "extractive": (0.0, 0.0),  # local analyzer, no API cost
+    "models/text-embedding-004": (0.0, 0.0),  # RAG embeddings; no charge on the Gemini API
+}
+
+# Estimated prompt tokens one meeting analysis may use (0 disables the check).
+ANALYSIS_TOKEN_BUDGET = int(os.getenv("ANALYSIS_TOKEN_BUDGET", "250000"))
+# What to do with transcripts over budget: "cheap" analyzes them with
+# GEMINI_BUDGET_MODEL, "reject" refuses them before any call is made.
+ANALYSIS_OVER_BUDGET = os.getenv("ANALYSIS_OVER_BUDGET", "cheap")
+GEMINI_BUDGET_MODEL = os.getenv("GEMINI_BUDGET_MODEL", "gemini-2.5-flash-lite")
+
+_current_ledger: ContextVar[Optional["UsageLedger"]] = ContextVar("model_usage_ledger", default=None)
+_unpriced_models = set()
+
+
+def estimate_cost_usd(model_name: str, prompt_tokens: int, output_tokens: int) -> float:
+    prices = MODEL_PRICES_USD_PER_MTOK.get(model_name)
+    if prices is None:
+        if model_name not in _unpriced_models:
+            _unpriced_models.add(model_name)
+            logger.warning(f"No price configured for model {model_name}; its cost is recorded as 0.")
+        return 0.0
+    return (prompt_tokens * prices[0] + output_tokens * prices[1]) / 1_000_000
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {"calls": 0, "errors": 0, "retries": 0, "prompt_tokens": 0, "output_tokens": 0,
+            "cost_usd": 0.0, "latency_ms": 0.0}
+
+
+def _add(totals: Dict[str, Any], call: Dict[str, Any]):
+    totals["calls"] += 1
+    totals["errors"] += call["status"] != "ok"
+    totals["retries"] += max(call["attempts"] - 1, 0)
+    totals["prompt_tokens"] += call["prompt_tokens"]
+    totals["output_tokens"] += call["output_tokens"]
+    totals["cost_usd"] += call["cost_usd"]
+    totals["latency_ms"] += call["latency_ms"]
+
+
+class UsageLedger:
+    """
+    The model calls made for one unit of work, e.g. analyzing a meeting.
+    """
+
+    def __init__(self):
+        self.calls: List[Dict[str, Any]] = []
+
+    def summary(self) -> Dict[str, Any]:
+        totals = _empty_totals()
+        for call in self.calls:
+            _add(totals, call)
+        totals["cost_usd"] = round(totals["cost_usd"], 6)
+        totals["latency_ms"] = round(totals["latency_ms"], 1)
+        return {**totals, "call_log": list(self.calls)}
+
+
+class UsageStats:
+    """
+    Per-process totals by model and operation, for /metrics.
+    """
+
+    def __init__(self):
+        self.by_key: Dict[tuple, Dict[str, Any]] = {}
+        self.budget_rejections = 0
+        self.budget_reroutes = 0
+
+    def add(self, call: Dict[str, Any]):
+        totals = self.by_key.setdefault((call["model"], call["operation"]), _empty_totals())
+        _add(totals, call)
+        totals["max_latency_ms"] = max(totals.get("max_latency_ms", 0.0), call["latency_ms"])
+
+    def snapshot(self) -> Dict[str, Any]:
+        calls = []
+        for (model_name, operation), totals in sorted(self.by_key.items()):
+            calls.append({
+                "model": model_name,
+                "operation": operation,
+                **totals,
+                "cost_usd": round(totals["cost_usd"], 6),
+                "avg_latency_ms": round(totals["latency_ms"] / totals["calls"], 1),
+                "latency_ms": round(totals["latency_ms"], 1),
+            })
+        return {
+            "calls": calls,
+            "budget_rejections": self.budget_rejections,
+            "budget_reroutes": self.budget_reroutes,
+        }
+
+
+usage_stats = UsageStats()
+
+
+@contextmanager
+def track_usage():
+    """
+    Collects every model call made inside the block, including calls from
+    tasks started within it, into the yielded ledger.
+    """
+    ledger = UsageLedger()
+    token = _current_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _current_ledger.reset(token)
+
+
+def record_call(operation: str, model_name: str, latency_seconds: float, response=None,
+                error: Optional[BaseException] = None, attempts: int = 1) -> Dict[str, Any]:
+    """
+    Records one model call from its response's usage metadata. Failed calls
+    are recorded too, with whatever usage the provider reported (usually none).
+    """
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+    output_tokens = (getattr(usage, "candidates_token_count", 0) or 0) + (getattr(usage, "thoughts_token_count", 0) or 0)
+    call = {
+        "operation": operation,
+        "model": model_name,
+        "status": "ok" if error is None else "error",
+        "error": None if error is None else (str(error) or type(error).__name__)[:200],
+        "attempts": attempts,
+        "prompt_tokens": prompt_tokens,
+        "output_tokens": output_tokens,
+        "cost_usd": round(estimate_cost_usd(model_name, prompt_tokens, output_tokens), 6),
+        "latency_ms": round(latency_seconds * 1000, 1),
+    }
+    usage_stats.add(call)
+    ledger = _current_ledger.get()
+    if ledger is not None:
+        ledger.calls.append(call)
+    return call
+
+
+def check_token_budget(estimated_tokens: int, default_model: str) -> Dict[str, Any]:
+    """
+    Decides, before any call is made, which model analyzes a transcript of
+    `estimated_tokens` prompt tokens. Returns {"model": name} or {"error": ...}.
+    """
+    if not ANALYSIS_TOKEN_BUDGET or estimated_tokens <= ANALYSIS_TOKEN_BUDGET:
+        return {"model": default_model}
+    if ANALYSIS_OVER_BUDGET == "reject":
+        usage_stats.budget_rejections += 1
+        return {"error": f"Transcript is about {estimated_tokens} tokens, over the "
+                         f"{ANALYSIS_TOKEN_BUDGET}-token analysis budget."}
+    usage_stats.budget_reroutes += 1
+    logger.info(f"Transcript of ~{estimated_tokens} tokens is over budget; analyzing with {GEMINI_BUDGET_MODEL}.")
+    return {"model": GEMINI_BUDGET_MODEL}
@@ -1,11 +1,40 @@
+import asyncio
+import logging
 import os
-from notion_client import Client
+import random
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from notion_client import AsyncClient, APIResponseError
 from dotenv import load_dotenv
 
+from rate_limit import KeyedLocks, TokenBucket
+from tracing import span
+
 load_dotenv()
-notion = Client(auth=os.getenv("NOTION_API_KEY"))
 
-def create_meeting_page(database_id, meeting):
+logger = logging.getLogger(__name__)
+
+# Override to point at a local mock Notion server.
+NOTION_API_BASE_URL = os.getenv("NOTION_API_BASE_URL", "https://api.notion.com")
+NOTION_DB_ID = os.getenv("NOTION_DB_ID")
+
+# Notion allows an average of ~3 requests/second per integration.
+NOTION_RATE_PER_SECOND = float(os.getenv("NOTION_RATE_PER_SECOND", "3"))
+NOTION_MAX_RETRIES = int(os.getenv("NOTION_MAX_RETRIES", "5"))
+NOTION_BULK_CONCURRENCY = int(os.getenv("NOTION_BULK_CONCURRENCY", "3"))
+NOTION_RETRY_BASE_SECONDS = 1.0
+NOTION_RETRYABLE_STATUSES = {409, 429, 500, 502, 503, 504}
+
+# notion-client 3.x retries on its own; _call_with_retry does that here, under
+# the shared rate limiter, so the client's retries are turned off.
+notion = AsyncClient(auth=os.getenv("NOTION_API_KEY"), base_url=NOTION_API_BASE_URL, retry=False)
+
+# One bucket for the whole process: the limit is per integration, not per page.
+notion_rate_limiter = TokenBucket(NOTION_RATE_PER_SECOND, capacity=3)
+
+
+def build_meeting_properties(meeting):
     properties = {
         "Title": {
             "title": [
@@ -37,7 +66,7 @@ def create_meeting_page(database_id, meeting):
         },
         "Assignees": {
             "multi_select": [
-                {"name": item["assignee"]} for item in meeting.get("action_items", [])
+                {"name": item["assignee"]} for item in meeting.get("action_items", []) if item.get("assignee")
             ]
         },
         "Deadline": {
@@ -60,9 +89,112 @@ def create_meeting_page(database_id, meeting):
     }
 
     # Filter out empty/None fields
-    properties = {k: v for k, v in properties.items() if v is not None}
+    return {k: v for k, v in properties.items() if v is not None}
+
+
+async def _call_with_retry(fn: Callable[..., Awaitable[Dict[str, Any]]], **kwargs) -> Dict[str, Any]:
+    """
+    Runs one Notion API call under the shared rate limiter, retrying rate
+    limits (honoring Retry-After) and transient errors with jittered backoff.
+    """
+    for attempt in range(NOTION_MAX_RETRIES + 1):
+        await notion_rate_limiter.acquire()
+        try:
+            return await fn(**kwargs)
+        except APIResponseError as e:
+            if e.status not in NOTION_RETRYABLE_STATUSES or attempt == NOTION_MAX_RETRIES:
+                raise
+            retry_after = (e.headers or {}).get("retry-after")
+            delay = float(retry_after) if retry_after else NOTION_RETRY_BASE_SECONDS * 2 ** attempt * random.uniform(0.5, 1.5)
+            if e.status == 429:
+                notion_rate_limiter.defer(delay)
+            logger.warning(f"Notion API returned {e.status}; retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+def _page_gone(e: APIResponseError) -> bool:
+    """
+    True when an update failed because the page no longer exists: deleted
+    pages return 404, archived ones a 400 validation_error about archiving.
+    """
+    if e.status == 404:
+        return True
+    return e.status == 400 and e.code == "validation_error" and "archived" in str(e).lower()
+
+
+class NotionExporter:
+    """
+    Upserts meeting pages keyed by meeting_id. The meeting -> page mapping is
+    kept in a Mongo collection, so a re-export updates the existing page
+    instead of creating a duplicate.
+    """
+
+    def __init__(self, pages_collection, database_id: Optional[str] = NOTION_DB_ID):
+        self.pages_collection = pages_collection
+        self.database_id = database_id
+        self._meeting_locks = KeyedLocks()
+
+    async def ensure_indexes(self):
+        await self.pages_collection.create_index("meeting_id", unique=True)
+
+    async def upsert_meeting_page(self, meeting: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.database_id:
+            raise ValueError("NOTION_DB_ID is not set in environment variables.")
+
+        meeting_id = meeting["meeting_id"]
+        with span("export.notion", meeting_id=meeting_id):
+            async with self._meeting_locks.hold(meeting_id):
+                properties = build_meeting_properties(meeting)
+                mapping = await self.pages_collection.find_one({"meeting_id": meeting_id})
+
+                if mapping:
+                    try:
+                        await _call_with_retry(notion.pages.update, page_id=mapping["page_id"], properties=properties)
+                        action = "updated"
+                        page_id = mapping["page_id"]
+                    except APIResponseError as e:
+                        # The page was deleted or archived in Notion; recreate it below.
+                        if not _page_gone(e):
+                            raise
+                        mapping = None
+
+                if not mapping:
+                    page = await _call_with_retry(
+                        notion.pages.create,
+                        parent={"database_id": self.database_id},
+                        properties=properties
+                    )
+                    page_id = page["id"]
+                    action = "created"
+
+                await self.pages_collection.update_one(
+                    {"meeting_id": meeting_id},
+                    {"$set": {"page_id": page_id, "database_id": self.database_id, "exported_at": datetime.now(timezone.utc)}},
+                    upsert=True
+                )
+            return {"meeting_id": meeting_id, "page_id": page_id, "action": action}
+
+    async def export_many(
+        self,
+        meetings: List[Dict[str, Any]],
+        on_progress: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Upserts many meetings with bounded concurrency; the shared rate limiter
+        keeps the overall request rate within Notion's limit. `on_progress` is
+        awaited with each result as it finishes.
+        """
+        semaphore = asyncio.Semaphore(NOTION_BULK_CONCURRENCY)
+
+        async def export_one(meeting):
+            async with semaphore:
+                try:
+                    result = await self.upsert_meeting_page(meeting)
+                except Exception as e:
+                    logger.error(f"Notion export failed for {meeting.get('meeting_id')}: {e}")
+                    result = {"meeting_id": meeting.get("meeting_id"), "error": str(e)}
+            if on_progress:
+                await on_progress(result)
+            return result
 
-    notion.pages.create(
-        parent={"database_id": database_id},
-        properties=properties
-    )
+        return await asyncio.gather(*(export_one(m) for m in meetings))
@@ -0,0 +1,211 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+# Incremental parsing of one JSON object whose text arrives in pieces, e.g. a
+# streamed model response. Only what the analysis stream needs is surfaced:
+# text deltas of chosen top-level strings, each element of top-level arrays,
+# and every top-level field once its value is complete. Text before the
+# opening brace (such as a ```json fence) and after the closing one is ignored.
+
+WHITESPACE = " \t\r\n"
+
+
+def decodable_prefix(raw: str) -> str:
+    """
+    The longest prefix of a partial JSON string body that ends on a character
+    boundary: a trailing escape (or a high surrogate without its low half) is
+    held back until the rest of it arrives.
+    """
+    end = 0
+    i = 0
+    while i < len(raw):
+        if raw[i] != "\\":
+            i += 1
+        elif raw[i + 1:i + 2] != "u":
+            i += 2
+        elif 0xD800 <= int(raw[i + 2:i + 6].ljust(4, "0"), 16) < 0xDC00:
+            i += 12
+        else:
+            i += 6
+        if i > len(raw):
+            break
+        end = i
+    return raw[:end]
+
+
+class PartialJSONError(ValueError):
+    pass
+
+
+class PartialJSONParser:
+    """
+    Feed text with feed(); each call returns the events completed by that
+    text, as dicts:
+
+        {"type": "delta", "field": name, "text": "..."}   (fields in stream_strings)
+        {"type": "item", "field": name, "index": i, "value": ...}
+        {"type": "field", "field": name, "value": ...}
+
+    `fields` holds every completed top-level field; `complete` turns True once
+    the closing brace has been read.
+    """
+
+    def __init__(self, stream_strings: Iterable[str] = ()):
+        self.stream_strings = set(stream_strings)
+        self.fields: Dict[str, Any] = {}
+        self.complete = False
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._expect = "start"  # start, key, colon, value, comma
+        self._key: Optional[str] = None
+        self._token_start: Optional[int] = None  # key, value or element being read
+        self._element_start: Optional[int] = None
+        self._element_index = 0
+        self._emitted_text = ""
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        self._text += text
+        events: List[Dict[str, Any]] = []
+        while self._pos < len(self._text) and not self.complete:
+            self._step(self._text[self._pos], events)
+            self._pos += 1
+        if self._in_string and self._depth == 1 and self._expect == "comma" and self._key in self.stream_strings:
+            self._emit_delta(events)
+        return events
+
+    # --- Scanner ---
+
+    def _step(self, char: str, events: List[Dict[str, Any]]):
+        if self._in_string:
+            if self._escaped:
+                self._escaped = False
+            elif char == "\\":
+                self._escaped = True
+            elif char == '"':
+                self._in_string = False
+                self._string_closed(events)
+            return
+
+        if self._expect == "start":
+            if char == "{":
+                self._depth = 1
+                self._expect = "key"
+            return
+
+        if self._depth == 1:
+            self._top_level(char, events)
+        elif char in WHITESPACE:
+            return
+        elif char in "{[":
+            if self._depth == 2 and self._element_start is None and self._in_array():
+                self._element_start = self._pos
+            self._depth += 1
+        elif char in "}]":
+            self._close_nested(events)
+        elif char == '"':
+            if self._depth == 2 and self._element_start is None and self._in_array():
+                self._element_start = self._pos
+            self._in_string = True
+        elif char == ",":
+            if self._depth == 2 and self._in_array():
+                self._end_scalar_element(events)
+        elif self._depth == 2 and self._element_start is None and self._in_array():
+            self._element_start = self._pos
+
+    def _top_level(self, char: str, events: List[Dict[str, Any]]):
+        if char in WHITESPACE:
+            if self._expect == "comma" and self._token_start is not None:
+                self._end_scalar_field(events)
+            return
+        if self._expect == "key":
+            if char == '"':
+                self._token_start = self._pos
+                self._in_string = True
+            elif char == "}":
+                self.complete = True
+            else:
+                raise PartialJSONError(f"Expected a key at offset {self._pos}, got {char!r}.")
+        elif self._expect == "colon":
+            if char != ":":
+                raise PartialJSONError(f"Expected ':' at offset {self._pos}, got {char!r}.")
+            self._expect = "value"
+        elif self._expect == "value":
+            self._token_start = self._pos
+            self._expect = "comma"
+            if char == '"':
+                self._in_string = True
+                self._emitted_text = ""
+            elif char in "{[":
+                self._depth = 2
+                self._element_start = None
+                self._element_index = 0
+        elif self._expect == "comma":
+            if char in ",}":
+                if self._token_start is not None:
+                    self._end_scalar_field(events)
+                self._expect = "key"
+                if char == "}":
+                    self.complete = True
+
+    def _in_array(self) -> bool:
+        return self._text[self._token_start] == "["
+
+    def _string_closed(self, events: List[Dict[str, Any]]):
+        if self._depth == 1 and self._expect == "key":
+            self._key = json.loads(self._text[self._token_start:self._pos + 1])
+            self._token_start = None
+            self._expect = "colon"
+        elif self._depth == 1:
+            if self._key in self.stream_strings:
+                self._emit_delta(events, final=True)
+            self._emit_field(events)
+        elif self._depth == 2 and self._in_array() and self._element_start is not None \
+                and self._text[self._element_start] == '"':
+            self._emit_item(events)
+
+    def _close_nested(self, events: List[Dict[str, Any]]):
+        if self._depth == 2:
+            if self._in_array():
+                self._end_scalar_element(events)
+            self._depth = 1
+            self._emit_field(events)
+            return
+        self._depth -= 1
+        if self._depth == 2 and self._in_array() and self._element_start is not None:
+            self._emit_item(events)
+
+    def _end_scalar_element(self, events: List[Dict[str, Any]]):
+        # Numbers, booleans and null end at the next separator.
+        if self._element_start is not None and self._text[self._element_start] not in '"{[':
+            self._emit_item(events, end=self._pos)
+
+    def _end_scalar_field(self, events: List[Dict[str, Any]]):
+        self._emit_field(events, end=self._pos)
+
+    # --- Events ---
+
+    def _emit_item(self, events: List[Dict[str, Any]], end: Optional[int] = None):
+        end = self._pos + 1 if end is None else end
+        value = json.loads(self._text[self._element_start:end])
+        events.append({"type": "item", "field": self._key, "index": self._element_index, "value": value})
+        self._element_index += 1
+        self._element_start = None
+
+    def _emit_field(self, events: List[Dict[str, Any]], end: Optional[int] = None):
+        end = self._pos + 1 if end is None else end
+        value = json.loads(self._text[self._token_start:end])
+        self.fields[self._key] = value
+        events.append({"type": "field", "field": self._key, "value": value})
+        self._token_start = None
+
+    def _emit_delta(self, events: List[Dict[str, Any]], final: bool = False):
+        raw = self._text[self._token_start + 1:self._pos]
+        if not final:
+            raw = decodable_prefix(raw)
+        text = json.loads(f'"{raw}"')
+        if len(text) > len(self._emitted_text):
+            events.append({"type": "delta", "field": self._key, "text": text[len(self._emitted_text):]})
+            self._emitted_text = text
@@ -0,0 +1,384 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from model_usage import record_call
+from resilience import gemini_caller
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Bump when chunking changes; together with the embedder name it forms the
+# per-meeting index version, so only meetings on an old version are re-embedded.
+CHUNKER_VERSION = "1"
+
+# Local retrieval index over stored meetings. Chunks are embedded at ingest
+# time and kept in a single float32 matrix (rows L2-normalized), so a query is
+# one matrix-vector product plus a partial sort.
+RAG_INDEX_DIR = os.getenv("RAG_INDEX_DIR", "rag_index")
+RAG_EMBEDDER = os.getenv("RAG_EMBEDDER", "gemini")  # "gemini" or "hashing"
+RAG_CHUNK_CHARS = int(os.getenv("RAG_CHUNK_CHARS", "1000"))
+RAG_CHUNK_OVERLAP_CHARS = int(os.getenv("RAG_CHUNK_OVERLAP_CHARS", "150"))
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "5"))
+
+GEMINI_EMBEDDING_MODEL = "models/text-embedding-004"
+GEMINI_EMBEDDING_DIM = 768
+GEMINI_EMBEDDING_BATCH = 100
+GEMINI_EMBEDDING_TIMEOUT_SECONDS = float(os.getenv("GEMINI_EMBEDDING_TIMEOUT_SECONDS", "30"))
+HASHING_EMBEDDING_DIM = 384
+
+VECTORS_FILE = "vectors.f32"
+CHUNKS_FILE = "chunks.jsonl"
+TOMBSTONES_FILE = "tombstones.jsonl"
+MANIFEST_FILE = "manifest.json"
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+# --- Embedders ---
+
+class HashingEmbedder:
+    """
+    Deterministic, dependency-free embedder (feature hashing of unigrams and
+    bigrams). Needs no network, so it is used for tests and offline setups.
+    """
+
+    name = "hashing-v1"
+
+    def __init__(self, dim: int = HASHING_EMBEDDING_DIM):
+        self.dim = dim
+
+    def _embed_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        return vector
+
+    async def embed_documents(self, texts: List[str]) -> np.ndarray:
+        return np.vstack([self._embed_one(t) for t in texts]) if texts else np.zeros((0, self.dim), np.float32)
+
+    async def embed_query(self, text: str) -> np.ndarray:
+        return self._embed_one(text)
+
+
+class GeminiEmbedder:
+    """
+    Gemini embeddings, called through the shared Gemini retry policy and
+    circuit breaker; each batch is recorded as an "embedding" model call.
+    """
+
+    name = f"gemini:{GEMINI_EMBEDDING_MODEL}"
+    dim = GEMINI_EMBEDDING_DIM
+
+    async def _embed_batch(self, batch: List[str], task_type: str) -> List[List[float]]:
+        import google.generativeai as genai
+
+        async def attempt(attempt_timeout):
+            return await genai.embed_content_async(model=GEMINI_EMBEDDING_MODEL, content=batch, task_type=task_type)
+
+        stats = {}
+        started = time.perf_counter()
+        try:
+            result = await gemini_caller.call(attempt, GEMINI_EMBEDDING_TIMEOUT_SECONDS, stats=stats)
+        except BaseException as e:
+            record_call("embedding", GEMINI_EMBEDDING_MODEL, time.perf_counter() - started, error=e,
+                        attempts=stats.get("attempts", 0))
+            raise
+        record_call("embedding", GEMINI_EMBEDDING_MODEL, time.perf_counter() - started, attempts=stats["attempts"])
+        return result["embedding"]
+
+    async def _embed(self, texts: List[str], task_type: str) -> np.ndarray:
+        vectors = []
+        for start in range(0, len(texts), GEMINI_EMBEDDING_BATCH):
+            vectors.extend(await self._embed_batch(texts[start:start + GEMINI_EMBEDDING_BATCH], task_type))
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim)
+
+    async def embed_documents(self, texts: List[str]) -> np.ndarray:
+        return await self._embed(texts, "retrieval_document")
+
+    async def embed_query(self, text: str) -> np.ndarray:
+        return (await self._embed([text], "retrieval_query"))[0]
+
+
+def get_embedder():
+    if RAG_EMBEDDER == "hashing":
+        return HashingEmbedder()
+    return GeminiEmbedder()
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+# --- Vector index ---
+
+class VectorIndex:
+    """
+    Append-only NumPy vector index persisted as a raw float32 file plus a JSONL
+    file of chunk metadata, so adding a meeting appends rather than rewrites.
+    Re-indexing a meeting appends a tombstone that hides its earlier rows.
+    """
+
+    def __init__(self, directory: str, dim: int, embedder_name: str):
+        self.directory = directory
+        self.dim = dim
+        self.embedder_name = embedder_name
+        self._vectors = np.zeros((1024, dim), dtype=np.float32)
+        self._live = np.zeros(1024, dtype=bool)
+        self._size = 0
+        self.chunks: List[Dict[str, Any]] = []
+        self._rows_by_meeting: Dict[str, List[int]] = {}
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:self._size]
+
+    def __len__(self):
+        return self._size
+
+    @classmethod
+    def load(cls, directory: str, dim: int, embedder_name: str) -> "VectorIndex":
+        index = cls(directory, dim, embedder_name)
+        manifest_path = os.path.join(directory, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return index
+
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("embedder") != embedder_name or manifest.get("dim") != dim:
+            logger.warning(f"RAG index at {directory} was built with {manifest.get('embedder')}; starting a new index.")
+            os.remove(manifest_path)  # The next write truncates the old data files.
+            return index
+
+        vectors = np.fromfile(os.path.join(directory, VECTORS_FILE), dtype=np.float32).reshape(-1, dim)
+        with open(os.path.join(directory, CHUNKS_FILE), encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f if line.strip()]
+        # A crash between the two appends can leave one file longer than the other.
+        count = min(len(vectors), len(chunks))
+        index._append(vectors[:count], chunks[:count])
+
+        tombstones_path = os.path.join(directory, TOMBSTONES_FILE)
+        if os.path.exists(tombstones_path):
+            with open(tombstones_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        tombstone = json.loads(line)
+                        index._remove(tombstone["meeting_id"], tombstone["before_row"])
+
+        logger.info(f"Loaded RAG index with {index.live_count} live chunks from {directory}.")
+        return index
+
+    @property
+    def live_count(self) -> int:
+        return int(self._live[:self._size].sum())
+
+    def _append(self, vectors: np.ndarray, chunks: List[Dict[str, Any]]):
+        needed = self._size + len(vectors)
+        if needed > len(self._vectors):
+            grown = np.zeros((max(needed, 2 * len(self._vectors)), self.dim), dtype=np.float32)
+            grown[:self._size] = self.vectors
+            self._vectors = grown
+            live = np.zeros(len(grown), dtype=bool)
+            live[:self._size] = self._live[:self._size]
+            self._live = live
+        self._vectors[self._size:needed] = vectors
+        self._live[self._size:needed] = True
+        for row, chunk in enumerate(chunks, start=self._size):
+            self._rows_by_meeting.setdefault(chunk["meeting_id"], []).append(row)
+        self.chunks.extend(chunks)
+        self._size = needed
+
+    def _persist(self, vectors: np.ndarray, chunks: List[Dict[str, Any]]):
+        os.makedirs(self.directory, exist_ok=True)
+        manifest_path = os.path.join(self.directory, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            # Fresh (or rebuilt) index: truncate any stale data files.
+            for name in (VECTORS_FILE, CHUNKS_FILE, TOMBSTONES_FILE):
+                open(os.path.join(self.directory, name), "wb").close()
+            with open(manifest_path, "w", encoding="utf-8") as f:
+                json.dump({"embedder": self.embedder_name, "dim": self.dim}, f)
+
+        with open(os.path.join(self.directory, VECTORS_FILE), "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        with open(os.path.join(self.directory, CHUNKS_FILE), "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(chunk) + "\n" for chunk in chunks)
+
+    def _remove(self, meeting_id: str, before_row: int):
+        rows = self._rows_by_meeting.get(meeting_id, [])
+        removed = [r for r in rows if r < before_row]
+        self._live[removed] = False
+        remaining = [r for r in rows if r >= before_row]
+        if remaining:
+            self._rows_by_meeting[meeting_id] = remaining
+        else:
+            self._rows_by_meeting.pop(meeting_id, None)
+
+    def _persist_removal(self, meeting_id: str, before_row: int):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, TOMBSTONES_FILE), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"meeting_id": meeting_id, "before_row": before_row}) + "\n")
+
+    def has_meeting(self, meeting_id: str) -> bool:
+        return meeting_id in self._rows_by_meeting
+
+    def prepare(self, vectors: np.ndarray) -> np.ndarray:
+        return _normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+
+    def add(self, vectors: np.ndarray, chunks: List[Dict[str, Any]], persist: bool = True):
+        vectors = self.prepare(vectors)
+        if persist:
+            self._persist(vectors, chunks)
+        self._append(vectors, chunks)
+
+    def search(self, query_vector: np.ndarray, k: int = RAG_TOP_K, meeting_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        if meeting_id is not None:
+            rows = np.asarray(self._rows_by_meeting.get(meeting_id, []), dtype=np.int64)
+            if rows.size == 0:
+                return []
+            scores = self._vectors[rows] @ query_vector
+        else:
+            rows = None
+            scores = self.vectors @ query_vector
+            if self.live_count < self._size:
+                scores = np.where(self._live[:self._size], scores, -np.inf)
+
+        if scores.size == 0:
+            return []
+        k = min(k, scores.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for position in top:
+            if not np.isfinite(scores[position]):
+                break
+            row = int(rows[position]) if rows is not None else int(position)
+            results.append({**self.chunks[row], "score": float(scores[position])})
+        return results
+
+
+# --- Chunking ---
+
+def chunk_text(text: str, max_chars: int = RAG_CHUNK_CHARS, overlap_chars: int = RAG_CHUNK_OVERLAP_CHARS) -> List[str]:
+    """
+    Splits text into overlapping windows, breaking at line or sentence ends
+    where possible so speaker turns are not cut mid-sentence.
+    """
+    text = text.strip()
+    chunks, start = [], 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            window = text[start:end]
+            cut = max(window.rfind("\n"), window.rfind(". "))
+            if cut > max_chars // 2:
+                end = start + cut + 1
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap_chars, start + 1)
+    return [c for c in chunks if c]
+
+
+def build_meeting_chunks(meeting_id: str, transcript: str, meeting: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Turns a meeting into retrievable chunks: transcript windows plus the
+    summary, each action item and each key decision as their own chunk.
+    """
+    base = {"meeting_id": meeting_id, "timestamp": meeting.get("timestamp")}
+    chunks = [{**base, "source": "transcript", "text": text} for text in chunk_text(transcript or "")]
+
+    if meeting.get("summary"):
+        chunks.append({**base, "source": "summary", "text": meeting["summary"]})
+    for item in meeting.get("action_items") or []:
+        text = f"Action item: {item.get('task')} (assignee: {item.get('assignee') or 'N/A'}, deadline: {item.get('deadline') or 'N/A'}, status: {item.get('status', 'new')})"
+        chunks.append({**base, "source": "action_item", "text": text})
+    for decision in meeting.get("key_decisions") or []:
+        participants = ", ".join(decision.get("participants_involved") or []) or "N/A"
+        text = f"Decision: {decision.get('description')} (participants: {participants}, date: {decision.get('date_made')})"
+        chunks.append({**base, "source": "key_decision", "text": text})
+    return chunks
+
+
+# --- Module-level index used by the API ---
+
+_embedder = None
+_index: Optional[VectorIndex] = None
+_index_lock: Optional[asyncio.Lock] = None
+
+
+def load_index() -> VectorIndex:
+    global _embedder, _index, _index_lock
+    _embedder = get_embedder()
+    _index = VectorIndex.load(RAG_INDEX_DIR, _embedder.dim, _embedder.name)
+    _index_lock = asyncio.Lock()
+    return _index
+
+
+def index_version() -> str:
+    if _embedder is None:
+        load_index()
+    return f"{_embedder.name}|chunker-{CHUNKER_VERSION}"
+
+
+async def index_meetings(meetings: List[Dict[str, Any]]) -> int:
+    """
+    Embeds and stores several meetings with one bulk embedding call. Each item
+    has meeting_id, transcript and meeting (the analysis dict). Meetings that
+    were indexed before are replaced; if a meeting appears more than once,
+    its last entry wins. Returns the number of chunks added.
+    """
+    if _index is None:
+        load_index()
+
+    meetings = list({m["meeting_id"]: m for m in meetings}.values())
+
+    chunks = [
+        chunk
+        for m in meetings
+        for chunk in build_meeting_chunks(m["meeting_id"], m["transcript"], m["meeting"])
+    ]
+    vectors = _index.prepare(await _embedder.embed_documents([c["text"] for c in chunks])) if chunks else None
+
+    async with _index_lock:
+        # Disk writes go off the loop; in-memory updates stay on the loop so
+        # concurrent searches never see a half-added meeting.
+        before_row = len(_index)
+        replaced = [m["meeting_id"] for m in meetings if _index.has_meeting(m["meeting_id"])]
+        if chunks:
+            await asyncio.to_thread(_index._persist, vectors, chunks)
+        for meeting_id in replaced:
+            await asyncio.to_thread(_index._persist_removal, meeting_id, before_row)
+        if chunks:
+            _index._append(vectors, chunks)
+        for meeting_id in replaced:
+            _index._remove(meeting_id, before_row)
+
+    return len(chunks)
+
+
+async def index_meeting(meeting_id: str, transcript: str, meeting: Dict[str, Any]) -> int:
+    """
+    Embeds and stores a single meeting's chunks. Returns the number of chunks added.
+    """
+    return await index_meetings([{"meeting_id": meeting_id, "transcript": transcript, "meeting": meeting}])
+
+
+async def retrieve(query: str, meeting_id: Optional[str] = None, k: int = RAG_TOP_K) -> List[Dict[str, Any]]:
+    if _index is None:
+        load_index()
+    query_vector = _normalize_rows(await _embedder.embed_query(query))
+    return _index.search(query_vector, k=k, meeting_id=meeting_id)
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+import rag_index
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Meetings are queued on insert and embedded in batches, so many small
+# meetings share one embedding call. Per-meeting index versions are recorded
+# in Mongo; backfill re-embeds only meetings that are missing or outdated.
+RAG_INGEST_BATCH_CHUNKS = int(os.getenv("RAG_INGEST_BATCH_CHUNKS", "256"))
+RAG_INGEST_FLUSH_SECONDS = float(os.getenv("RAG_INGEST_FLUSH_SECONDS", "2"))
+RAG_BACKFILL_BATCH_MEETINGS = int(os.getenv("RAG_BACKFILL_BATCH_MEETINGS", "50"))
+
+# Analysis fields that are not worth embedding.
+EXCLUDED_MEETING_FIELDS = ("_id", "raw_transcript_preview", "full_transcript_path")
+
+
+class IngestPipeline:
+    """
+    Background batcher between the API and the vector index.
+    """
+
+    def __init__(self, state_collection, transcripts_collection,
+                 batch_chunks: int = RAG_INGEST_BATCH_CHUNKS,
+                 flush_seconds: float = RAG_INGEST_FLUSH_SECONDS):
+        self.state_collection = state_collection
+        self.transcripts_collection = transcripts_collection
+        self.batch_chunks = batch_chunks
+        self.flush_seconds = flush_seconds
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await self.state_collection.create_index("meeting_id", unique=True)
+        await self.state_collection.create_index("index_version")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def submit(self, meeting_id: str, transcript: str, meeting: Dict[str, Any]):
+        meeting = {k: v for k, v in meeting.items() if k not in EXCLUDED_MEETING_FIELDS}
+        self._queue.put_nowait({"meeting_id": meeting_id, "transcript": transcript, "meeting": meeting})
+
+    async def ingest_batch(self, items: List[Dict[str, Any]]) -> int:
+        """
+        Embeds a batch of meetings in one call and records their index version.
+        """
+        if not items:
+            return 0
+        version = rag_index.index_version()
+        chunk_count = await rag_index.index_meetings(items)
+        now = datetime.now(timezone.utc)
+        await self.state_collection.bulk_write([
+            UpdateOne(
+                {"meeting_id": item["meeting_id"]},
+                {"$set": {"index_version": version, "indexed_at": now}},
+                upsert=True
+            )
+            for item in items
+        ], ordered=False)
+        return chunk_count
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            estimated_chunks = _estimate_chunks(batch[0])
+            deadline = asyncio.get_running_loop().time() + self.flush_seconds
+
+            while estimated_chunks < self.batch_chunks:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                estimated_chunks += _estimate_chunks(item)
+
+            try:
+                chunk_count = await self.ingest_batch(batch)
+                logger.info(f"Indexed {chunk_count} chunks for {len(batch)} meetings.")
+            except Exception as e:
+                # Left unrecorded, so the next backfill picks these meetings up.
+                logger.error(f"RAG ingestion failed for {len(batch)} meetings: {e}")
+
+
+def _estimate_chunks(item: Dict[str, Any]) -> int:
+    meeting = item["meeting"]
+    transcript_chunks = len(item["transcript"] or "") // max(rag_index.RAG_CHUNK_CHARS - rag_index.RAG_CHUNK_OVERLAP_CHARS, 1) + 1
+    return transcript_chunks + 1 + len(meeting.get("action_items") or []) + len(meeting.get("key_decisions") or [])
+
+
+async def backfill(meetings_collection, pipeline: IngestPipeline,
+                   batch_meetings: int = RAG_BACKFILL_BATCH_MEETINGS, limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Indexes every stored meeting that is not yet on the current index version.
+    Progress is recorded per batch, so an interrupted run resumes where it stopped.
+    """
+    version = rag_index.index_version()
+    up_to_date = {
+        doc["meeting_id"]
+        async for doc in pipeline.state_collection.find({"index_version": version}, {"meeting_id": 1, "_id": 0})
+    }
+
+    report = {"index_version": version, "meetings_indexed": 0, "meetings_skipped": 0, "chunks": 0}
+    started = time.perf_counter()
+    batch: List[Dict[str, Any]] = []
+
+    async def flush():
+        report["chunks"] += await pipeline.ingest_batch(batch)
+        report["meetings_indexed"] += len(batch)
+        batch.clear()
+        elapsed = time.perf_counter() - started
+        logger.info(f"Backfill: {report['meetings_indexed']} meetings, {report['chunks']} chunks, "
+                    f"{report['chunks'] / elapsed:.1f} chunks/s")
+
+    async for doc in meetings_collection.find({}).sort("_id", 1):
+        if doc["meeting_id"] in up_to_date:
+            report["meetings_skipped"] += 1
+            continue
+        if limit is not None and report["meetings_indexed"] + len(batch) >= limit:
+            break
+
+        # Older meetings predate full-transcript storage; fall back to the preview.
+        transcript_doc = await pipeline.transcripts_collection.find_one({"meeting_id": doc["meeting_id"]}, {"text": 1})
+        transcript = transcript_doc["text"] if transcript_doc else doc.get("raw_transcript_preview") or ""
+        meeting = {k: v for k, v in doc.items() if k not in EXCLUDED_MEETING_FIELDS}
+        batch.append({"meeting_id": doc["meeting_id"], "transcript": transcript, "meeting": meeting})
+
+        if len(batch) >= batch_meetings:
+            await flush()
+
+    if batch:
+        await flush()
+
+    elapsed = time.perf_counter() - started
+    report["seconds"] = round(elapsed, 3)
+    report["chunks_per_second"] = round(report["chunks"] / elapsed, 1) if elapsed else 0.0
+    return report
+
+
+async def _backfill_main(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    mongo_db_url = os.getenv("MONGO_DB_URL")
+    db_name = os.getenv("DB_NAME")
+    if not mongo_db_url or not db_name:
+        raise ValueError("MONGO_DB_URL and DB_NAME must be set in environment variables.")
+
+    client = AsyncIOMotorClient(mongo_db_url)
+    try:
+        database = client[db_name]
+        rag_index.load_index()
+        pipeline = IngestPipeline(database["rag_index_state"], database["meeting_transcripts"])
+        await pipeline.state_collection.create_index("meeting_id", unique=True)
+        report = await backfill(database["meetings"], pipeline, batch_meetings=args.batch_size, limit=args.limit)
+        logger.info(f"Backfill finished: {report}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Embed stored meetings that are missing from the RAG index or on an old index version. "
+                    "Run while the API is stopped, or use POST /rag/backfill on a running server, "
+                    "since both append to the same index files."
+    )
+    parser.add_argument("--batch-size", type=int, default=RAG_BACKFILL_BATCH_MEETINGS, help="Meetings per embedding batch.")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after indexing this many meetings.")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(_backfill_main(parser.parse_args()))
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+try:
+    from google.api_core import exceptions as google_exceptions
+except ImportError:  # only needed to classify Gemini errors
+    google_exceptions = None
+
+# Shared wrapper for calls to external model providers (Gemini, AssemblyAI):
+# jittered exponential retries within an overall deadline, optional hedged
+# duplicates once an attempt runs past the provider's recent p95 latency, and
+# a circuit breaker that fails fast while a provider keeps failing.
+RETRY_ATTEMPTS = int(os.getenv("PROVIDER_RETRY_ATTEMPTS", "3"))
+RETRY_BASE_SECONDS = float(os.getenv("PROVIDER_RETRY_BASE_SECONDS", "0.5"))
+RETRY_MAX_SECONDS = float(os.getenv("PROVIDER_RETRY_MAX_SECONDS", "8"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+# Hedging doubles the cost of slow calls, so it is opt-in per provider.
+GEMINI_HEDGE = os.getenv("GEMINI_HEDGE", "false").lower() == "true"
+HEDGE_MIN_SAMPLES = 20
+HEDGE_PERCENTILE = 95
+LATENCY_WINDOW = 200
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+Attempt = Callable[[float], Awaitable[Any]]
+
+
+class ProviderUnavailable(RuntimeError):
+    """
+    The provider's circuit is open; the call was not attempted.
+    """
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(f"{provider} is unavailable after repeated failures; retry in {retry_after:.0f}s.")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Timeouts, connection problems, throttling and server errors are worth
+    retrying; client errors (bad request, auth) are not.
+    """
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    if google_exceptions is not None and isinstance(error, (
+        google_exceptions.TooManyRequests,
+        google_exceptions.InternalServerError,
+        google_exceptions.BadGateway,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.GatewayTimeout,
+    )):
+        return True
+    return False
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failed calls. A call counts
+    once, when it has failed with a retryable error and used up its retries,
+    however many attempts it made. While open, calls fail fast; after
+    `reset_seconds` one probe call (a single attempt) is let through
+    (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(self.reset_seconds - (time.monotonic() - self.opened_at), 0.0)
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and self.retry_after() == 0:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"Circuit opened after {self.consecutive_failures} consecutive failures.")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        # A probe that ended without a verdict (e.g. a client error) frees the slot.
+        self._probe_in_flight = False
+
+
+class ResilientCaller:
+    """
+    Runs attempts against one provider. Each attempt is a coroutine factory
+    that takes its own timeout in seconds, so one call can be retried or
+    hedged without sharing state between attempts.
+    """
+
+    def __init__(self, provider: str, attempts: int = RETRY_ATTEMPTS, hedge: bool = False,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.provider = provider
+        self.attempts = attempts
+        self.hedge = hedge
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.counts = {"calls": 0, "failures": 0, "retries": 0, "hedges": 0, "rejected": 0}
+        self.last_error: Optional[str] = None
+
+    def hedge_delay(self) -> Optional[float]:
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, len(ordered) * HEDGE_PERCENTILE // 100)]
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": uniformly random up to the exponential cap.
+        return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
+
+    async def _attempt(self, attempt: Attempt, timeout: float, hedge: bool, stats: Dict[str, Any]):
+        started = time.perf_counter()
+        delay = self.hedge_delay() if hedge else None
+        first = asyncio.ensure_future(asyncio.wait_for(attempt(timeout), timeout))
+        tasks = {first}
+        try:
+            if delay is not None and delay < timeout:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    self.counts["hedges"] += 1
+                    stats["hedged"] = True
+                    tasks.add(asyncio.ensure_future(asyncio.wait_for(attempt(timeout - delay), timeout - delay)))
+            while True:
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.latencies.append(time.perf_counter() - started)
+                        return task.result()
+                tasks = pending
+                if not tasks:
+                    raise next(iter(done)).exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def call(self, attempt: Attempt, deadline: float, retry: bool = True,
+                   hedge: Optional[bool] = None, stats: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Calls `attempt(timeout)` until it succeeds, fails with a non-retryable
+        error, runs out of attempts or passes `deadline` seconds in total.
+        `retry=False` is for attempts that cannot be replayed (e.g. a consumed
+        upload stream). `stats` receives the attempt count and whether a
+        hedged duplicate was sent.
+        """
+        stats = stats if stats is not None else {}
+        stats.update(attempts=0, hedged=False)
+        hedge = self.hedge if hedge is None else hedge
+        give_up_at = time.monotonic() + deadline
+        self.counts["calls"] += 1
+
+        if not self.breaker.allow():
+            self.counts["rejected"] += 1
+            raise ProviderUnavailable(self.provider, self.breaker.retry_after())
+        # A half-open probe gets one attempt, so one call decides the circuit.
+        max_attempts = 1 if not retry or self.breaker.state == "half_open" else self.attempts
+
+        failure: Optional[BaseException] = None
+        for attempt_number in range(max_attempts):
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                failure = asyncio.TimeoutError(f"{self.provider} call exceeded its {deadline}s deadline.")
+                break
+
+            stats["attempts"] += 1
+            try:
+                result = await self._attempt(attempt, remaining, hedge, stats)
+            except asyncio.CancelledError:
+                self.breaker.release_probe()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    self.breaker.release_probe()
+                    raise
+                failure = e
+                self.counts["failures"] += 1
+                self.last_error = f"{type(e).__name__}: {e}"[:200]
+                backoff = self._backoff(attempt_number)
+                if attempt_number + 1 >= max_attempts or time.monotonic() + backoff >= give_up_at:
+                    break
+                self.counts["retries"] += 1
+                logger.warning(f"{self.provider} call failed ({type(e).__name__}: {e}); "
+                               f"retry {attempt_number + 1} in {backoff:.2f}s")
+                await asyncio.sleep(backoff)
+                continue
+            self.breaker.record_success()
+            return result
+
+        self.breaker.record_failure()
+        raise failure
+
+    def health(self) -> Dict[str, Any]:
+        delay = self.hedge_delay()
+        ordered = sorted(self.latencies)
+        return {
+            "provider": self.provider,
+            "status": {"closed": "healthy", "half_open": "recovering", "open": "unavailable"}[self.breaker.state],
+            "circuit": self.breaker.state,
+            "retry_after_seconds": round(self.breaker.retry_after(), 1),
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "p50_latency_ms": round(ordered[len(ordered) // 2] * 1000, 1) if ordered else None,
+            "hedge_after_ms": round(delay * 1000, 1) if delay is not None else None,
+            "last_error": self.last_error,
+            **self.counts,
+        }
+
+
+gemini_caller = ResilientCaller("gemini", hedge=GEMINI_HEDGE)
+assemblyai_caller = ResilientCaller("assemblyai")
+
+
+def provider_health() -> Dict[str, Any]:
+    return {caller.provider: caller.health() for caller in (gemini_caller, assemblyai_caller)}
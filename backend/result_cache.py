@@ -0,0 +1,128 @@
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Content-addressed cache for transcription and analysis results, so a
+# re-uploaded recording or transcript does not pay AssemblyAI/Gemini again.
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_MONGO_ENABLED = os.getenv("CACHE_MONGO_ENABLED", "true").lower() == "true"
+
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class MemoryCache:
+    """
+    In-process LRU with a per-entry TTL.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class MongoCache:
+    """
+    Shared cache in a Mongo collection; a TTL index expires old entries.
+    """
+
+    def __init__(self, collection, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("key", unique=True)
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def get(self, key: str) -> Optional[Any]:
+        doc = await self.collection.find_one(
+            {"key": key, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+            {"_id": 0, "value": 1}
+        )
+        return doc["value"] if doc else None
+
+    async def set(self, key: str, value: Any):
+        await self.collection.update_one(
+            {"key": key},
+            {"$set": {
+                "value": value,
+                "expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+            }},
+            upsert=True
+        )
+
+
+class ResultCache:
+    """
+    Two-tier cache (memory in front of an optional Mongo backend) with hit and
+    miss counters per namespace, e.g. "transcript" or "analysis".
+    """
+
+    def __init__(self, memory: MemoryCache, mongo: Optional[MongoCache] = None):
+        self.memory = memory
+        self.mongo = mongo
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, namespace: str, outcome: str):
+        counts = self.counters.setdefault(namespace, {"hits": 0, "misses": 0})
+        counts[outcome] += 1
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        full_key = f"{namespace}:{key}"
+        value = await self.memory.get(full_key)
+        if value is None and self.mongo is not None:
+            try:
+                value = await self.mongo.get(full_key)
+            except Exception as e:
+                logger.warning(f"Cache lookup failed for {namespace}: {e}")
+            if value is not None:
+                await self.memory.set(full_key, value)
+
+        self._count(namespace, "misses" if value is None else "hits")
+        return value
+
+    async def set(self, namespace: str, key: str, value: Any):
+        full_key = f"{namespace}:{key}"
+        await self.memory.set(full_key, value)
+        if self.mongo is not None:
+            try:
+                await self.mongo.set(full_key, value)
+            except Exception as e:
+                logger.warning(f"Cache write failed for {namespace}: {e}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {}
+        for namespace, counts in self.counters.items():
+            total = counts["hits"] + counts["misses"]
+            stats[namespace] = {**counts, "hit_ratio": counts["hits"] / total if total else 0.0}
+        return stats
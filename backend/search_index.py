@@ -0,0 +1,279 @@
+import heapq
+import logging
+import math
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Tuple
+
+from dotenv import load_dotenv
+
+try:
+    from nltk.stem.snowball import SnowballStemmer
+except ImportError:  # falls back to a light suffix stripper below
+    SnowballStemmer = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Full-text search over meeting analyses. "mongo" uses a text index on the
+# meetings collection; "memory" is a pure-Python BM25 inverted index used for
+# tests and deployments without text-index support.
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "mongo")
+
+# Fields that are searched, as dotted Mongo paths.
+SEARCH_FIELDS = ["summary", "important_topics", "action_items.task", "key_decisions.description"]
+TEXT_INDEX_NAME = "meeting_text_search"
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+SNIPPET_CHARS = 160
+
+TOKEN_PATTERN = re.compile(r"\w+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "that", "the", "to", "was", "we", "were", "where", "with",
+}
+
+
+# MongoDB's $text stems with Snowball's English stemmer, so terms are stemmed
+# the same way here: "deciding" in a query matches and highlights "decided".
+_snowball = SnowballStemmer("english") if SnowballStemmer else None
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    if _snowball is not None:
+        return _snowball.stem(word)
+    # Without nltk: strip a plural, then one verb/adverb suffix. Close to
+    # Snowball for common words, e.g. "meetings" and "meeting" -> "meet".
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    for suffix in ("ingly", "edly", "ing", "ed", "ly"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    return word[:-1] if word.endswith("e") and len(word) > 4 else word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cased, stemmed terms of `text` without stopwords.
+    """
+    return [stem(t) for t in TOKEN_PATTERN.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def _matches(word: str, terms: set) -> bool:
+    word = word.lower()
+    return word not in STOPWORDS and stem(word) in terms
+
+
+def extract_field_texts(meeting: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    Pulls the searchable text out of a meeting document, keyed by SEARCH_FIELDS.
+    """
+    return {
+        "summary": [meeting.get("summary") or ""],
+        "important_topics": list(meeting.get("important_topics") or []),
+        "action_items.task": [i.get("task") or "" for i in meeting.get("action_items") or []],
+        "key_decisions.description": [d.get("description") or "" for d in meeting.get("key_decisions") or []],
+    }
+
+
+def _snippet(text: str, terms: set) -> str:
+    tokens = list(TOKEN_PATTERN.finditer(text))
+    first = next((m for m in tokens if _matches(m.group(), terms)), None)
+    if first is None:
+        return ""
+    start = max(0, first.start() - SNIPPET_CHARS // 3)
+    end = min(len(text), start + SNIPPET_CHARS)
+    window = text[start:end]
+    highlighted = TOKEN_PATTERN.sub(
+        lambda m: f"<mark>{m.group()}</mark>" if _matches(m.group(), terms) else m.group(),
+        window
+    )
+    return ("..." if start > 0 else "") + highlighted + ("..." if end < len(text) else "")
+
+
+def build_highlights(meeting: Dict[str, Any], query: str) -> Dict[str, List[str]]:
+    """
+    Snippets, with query terms wrapped in <mark>, for every field that matched.
+    Words are compared by stem, as the text index compares them.
+    """
+    terms = set(tokenize(query))
+    highlights = {}
+    for field, texts in extract_field_texts(meeting).items():
+        snippets = [s for s in (_snippet(t, terms) for t in texts) if s]
+        if snippets:
+            highlights[field] = snippets
+    return highlights
+
+
+async def ensure_text_index(collection):
+    try:
+        await collection.create_index(
+            [(field, "text") for field in SEARCH_FIELDS],
+            name=TEXT_INDEX_NAME,
+            weights={"summary": 3, "important_topics": 2, "action_items.task": 1, "key_decisions.description": 2},
+        )
+    except Exception as e:
+        logger.warning(f"Could not create meetings text index: {e}")
+
+
+class InvertedIndex:
+    """
+    In-memory inverted index ranked with BM25. Postings map each term to
+    {doc_id: term frequency}; a query only touches the postings of its terms.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self._doc_terms: Dict[str, List[str]] = {}
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: str, meeting: Dict[str, Any]):
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+        tokens = [t for texts in extract_field_texts(meeting).values() for text in texts for t in tokenize(text)]
+        counts = Counter(tokens)
+        for term, count in counts.items():
+            self.postings.setdefault(term, {})[doc_id] = count
+        self._doc_terms[doc_id] = list(counts)
+        self.doc_lengths[doc_id] = len(tokens)
+        self._total_length += len(tokens)
+
+    def remove(self, doc_id: str):
+        length = self.doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._doc_terms.pop(doc_id, []):
+            docs = self.postings[term]
+            docs.pop(doc_id, None)
+            if not docs:
+                del self.postings[term]
+
+    def _scores(self, query: str) -> Dict[str, float]:
+        n_docs = len(self.doc_lengths)
+        if not n_docs:
+            return {}
+        avg_length = self._total_length / n_docs
+        scores: Dict[str, float] = {}
+
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        return heapq.nlargest(k, self._scores(query).items(), key=lambda item: item[1])
+
+    def search_batches(self, query: str, batch_size: int) -> Iterator[List[Tuple[str, float]]]:
+        """
+        All matches, best first, in batches of `batch_size`. For callers that
+        filter hits afterwards and need to keep going until a page is full.
+        """
+        heap = [(-score, doc_id) for doc_id, score in self._scores(query).items()]
+        heapq.heapify(heap)
+        while heap:
+            batch = [heapq.heappop(heap) for _ in range(min(batch_size, len(heap)))]
+            yield [(doc_id, -score) for score, doc_id in batch]
+
+
+# --- Benchmark: query latency over synthetic meetings ---
+
+def _synthetic_vocabulary(size: int, rng) -> List[str]:
+    syllables = ["ka", "lo", "mi", "ren", "tas", "vo", "bel", "dri", "gan", "sul", "pe", "tor"]
+    words = dict.fromkeys("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(size * 2))
+    return list(words)[:size]
+
+
+def _synthetic_meetings(count: int, vocabulary: List[str], rng) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    # Zipf-like word frequencies, as in real text.
+    cumulative = list(accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+
+    def words(n):
+        return " ".join(rng.choices(vocabulary, cum_weights=cumulative, k=n))
+
+    for i in range(count):
+        yield f"m{i}", {
+            "summary": words(40),
+            "important_topics": [words(2) for _ in range(3)],
+            "action_items": [{"task": words(6)} for _ in range(3)],
+            "key_decisions": [{"description": words(8)} for _ in range(2)],
+        }
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _benchmark_main(args):
+    import random
+    import resource
+    import time
+
+    rng = random.Random(args.seed)
+    vocabulary = _synthetic_vocabulary(args.vocabulary, rng)
+    index = InvertedIndex()
+    started = time.perf_counter()
+    for doc_id, meeting in _synthetic_meetings(args.documents, vocabulary, rng):
+        index.add(doc_id, meeting)
+    print(f"Indexed {len(index)} meetings ({len(index.postings)} terms) in {time.perf_counter() - started:.0f}s; "
+          f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+    # Content-word queries skip the most frequent ranks, which behave like
+    # stopwords (in nearly every meeting); "head terms" shows that worst case.
+    query_sets = {
+        "content terms": vocabulary[args.skip_top:],
+        "head terms": vocabulary[:args.skip_top],
+    }
+    for name, pool in query_sets.items():
+        # Head-term queries are slow; a tenth as many is enough for their percentiles.
+        count = args.queries if name == "content terms" else max(20, args.queries // 10)
+        queries = [" ".join(rng.sample(pool, rng.randint(1, 3))) for _ in range(count)]
+        hits, top10, batch = [], [], []
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query, k=10)
+            top10.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            next(index.search_batches(query, 50), None)
+            batch.append((time.perf_counter() - started) * 1000)
+            hits.append(len(index._scores(query)))
+        print(f"{name} (median {_percentile(hits, 0.5)} matching meetings):")
+        for label, values in (("top 10", top10), ("first batch of 50", batch)):
+            print(f"  {label:<18} p50 {_percentile(values, 0.5):8.2f} ms  p95 {_percentile(values, 0.95):8.2f} ms  "
+                  f"p99 {_percentile(values, 0.99):8.2f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Query latency of the in-memory BM25 index (SEARCH_BACKEND=memory) over synthetic meetings."
+    )
+    parser.add_argument("--documents", type=int, default=500_000)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=300, help="Queries per query set.")
+    parser.add_argument("--skip-top", type=int, default=100,
+                        help="The most frequent terms, excluded from content-term queries and used for head-term ones.")
+    parser.add_argument("--seed", type=int, default=7)
+    _benchmark_main(parser.parse_args())
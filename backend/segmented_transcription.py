@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import os
+import re
+import string
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from audio_preprocess import SAMPLE_RATE, VAD_FRAME_MS
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Long recordings are cut at quiet points into overlapping segments that are
+# transcribed concurrently, then stitched back into one AssemblyAI-shaped
+# transcript. Each segment "owns" the words whose midpoint falls between its
+# cuts; the overlap is only used to match speaker labels across segments.
+SEGMENTED_TRANSCRIPTION = os.getenv("SEGMENTED_TRANSCRIPTION", "false").lower() == "true"
+SEGMENT_SECONDS = float(os.getenv("SEGMENT_SECONDS", "900"))
+SEGMENT_OVERLAP_SECONDS = float(os.getenv("SEGMENT_OVERLAP_SECONDS", "15"))
+SEGMENT_MAX_PARALLEL = int(os.getenv("SEGMENT_MAX_PARALLEL", "4"))
+# How far around each target cut to look for the quietest frame.
+SEGMENT_SEARCH_SECONDS = 60.0
+# Words from two segments are the same word if they start this close together.
+WORD_MATCH_MS = 500
+
+# Transcribes one segment's samples and returns an AssemblyAI transcript with
+# times relative to the segment start.
+SegmentTranscriber = Callable[[np.ndarray], Awaitable[Dict[str, Any]]]
+
+# Results whose entries carry start/end times and are re-cut per segment.
+TIMED_RESULT_FIELDS = ("sentiment_analysis_results", "entities")
+
+
+def plan_segments(samples: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                  segment_seconds: float = SEGMENT_SECONDS,
+                  overlap_seconds: float = SEGMENT_OVERLAP_SECONDS) -> List[Dict[str, int]]:
+    """
+    Splits a recording into segments of roughly `segment_seconds`, cutting at
+    the quietest frame near each target. Each segment owns [cut_start, cut_end)
+    and is transcribed over [start, end), which adds the overlap on both sides.
+    All values are sample offsets.
+    """
+    total = len(samples)
+    segment, overlap = int(segment_seconds * sample_rate), int(overlap_seconds * sample_rate)
+    if total <= segment * 1.5:
+        return [{"start": 0, "end": total, "cut_start": 0, "cut_end": total}]
+
+    frame = sample_rate * VAD_FRAME_MS // 1000
+    n_frames = total // frame
+    frames = samples[:n_frames * frame].reshape(n_frames, frame).astype(np.float32)
+    energy = np.mean(frames * frames, axis=1)
+    search = int(SEGMENT_SEARCH_SECONDS * sample_rate) // frame
+
+    cuts, target = [0], segment
+    while total - target > segment // 2:
+        center = target // frame
+        lo, hi = max(center - search, cuts[-1] // frame + 1), min(center + search, n_frames)
+        cut = (lo + int(np.argmin(energy[lo:hi]))) * frame if hi > lo else target
+        cuts.append(cut)
+        target = cut + segment
+    cuts.append(total)
+
+    return [
+        {"start": max(cut_start - overlap, 0), "end": min(cut_end + overlap, total),
+         "cut_start": cut_start, "cut_end": cut_end}
+        for cut_start, cut_end in zip(cuts, cuts[1:])
+    ]
+
+
+def _normalize_word(text: str) -> str:
+    return (text or "").lower().strip(string.punctuation)
+
+
+def _shift(item: Dict[str, Any], offset_ms: int) -> Dict[str, Any]:
+    return {**item, "start": item["start"] + offset_ms, "end": item["end"] + offset_ms}
+
+
+def _owned(item: Dict[str, Any], lo_ms: int, hi_ms: int) -> bool:
+    return lo_ms <= (item["start"] + item["end"]) / 2 < hi_ms
+
+
+def _next_label(used: set) -> str:
+    for label in string.ascii_uppercase:
+        if label not in used:
+            return label
+    n = len(used)
+    while f"S{n}" in used:
+        n += 1
+    return f"S{n}"
+
+
+def reconcile_speakers(previous_words: List[Dict[str, Any]], words: List[Dict[str, Any]],
+                       known_labels: List[str]) -> Dict[str, str]:
+    """
+    Maps a segment's local speaker labels to the labels already in use, by
+    matching the words both segments heard in their overlap. Labels with no
+    evidence take a known label that is still unclaimed, then their own
+    letter if it is free, otherwise a new one.
+    """
+    by_text: Dict[str, List[Dict[str, Any]]] = {}
+    for word in previous_words:
+        by_text.setdefault(_normalize_word(word["text"]), []).append(word)
+
+    votes = Counter()
+    for word in words:
+        candidates = by_text.get(_normalize_word(word["text"]), [])
+        match = min(candidates, key=lambda w: abs(w["start"] - word["start"]), default=None)
+        if match and abs(match["start"] - word["start"]) <= WORD_MATCH_MS and word.get("speaker") and match.get("speaker"):
+            votes[(word["speaker"], match["speaker"])] += 1
+
+    mapping: Dict[str, str] = {}
+    for (local, known), _ in votes.most_common():
+        if local not in mapping and known not in mapping.values():
+            mapping[local] = known
+
+    # A speaker silent during the overlap most likely is one of the known
+    # speakers not matched yet; only mint new labels once those run out.
+    unclaimed = [label for label in known_labels if label not in mapping.values()]
+    used = set(known_labels) | set(mapping.values())
+    for local in dict.fromkeys(w.get("speaker") for w in words if w.get("speaker")):
+        if local in mapping:
+            continue
+        if unclaimed:
+            label = unclaimed.pop(0)
+        else:
+            label = local if local not in used else _next_label(used)
+            used.add(label)
+        mapping[local] = label
+    return mapping
+
+
+def build_utterances(words: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Groups consecutive words by speaker into AssemblyAI-style utterances.
+    """
+    utterances = []
+    for word in words:
+        if utterances and utterances[-1]["speaker"] == word.get("speaker"):
+            utterances[-1]["words"].append(word)
+        else:
+            utterances.append({"speaker": word.get("speaker"), "words": [word]})
+    for utterance in utterances:
+        utterance_words = utterance["words"]
+        utterance.update(
+            start=utterance_words[0]["start"],
+            end=utterance_words[-1]["end"],
+            text=" ".join(w["text"] for w in utterance_words),
+            confidence=round(sum(w.get("confidence", 0.0) for w in utterance_words) / len(utterance_words), 4),
+        )
+    return utterances
+
+
+def stitch_transcripts(results: List[Dict[str, Any]], plan: List[Dict[str, int]],
+                       sample_rate: int = SAMPLE_RATE) -> Dict[str, Any]:
+    """
+    Joins per-segment transcripts into one: shifts times to the recording,
+    keeps each segment's owned words, unifies speaker labels and drops the
+    duplicate a boundary word can leave in both segments.
+    """
+    def ms(samples: int) -> int:
+        return samples * 1000 // sample_rate
+
+    words: List[Dict[str, Any]] = []
+    timed: Dict[str, List[Dict[str, Any]]] = {field: [] for field in TIMED_RESULT_FIELDS}
+    previous_segment_words: List[Dict[str, Any]] = []
+    known_labels: List[str] = []
+
+    for result, segment in zip(results, plan):
+        offset, lo, hi = ms(segment["start"]), ms(segment["cut_start"]), ms(segment["cut_end"])
+        segment_words = [_shift(w, offset) for w in result.get("words") or []]
+
+        overlap_words = [w for w in previous_segment_words if w["end"] >= offset - WORD_MATCH_MS]
+        mapping = reconcile_speakers(overlap_words, segment_words, known_labels)
+        for word in segment_words:
+            if word.get("speaker"):
+                word["speaker"] = mapping.get(word["speaker"], word["speaker"])
+        known_labels.extend(label for label in dict.fromkeys(mapping.values()) if label not in known_labels)
+
+        for word in segment_words:
+            if not _owned(word, lo, hi):
+                continue
+            previous = words[-1] if words else None
+            if (previous and _normalize_word(previous["text"]) == _normalize_word(word["text"])
+                    and abs(previous["start"] - word["start"]) <= WORD_MATCH_MS):
+                continue
+            words.append(word)
+
+        for field in TIMED_RESULT_FIELDS:
+            for item in result.get(field) or []:
+                item = _shift(item, offset)
+                if item.get("speaker"):
+                    item["speaker"] = mapping.get(item["speaker"], item["speaker"])
+                if _owned(item, lo, hi):
+                    timed[field].append(item)
+
+        previous_segment_words = segment_words
+
+    return {
+        "status": "completed",
+        "text": re.sub(r"\s+", " ", " ".join(w["text"] for w in words)).strip(),
+        "words": words,
+        "utterances": build_utterances(words),
+        **timed,
+        "audio_duration": round(ms(plan[-1]["cut_end"]) / 1000, 3) if plan else 0,
+        "segment_transcript_ids": [r.get("id") for r in results],
+        "segments": [{"start": ms(s["start"]), "end": ms(s["end"])} for s in plan],
+    }
+
+
+async def transcribe_segmented(samples: np.ndarray, transcribe_segment: SegmentTranscriber,
+                               max_parallel: int = SEGMENT_MAX_PARALLEL,
+                               plan: Optional[List[Dict[str, int]]] = None) -> Dict[str, Any]:
+    """
+    Transcribes every planned segment, at most `max_parallel` at a time, and
+    stitches the results. Times in the result are relative to `samples`.
+    """
+    plan = plan or plan_segments(samples)
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def transcribe(segment):
+        async with semaphore:
+            return await transcribe_segment(samples[segment["start"]:segment["end"]])
+
+    logger.info(f"Transcribing {len(samples) / SAMPLE_RATE:.0f}s of audio as {len(plan)} segments, {max_parallel} at a time.")
+    results = await asyncio.gather(*(transcribe(segment) for segment in plan))
+    return stitch_transcripts(results, plan)
@@ -1,36 +1,167 @@
+import asyncio
+import hashlib
+import logging
 import os
-from slack_sdk import WebClient
+from slack_sdk.web.async_client import AsyncWebClient
 from slack_sdk.errors import SlackApiError
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 from dotenv import load_dotenv
+from rate_limit import KeyedLocks, TokenBucket
+from tracing import span
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
-slack_client = WebClient(token=SLACK_BOT_TOKEN)
+# Override to point at a local fake Slack API server.
+SLACK_API_BASE_URL = os.getenv("SLACK_API_BASE_URL", "https://slack.com/api/")
+
+# Slack allows roughly one chat.postMessage per second per channel.
+SLACK_CHANNEL_RATE_PER_SECOND = float(os.getenv("SLACK_CHANNEL_RATE_PER_SECOND", "1"))
+SLACK_CHANNEL_BURST = int(os.getenv("SLACK_CHANNEL_BURST", "3"))
+SLACK_MAX_RETRIES = int(os.getenv("SLACK_MAX_RETRIES", "3"))
+
+# Block Kit limits: section text is capped at 3000 chars, a message at 50 blocks.
+SLACK_SECTION_MAX_CHARS = 3000
+SLACK_MAX_BLOCKS_PER_MESSAGE = 50
+
+slack_client = AsyncWebClient(token=SLACK_BOT_TOKEN, base_url=SLACK_API_BASE_URL)
+
+_channel_buckets: Dict[str, TokenBucket] = {}
+# Held while all parts of one message are posted, so two multi-part messages
+# to the same channel never interleave.
+_channel_locks = KeyedLocks()
+
+
+def _bucket_for(channel_id: str) -> TokenBucket:
+    bucket = _channel_buckets.get(channel_id)
+    if bucket is None:
+        bucket = _channel_buckets[channel_id] = TokenBucket(SLACK_CHANNEL_RATE_PER_SECOND, SLACK_CHANNEL_BURST)
+    return bucket
+
 
-def send_slack_message(channel_id: str, message_text: str) -> Dict[str, Any]:
+def _split_text(text: str, max_chars: int) -> List[str]:
     """
-    Sends a message to a specified Slack channel.
+    Splits text into pieces of at most max_chars, preferring line breaks.
+    """
+    pieces, current = [], ""
+    for line in text.split("\n"):
+        while len(line) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > max_chars:
+            pieces.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def build_slack_messages(message_text: str) -> List[Dict[str, Any]]:
+    """
+    Turns mrkdwn text into one or more chat.postMessage payloads of section
+    blocks, so long summaries are split instead of rejected or truncated.
+    """
+    blocks = [
+        {"type": "section", "text": {"type": "mrkdwn", "text": piece}}
+        for piece in _split_text(message_text, SLACK_SECTION_MAX_CHARS)
+    ]
+    messages = []
+    for start in range(0, len(blocks), SLACK_MAX_BLOCKS_PER_MESSAGE):
+        group = blocks[start:start + SLACK_MAX_BLOCKS_PER_MESSAGE]
+        # `text` is the notification/accessibility fallback for the blocks.
+        messages.append({"blocks": group, "text": group[0]["text"]["text"][:SLACK_SECTION_MAX_CHARS]})
+    return messages
+
+
+async def _post_with_retry(channel_id: str, payload: Dict[str, Any]):
+    bucket = _bucket_for(channel_id)
+    for attempt in range(SLACK_MAX_RETRIES + 1):
+        await bucket.acquire()
+        try:
+            return await slack_client.chat_postMessage(channel=channel_id, mrkdwn=True, **payload)
+        except SlackApiError as e:
+            if e.response.status_code != 429 or attempt == SLACK_MAX_RETRIES:
+                raise
+            headers = {k.lower(): v for k, v in (e.response.headers or {}).items()}
+            retry_after = float(headers.get("retry-after", 1))
+            logger.warning(f"Slack rate limited on {channel_id}; retrying in {retry_after}s")
+            bucket.defer(retry_after)
+
+
+def _message_hash(message_text: str) -> str:
+    return hashlib.sha256(message_text.encode("utf-8")).hexdigest()[:16]
+
+
+async def send_slack_message(channel_id: str, message_text: str,
+                             resume: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Sends a message to a specified Slack channel, split into as many Block Kit
+    messages as needed and posted in order. Rate limits are honored per channel.
+
+    Results (errors included) list the timestamps of the parts posted so far
+    under "parts". Pass a failed result back as `resume` to post only the
+    remaining parts of the same message.
     """
     if not SLACK_BOT_TOKEN:
-        print("Error: SLACK_BOT_TOKEN is not set in environment variables.")
+        logger.error("Error: SLACK_BOT_TOKEN is not set in environment variables.")
         return {"error": "Slack bot token is not configured."}
 
-    try:
-        response = slack_client.chat_postMessage(
-            channel=channel_id,
-            text=message_text,
-            mrkdwn=True
-        )
-        print(f"Slack message sent to {channel_id}: {response['ts']}")
-        return {"success": True, "ts": response["ts"], "channel": response["channel"]}
-    except SlackApiError as e:
-        print(f"Error sending Slack message: {e.response['error']}")
-        return {"error": f"Slack API error: {e.response['error']}"}
-    except Exception as e:
-        print(f"An unexpected error occurred while sending Slack message: {e}")
-        return {"error": f"Failed to send Slack message: {e}"}
+    payloads = build_slack_messages(message_text)
+    if not payloads:
+        return {"error": "Slack message is empty."}
+
+    digest = _message_hash(message_text)
+    timestamps: List[str] = []
+    if resume and resume.get("message_hash") == digest:
+        timestamps = list(resume.get("parts") or [])[:len(payloads)]
+
+    with span("export.slack", channel_id=channel_id, parts=len(payloads), resumed_parts=len(timestamps)) as slack_span:
+        progress = {"channel": channel_id, "message_hash": digest, "parts": timestamps}
+        try:
+            async with _channel_locks.hold(channel_id):
+                for payload in payloads[len(timestamps):]:
+                    response = await _post_with_retry(channel_id, payload)
+                    timestamps.append(response["ts"])
+            logger.info(f"Slack message sent to {channel_id}: {timestamps[0]} ({len(timestamps)} part(s))")
+            return {"success": True, "ts": timestamps[0], **progress}
+        except SlackApiError as e:
+            slack_span.set_error(e)
+            logger.error(f"Error sending Slack message: {e.response['error']}")
+            return {"error": f"Slack API error: {e.response['error']}", **progress}
+        except Exception as e:
+            slack_span.set_error(e)
+            logger.error(f"An unexpected error occurred while sending Slack message: {e}")
+            return {"error": f"Failed to send Slack message: {e}", **progress}
+
+
+async def send_slack_messages_bulk(deliveries: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Sends many (channel_id, message_text) deliveries. Deliveries to the same
+    channel are sent one after another, in order; different channels run
+    concurrently and are rate limited independently, so one throttled
+    channel does not stall others.
+    """
+    by_channel: Dict[str, List[int]] = {}
+    for index, delivery in enumerate(deliveries):
+        by_channel.setdefault(delivery["channel_id"], []).append(index)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(deliveries)
+
+    async def send_channel(indexes: List[int]):
+        for index in indexes:
+            delivery = deliveries[index]
+            results[index] = await send_slack_message(delivery["channel_id"], delivery["message_text"])
+
+    await asyncio.gather(*(send_channel(indexes) for indexes in by_channel.values()))
+    return [{**{k: v for k, v in d.items() if k != "message_text"}, **r} for d, r in zip(deliveries, results)]
 
 def format_meeting_analysis_for_slack(meeting_analysis: Dict[str, Any], export_format: str) -> str:
     sections = []
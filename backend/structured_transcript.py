@@ -0,0 +1,209 @@
+import argparse
+import asyncio
+import bisect
+import json
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# Turns AssemblyAI's diarized output (utterances, sentiment, entities) into a
+# compact, line-per-turn text for the analysis prompt, so Gemini sees who said
+# what instead of guessing speakers from a flat transcript:
+#
+#   Entities: person_name=Sarah, Alex; date=Friday
+#   A: Let's finalize the Q3 roadmap by Friday.
+#   B: I'll lead the marketing update section. (+)
+#
+# This is not shorter than the flat text: it is the same words plus a speaker
+# label per turn, the sentiment marks, the entity line and the legend below.
+# It trades those extra tokens for structure. To keep the overhead small,
+# consecutive utterances by one speaker are merged into one turn and there
+# are no timestamps.
+SENTIMENT_MARKS = {"POSITIVE": " (+)", "NEGATIVE": " (-)"}
+MAX_ENTITIES_PER_TYPE = 20
+# Part of the cache key for compact transcripts; bump when the format changes.
+COMPACT_FORMAT_VERSION = "2"
+
+COMPACT_FORMAT_NOTE = """Lines are "speaker: words"; speakers are voice labels (A, B, ...). Use a speaker's
+    real name where the conversation reveals it. (+)/(-) mark positive/negative turns."""
+
+# "Name: text" or "[Name]: text" lines in uploaded plain-text transcripts.
+PLAIN_TURN_PATTERN = re.compile(r"^\s*\[?([A-Z][\w .'-]{0,40})\]?:\s*(.*)$")
+
+
+def _merge_turns(utterances: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Merges consecutive utterances by the same speaker into one turn.
+    """
+    turns: List[Dict[str, Any]] = []
+    for u in utterances:
+        text = (u.get("text") or "").strip()
+        if not text:
+            continue
+        if turns and u.get("speaker") and turns[-1]["speaker"] == u.get("speaker"):
+            turns[-1]["text"] += " " + text
+            turns[-1]["end"] = u.get("end", 0)
+        else:
+            turns.append({"speaker": u.get("speaker"), "start": u.get("start", 0), "end": u.get("end", 0), "text": text})
+    return turns
+
+
+def _utterance_sentiment(utterance: Dict[str, Any], midpoints: List[float],
+                         sentiments: List[Dict[str, Any]]) -> Optional[str]:
+    # Confidence-weighted vote of the sentence-level results inside the
+    # utterance; `sentiments` are sorted by midpoint, listed in `midpoints`.
+    score = 0.0
+    first = bisect.bisect_left(midpoints, utterance["start"])
+    last = bisect.bisect_right(midpoints, utterance["end"])
+    for result in sentiments[first:last]:
+        sign = {"POSITIVE": 1, "NEGATIVE": -1}.get(result.get("sentiment"), 0)
+        score += sign * (result.get("confidence") or 0.0)
+    if score >= 0.5:
+        return "POSITIVE"
+    if score <= -0.5:
+        return "NEGATIVE"
+    return None
+
+
+def build_structured_transcript(transcript: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Speakers, turns (consecutive utterances by one speaker, with an overall
+    sentiment) and entities grouped by type, from an AssemblyAI transcript
+    response.
+    """
+    utterances = transcript.get("utterances") or []
+    if not utterances and transcript.get("text"):
+        utterances = [{"speaker": None, "start": 0, "end": 0, "text": transcript["text"]}]
+    sentiments = sorted(transcript.get("sentiment_analysis_results") or [], key=lambda r: r["start"] + r["end"])
+    midpoints = [(r["start"] + r["end"]) / 2 for r in sentiments]
+
+    entities: Dict[str, List[str]] = {}
+    for entity in transcript.get("entities") or []:
+        values = entities.setdefault(entity.get("entity_type") or "other", [])
+        text = (entity.get("text") or "").strip()
+        if text and text not in values and len(values) < MAX_ENTITIES_PER_TYPE:
+            values.append(text)
+
+    return {
+        "speakers": list(dict.fromkeys(u["speaker"] for u in utterances if u.get("speaker"))),
+        "utterances": [
+            {**turn, "sentiment": _utterance_sentiment(turn, midpoints, sentiments) if sentiments else None}
+            for turn in _merge_turns(utterances)
+        ],
+        "entities": entities,
+    }
+
+
+def format_compact(structured: Dict[str, Any]) -> str:
+    lines = []
+    if structured["entities"]:
+        lines.append("Entities: " + "; ".join(f"{kind}={', '.join(values)}" for kind, values in structured["entities"].items()))
+    for u in structured["utterances"]:
+        speaker = f"{u['speaker']}: " if u["speaker"] else ""
+        lines.append(f"{speaker}{u['text']}{SENTIMENT_MARKS.get(u['sentiment'], '')}")
+    return "\n".join(lines)
+
+
+def compact_transcript(transcript: Dict[str, Any]) -> Optional[str]:
+    """
+    The analysis input for a transcription result, or None when it has no
+    speaker labels to add (the flat text is then just as good).
+    """
+    if not any(u.get("speaker") for u in transcript.get("utterances") or []):
+        return None
+    return format_compact(build_structured_transcript(transcript))
+
+
+def _simulate_assemblyai(text: str) -> Dict[str, Any]:
+    """
+    Approximates AssemblyAI's response for a "Name: text" sample transcript:
+    speakers become voice labels, words get ~350 ms timings, and the flat
+    text has no speaker names.
+    """
+    labels: Dict[str, str] = {}
+    words, utterances, clock = [], [], 0
+    for line in text.splitlines():
+        match = PLAIN_TURN_PATTERN.match(line)
+        if not match:
+            continue
+        speaker = labels.setdefault(match.group(1), chr(ord("A") + len(labels)))
+        utterance_words = [
+            {"text": w, "start": clock + i * 350, "end": clock + i * 350 + 300, "confidence": 0.95, "speaker": speaker}
+            for i, w in enumerate(match.group(2).split())
+        ]
+        if not utterance_words:
+            continue
+        clock = utterance_words[-1]["end"] + 500
+        words.extend(utterance_words)
+        utterances.append({"speaker": speaker, "start": utterance_words[0]["start"], "end": utterance_words[-1]["end"],
+                           "text": match.group(2), "confidence": 0.95, "words": utterance_words})
+    return {"text": " ".join(u["text"] for u in utterances), "words": words, "utterances": utterances}
+
+
+async def _time_analysis(text: str, structured: bool, runs: int) -> Dict[str, Any]:
+    import geminiUtils
+
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        analysis = await geminiUtils.get_summary_and_action_items_async(text, structured=structured, chunked=False)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if "error" in analysis:
+            return {"error": analysis["error"]}
+    return {"latency_ms": sorted(latencies)[len(latencies) // 2]}
+
+
+async def _compare_main(args):
+    from geminiUtils import build_analysis_prompt, estimate_tokens
+
+    if args.analyze == "stub":
+        from bench_gemini import StubModel, use_stub_model
+        use_stub_model(StubModel())
+
+    totals = Counter()
+    for path in args.paths:
+        with open(path, encoding="utf-8") as f:
+            raw = f.read()
+        transcript = json.loads(raw) if path.endswith(".json") else _simulate_assemblyai(raw)
+
+        started = time.perf_counter()
+        compact = format_compact(build_structured_transcript(transcript))
+        format_ms = (time.perf_counter() - started) * 1000
+
+        sizes = {
+            "flat": estimate_tokens(build_analysis_prompt(transcript["text"])),
+            "compact": estimate_tokens(build_analysis_prompt(compact, structured=True)),
+            "json": estimate_tokens(build_analysis_prompt(json.dumps(transcript))),
+        }
+        totals.update(sizes)
+        print(f"{path}: prompt tokens flat={sizes['flat']} compact={sizes['compact']} full JSON={sizes['json']}; "
+              f"formatted in {format_ms:.2f} ms")
+
+        if args.analyze:
+            # Formatting is negligible; what the prompt size changes is the analysis call.
+            for label, text, structured in (("flat", transcript["text"], False), ("compact", compact, True)):
+                timing = await _time_analysis(text, structured, args.runs)
+                if "error" in timing:
+                    print(f"  {label} analysis failed: {timing['error']}")
+                    continue
+                totals[f"{label}_ms"] += timing["latency_ms"]
+                print(f"  {label} analysis: median {timing['latency_ms']:.0f} ms over {args.runs} run(s)")
+
+    print(f"Total: flat={totals['flat']} compact={totals['compact']} full JSON={totals['json']}")
+    if args.analyze:
+        print(f"Total analysis latency: flat={totals['flat_ms']:.0f} ms compact={totals['compact_ms']:.0f} ms ({args.analyze})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare analysis prompt sizes (estimated tokens) for flat vs compact speaker-aware transcripts, "
+                    "and optionally the latency of analyzing each. "
+                    "Accepts AssemblyAI transcript JSON or 'Name: text' / '[Name]: text' plain-text transcripts."
+    )
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--analyze", choices=["gemini", "stub"],
+                        help="Also time the analysis call on each form: against Gemini (needs GEMINI_API_KEY), "
+                             "or bench_gemini.StubModel, whose latency follows prompt and output size.")
+    parser.add_argument("--runs", type=int, default=3, help="Analysis calls per form; the median is reported.")
+    asyncio.run(_compare_main(parser.parse_args()))
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+# The backend uses flat imports (run from backend/), so put it on the path.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import geminiUtils  # noqa: E402
+from bench_gemini import StubModel, use_stub_model  # noqa: E402
+from resilience import CircuitBreaker, gemini_caller  # noqa: E402
+
+
+@pytest.fixture
+def stub_gemini(monkeypatch):
+    """
+    Answers every Gemini call with a bench_gemini.StubModel and gives each
+    test a fresh concurrency semaphore and circuit breaker.
+    """
+    stub = StubModel(first_token_seconds=0.3, output_tokens_per_second=1e9)
+    monkeypatch.setattr(geminiUtils, "_models", dict(geminiUtils._models))
+    monkeypatch.setattr(geminiUtils, "_analysis_semaphore", None)
+    monkeypatch.setattr(gemini_caller, "breaker", CircuitBreaker())
+    use_stub_model(stub)
+    return stub
@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import httpx
+
+import geminiUtils
+import main
+from bench_gemini import StubModel
+
+
+def post_transcripts(count: int):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def analyze(i):
+                files = {"file": (f"t{i}.txt", f"Sarah: concurrency test transcript {i} {time.time()}.".encode(), "text/plain")}
+                return await client.post("/analyze/?priority=high", files=files)
+
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(analyze(i) for i in range(count)))
+            return responses, time.perf_counter() - started
+    return asyncio.run(run())
+
+
+def test_concurrent_analyze_requests_run_in_parallel(stub_gemini, monkeypatch):
+    async def skip_store(meeting, transcript):
+        pass
+
+    monkeypatch.setattr(main, "store_meeting", skip_store)
+    monkeypatch.setattr(geminiUtils, "GEMINI_MAX_CONCURRENCY", 4)
+
+    responses, elapsed = post_transcripts(4)
+
+    assert [r.status_code for r in responses] == [200] * 4
+    assert all(r.json()["analyzer"] == geminiUtils.GEMINI_MODEL_NAME for r in responses)
+    assert stub_gemini.max_in_flight == 4
+    # One after another would take 4 x 0.3 s.
+    assert elapsed < 2 * stub_gemini.first_token_seconds
+
+
+def test_blocking_model_call_serializes_requests(stub_gemini, monkeypatch):
+    # The behaviour the async engine replaced, as a control for the test above.
+    async def skip_store(meeting, transcript):
+        pass
+
+    monkeypatch.setattr(main, "store_meeting", skip_store)
+    stub_gemini.blocking = True
+
+    responses, elapsed = post_transcripts(3)
+
+    assert [r.status_code for r in responses] == [200] * 3
+    assert stub_gemini.max_in_flight == 1
+    assert elapsed >= 3 * stub_gemini.first_token_seconds
+
+
+class _FlakyStream:
+    """
+    Streams a stub analysis, but the first attempt fails with a 503 before
+    any text. Non-streaming calls answer after a short delay.
+    """
+
+    def __init__(self, events):
+        self.events = events
+        self.stream_attempts = 0
+
+    async def generate_content_async(self, prompt, generation_config=None, stream=False):
+        if not stream:
+            self.events.append("call")
+            await asyncio.sleep(0.01)
+            return StubModel()._response(10, 10)
+        self.stream_attempts += 1
+        self.events.append(f"stream attempt {self.stream_attempts}")
+        if self.stream_attempts == 1:
+            request = httpx.Request("POST", "http://gemini.test")
+            raise httpx.HTTPStatusError("unavailable", request=request, response=httpx.Response(503, request=request))
+        return self._stream()
+
+    async def _stream(self):
+        yield StubModel()._response(10, 10)
+
+
+def test_stream_retry_backoff_does_not_hold_a_concurrency_slot(stub_gemini, monkeypatch):
+    events = []
+    model = _FlakyStream(events)
+    monkeypatch.setattr(geminiUtils, "GEMINI_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(geminiUtils.gemini_caller, "_backoff", lambda attempt: 0.3)
+    geminiUtils._models[geminiUtils.GEMINI_MODEL_NAME] = model
+
+    async def run():
+        async def stream():
+            return [text async for text in geminiUtils._generate_stream_async("prompt", timeout=5)]
+
+        streamed = asyncio.create_task(stream())
+        await asyncio.sleep(0.05)  # the stream's first attempt has failed and it is backing off
+        await geminiUtils._generate_async("prompt", timeout=5)
+        events.append("call done")
+        return await streamed
+
+    streamed = asyncio.run(run())
+
+    assert streamed
+    # With one slot, the other call only gets in while the stream backs off.
+    assert events == ["stream attempt 1", "call", "call done", "stream attempt 2"]
+    assert geminiUtils._analysis_semaphore._value == 1
@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import main
+from geminiUtils import STREAM_FIELD_ORDER
+from result_cache import MemoryCache, ResultCache
+
+
+@pytest.fixture
+def stream_app(stub_gemini, monkeypatch):
+    stored = []
+
+    async def skip_store(meeting, transcript):
+        stored.append(meeting)
+
+    monkeypatch.setattr(main, "store_meeting", skip_store)
+    monkeypatch.setattr(main, "result_cache", ResultCache(MemoryCache()))
+    return stored
+
+
+def post_stream(output_format: str, transcript: str = "Sarah: we ship on Friday.\nAlex: agreed."):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            files = {"file": ("t.txt", transcript.encode(), "text/plain")}
+            return await client.post(f"/analyze/stream?format={output_format}", files=files)
+    return asyncio.run(run())
+
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        name, data = block.split("\n")
+        assert name.startswith("event: ") and data.startswith("data: ")
+        events.append({"type": name[len("event: "):], **json.loads(data[len("data: "):])})
+    return events
+
+
+def test_sse_stream_sends_summary_deltas_items_fields_then_the_result(stub_gemini, stream_app):
+    response = post_stream("sse")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    types = [e["type"] for e in events]
+    meeting = events[-1]["meeting"]
+
+    # The stub streams its answer in several chunks, so the summary comes in pieces.
+    assert types[0] == "delta" and types.count("delta") > 1
+    assert types[-1] == "result" and "error" not in types
+    assert "".join(e["text"] for e in events if e["type"] == "delta") == meeting["summary"]
+    assert [e["field"] for e in events if e["type"] == "field"] == list(STREAM_FIELD_ORDER)
+    items = [e for e in events if e["type"] == "item"]
+    assert items[0] == {"type": "item", "field": "action_items", "index": 0,
+                        "value": {"task": "Send the stub report", "assignee": "A", "deadline": "Friday", "status": "new"}}
+    for position, field in ((i, e["field"]) for i, e in enumerate(events) if e["type"] == "field"):
+        # Each array's items arrive before the field itself completes.
+        assert all(i < position for i, e in enumerate(events) if e["type"] == "item" and e["field"] == field)
+    assert meeting["important_topics"] == ["benchmarking"]
+    assert [m.meeting_id for m in stream_app] == [meeting["meeting_id"]]
+    assert stub_gemini.calls == 1 and stub_gemini.in_flight == 0
+
+
+def test_cached_analysis_is_replayed_as_the_same_events(stub_gemini, stream_app):
+    first = [json.loads(line) for line in post_stream("ndjson").text.splitlines()]
+    second = [json.loads(line) for line in post_stream("ndjson").text.splitlines()]
+
+    assert stub_gemini.calls == 1
+    assert [e["type"] for e in second if e["type"] != "delta"] == [e["type"] for e in first if e["type"] != "delta"]
+    assert "".join(e.get("text", "") for e in second) == "".join(e.get("text", "") for e in first)
+    assert second[-1]["meeting"]["summary"] == first[-1]["meeting"]["summary"]
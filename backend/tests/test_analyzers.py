@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+import analyzers
+import model_usage
+from geminiUtils import GEMINI_MODEL_NAME
+from model_usage import GEMINI_BUDGET_MODEL
+
+TRANSCRIPT = "Sarah: We agreed to ship the beta on Friday. Tom will update the docs."
+
+
+@pytest.fixture
+def tiny_budget(monkeypatch):
+    # Every transcript is over budget, so Gemini work goes to the budget model.
+    monkeypatch.setattr(analyzers, "ANALYSIS_TOKEN_BUDGET", 10)
+    monkeypatch.setattr(model_usage, "ANALYSIS_TOKEN_BUDGET", 10)
+    monkeypatch.setattr(analyzers, "route_counts", analyzers.Counter())
+
+
+def test_over_budget_routes_to_the_budget_model(tiny_budget):
+    analyzer, reason = analyzers.choose_analyzer(TRANSCRIPT, priority="high")
+
+    assert (analyzer.name, reason) == (GEMINI_BUDGET_MODEL, "over_budget")
+    assert analyzers.route_counts == {(GEMINI_BUDGET_MODEL, "over_budget"): 1}
+    assert analyzer.cache_version().startswith(f"{GEMINI_BUDGET_MODEL}:")
+
+
+def test_result_names_the_model_that_answered(stub_gemini, tiny_budget):
+    # Even when the caller forces the default model, geminiUtils reroutes
+    # over-budget work, and the label must follow it.
+    analysis = asyncio.run(analyzers.get_summary_and_action_items_async(
+        TRANSCRIPT, analyzer=analyzers.get_analyzer(GEMINI_MODEL_NAME)
+    ))
+
+    assert "error" not in analysis
+    assert analysis["analyzer"] == GEMINI_BUDGET_MODEL
+    assert "model" not in analysis
+
+
+def test_within_budget_keeps_the_routed_model(stub_gemini, monkeypatch):
+    monkeypatch.setattr(analyzers, "route_counts", analyzers.Counter())
+
+    analyzer, reason = analyzers.choose_analyzer(TRANSCRIPT, priority="high")
+    analysis = asyncio.run(analyzers.get_summary_and_action_items_async(TRANSCRIPT, analyzer=analyzer))
+
+    assert (analyzer.name, reason) == (GEMINI_MODEL_NAME, "high_priority")
+    assert analysis["analyzer"] == GEMINI_MODEL_NAME
+
+
+def test_analyzer_is_abstract():
+    with pytest.raises(TypeError):
+        analyzers.Analyzer()
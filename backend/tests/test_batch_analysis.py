@@ -0,0 +1,194 @@
+import asyncio
+import copy
+
+import pytest
+from pymongo import ReplaceOne, UpdateOne
+
+from batch_analysis import BatchAnalyzer
+
+GOOD = ["a.txt", "b.txt", "nested/c.txt"]
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        if isinstance(condition, dict):
+            if doc.get(key) == condition["$ne"]:
+                return False
+        elif doc.get(key) != condition:
+            return False
+    return True
+
+
+class FakeCollection:
+    """
+    The Motor calls BatchAnalyzer makes, on documents held in memory.
+    """
+
+    def __init__(self):
+        self.docs = []
+        self.bulk_writes = 0
+
+    async def create_index(self, *args, **kwargs):
+        pass
+
+    def _upsert(self, query, update, upsert):
+        doc = next((d for d in self.docs if _matches(d, query)), None)
+        if doc is None:
+            if not upsert:
+                return
+            doc = dict(query)
+            self.docs.append(doc)
+            doc.update(copy.deepcopy(update.get("$setOnInsert", {})))
+        doc.update(copy.deepcopy(update.get("$set", {})))
+
+    async def update_one(self, query, update, upsert=False):
+        self._upsert(query, update, upsert)
+
+    async def bulk_write(self, operations, ordered=True):
+        self.bulk_writes += 1
+        for op in operations:
+            if isinstance(op, ReplaceOne):
+                self.docs = [d for d in self.docs if not _matches(d, op._filter)] + [copy.deepcopy(op._doc)]
+            else:
+                assert isinstance(op, UpdateOne)
+                self._upsert(op._filter, op._doc, op._upsert)
+
+    async def find_one(self, query, projection=None):
+        return next((dict(d) for d in self.docs if _matches(d, query)), None)
+
+    def find(self, query, projection=None):
+        async def cursor():
+            for doc in [dict(d) for d in self.docs if _matches(d, query)]:
+                yield doc
+        return cursor()
+
+    async def count_documents(self, query):
+        return sum(_matches(d, query) for d in self.docs)
+
+    def aggregate(self, pipeline):
+        # Only the status count BatchAnalyzer.get runs.
+        matched = [d for d in self.docs if _matches(d, pipeline[0]["$match"])]
+
+        async def cursor():
+            for status in sorted({d["status"] for d in matched}):
+                yield {"_id": status, "n": sum(d["status"] == status for d in matched)}
+        return cursor()
+
+
+class FakeAnalyzer:
+    """
+    Analyzes a transcript after a short delay, counting how many run at once.
+    Transcripts containing "FAIL" return an error; "CRASH" raises.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+
+    async def __call__(self, transcript, priority):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.02)
+        finally:
+            self.in_flight -= 1
+        if "CRASH" in transcript:
+            raise RuntimeError("model returned garbage")
+        if "FAIL" in transcript:
+            return {"error": "Gemini is unavailable.", "provider_unavailable": True}
+        return {"summary": transcript.strip(), "analyzer": "stub-model"}
+
+
+class StoredMeetings:
+    def __init__(self):
+        self.meeting_ids = []
+
+    def __call__(self, meeting, transcript):
+        self.meeting_ids.append(meeting["meeting_id"])
+
+
+def build_meeting(meeting_id, transcript, analysis, model_usage):
+    return {"meeting_id": meeting_id, "summary": analysis["summary"], "analyzer": analysis["analyzer"]}
+
+
+@pytest.fixture
+def runner():
+    return BatchAnalyzer(FakeCollection(), FakeCollection(), FakeCollection(), FakeCollection(),
+                         analyze=FakeAnalyzer(), build_meeting=build_meeting, on_stored=StoredMeetings(),
+                         concurrency=3, write_size=4)
+
+
+def write_files(directory, files):
+    for name, content in files.items():
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+    return sorted(files)
+
+
+def test_failures_are_reported_per_file_and_the_rest_are_stored(runner, tmp_path):
+    names = write_files(tmp_path, {
+        **{name: f"Meeting {name}".encode() for name in GOOD},
+        "empty.txt": b"  \n",
+        "latin1.txt": "Café".encode("latin-1"),
+        "unavailable.txt": b"FAIL",
+        "crash.txt": b"CRASH",
+    })
+
+    async def run():
+        batch = await runner.create(str(tmp_path), names + ["deleted.txt"])
+        report = await runner.run(batch["batch_id"])
+        return report, await runner.get(batch["batch_id"])
+
+    report, batch = asyncio.run(run())
+
+    assert (report["files"], report["analyzed"], report["failed"], report["skipped"]) == (8, 3, 5, 0)
+    assert report["analyzers"] == {"stub-model": 3}
+    failures = {f["file"]: f["error"] for f in report["failures"]}
+    assert failures.pop("deleted.txt").startswith("Could not read file")
+    assert failures == {
+        "empty.txt": "Transcript is empty.",
+        "latin1.txt": "Not a valid UTF-8 text file.",
+        "unavailable.txt": "Gemini is unavailable.",
+        "crash.txt": "model returned garbage",
+    }
+    assert (batch["status"], batch["files"], batch["report"]) == ("completed", {"done": 3, "failed": 5}, report)
+    items = {d["name"]: d for d in runner.items.docs}
+    assert sorted(d["summary"] for d in runner.meetings.docs) == sorted(f"Meeting {name}" for name in GOOD)
+    assert sorted(runner.on_stored.meeting_ids) == sorted(items[name]["meeting_id"] for name in GOOD)
+    assert sorted(d["text"] for d in runner.transcripts.docs) == sorted(f"Meeting {name}" for name in GOOD)
+
+
+def test_resumed_batch_retries_only_unfinished_files(runner, tmp_path):
+    names = write_files(tmp_path, {**{name: f"Meeting {name}".encode() for name in GOOD}, "flaky.txt": b"FAIL"})
+
+    async def run():
+        batch_id = (await runner.create(str(tmp_path), names))["batch_id"]
+        first = await runner.run(batch_id)
+        (tmp_path / "flaky.txt").write_bytes(b"Meeting flaky.txt")  # the provider is back
+        second = await runner.run(batch_id)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert (first["analyzed"], first["failed"]) == (3, 1)
+    assert (second["files"], second["analyzed"], second["failed"], second["skipped"]) == (1, 1, 0, 3)
+    assert runner.analyze.calls == 5
+    assert len(runner.meetings.docs) == 4
+
+
+def test_concurrency_stays_bounded(runner, tmp_path):
+    names = write_files(tmp_path, {f"m{i:02d}.txt": f"Meeting {i}".encode() for i in range(12)})
+
+    async def run():
+        batch_id = (await runner.create(str(tmp_path), names))["batch_id"]
+        return await runner.run(batch_id)
+
+    report = asyncio.run(run())
+
+    assert report["analyzed"] == 12
+    assert runner.analyze.max_in_flight == 3
+    # Results go out in bulk writes of write_size (4): three per collection, not twelve.
+    assert runner.meetings.bulk_writes == 3
@@ -0,0 +1,118 @@
+import asyncio
+import socket
+
+import aiosmtplib
+import pytest
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+import email_integration
+from email_integration import EmailOutbox, SMTPConnectionPool
+
+
+class FakeSMTPHandler:
+    """
+    aiosmtpd handler: gone@ is refused permanently (550), busy@ temporarily
+    (451), and drop@ makes the server hang up mid-transaction.
+    """
+
+    def __init__(self):
+        self.logins = 0
+        self.delivered = []
+
+    def authenticate(self, server, session, envelope, mechanism, auth_data):
+        self.logins += 1
+        return AuthResult(success=True)
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("gone@"):
+            return "550 5.1.1 No such user"
+        if address.startswith("busy@"):
+            return "451 4.3.0 Try again later"
+        if address.startswith("drop@"):
+            server.transport.close()
+            return "421 4.4.2 Closing connection"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.delivered.extend(envelope.rcpt_tos)
+        return "250 Message accepted"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    handler = FakeSMTPHandler()
+    port = _free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port,
+                            authenticator=handler.authenticate, auth_require_tls=False)
+    controller.start()
+    monkeypatch.setattr(email_integration, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(email_integration, "SMTP_PORT", port)
+    monkeypatch.setattr(email_integration, "SMTP_USE_TLS", False)
+    monkeypatch.setattr(email_integration, "EMAIL_ADDRESS", "bot@example.com")
+    monkeypatch.setattr(email_integration, "EMAIL_PASSWORD", "secret")
+    yield handler
+    controller.stop()
+
+
+class FakeOutboxCollection:
+    def __init__(self):
+        self.updates = {}
+
+    async def update_one(self, query, update):
+        self.updates[query["outbox_id"]] = update["$set"]
+
+
+def _send_all(pool, recipients):
+    async def run():
+        outcomes = []
+        for recipient in recipients:
+            try:
+                async with pool.connection() as smtp:
+                    await smtp.send_message(email_integration.build_email_message(recipient, "Minutes", "Hi"))
+                outcomes.append("sent")
+            except aiosmtplib.SMTPException as e:
+                outcomes.append(type(e).__name__)
+        await pool.close()
+        return outcomes
+
+    return asyncio.run(run())
+
+
+def test_refused_recipient_keeps_the_pooled_connection(smtp_server):
+    outcomes = _send_all(SMTPConnectionPool(size=1), ["gone@example.com", "busy@example.com", "sarah@example.com"])
+
+    assert outcomes == ["SMTPRecipientsRefused", "SMTPRecipientsRefused", "sent"]
+    assert smtp_server.delivered == ["sarah@example.com"]
+    assert smtp_server.logins == 1
+
+
+def test_dropped_connection_is_replaced(smtp_server):
+    outcomes = _send_all(SMTPConnectionPool(size=1), ["drop@example.com", "sarah@example.com"])
+
+    assert outcomes[1] == "sent"
+    assert smtp_server.logins == 2
+
+
+@pytest.mark.parametrize("recipient, status", [("gone@example.com", "failed"), ("busy@example.com", "pending")])
+def test_only_permanent_refusals_fail_on_the_first_attempt(smtp_server, monkeypatch, recipient, status):
+    monkeypatch.setattr(email_integration, "smtp_pool", SMTPConnectionPool(size=1))
+    collection = FakeOutboxCollection()
+    doc = {"outbox_id": "o1", "recipient": recipient, "subject": "Minutes", "body": "Hi", "attempts": 1}
+
+    async def run():
+        await EmailOutbox(collection)._deliver(doc)
+        await email_integration.smtp_pool.close()
+
+    asyncio.run(run())
+
+    update = collection.updates["o1"]
+    assert update["status"] == status
+    assert ("next_attempt_at" in update) == (status == "pending")
@@ -0,0 +1,206 @@
+import asyncio
+import copy
+from datetime import timedelta
+
+import pytest
+
+import job_queue
+from job_queue import JobQueue, _now
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_matches(doc, q) for q in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = doc.get(key)
+            if value is None or not all({"$lt": value < v, "$gte": value >= v}[op] for op, v in condition.items()):
+                return False
+        elif doc.get(key) != condition:
+            return False
+    return True
+
+
+def _project(doc, projection):
+    if projection and any(projection.values()):
+        return {k: copy.deepcopy(v) for k, v in doc.items() if projection.get(k)}
+    return {k: copy.deepcopy(v) for k, v in doc.items() if k not in (projection or {})}
+
+
+class FakeJobs:
+    """
+    The slice of a Motor collection JobQueue uses, held in memory.
+    """
+
+    def __init__(self):
+        self.docs = []
+
+    async def create_index(self, *args, **kwargs):
+        pass
+
+    async def insert_one(self, doc):
+        self.docs.append(copy.deepcopy(doc))
+
+    async def find_one(self, query, projection=None):
+        for doc in self.docs:
+            if _matches(doc, query):
+                return _project(doc, projection)
+        return None
+
+    async def update_one(self, query, update):
+        for doc in self.docs:
+            if _matches(doc, query):
+                doc.update(copy.deepcopy(update["$set"]))
+                return
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=None):
+        for doc in self.docs:
+            if _matches(doc, query):
+                doc.update(copy.deepcopy(update["$set"]))
+                for key, step in update.get("$inc", {}).items():
+                    doc[key] = doc.get(key, 0) + step
+                return _project(doc, projection)
+        return None
+
+    def find(self, query, projection=None):
+        async def cursor():
+            for doc in [_project(d, projection) for d in self.docs if _matches(d, query)]:
+                yield doc
+        return cursor()
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_LEASE_SECONDS", 0.3)
+    monkeypatch.setattr(job_queue, "JOB_SWEEP_SECONDS", 0.05)
+    monkeypatch.setattr(job_queue, "JOB_MAX_ATTEMPTS", 3)
+    return FakeJobs()
+
+
+def stages(calls, transcribe_seconds=0.0):
+    async def transcribe(job, save):
+        calls.append("transcribed")
+        await asyncio.sleep(transcribe_seconds)
+        return {"transcript_id": "t1"}
+
+    async def analyze(job, save):
+        calls.append("analyzed")
+        return {"analysis": {"summary": f"From {job['transcript_id']}."}}
+
+    async def store(job, save):
+        calls.append("stored")
+        return {}
+
+    return [("transcribed", transcribe), ("analyzed", analyze), ("stored", store)]
+
+
+async def wait_for(condition, timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_heartbeat_keeps_a_long_stage_leased(jobs):
+    calls = []
+
+    async def run():
+        queue = JobQueue(jobs, stages(calls, transcribe_seconds=1.0), workers=1)
+        other = JobQueue(jobs, stages(calls), workers=1)
+        await queue.start()
+        job = await queue.create_job({"file": "a.wav"})
+        await wait_for(lambda: calls)
+        claimed_at = jobs.docs[0]["lease_expires_at"]
+        await asyncio.sleep(0.6)  # twice the lease, still transcribing
+        stolen = await other._claim(job["job_id"])
+        renewed_at = jobs.docs[0]["lease_expires_at"]
+        await wait_for(lambda: jobs.docs[0]["status"] == "completed")
+        await queue.stop()
+        return stolen, claimed_at, renewed_at
+
+    stolen, claimed_at, renewed_at = asyncio.run(run())
+
+    assert stolen is None
+    assert renewed_at > claimed_at + timedelta(seconds=0.3)
+    assert calls == ["transcribed", "analyzed", "stored"]
+    assert jobs.docs[0]["attempts"] == 1
+    assert jobs.docs[0]["lease_owner"] is None
+
+
+def test_lapsed_lease_is_swept_and_resumes_from_the_last_stage(jobs):
+    calls = []
+
+    async def run():
+        crashed = JobQueue(jobs, stages(calls), workers=1)
+        job = await crashed.create_job({"file": "a.wav"})
+
+        async def stuck(job, save):
+            calls.append("analyzing")
+            await asyncio.Event().wait()
+
+        crashed.stages = [crashed.stages[0], ("analyzed", stuck), crashed.stages[2]]
+        await crashed.start()
+        await wait_for(lambda: "analyzing" in calls)
+        # The process dies mid-stage: no more heartbeats, the lease stays set.
+        await crashed.stop()
+        leased_until = jobs.docs[0]["lease_expires_at"]
+
+        survivor = JobQueue(jobs, stages(calls), workers=1)
+        early = await survivor._claim(job["job_id"])
+        await survivor.start()
+        await wait_for(lambda: jobs.docs[0]["status"] == "completed")
+        await survivor.stop()
+        return early, leased_until
+
+    early, leased_until = asyncio.run(run())
+
+    assert early is None  # the lease had not lapsed yet
+    assert jobs.docs[0]["updated_at"] > leased_until
+    assert calls == ["transcribed", "analyzing", "analyzed", "stored"]
+    assert jobs.docs[0]["attempts"] == 2
+    assert jobs.docs[0]["analysis"] == {"summary": "From t1."}
+
+
+def test_sweeper_leaves_live_leases_alone(jobs):
+    now = _now()
+    for job_id, expires in (("stale", now - timedelta(seconds=5)), ("live", now + timedelta(seconds=60))):
+        jobs.docs.append({"job_id": job_id, "status": "running", "stage": "transcribed", "attempts": 1,
+                          "transcript_id": "t1", "lease_owner": "gone", "lease_expires_at": expires,
+                          "stage_completed_at": {}})
+    calls = []
+
+    async def run():
+        queue = JobQueue(jobs, stages(calls), workers=1)
+        await queue.start()
+        await wait_for(lambda: jobs.docs[0]["status"] == "completed")
+        await asyncio.sleep(0.15)  # a few more sweeps
+        await queue.stop()
+
+    asyncio.run(run())
+
+    assert calls == ["analyzed", "stored"]
+    assert (jobs.docs[1]["status"], jobs.docs[1]["lease_owner"], jobs.docs[1]["attempts"]) == ("running", "gone", 1)
+
+
+def test_job_whose_lease_keeps_lapsing_fails_at_the_attempt_cap(jobs):
+    jobs.docs.append({"job_id": "poison", "status": "running", "stage": "uploaded", "attempts": 3,
+                      "lease_owner": "gone", "lease_expires_at": _now() - timedelta(seconds=1),
+                      "stage_completed_at": {}, "error": None})
+    calls = []
+
+    async def run():
+        queue = JobQueue(jobs, stages(calls), workers=1)
+        claimed = await queue._claim("poison")
+        updates = queue.subscribe("poison")
+        await queue.start()
+        update = await asyncio.wait_for(updates.get(), timeout=2)
+        await queue.stop()
+        return claimed, update
+
+    claimed, update = asyncio.run(run())
+
+    assert claimed is None
+    assert calls == []
+    assert update["status"] == "failed" and "3 attempts" in update["error"]
+    assert (jobs.docs[0]["status"], jobs.docs[0]["attempts"], jobs.docs[0]["lease_owner"]) == ("failed", 3, None)
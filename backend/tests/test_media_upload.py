@@ -0,0 +1,115 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+from starlette.formparsers import MultiPartParser
+
+import main
+from media_upload import InvalidUpload, MultipartUpload
+from transcript_store import TranscriptStore
+
+BOUNDARY = "test-boundary"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def _form(payload: bytes, content_type="audio/mpeg", extra_field=True) -> bytes:
+    parts = []
+    if extra_field:
+        parts.append(f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"note\"\r\n\r\nhello\r\n".encode())
+    parts.append(f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"standup.mp3\"\r\n"
+                 f"Content-Type: {content_type}\r\n\r\n".encode() + payload + b"\r\n")
+    parts.append(f"--{BOUNDARY}--\r\n".encode())
+    return b"".join(parts)
+
+
+async def _chunks(body: bytes, size: int):
+    for offset in range(0, len(body), size):
+        yield body[offset:offset + size]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_multipart_upload_streams_the_file_field(chunk_size):
+    payload = os.urandom(20000) + b"\r\n--not-the-boundary\r\n"
+
+    async def read():
+        upload = MultipartUpload(CONTENT_TYPE, _chunks(_form(payload), chunk_size))
+        assert await upload.open()
+        return upload, b"".join([chunk async for chunk in upload])
+
+    upload, data = asyncio.run(read())
+
+    assert data == payload
+    assert (upload.filename, upload.content_type) == ("standup.mp3", "audio/mpeg")
+
+
+def test_multipart_upload_without_the_field():
+    body = _form(b"x").replace(b'name="file"', b'name="other"')
+
+    async def open_():
+        return await MultipartUpload(CONTENT_TYPE, _chunks(body, 64)).open()
+
+    assert asyncio.run(open_()) is False
+
+
+def test_truncated_body_is_invalid():
+    body = _form(b"a" * 1000)[:-200]
+
+    async def read():
+        upload = MultipartUpload(CONTENT_TYPE, _chunks(body, 64))
+        await upload.open()
+        return [chunk async for chunk in upload]
+
+    with pytest.raises(InvalidUpload):
+        asyncio.run(read())
+
+
+@pytest.fixture
+def upload_sink(stub_gemini, monkeypatch, tmp_path):
+    received = []
+
+    async def drain(chunks):
+        async for chunk in chunks:
+            received.append(chunk)
+        return {"audio_url": "test://upload", "time_map": None}
+
+    async def transcribe(prepared):
+        return {"text": "Sarah: The upload arrived.", "utterances": []}
+
+    async def skip_store(meeting, transcript):
+        pass
+
+    async def no_spooling(self):
+        raise AssertionError("Starlette's form parser must not run for media uploads")
+
+    monkeypatch.setattr(main, "prepare_media", drain)
+    monkeypatch.setattr(main, "transcribe_prepared", transcribe)
+    monkeypatch.setattr(main, "store_meeting", skip_store)
+    monkeypatch.setattr(main, "transcript_store", TranscriptStore(str(tmp_path)))
+    monkeypatch.setattr(MultiPartParser, "parse", no_spooling)
+    return received
+
+
+def _post(body: bytes):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/transcribe-and-analyze/", content=_chunks(body, 1024),
+                                     headers={"content-type": CONTENT_TYPE})
+    return asyncio.run(run())
+
+
+def test_media_endpoint_streams_multipart_without_the_form_parser(upload_sink):
+    payload = os.urandom(300000)
+
+    response = _post(_form(payload))
+
+    assert response.status_code == 200, response.text
+    assert b"".join(upload_sink) == payload
+
+
+def test_media_endpoint_rejects_non_media_parts(upload_sink):
+    response = _post(_form(b"hello", content_type="text/plain"))
+
+    assert response.status_code == 400
+    assert not upload_sink
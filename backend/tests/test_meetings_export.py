@@ -0,0 +1,131 @@
+import asyncio
+import gzip
+import json
+
+import httpx
+import pytest
+
+import main
+from meeting_queries import EXPORT_SORT
+
+
+def _meeting(i, timestamp):
+    return {"meeting_id": f"m{i:03d}", "timestamp": timestamp, "summary": f"Meeting {i} — café roadmap.",
+            "action_items": [], "key_decisions": [], "speakers_detected": ["A" if i % 2 else "B"],
+            "tone_overview": "neutral", "important_topics": ["roadmap"], "_id": i}
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(_matches(doc, q) for q in condition):
+                return False
+        elif isinstance(condition, dict):
+            ops = {"$gt": lambda a, b: a > b, "$gte": lambda a, b: a >= b, "$lt": lambda a, b: a < b}
+            if not all(ops[op](doc[key], value) for op, value in condition.items()):
+                return False
+        elif condition not in (doc[key] if isinstance(doc[key], list) else [doc[key]]):
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+        self.sorted_by = None
+        self.batch = None
+        self.closed = False
+
+    def sort(self, keys):
+        self.sorted_by = keys
+        return self
+
+    def batch_size(self, size):
+        self.batch = size
+        return self
+
+    async def close(self):
+        self.closed = True
+
+    async def __aiter__(self):
+        assert self.sorted_by == EXPORT_SORT
+        for doc in sorted(self.docs, key=lambda d: (d["timestamp"], d["meeting_id"])):
+            await asyncio.sleep(0)
+            yield doc
+
+
+class FakeMeetings:
+    """
+    The find() the export uses: equality, $gt/$gte/$lt and $and, with an
+    inclusion or exclusion projection.
+    """
+
+    def __init__(self, docs):
+        self.docs = list(docs)
+        self.cursors = []
+
+    def find(self, query, projection=None):
+        docs = [d for d in self.docs if _matches(d, query)]
+        if projection and any(projection.values()):
+            docs = [{k: v for k, v in d.items() if projection.get(k)} for d in docs]
+        elif projection:
+            docs = [{k: v for k, v in d.items() if k not in projection} for d in docs]
+        self.cursors.append(FakeCursor(docs))
+        return self.cursors[-1]
+
+
+@pytest.fixture
+def meetings(monkeypatch):
+    # Stored out of order; two share a timestamp, which meeting_id breaks.
+    collection = FakeMeetings(_meeting(i, f"2025-01-{10 + i // 2:02d}T09:00:00+00:00") for i in (5, 1, 0, 4, 3, 2))
+    monkeypatch.setattr(main, "meetings_collection", collection)
+    monkeypatch.setattr(main, "EXPORT_FLUSH_BYTES", 300)  # several chunks per export
+    return collection
+
+
+def export(params):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/meetings/export", params=params)
+    return asyncio.run(run())
+
+
+def ndjson(body: bytes):
+    return [json.loads(line) for line in body.decode("utf-8").splitlines()]
+
+
+def test_export_streams_every_meeting_oldest_first(meetings):
+    response = export({})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = ndjson(response.content)
+    assert [r["meeting_id"] for r in rows] == ["m000", "m001", "m002", "m003", "m004", "m005"]
+    assert rows[0]["summary"] == "Meeting 0 — café roadmap."
+    assert "_id" not in rows[0]
+    assert meetings.cursors[-1].closed
+    assert meetings.cursors[-1].batch == main.EXPORT_BATCH_SIZE
+
+
+def test_gzip_export_decompresses_to_the_same_ndjson(meetings):
+    plain = export({"view": "list"}).content
+    response = export({"view": "list", "gzip": "true"})
+
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"].endswith("meetings.ndjson.gz")
+    assert gzip.decompress(response.content) == plain
+    assert set(ndjson(plain)[0]) == {"meeting_id", "timestamp", "summary"}
+
+
+def test_since_watermark_pulls_only_newer_meetings(meetings):
+    first = ndjson(export({"speaker": "A"}).content)
+    meetings.docs.append(_meeting(6, "2025-01-13T09:00:00+00:00"))
+    meetings.docs.append(_meeting(7, "2025-01-13T10:00:00+00:00"))
+
+    # The last exported timestamp is the next pull's `since`.
+    second = ndjson(export({"speaker": "A", "since": first[-1]["timestamp"]}).content)
+
+    assert [r["meeting_id"] for r in first] == ["m001", "m003", "m005"]
+    assert [r["meeting_id"] for r in second] == ["m007"]
+    assert export({"since": "not a date"}).status_code == 422
@@ -0,0 +1,145 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from notion_client import AsyncClient
+
+import notion_integration
+from notion_integration import NotionExporter
+from rate_limit import TokenBucket
+
+
+class FakeNotion:
+    """
+    MockTransport handler for the Notion pages API. Pages can be deleted or
+    archived behind the exporter's back; `script` injects statuses (e.g. 429)
+    for the next requests.
+    """
+
+    def __init__(self, script=()):
+        self.script = list(script)
+        self.pages = {}
+        self.created = 0
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append((request.method, request.url.path))
+        if self.script:
+            status = self.script.pop(0)
+            return httpx.Response(status, headers={"retry-after": "0"},
+                                  json={"object": "error", "status": status, "code": "rate_limited", "message": "Slow down."})
+
+        if request.method == "POST" and request.url.path == "/v1/pages":
+            body = json.loads(request.content)
+            self.created += 1
+            page_id = f"page-{self.created}"
+            self.pages[page_id] = {"id": page_id, "archived": False, "properties": body["properties"]}
+            return httpx.Response(200, json={"object": "page", "id": page_id})
+
+        if request.method == "PATCH" and request.url.path.startswith("/v1/pages/"):
+            page = self.pages.get(request.url.path.rsplit("/", 1)[-1])
+            if page is None:
+                return httpx.Response(404, json={"object": "error", "status": 404, "code": "object_not_found",
+                                                 "message": "Could not find page."})
+            if page["archived"]:
+                return httpx.Response(400, json={
+                    "object": "error", "status": 400, "code": "validation_error",
+                    "message": "Can't edit block that is archived. You must unarchive the block before editing."
+                })
+            page["properties"] = json.loads(request.content)["properties"]
+            return httpx.Response(200, json={"object": "page", "id": page["id"]})
+
+        return httpx.Response(400, json={"object": "error", "status": 400, "code": "invalid_request_url", "message": "?"})
+
+
+class FakePagesCollection:
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one(self, query):
+        return self.docs.get(query["meeting_id"])
+
+    async def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["meeting_id"], {"meeting_id": query["meeting_id"]}).update(update["$set"])
+
+
+@pytest.fixture
+def fake_notion(monkeypatch):
+    fake = FakeNotion()
+    client = AsyncClient(auth="secret", base_url="http://notion.test", retry=False,
+                         client=httpx.AsyncClient(transport=httpx.MockTransport(fake.handler)))
+    monkeypatch.setattr(notion_integration, "notion", client)
+    monkeypatch.setattr(notion_integration, "notion_rate_limiter", TokenBucket(1000, capacity=1000))
+    monkeypatch.setattr(notion_integration, "NOTION_RETRY_BASE_SECONDS", 0.001)
+    return fake
+
+
+def _meeting(meeting_id="m1", summary="Shipped the beta."):
+    return {
+        "meeting_id": meeting_id,
+        "summary": summary,
+        "timestamp": "2026-10-01T10:00:00Z",
+        "action_items": [{"task": "Update docs", "assignee": "Tom", "deadline": "2026-10-09", "status": "pending"}],
+        "key_decisions": [],
+    }
+
+
+def _summary(page):
+    return page["properties"]["Summary"]["rich_text"][0]["text"]["content"]
+
+
+def test_first_export_creates_and_re_export_updates(fake_notion):
+    exporter = NotionExporter(FakePagesCollection(), database_id="db-1")
+
+    async def scenario():
+        first = await exporter.upsert_meeting_page(_meeting())
+        second = await exporter.upsert_meeting_page(_meeting(summary="Shipped the beta, docs next."))
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first["action"] == "created" and second["action"] == "updated"
+    assert first["page_id"] == second["page_id"]
+    assert len(fake_notion.pages) == 1
+    assert _summary(fake_notion.pages[first["page_id"]]) == "Shipped the beta, docs next."
+
+
+@pytest.mark.parametrize("gone", ["deleted", "archived"])
+def test_deleted_or_archived_page_is_recreated(fake_notion, gone):
+    pages = FakePagesCollection()
+    exporter = NotionExporter(pages, database_id="db-1")
+
+    async def scenario():
+        first = await exporter.upsert_meeting_page(_meeting())
+        if gone == "deleted":
+            del fake_notion.pages[first["page_id"]]
+        else:
+            fake_notion.pages[first["page_id"]]["archived"] = True
+        return first, await exporter.upsert_meeting_page(_meeting())
+
+    first, second = asyncio.run(scenario())
+
+    assert second["action"] == "created"
+    assert second["page_id"] != first["page_id"]
+    assert pages.docs["m1"]["page_id"] == second["page_id"]
+
+
+def test_rate_limited_call_is_retried(fake_notion):
+    fake_notion.script = [429, 503]
+    exporter = NotionExporter(FakePagesCollection(), database_id="db-1")
+
+    result = asyncio.run(exporter.upsert_meeting_page(_meeting()))
+
+    assert result["action"] == "created"
+    assert fake_notion.requests == [("POST", "/v1/pages")] * 3
+
+
+def test_concurrent_exports_of_one_meeting_create_one_page_and_release_locks(fake_notion):
+    exporter = NotionExporter(FakePagesCollection(), database_id="db-1")
+
+    results = asyncio.run(exporter.export_many([_meeting("m1"), _meeting("m1"), _meeting("m2")]))
+
+    assert sorted(r["action"] for r in results) == ["created", "created", "updated"]
+    assert len(fake_notion.pages) == 2
+    assert len(exporter._meeting_locks) == 0
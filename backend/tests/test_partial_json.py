@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from partial_json import PartialJSONError, PartialJSONParser, decodable_prefix
+
+ANALYSIS = {
+    "summary": 'Zoë said "ship it"\\now 🚀 — café\nnext line',
+    "action_items": [{"task": "Send {the} [report]", "assignee": "A", "deadline": None}],
+    "speakers_detected": ["A", "B"],
+    "scores": [1, -2.5e3, True, None],
+    "tone_overview": "neutral",
+    "empty": [],
+    "count": 3,
+}
+
+
+def feed_pieces(parser, pieces):
+    events = []
+    for piece in pieces:
+        events += parser.feed(piece)
+    return events
+
+
+def summary_text(events):
+    return "".join(e["text"] for e in events if e["type"] == "delta")
+
+
+@pytest.mark.parametrize("ascii_only", [True, False])
+def test_any_split_gives_the_same_fields_and_summary(ascii_only):
+    text = "```json\n" + json.dumps(ANALYSIS, ensure_ascii=ascii_only, indent=1) + "\n```"
+
+    for size in (1, 2, 3, 7, len(text)):
+        parser = PartialJSONParser(stream_strings=("summary",))
+        events = feed_pieces(parser, [text[i:i + size] for i in range(0, len(text), size)])
+
+        assert parser.complete
+        assert parser.fields == ANALYSIS
+        assert summary_text(events) == ANALYSIS["summary"]
+        assert [e["field"] for e in events if e["type"] == "field"] == list(ANALYSIS)
+
+
+def test_summary_deltas_hold_back_split_escapes():
+    # 🚀 is one character; no delta may end inside it or after a lone backslash.
+    text = json.dumps({"summary": 'a"b\\c 🚀 d'})
+    parser = PartialJSONParser(stream_strings=("summary",))
+
+    deltas = [e["text"] for e in feed_pieces(parser, text) if e["type"] == "delta"]
+
+    assert "".join(deltas) == 'a"b\\c 🚀 d'
+    assert "🚀" in deltas
+    assert decodable_prefix("ab\\") == "ab"
+    assert decodable_prefix("ab\\u00e") == "ab"
+    assert decodable_prefix("ab\\ud83d\\ude8") == "ab"
+    assert decodable_prefix("ab\\ud83d\\ude80") == "ab\\ud83d\\ude80"
+
+
+def test_array_items_arrive_before_the_array_closes():
+    parser = PartialJSONParser()
+    text = json.dumps({"scores": ANALYSIS["scores"], "action_items": ANALYSIS["action_items"]})
+    head = text[:text.index("]") - len("null")]  # up to the last score
+
+    events = parser.feed(head)
+
+    assert [(e["index"], e["value"]) for e in events] == [(0, 1), (1, -2500.0), (2, True)]
+    assert parser.fields == {}
+
+    events = parser.feed(text[len(head):-len("]}")])  # up to the end of the action item
+
+    assert events == [
+        {"type": "item", "field": "scores", "index": 3, "value": None},
+        {"type": "field", "field": "scores", "value": ANALYSIS["scores"]},
+        {"type": "item", "field": "action_items", "index": 0, "value": ANALYSIS["action_items"][0]},
+    ]
+    assert not parser.complete
+
+
+def test_truncated_stream_keeps_only_completed_fields():
+    parser = PartialJSONParser(stream_strings=("summary",))
+    text = json.dumps({"summary": "Done.", "speakers_detected": ["A", "B"], "tone_overview": "neutral"})
+
+    events = parser.feed(text[:text.index('"neutral"') + 4])
+
+    assert parser.fields == {"summary": "Done.", "speakers_detected": ["A", "B"]}
+    assert not parser.complete
+    assert events[-1]["type"] == "field"
+
+
+def test_text_after_the_closing_brace_is_ignored():
+    parser = PartialJSONParser()
+
+    parser.feed('{"count": 3}\n```\n{"count": 4}')
+
+    assert parser.complete
+    assert parser.fields == {"count": 3}
+
+
+@pytest.mark.parametrize("text, message", [
+    ('{"summary": "ok", summary: 1}', "Expected a key"),
+    ('{"summary" "ok"}', "Expected ':'"),
+])
+def test_malformed_structure_raises(text, message):
+    with pytest.raises(PartialJSONError, match=message):
+        PartialJSONParser().feed(text)
+
+
+def test_malformed_values_raise_when_complete():
+    parser = PartialJSONParser()
+    parser.feed('{"count": 3, "flag": tru')
+
+    with pytest.raises(ValueError):
+        parser.feed("e_ish}")
+    assert parser.fields == {"count": 3}
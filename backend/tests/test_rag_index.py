@@ -0,0 +1,63 @@
+import asyncio
+
+import google.generativeai as genai
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+import rag_index
+import resilience
+from model_usage import track_usage
+from resilience import CircuitBreaker, gemini_caller
+
+
+@pytest.fixture
+def hashing_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_index, "RAG_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(rag_index, "RAG_EMBEDDER", "hashing")
+    for name in ("_embedder", "_index", "_index_lock"):
+        monkeypatch.setattr(rag_index, name, None)
+    return rag_index.load_index()
+
+
+def _item(meeting_id, summary):
+    return {"meeting_id": meeting_id, "transcript": "", "meeting": {"summary": summary}}
+
+
+def test_duplicate_meetings_in_one_batch_keep_the_last(hashing_index):
+    added = asyncio.run(rag_index.index_meetings([
+        _item("m1", "Draft budget agreed."),
+        _item("m2", "Hiring plan."),
+        _item("m1", "Final budget agreed."),
+    ]))
+
+    assert added == 2
+    assert hashing_index.live_count == 2
+    results = asyncio.run(rag_index.retrieve("budget", meeting_id="m1", k=5))
+    assert [r["text"] for r in results] == ["Final budget agreed."]
+
+
+def test_gemini_embeddings_are_retried_and_recorded(monkeypatch):
+    monkeypatch.setattr(gemini_caller, "breaker", CircuitBreaker())
+    monkeypatch.setattr(resilience, "RETRY_BASE_SECONDS", 0.001)
+    calls = []
+
+    async def embed_content_async(model, content, task_type):
+        calls.append(len(content))
+        if len(calls) == 1:
+            raise google_exceptions.ServiceUnavailable("try again")
+        return {"embedding": [[1.0] * rag_index.GEMINI_EMBEDDING_DIM for _ in content]}
+
+    monkeypatch.setattr(genai, "embed_content_async", embed_content_async)
+
+    async def embed():
+        with track_usage() as ledger:
+            vectors = await rag_index.GeminiEmbedder().embed_documents(["a", "b"])
+        return vectors, ledger
+
+    vectors, ledger = asyncio.run(embed())
+
+    assert vectors.shape == (2, rag_index.GEMINI_EMBEDDING_DIM)
+    assert calls == [2, 2]
+    assert [(c["operation"], c["model"], c["status"], c["attempts"]) for c in ledger.calls] == [
+        ("embedding", rag_index.GEMINI_EMBEDDING_MODEL, "ok", 2)
+    ]
@@ -0,0 +1,180 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import resilience
+from resilience import CircuitBreaker, ProviderUnavailable, ResilientCaller
+
+
+class FakeProvider:
+    """
+    Fault-injecting provider: each attempt plays the next scripted outcome
+    ("ok", "5xx", "timeout", "400", "hang" or ("slow", seconds)); the last
+    one repeats.
+    """
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.attempts = 0
+        self.states = []
+
+    def __call__(self, breaker: CircuitBreaker = None):
+        async def attempt(timeout):
+            outcome = self.script[min(self.attempts, len(self.script) - 1)]
+            self.attempts += 1
+            if breaker is not None:
+                self.states.append(breaker.state)
+            request = httpx.Request("POST", "http://fake-provider/generate")
+            if outcome == "5xx":
+                raise httpx.HTTPStatusError("unavailable", request=request, response=httpx.Response(503, request=request))
+            if outcome == "400":
+                raise httpx.HTTPStatusError("bad request", request=request, response=httpx.Response(400, request=request))
+            if outcome == "timeout":
+                raise httpx.ReadTimeout("read timed out", request=request)
+            if outcome == "hang":
+                await asyncio.sleep(3600)
+            if isinstance(outcome, tuple):
+                await asyncio.sleep(outcome[1])
+            return "ok"
+        return attempt
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_BASE_SECONDS", 0.001)
+
+
+def call(caller, attempt, deadline=5.0, **kwargs):
+    stats = {}
+    result = asyncio.run(caller.call(attempt, deadline, stats=stats, **kwargs))
+    return result, stats
+
+
+def test_retries_server_errors_and_timeouts_until_success():
+    caller = ResilientCaller("fake", attempts=3)
+    provider = FakeProvider("5xx", "timeout", "ok")
+
+    result, stats = call(caller, provider())
+
+    assert result == "ok"
+    assert provider.attempts == 3 and stats["attempts"] == 3
+    assert caller.counts["retries"] == 2 and caller.counts["failures"] == 2
+    assert caller.breaker.state == "closed" and caller.breaker.consecutive_failures == 0
+
+
+def test_gives_up_after_the_configured_attempts():
+    caller = ResilientCaller("fake", attempts=3)
+    provider = FakeProvider("5xx")
+
+    with pytest.raises(httpx.HTTPStatusError):
+        call(caller, provider())
+
+    assert provider.attempts == 3
+    assert caller.counts["retries"] == 2
+
+
+def test_non_retryable_error_is_raised_at_once():
+    caller = ResilientCaller("fake", attempts=3)
+    provider = FakeProvider("400", "ok")
+
+    with pytest.raises(httpx.HTTPStatusError):
+        call(caller, provider())
+
+    assert provider.attempts == 1
+    assert caller.counts["retries"] == 0
+    assert caller.breaker.consecutive_failures == 0
+
+
+def test_overall_deadline_bounds_a_hanging_provider():
+    caller = ResilientCaller("fake", attempts=3)
+    provider = FakeProvider("hang")
+
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        call(caller, provider(), deadline=0.2)
+
+    assert time.monotonic() - started < 1
+    assert provider.attempts == 1
+
+
+def test_hedged_request_fires_after_the_p95_delay():
+    caller = ResilientCaller("fake", attempts=1, hedge=True)
+    caller.latencies.extend([0.05] * resilience.HEDGE_MIN_SAMPLES)
+    provider = FakeProvider(("slow", 2.0), "ok")
+
+    started = time.monotonic()
+    result, stats = call(caller, provider())
+
+    assert result == "ok"
+    assert time.monotonic() - started < 1
+    assert provider.attempts == 2
+    assert stats["hedged"] is True and caller.counts["hedges"] == 1
+
+
+def test_no_hedge_before_enough_latency_samples():
+    caller = ResilientCaller("fake", attempts=1, hedge=True)
+    provider = FakeProvider(("slow", 0.1))
+
+    result, stats = call(caller, provider())
+
+    assert result == "ok" and provider.attempts == 1 and stats["hedged"] is False
+
+
+def test_breaker_counts_calls_not_attempts():
+    # Two calls of three failed attempts each stay under a threshold of five.
+    caller = ResilientCaller("fake", attempts=3, breaker=CircuitBreaker(failure_threshold=5))
+    provider = FakeProvider("5xx")
+
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            call(caller, provider())
+
+    assert provider.attempts == 6
+    assert caller.breaker.consecutive_failures == 2
+    assert caller.breaker.state == "closed"
+
+
+def test_breaker_opens_half_opens_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.1)
+    caller = ResilientCaller("fake", attempts=3, breaker=breaker)
+    failing = FakeProvider("5xx")
+
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            call(caller, failing())
+    assert breaker.state == "open"
+
+    with pytest.raises(ProviderUnavailable) as unavailable:
+        call(caller, failing())
+    assert failing.attempts == 6  # failed fast, the provider was not called
+    assert 0 < unavailable.value.retry_after <= 0.1
+    assert caller.counts["rejected"] == 1
+
+    time.sleep(0.15)
+    recovered = FakeProvider("ok")
+    result, stats = call(caller, recovered(breaker))
+
+    assert result == "ok"
+    assert recovered.states == ["half_open"]
+    assert breaker.state == "closed" and breaker.consecutive_failures == 0
+
+
+def test_failed_probe_reopens_the_circuit_after_one_attempt():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.1)
+    caller = ResilientCaller("fake", attempts=3, breaker=breaker)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        call(caller, FakeProvider("5xx")())
+    assert breaker.state == "open"
+
+    time.sleep(0.15)
+    probe = FakeProvider("5xx")
+    with pytest.raises(httpx.HTTPStatusError):
+        call(caller, probe(breaker))
+
+    assert probe.attempts == 1 and probe.states == ["half_open"]
+    assert breaker.state == "open"
+    with pytest.raises(ProviderUnavailable):
+        call(caller, probe())
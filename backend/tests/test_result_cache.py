@@ -0,0 +1,142 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+import geminiUtils
+import main
+import result_cache
+from analyzers import get_analyzer
+from model_usage import GEMINI_BUDGET_MODEL
+from result_cache import MemoryCache, MongoCache, ResultCache
+
+TRANSCRIPT = "Sarah: We agreed to ship the beta on Friday. Tom will update the docs."
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache.time, "monotonic", clock)
+    return clock
+
+
+class FakeCacheCollection:
+    """
+    find_one/update_one on {"key", "value", "expires_at"} documents, as
+    MongoCache uses them.
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self.reads = 0
+        self.fail = False
+
+    async def find_one(self, query, projection=None):
+        self.reads += 1
+        if self.fail:
+            raise ConnectionError("mongo is down")
+        doc = self.docs.get(query["key"])
+        if doc is None or doc["expires_at"] <= query["expires_at"]["$gt"]:
+            return None
+        return {"value": doc["value"]}
+
+    async def update_one(self, query, update, upsert=False):
+        self.docs[query["key"]] = dict(update["$set"])
+
+
+def test_memory_tier_evicts_the_least_recently_used(clock):
+    cache = MemoryCache(max_entries=2, ttl_seconds=60)
+
+    async def run():
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.get("a")  # now b is the least recently used
+        await cache.set("c", 3)
+        return [await cache.get(key) for key in "abc"]
+
+    assert asyncio.run(run()) == [1, None, 3]
+
+
+def test_memory_tier_expires_entries_after_the_ttl(clock):
+    cache = MemoryCache(max_entries=10, ttl_seconds=60)
+
+    async def run():
+        await cache.set("a", {"summary": "x"})
+        clock.now += 59
+        fresh = await cache.get("a")
+        clock.now += 2
+        return fresh, await cache.get("a")
+
+    assert asyncio.run(run()) == ({"summary": "x"}, None)
+    assert "a" not in cache._entries
+
+
+def test_mongo_hit_fills_the_memory_tier(clock):
+    collection = FakeCacheCollection()
+    other_process = ResultCache(MemoryCache(), MongoCache(collection))
+    cache = ResultCache(MemoryCache(), MongoCache(collection))
+
+    async def run():
+        await other_process.set("analysis", "k1", {"summary": "shared"})
+        first = await cache.get("analysis", "k1")
+        reads = collection.reads
+        second = await cache.get("analysis", "k1")
+        return first, second, reads
+
+    first, second, reads_after_first = asyncio.run(run())
+
+    assert first == second == {"summary": "shared"}
+    assert collection.reads == reads_after_first == 1  # the second get is served from memory
+    assert cache.stats()["analysis"] == {"hits": 2, "misses": 0, "hit_ratio": 1.0}
+
+
+def test_expired_or_unreachable_mongo_entries_are_misses(clock):
+    collection = FakeCacheCollection()
+    cache = ResultCache(MemoryCache(), MongoCache(collection))
+    collection.docs["analysis:old"] = {"value": {"summary": "stale"},
+                                        "expires_at": datetime(2000, 1, 1, tzinfo=timezone.utc)}
+
+    async def run():
+        stale = await cache.get("analysis", "old")
+        collection.fail = True
+        await cache.set("analysis", "k2", {"summary": "local"})  # the write fails, memory still has it
+        return stale, await cache.get("analysis", "k2"), await cache.get("analysis", "k3")
+
+    assert asyncio.run(run()) == (None, {"summary": "local"}, None)
+    assert cache.stats()["analysis"]["misses"] == 2
+
+
+def test_analysis_key_changes_with_model_prompt_version_and_transcript(monkeypatch):
+    default = get_analyzer(geminiUtils.GEMINI_MODEL_NAME)
+    key = main.analysis_cache_key(TRANSCRIPT, default)
+
+    assert main.analysis_cache_key(TRANSCRIPT, default) == key
+    assert main.analysis_cache_key(TRANSCRIPT + " ", default) != key
+    assert main.analysis_cache_key(TRANSCRIPT, get_analyzer(GEMINI_BUDGET_MODEL)) != key
+    assert main.analysis_cache_key(TRANSCRIPT, get_analyzer("extractive")) != key
+    monkeypatch.setattr(geminiUtils, "PROMPT_VERSION", geminiUtils.PROMPT_VERSION + "-next")
+    assert main.analysis_cache_key(TRANSCRIPT, default) != key
+
+
+def test_repeat_analysis_is_served_from_the_cache_until_the_prompt_changes(stub_gemini, monkeypatch):
+    monkeypatch.setattr(main, "result_cache", ResultCache(MemoryCache()))
+
+    async def analyze():
+        return await main.analyze_with_cache(TRANSCRIPT, priority="high")
+
+    first = asyncio.run(analyze())
+    again = asyncio.run(analyze())
+    monkeypatch.setattr(geminiUtils, "PROMPT_VERSION", geminiUtils.PROMPT_VERSION + "-next")
+    after_prompt_change = asyncio.run(analyze())
+
+    assert again["summary"] == first["summary"] == after_prompt_change["summary"]
+    assert stub_gemini.calls == 2
+    assert main.result_cache.stats()["analysis"] == {"hits": 1, "misses": 2, "hit_ratio": 1 / 3}
@@ -0,0 +1,84 @@
+import asyncio
+
+import httpx
+
+import main
+from search_index import InvertedIndex, build_highlights
+
+
+def _meeting(i, summary, topic):
+    return {
+        "meeting_id": f"m{i}",
+        "timestamp": "2026-10-01T10:00:00Z",
+        "summary": summary,
+        "important_topics": [topic],
+        "action_items": [],
+        "key_decisions": [],
+    }
+
+
+def test_highlights_match_by_stem_like_the_text_index():
+    meeting = _meeting(1, "We decided to move the budget meetings to Fridays.", "planning")
+
+    highlights = build_highlights(meeting, "deciding budgets meeting")
+
+    assert highlights == {"summary": ["We <mark>decided</mark> to move the <mark>budget</mark> <mark>meetings</mark> to Fridays."]}
+
+
+def test_search_batches_yield_every_match_best_first():
+    index = InvertedIndex()
+    for i in range(12):
+        index.add(f"m{i}", _meeting(i, "budget " * (i + 1) + "review", "finance"))
+
+    batches = list(index.search_batches("budget", 5))
+
+    assert [len(b) for b in batches] == [5, 5, 2]
+    scores = [score for batch in batches for _, score in batch]
+    assert scores == sorted(scores, reverse=True)
+    assert [doc_id for doc_id, _ in batches[0]] == [doc_id for doc_id, _ in index.search("budget", k=5)]
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class _Meetings:
+    def __init__(self, docs):
+        self.docs = {d["meeting_id"]: d for d in docs}
+        self.queries = 0
+
+    def find(self, query, projection=None):
+        self.queries += 1
+        wanted = query["meeting_id"]["$in"]
+        topic = query.get("important_topics")
+        return _Cursor([dict(self.docs[m]) for m in wanted if topic is None or topic in self.docs[m]["important_topics"]])
+
+
+def test_filtered_memory_search_keeps_scanning_until_the_page_is_full(monkeypatch):
+    # The 30 best "budget" matches are all about hiring; only weaker ones pass the filter.
+    docs = [_meeting(i, "budget " * 10 + "plan", "hiring") for i in range(30)]
+    docs += [_meeting(100 + i, "budget plan " * 5, "finance") for i in range(4)]
+    index = InvertedIndex()
+    for doc in docs:
+        index.add(doc["meeting_id"], doc)
+    meetings = _Meetings(docs)
+    monkeypatch.setattr(main, "memory_search_index", index)
+    monkeypatch.setattr(main, "meetings_collection", meetings)
+
+    async def search():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/meetings/search", params={"q": "budget", "limit": 3, "topic": "finance"})
+
+    response = asyncio.run(search())
+
+    assert response.status_code == 200, response.text
+    items = response.json()["items"]
+    assert len(items) == 3
+    assert all(item["meeting_id"].startswith("m10") for item in items)
+    # Batches of limit * 5 = 15: two batches of hiring meetings, then the finance ones.
+    assert meetings.queries == 3
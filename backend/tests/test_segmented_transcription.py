@@ -0,0 +1,124 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+import segmented_transcription
+from audio_preprocess import SAMPLE_RATE
+from segmented_transcription import plan_segments, transcribe_segmented
+
+SECONDS = 60
+GAPS = (19.0, 39.0)  # quiet points near the 20 s segment targets
+# The true speaker of each 5-second block. Each segment names its speakers A, B, C
+# in order of appearance, so the same person gets different local labels.
+BLOCK_SPEAKERS = ["X", "Y", "Z", "Y", "Z", "X", "Z", "Y", "X", "Z", "Y", "X"]
+
+
+def _signal():
+    rng = np.random.default_rng(0)
+    signal = rng.integers(-8000, 8000, SECONDS * SAMPLE_RATE).astype(np.int16)
+    for gap in GAPS:
+        signal[int(gap * SAMPLE_RATE):int((gap + 0.3) * SAMPLE_RATE)] = 0
+    return signal
+
+
+def _script(plan):
+    # A word every 500 ms, plus one word centred just before each cut.
+    words = [{"text": f"w{i}", "start": 250 + 500 * i, "end": 550 + 500 * i,
+              "speaker": BLOCK_SPEAKERS[(250 + 500 * i) // 5000]} for i in range(SECONDS * 2 - 1)]
+    for segment in plan[1:]:
+        cut = segment["cut_start"] * 1000 // SAMPLE_RATE
+        words.append({"text": f"edge{cut}", "start": cut - 160, "end": cut + 140,
+                      "speaker": BLOCK_SPEAKERS[cut // 5000]})
+    return sorted(words, key=lambda w: w["start"])
+
+
+class FakeTranscriber:
+    """
+    Transcribes a slice of np.arange(samples) by looking up the script: it
+    hears the words wholly inside the slice, reports times relative to the
+    slice, labels speakers A, B, C in order of appearance and returns one
+    sentiment result per 5-second block. Later segments place "edge" words
+    40 ms late, as a second recognition of the same audio may.
+    """
+
+    def __init__(self, script):
+        self.script = script
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, samples):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            self.in_flight -= 1
+
+        offset = int(samples[0]) * 1000 // SAMPLE_RATE
+        end = (int(samples[-1]) + 1) * 1000 // SAMPLE_RATE
+        labels = {}
+        words = []
+        for w in self.script:
+            if offset <= w["start"] and w["end"] <= end:
+                jitter = 40 if offset and w["text"].startswith("edge") else 0
+                local = labels.setdefault(w["speaker"], "ABCDEFG"[len(labels)])
+                words.append({"text": w["text"], "start": w["start"] - offset + jitter,
+                              "end": w["end"] - offset + jitter, "speaker": local, "confidence": 0.9})
+        sentiments = [
+            {"start": block * 5000 - offset, "end": block * 5000 + 5000 - offset, "sentiment": "NEUTRAL",
+             "speaker": labels[speaker], "confidence": 0.5}
+            for block, speaker in enumerate(BLOCK_SPEAKERS)
+            if offset <= block * 5000 and block * 5000 + 5000 <= end
+        ]
+        return {"id": f"seg-{offset}", "words": words, "sentiment_analysis_results": sentiments}
+
+
+@pytest.fixture
+def run(monkeypatch):
+    monkeypatch.setattr(segmented_transcription, "SEGMENT_SEARCH_SECONDS", 3.0)
+    plan = plan_segments(_signal(), segment_seconds=20, overlap_seconds=3)
+    script = _script(plan)
+    transcriber = FakeTranscriber(script)
+    # The fake reads each slice's position from the sample values.
+    samples = np.arange(SECONDS * SAMPLE_RATE, dtype=np.int64)
+    result = asyncio.run(transcribe_segmented(samples, transcriber, max_parallel=4, plan=plan))
+    return plan, script, transcriber, result
+
+
+def test_cuts_land_in_the_quiet_gaps(run):
+    plan = run[0]
+
+    cuts = [s["cut_start"] / SAMPLE_RATE for s in plan[1:]]
+    assert len(plan) == 3
+    assert all(gap <= cut < gap + 0.3 for cut, gap in zip(cuts, GAPS))
+    assert all(s["start"] < s["cut_start"] and s["cut_end"] < s["end"] for s in plan[1:-1])
+
+
+def test_overlap_words_appear_once_on_the_original_timeline(run):
+    _, script, _, result = run
+
+    assert [w["text"] for w in result["words"]] == [w["text"] for w in script]
+    for word, expected in zip(result["words"], script):
+        # Edge words come from whichever segment owned them, possibly 40 ms late.
+        assert 0 <= word["start"] - expected["start"] <= 40
+        if not word["text"].startswith("edge"):
+            assert (word["start"], word["end"]) == (expected["start"], expected["end"])
+    assert result["audio_duration"] == SECONDS
+
+
+def test_speaker_labels_are_reconciled_across_segments(run):
+    _, script, _, result = run
+
+    assert [w["speaker"] for w in result["words"]] == [{"X": "A", "Y": "B", "Z": "C"}[w["speaker"]] for w in script]
+    assert [u["speaker"] for u in result["utterances"]] == ["A", "B", "C", "B", "C", "A", "C", "B", "A", "C", "B", "A"]
+    sentiments = result["sentiment_analysis_results"]
+    assert [(s["start"], s["speaker"]) for s in sentiments] == [
+        (block * 5000, {"X": "A", "Y": "B", "Z": "C"}[speaker]) for block, speaker in enumerate(BLOCK_SPEAKERS)]
+
+
+def test_segments_are_transcribed_in_parallel(run):
+    _, _, transcriber, result = run
+
+    assert transcriber.max_in_flight == 3
+    assert result["segment_transcript_ids"] == ["seg-0", "seg-16020", "seg-36000"]
@@ -0,0 +1,178 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from slack_sdk.web.async_client import AsyncWebClient
+
+import slack_integration
+from export_fanout import ExportFanout
+
+
+class FakeSlack:
+    """
+    Local chat.postMessage endpoint. Each post takes `post_seconds`; the
+    statuses in `script` (consumed one per post) inject a 429 with
+    Retry-After or an ok:false error.
+    """
+
+    def __init__(self, post_seconds=0.02, script=()):
+        self.post_seconds = post_seconds
+        self.script = list(script)
+        self.posts = []
+        self.in_flight = {}
+        self.max_in_flight_total = 0
+        self._total = 0
+
+    async def post_message(self, request):
+        body = await request.json()
+        outcome = self.script.pop(0) if self.script else "ok"
+        if outcome == "429":
+            return web.json_response({"ok": False, "error": "ratelimited"}, status=429, headers={"Retry-After": "0"})
+        if outcome == "error":
+            return web.json_response({"ok": False, "error": "channel_not_found"})
+        channel = body["channel"]
+        self.in_flight[channel] = self.in_flight.get(channel, 0) + 1
+        self._total += 1
+        self.max_in_flight_total = max(self.max_in_flight_total, self._total)
+        assert self.in_flight[channel] == 1, f"concurrent posts to {channel}"
+        try:
+            await asyncio.sleep(self.post_seconds)
+        finally:
+            self.in_flight[channel] -= 1
+            self._total -= 1
+        self.posts.append((channel, body["text"]))
+        return web.json_response({"ok": True, "channel": channel, "ts": f"{len(self.posts)}.000"})
+
+    def texts(self, channel):
+        return [text for c, text in self.posts if c == channel]
+
+
+async def _serve(fake, scenario):
+    app = web.Application()
+    app.router.add_post("/api/chat.postMessage", fake.post_message)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    slack_integration.slack_client = AsyncWebClient(token="xoxb-test", base_url=f"http://127.0.0.1:{port}/api/")
+    try:
+        return await scenario()
+    finally:
+        await runner.cleanup()
+
+
+@pytest.fixture(autouse=True)
+def slack_settings(monkeypatch):
+    monkeypatch.setattr(slack_integration, "slack_client", None)
+    monkeypatch.setattr(slack_integration, "SLACK_BOT_TOKEN", "xoxb-test")
+    monkeypatch.setattr(slack_integration, "SLACK_CHANNEL_RATE_PER_SECOND", 1000.0)
+    monkeypatch.setattr(slack_integration, "SLACK_CHANNEL_BURST", 1000)
+    monkeypatch.setattr(slack_integration, "_channel_buckets", {})
+    monkeypatch.setattr(slack_integration, "_channel_locks", slack_integration.KeyedLocks())
+    # One 5-char section per message, so every line below is its own part.
+    monkeypatch.setattr(slack_integration, "SLACK_SECTION_MAX_CHARS", 5)
+    monkeypatch.setattr(slack_integration, "SLACK_MAX_BLOCKS_PER_MESSAGE", 1)
+
+
+def _message(name, parts=3):
+    return "\n".join(f"{name}-{i}" for i in range(parts))
+
+
+def test_bulk_keeps_channel_order_and_runs_channels_concurrently():
+    fake = FakeSlack()
+    deliveries = [
+        {"meeting_id": meeting, "channel_id": channel, "message_text": _message(meeting)}
+        for meeting in ("m1", "m2")
+        for channel in ("C1", "C2", "C3")
+    ]
+
+    results = asyncio.run(_serve(fake, lambda: slack_integration.send_slack_messages_bulk(deliveries)))
+
+    assert all(r["success"] for r in results)
+    assert [(r["meeting_id"], r["channel_id"]) for r in results] == [(d["meeting_id"], d["channel_id"]) for d in deliveries]
+    for channel in ("C1", "C2", "C3"):
+        assert fake.texts(channel) == _message("m1").split("\n") + _message("m2").split("\n")
+    assert fake.max_in_flight_total == 3
+
+
+def test_concurrent_messages_to_one_channel_do_not_interleave():
+    fake = FakeSlack()
+
+    async def scenario():
+        return await asyncio.gather(
+            slack_integration.send_slack_message("C1", _message("a")),
+            slack_integration.send_slack_message("C1", _message("b")),
+        )
+
+    asyncio.run(_serve(fake, scenario))
+
+    texts = fake.texts("C1")
+    assert sorted([texts[:3], texts[3:]]) == [_message("a").split("\n"), _message("b").split("\n")]
+    assert len(slack_integration._channel_locks) == 0
+
+
+def test_rate_limited_post_is_retried():
+    fake = FakeSlack(script=["ok", "429"])
+
+    result = asyncio.run(_serve(fake, lambda: slack_integration.send_slack_message("C1", _message("a"))))
+
+    assert result["success"]
+    assert fake.texts("C1") == _message("a").split("\n")
+
+
+def test_retry_resumes_after_the_parts_already_posted():
+    fake = FakeSlack(script=["ok", "error"])
+    text = _message("a", parts=4)
+
+    async def scenario():
+        failed = await slack_integration.send_slack_message("C1", text)
+        resumed = await slack_integration.send_slack_message("C1", text, resume=failed)
+        return failed, resumed
+
+    failed, resumed = asyncio.run(_serve(fake, scenario))
+
+    assert "channel_not_found" in failed["error"]
+    assert failed["parts"] == ["1.000"]
+    assert resumed["success"] and len(resumed["parts"]) == 4
+    assert fake.texts("C1") == text.split("\n")
+
+
+def test_resume_for_a_different_message_starts_over():
+    fake = FakeSlack()
+
+    async def scenario():
+        stale = {"message_hash": "something-else", "parts": ["9.000"]}
+        return await slack_integration.send_slack_message("C1", _message("a"), resume=stale)
+
+    result = asyncio.run(_serve(fake, scenario))
+
+    assert fake.texts("C1") == _message("a").split("\n")
+    assert "9.000" not in result["parts"]
+
+
+class _Collection:
+    async def insert_one(self, doc):
+        pass
+
+    async def update_one(self, query, update):
+        pass
+
+
+def test_fanout_retry_passes_progress_back_to_the_sender():
+    fake = FakeSlack(script=["ok", "error"])
+    text = _message("a", parts=3)
+    fanout = ExportFanout(_Collection())
+    senders = {"slack": lambda channel, progress: slack_integration.send_slack_message(channel, text, resume=progress)}
+
+    async def scenario():
+        export = await fanout.create("m1", [{"destination": "slack", "target": "C1"}], {})
+        export = await fanout.run(export, senders)
+        assert export["deliveries"][0]["status"] == "failed"
+        return await fanout.run(export, senders, only_failed=True)
+
+    export = asyncio.run(_serve(fake, scenario))
+
+    delivery = export["deliveries"][0]
+    assert delivery["status"] == "delivered" and delivery["attempts"] == 2
+    assert fake.texts("C1") == text.split("\n")
@@ -0,0 +1,40 @@
+from structured_transcript import build_structured_transcript, compact_transcript
+
+
+def _utterance(speaker, start, end, text):
+    return {"speaker": speaker, "start": start, "end": end, "text": text}
+
+
+def test_same_speaker_runs_merge_into_one_untimed_line():
+    transcript = {
+        "text": "Let's ship Friday. Docs too. I'll do the docs.",
+        "utterances": [
+            _utterance("A", 0, 1000, "Let's ship Friday."),
+            _utterance("A", 1200, 2000, "Docs too."),
+            _utterance("B", 2500, 4000, "I'll do the docs."),
+        ],
+    }
+
+    assert compact_transcript(transcript) == "A: Let's ship Friday. Docs too.\nB: I'll do the docs."
+
+
+def test_sentiment_votes_only_count_sentences_inside_the_turn():
+    transcript = {
+        "utterances": [
+            _utterance("A", 0, 1000, "Great news."),
+            _utterance("B", 1000, 3000, "That is bad. Really bad."),
+            _utterance("A", 3000, 4000, "Okay."),
+        ],
+        # Unsorted on purpose; the middle sentence straddles a turn boundary
+        # but its midpoint (1100) falls inside B's turn.
+        "sentiment_analysis_results": [
+            {"start": 2000, "end": 2900, "sentiment": "NEGATIVE", "confidence": 0.4},
+            {"start": 0, "end": 900, "sentiment": "POSITIVE", "confidence": 0.9},
+            {"start": 900, "end": 1300, "sentiment": "NEGATIVE", "confidence": 0.3},
+            {"start": 3100, "end": 3900, "sentiment": "NEUTRAL", "confidence": 0.9},
+        ],
+    }
+
+    turns = build_structured_transcript(transcript)["utterances"]
+
+    assert [t["sentiment"] for t in turns] == ["POSITIVE", "NEGATIVE", None]
@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from notion_client import AsyncClient
+
+import main
+import notion_integration
+import tracing
+from notion_integration import NotionExporter
+from rate_limit import TokenBucket
+from tracing import SPAN_KIND_SERVER, STATUS_ERROR, STATUS_OK, InMemorySpanExporter
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    exporter = InMemorySpanExporter()
+    monkeypatch.setattr(tracing, "exporters", [exporter])
+    return exporter
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+
+    async def replace_one(self, query, doc, upsert=False):
+        self.docs[query["meeting_id"]] = doc
+
+    async def find_one(self, query):
+        return self.docs.get(query["meeting_id"])
+
+    async def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["meeting_id"], {}).update(update["$set"])
+
+
+class FakeIngest:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, meeting_id, transcript, meeting_doc):
+        self.submitted.append(meeting_id)
+
+
+def request(method, path, **kwargs):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, path, **kwargs)
+    return asyncio.run(run())
+
+
+def only(spans, name):
+    found = spans.find(name)
+    assert len(found) == 1, [s.name for s in spans.spans]
+    return found[0]
+
+
+def test_analyze_request_traces_analysis_model_call_and_insert(stub_gemini, spans, monkeypatch):
+    monkeypatch.setattr(main, "meetings_collection", FakeCollection())
+    monkeypatch.setattr(main, "transcripts_collection", FakeCollection())
+    monkeypatch.setattr(main, "ingest_pipeline", FakeIngest())
+    files = {"file": ("t.txt", b"Sarah: tracing test, ship the beta on Friday.", "text/plain")}
+
+    response = request("POST", "/analyze/?priority=high", files=files)
+
+    assert response.status_code == 200
+    root = only(spans, "POST /analyze/")
+    analysis = only(spans, "analysis")
+    model_call = only(spans, "gemini.generate")
+    insert = only(spans, "db_insert")
+    assert root.kind == SPAN_KIND_SERVER and root.parent_span_id is None
+    assert root.attributes["http.response.status_code"] == 200
+    assert analysis.parent_span_id == root.span_id
+    assert model_call.parent_span_id == analysis.span_id
+    assert insert.parent_span_id == root.span_id
+    assert {s.trace_id for s in spans.spans} == {root.trace_id}
+    assert analysis.attributes["cache_hit"] is False
+    assert insert.attributes["meeting_id"] == response.json()["meeting_id"]
+    # Children finish inside their parents.
+    assert root.start_ns <= analysis.start_ns <= model_call.start_ns
+    assert model_call.duration_ms <= analysis.duration_ms <= root.duration_ms
+    assert model_call.duration_ms >= stub_gemini.first_token_seconds * 1000
+
+
+@pytest.mark.parametrize("notion_status", [200, 400])
+def test_notion_export_span_is_a_child_of_the_request(spans, monkeypatch, notion_status):
+    def handler(request):
+        if notion_status != 200:
+            return httpx.Response(notion_status, json={"object": "error", "status": notion_status,
+                                                       "code": "validation_error", "message": "Bad property."})
+        return httpx.Response(200, json={"object": "page", "id": "page-1"})
+
+    client = AsyncClient(auth="secret", base_url="http://notion.test", retry=False,
+                         client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(notion_integration, "notion", client)
+    monkeypatch.setattr(notion_integration, "notion_rate_limiter", TokenBucket(1000, capacity=1000))
+    monkeypatch.setattr(main, "notion_exporter", NotionExporter(FakeCollection(), database_id="db-1"))
+    meeting = {"meeting_id": "m1", "timestamp": "2026-10-01T10:00:00Z", "summary": "Shipped the beta.",
+               "action_items": [], "key_decisions": [], "speakers_detected": [], "tone_overview": "",
+               "important_topics": []}
+
+    response = request("POST", "/export/notion", content=json.dumps(meeting),
+                       headers={"content-type": "application/json"})
+
+    root = only(spans, "POST /export/notion")
+    export = only(spans, "export.notion")
+    assert export.parent_span_id == root.span_id and export.trace_id == root.trace_id
+    assert export.attributes["meeting_id"] == "m1"
+    assert root.attributes["http.response.status_code"] == response.status_code
+    if notion_status == 200:
+        assert response.status_code == 200 and export.status == STATUS_OK
+    else:
+        assert response.status_code == 500
+        assert export.status == STATUS_ERROR and "Bad property" in export.status_message
+        assert export.to_otlp()["status"] == {"code": STATUS_ERROR, "message": export.status_message}
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from transcript_store import TranscriptNotFound, TranscriptStore
+
+
+def _word(text, start, speaker):
+    return {"text": text, "start": start, "end": start + 400, "speaker": speaker, "confidence": 0.9}
+
+
+TRANSCRIPT = {
+    "id": "t1",
+    "audio_duration": 5,
+    "words": [
+        _word("Ship", 0, "A"), _word("it", 500, "A"), _word("Friday.", 1000, "A"),
+        _word("Café", 2000, "B"), _word("Zoë", 2500, "B"), _word("agrees.", 3000, "B"),
+        _word("Um.", 4000, None),
+    ],
+    "utterances": [
+        {"speaker": "A", "start": 0, "end": 1400},
+        {"speaker": "B", "start": 2000, "end": 3400},
+        {"speaker": None, "start": 4000, "end": 4400},
+    ],
+    "sentiment_analysis_results": [
+        {"start": 0, "end": 1400, "sentiment": "POSITIVE", "speaker": "A", "confidence": 0.8},
+        # A label outside POSITIVE/NEUTRAL/NEGATIVE, and a missing one.
+        {"start": 2000, "end": 3400, "sentiment": "MIXED", "speaker": "B", "confidence": 0.5},
+        {"start": 4000, "end": 4400, "sentiment": None, "speaker": None, "confidence": 0.1},
+    ],
+    "entities": [
+        {"start": 1000, "end": 1400, "entity_type": "date"},
+        {"start": 2500, "end": 2900, "entity_type": "person_name"},
+        {"start": 2000, "end": 2400, "entity_type": None},
+    ],
+}
+
+
+@pytest.fixture
+def stored(tmp_path):
+    store = TranscriptStore(str(tmp_path))
+    asyncio.run(store.save("m1", TRANSCRIPT))
+    return store.open("m1")
+
+
+def test_words_round_trip(stored):
+    words = stored.words()
+
+    assert [w["text"] for w in words] == [w["text"] for w in TRANSCRIPT["words"]]
+    assert [(w["start"], w["end"], w["speaker"]) for w in words] == [
+        (w["start"], w["end"], w["speaker"]) for w in TRANSCRIPT["words"]]
+    assert [w["text"] for w in stored.words(1900, 2600)] == ["Café", "Zoë"]
+
+
+def test_utterances_by_speaker_and_range(stored):
+    assert [u["text"] for u in stored.utterances()] == ["Ship it Friday.", "Café Zoë agrees.", "Um."]
+    assert stored.utterances(speaker="B") == [{"speaker": "B", "start": 2000, "end": 3400, "text": "Café Zoë agrees."}]
+    assert stored.utterances(speaker="C") == []
+    assert [u["speaker"] for u in stored.utterances(start_ms=3900)] == [None]
+
+
+def test_sentiment_keeps_unknown_labels_and_missing_values(stored):
+    sentiments = stored.annotations("sentiment")
+
+    assert [(s["text"], s["sentiment"], s["speaker"]) for s in sentiments] == [
+        ("Ship it Friday.", "POSITIVE", "A"),
+        ("Café Zoë agrees.", "MIXED", "B"),
+        ("Um.", None, None),
+    ]
+
+
+def test_entities_round_trip(stored):
+    entities = stored.annotations("entity", start_ms=900)
+
+    assert [(e["text"], e["entity_type"]) for e in entities] == [("Friday.", "date"), ("Zoë", "person_name"), ("Café", None)]
+
+
+def test_files_without_a_sentiment_vocabulary_use_the_default_labels(stored):
+    del stored.header["sentiments"]  # written before the vocabulary was stored
+
+    assert stored.annotations("sentiment", end_ms=1000)[0]["sentiment"] == "POSITIVE"
+
+
+def test_unknown_or_unsafe_meeting_ids(tmp_path):
+    store = TranscriptStore(str(tmp_path))
+
+    with pytest.raises(TranscriptNotFound):
+        store.open("missing")
+    with pytest.raises(TranscriptNotFound):
+        store.open("../etc/passwd")
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+import main
+import transcriptionUtils
+from resilience import CircuitBreaker, assemblyai_caller
+
+
+class FakeAssemblyAI:
+    """
+    In-process stand-in for the AssemblyAI REST API: uploads, transcript
+    submission and status polling. A transcript finishes after
+    `polls_until_done` status reads, or when finish() is called.
+    """
+
+    def __init__(self, polls_until_done=2, fail_with=None):
+        self.polls_until_done = polls_until_done
+        self.fail_with = fail_with
+        self.uploads = []
+        self.submissions = []
+        self.polls = {}
+        self.finished = set()
+
+    def finish(self, transcript_id):
+        self.finished.add(transcript_id)
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.headers.get("authorization") != "test-key":
+            return httpx.Response(401, json={"error": "Authentication error"})
+        path = request.url.path
+        if request.method == "POST" and path == "/v2/upload":
+            self.uploads.append(await request.aread())
+            return httpx.Response(200, json={"upload_url": f"https://cdn.fake/upload/{len(self.uploads)}"})
+        if request.method == "POST" and path == "/v2/transcript":
+            payload = json.loads(await request.aread())
+            self.submissions.append(payload)
+            transcript_id = f"t{len(self.submissions)}"
+            self.polls[transcript_id] = 0
+            return httpx.Response(200, json={"id": transcript_id, "status": "queued"})
+        if request.method == "GET" and path.startswith("/v2/transcript/"):
+            transcript_id = path.rsplit("/", 1)[1]
+            if transcript_id not in self.polls:
+                return httpx.Response(404, json={"error": "Transcript not found"})
+            self.polls[transcript_id] += 1
+            done = transcript_id in self.finished or self.polls[transcript_id] >= self.polls_until_done
+            if not done:
+                return httpx.Response(200, json={"id": transcript_id, "status": "processing"})
+            if self.fail_with:
+                return httpx.Response(200, json={"id": transcript_id, "status": "error", "error": self.fail_with})
+            return httpx.Response(200, json={
+                "id": transcript_id, "status": "completed", "text": "Sarah: Ship it Friday.",
+                "utterances": [{"speaker": "A", "start": 0, "end": 900, "text": "Ship it Friday.", "words": []}],
+                "words": [],
+            })
+        return httpx.Response(404)
+
+
+@pytest.fixture
+def fake_assemblyai(monkeypatch):
+    fake = FakeAssemblyAI()
+    client = httpx.AsyncClient(base_url="https://api.fake", headers={"authorization": "test-key"},
+                               transport=httpx.MockTransport(fake.handler))
+    monkeypatch.setattr(transcriptionUtils, "ASSEMBLYAI_API_KEY", "test-key")
+    monkeypatch.setattr(transcriptionUtils, "_http_client", client)
+    monkeypatch.setattr(transcriptionUtils, "ASSEMBLYAI_POLL_SECONDS", 0.01)
+    monkeypatch.setattr(assemblyai_caller, "breaker", CircuitBreaker())
+    return fake
+
+
+def test_upload_submit_and_poll_until_completed(fake_assemblyai, tmp_path):
+    media = tmp_path / "meeting.wav"
+    media.write_bytes(b"RIFF" + bytes(3 * 1024 * 1024))
+    fake_assemblyai.polls_until_done = 3
+
+    transcript = asyncio.run(transcriptionUtils.transcribe_file(str(media)))
+
+    assert transcript["status"] == "completed"
+    assert transcript["text"] == "Sarah: Ship it Friday."
+    assert fake_assemblyai.uploads == [media.read_bytes()]
+    submission = fake_assemblyai.submissions[0]
+    assert submission["audio_url"] == "https://cdn.fake/upload/1"
+    assert submission["speaker_labels"] and submission["sentiment_analysis"] and submission["entity_detection"]
+    assert "webhook_url" not in submission
+    assert fake_assemblyai.polls == {"t1": 3}
+
+
+def test_transcription_error_is_raised(fake_assemblyai):
+    fake_assemblyai.fail_with = "Audio file contains no speech"
+
+    async def run():
+        transcript_id = await transcriptionUtils.request_transcription("https://cdn.fake/upload/1")
+        return await transcriptionUtils.wait_for_transcription(transcript_id)
+
+    with pytest.raises(Exception, match="no speech"):
+        asyncio.run(run())
+
+
+def test_wait_times_out(fake_assemblyai):
+    fake_assemblyai.polls_until_done = 10 ** 6
+
+    async def run():
+        transcript_id = await transcriptionUtils.request_transcription("https://cdn.fake/upload/1")
+        return await transcriptionUtils.wait_for_transcription(transcript_id, timeout=0.1)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(run())
+
+
+def test_webhook_wakes_the_waiter_before_the_next_poll(fake_assemblyai, monkeypatch):
+    # With a webhook configured the safety-net poll is 30 s away, so only the
+    # webhook can finish this wait quickly.
+    monkeypatch.setattr(transcriptionUtils, "ASSEMBLYAI_WEBHOOK_URL", "https://app.fake/webhooks/assemblyai")
+    monkeypatch.setattr(transcriptionUtils, "ASSEMBLYAI_WEBHOOK_SECRET", "s3cret")
+    monkeypatch.setattr(main, "ASSEMBLYAI_WEBHOOK_SECRET", "s3cret")
+    fake_assemblyai.polls_until_done = 10 ** 6
+
+    async def run():
+        transcript_id = await transcriptionUtils.request_transcription("https://cdn.fake/upload/1")
+        waiter = asyncio.create_task(transcriptionUtils.wait_for_transcription(transcript_id, timeout=60))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+
+        fake_assemblyai.finish(transcript_id)
+        submission = fake_assemblyai.submissions[-1]
+        app = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="https://app.fake")
+        async with app:
+            rejected = await app.post("/webhooks/assemblyai", json={"transcript_id": transcript_id, "status": "completed"})
+            delivered = await app.post(
+                "/webhooks/assemblyai", json={"transcript_id": transcript_id, "status": "completed"},
+                headers={submission["webhook_auth_header_name"]: submission["webhook_auth_header_value"]},
+            )
+        started = time.monotonic()
+        transcript = await asyncio.wait_for(waiter, timeout=2)
+        return transcript_id, rejected, delivered, transcript, time.monotonic() - started
+
+    transcript_id, rejected, delivered, transcript, waited = asyncio.run(run())
+
+    submission = fake_assemblyai.submissions[0]
+    assert submission["webhook_url"] == "https://app.fake/webhooks/assemblyai"
+    assert rejected.status_code == 401
+    assert delivered.json() == {"transcript_id": transcript_id, "status": "completed", "waiting": True}
+    assert transcript["status"] == "completed"
+    assert waited < 1
+    assert fake_assemblyai.polls[transcript_id] == 2
+
+
+def test_server_errors_on_status_reads_are_retried(fake_assemblyai, monkeypatch):
+    import resilience
+    monkeypatch.setattr(resilience, "RETRY_BASE_SECONDS", 0.001)
+    handler = fake_assemblyai.handler
+    failures = {"left": 2}
+
+    async def flaky(request):
+        if request.method == "GET" and failures["left"]:
+            failures["left"] -= 1
+            return httpx.Response(503, json={"error": "busy"})
+        return await handler(request)
+
+    monkeypatch.setattr(transcriptionUtils, "_http_client", httpx.AsyncClient(
+        base_url="https://api.fake", headers={"authorization": "test-key"}, transport=httpx.MockTransport(flaky)))
+
+    async def run():
+        transcript_id = await transcriptionUtils.request_transcription("https://cdn.fake/upload/1")
+        return await transcriptionUtils.wait_for_transcription(transcript_id)
+
+    assert asyncio.run(run())["status"] == "completed"
+    assert failures["left"] == 0
+
+
+def test_webhook_during_a_status_read_is_not_lost(fake_assemblyai, monkeypatch):
+    # The transcript completes, and the webhook arrives, while the first
+    # status read is in flight: that read still answers "processing".
+    monkeypatch.setattr(transcriptionUtils, "ASSEMBLYAI_WEBHOOK_URL", "https://app.fake/webhooks/assemblyai")
+    fake_assemblyai.polls_until_done = 10 ** 6
+    handler = fake_assemblyai.handler
+
+    async def webhook_mid_read(request):
+        response = await handler(request)
+        if request.method == "GET" and response.json().get("status") == "processing":
+            transcript_id = request.url.path.rsplit("/", 1)[1]
+            fake_assemblyai.finish(transcript_id)
+            assert transcriptionUtils.notify_transcription_complete(transcript_id)
+        return response
+
+    monkeypatch.setattr(transcriptionUtils, "_http_client", httpx.AsyncClient(
+        base_url="https://api.fake", headers={"authorization": "test-key"},
+        transport=httpx.MockTransport(webhook_mid_read)))
+
+    async def run():
+        transcript_id = await transcriptionUtils.request_transcription("https://cdn.fake/upload/1")
+        started = time.monotonic()
+        transcript = await asyncio.wait_for(transcriptionUtils.wait_for_transcription(transcript_id, timeout=60), 2)
+        return transcript_id, transcript, time.monotonic() - started
+
+    transcript_id, transcript, waited = asyncio.run(run())
+
+    assert transcript["status"] == "completed"
+    assert waited < 1
+    assert fake_assemblyai.polls[transcript_id] == 2
@@ -0,0 +1,154 @@
+import logging
+import os
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from metrics import stage_latency
+
+load_dotenv()
+
+# Lightweight tracing for the request pipeline. Spans nest through a
+# contextvar, so a stage started inside a request (or a task spawned from it)
+# becomes its child. Finished spans are exported in the OTLP/JSON span shape
+# and every internal span's duration feeds the per-stage latency histogram.
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "log")  # log, memory or none
+SERVICE_NAME = os.getenv("SERVICE_NAME", "meeting-analysis-api")
+
+# OTLP span kinds and status codes.
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def _attribute_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    def __init__(self, name: str, parent: Optional["Span"] = None, kind: int = SPAN_KIND_INTERNAL,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent else None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = STATUS_OK
+        self.status_message = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self._started = time.perf_counter()
+        self.duration_seconds: Optional[float] = None
+
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_error(self, error: BaseException):
+        self.status = STATUS_ERROR
+        self.status_message = str(error) or type(error).__name__
+
+    def end(self):
+        self.duration_seconds = time.perf_counter() - self._started
+        self.end_ns = self.start_ns + int(self.duration_seconds * 1e9)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.duration_seconds or 0.0) * 1000
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": k, "value": _attribute_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": self.status, **({"message": self.status_message} if self.status_message else {})},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+class InMemorySpanExporter:
+    """
+    Keeps finished spans in a list, so tests can assert on names, nesting and
+    timings: `memory_exporter.find("analysis")[0].duration_ms`.
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def find(self, name: str) -> List[Span]:
+        return [s for s in self.spans if s.name == name]
+
+    def clear(self):
+        self.spans.clear()
+
+
+class LogSpanExporter:
+    """
+    Writes each finished span as an OTLP/JSON span on the "tracing" logger,
+    which goes through the non-blocking log queue.
+    """
+
+    def export(self, span: Span):
+        logger.info(f"span {span.name} {span.duration_ms:.1f}ms",
+                    extra={"otlp_span": span.to_otlp(), "service_name": SERVICE_NAME})
+
+
+memory_exporter = InMemorySpanExporter()
+exporters: List[Any] = {
+    "log": [LogSpanExporter()],
+    "memory": [memory_exporter],
+}.get(TRACE_EXPORTER, [])
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """
+    Times the block as a child of the current span. Exceptions mark the span
+    as failed and propagate.
+    """
+    current = Span(name, parent=_current_span.get(), kind=kind, attributes=attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+        if kind == SPAN_KIND_INTERNAL:
+            stage_latency.observe(current.duration_seconds, stage=name)
+        for exporter in exporters:
+            try:
+                exporter.export(current)
+            except Exception as e:
+                logger.warning(f"Span exporter {type(exporter).__name__} failed: {e}")
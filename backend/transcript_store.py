@@ -0,0 +1,279 @@
+import asyncio
+import json
+import os
+import re
+import struct
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Detailed transcripts (word timings, speakers, sentiment, entities) are kept
+# per meeting in a small columnar file instead of pretty-printed JSON. Columns
+# are raw little-endian arrays that are memory-mapped on read, so a time-range
+# or single-speaker query only touches the pages it needs.
+TRANSCRIPT_STORE_DIR = os.getenv("TRANSCRIPT_STORE_DIR", "transcript_store")
+
+MAGIC = b"TCOL1\n"
+FORMAT_VERSION = 1
+MISSING_CODE = 255  # a word, sentiment or entity with no speaker/label
+SENTIMENTS = ["POSITIVE", "NEUTRAL", "NEGATIVE"]
+MEETING_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+class TranscriptNotFound(LookupError):
+    pass
+
+
+def _codes(values: List[Optional[str]], vocabulary: List[str], missing: int = MISSING_CODE) -> np.ndarray:
+    index = {}
+    for value in values:
+        if value is not None and value not in index:
+            if value not in vocabulary:
+                vocabulary.append(value)
+            index[value] = vocabulary.index(value)
+    return np.array([index.get(v, missing) for v in values], dtype=np.uint8)
+
+
+def encode_transcript(transcript: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converts an AssemblyAI transcript into columns plus a small header.
+    Utterances are stored as the index of their first word; sentiment and
+    entity text is recovered from the words they span.
+    """
+    words = transcript.get("words") or []
+    speakers: List[str] = []
+    sentiment_labels: List[str] = list(SENTIMENTS)
+    entity_types: List[str] = []
+
+    texts = [w.get("text") or "" for w in words]
+    encoded = [t.encode("utf-8") for t in texts]
+    text_offsets = np.zeros(len(words) + 1, dtype=np.uint32)
+    np.cumsum([len(e) for e in encoded], out=text_offsets[1:])
+    word_starts = np.array([w["start"] for w in words], dtype=np.int32)
+
+    utterance_first_word = np.array(
+        [int(np.searchsorted(word_starts, u["start"])) for u in transcript.get("utterances") or []],
+        dtype=np.uint32
+    )
+    sentiments = transcript.get("sentiment_analysis_results") or []
+    entities = transcript.get("entities") or []
+
+    columns = {
+        "word_start": word_starts,
+        "word_end": np.array([w["end"] for w in words], dtype=np.int32),
+        "word_speaker": _codes([w.get("speaker") for w in words], speakers),
+        "word_confidence": np.array([w.get("confidence", 0.0) for w in words], dtype=np.float16),
+        "word_text_offset": text_offsets,
+        "word_text": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "utterance_first_word": utterance_first_word,
+        "sentiment_start": np.array([s["start"] for s in sentiments], dtype=np.int32),
+        "sentiment_end": np.array([s["end"] for s in sentiments], dtype=np.int32),
+        "sentiment": _codes([s.get("sentiment") for s in sentiments], sentiment_labels),
+        "sentiment_speaker": _codes([s.get("speaker") for s in sentiments], speakers),
+        "sentiment_confidence": np.array([s.get("confidence", 0.0) for s in sentiments], dtype=np.float16),
+        "entity_start": np.array([e["start"] for e in entities], dtype=np.int32),
+        "entity_end": np.array([e["end"] for e in entities], dtype=np.int32),
+        "entity_type": _codes([e.get("entity_type") for e in entities], entity_types),
+    }
+    header = {
+        "version": FORMAT_VERSION,
+        "speakers": speakers,
+        "sentiments": sentiment_labels,
+        "entity_types": entity_types,
+        "audio_duration": transcript.get("audio_duration"),
+        "language_code": transcript.get("language_code"),
+        "transcript_id": transcript.get("id"),
+        "confidence": transcript.get("confidence"),
+    }
+    return {"header": header, "columns": columns}
+
+
+def write_transcript_file(path: str, transcript: Dict[str, Any]):
+    """
+    Layout: MAGIC, header length (uint32), JSON header, then each column's
+    raw bytes at the offset recorded in the header.
+    """
+    encoded = encode_transcript(transcript)
+    header, columns = encoded["header"], encoded["columns"]
+
+    layout, offset = {}, 0
+    for name, array in columns.items():
+        layout[name] = {"dtype": array.dtype.str, "offset": offset, "length": int(array.size)}
+        offset += array.nbytes
+    header["columns"] = layout
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for array in columns.values():
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+class ColumnarTranscript:
+    """
+    Read view over one stored transcript. Columns are memory-mapped lazily.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a columnar transcript file.")
+            (header_length,) = struct.unpack("<I", f.read(4))
+            self.header = json.loads(f.read(header_length))
+        self.path = path
+        self._data_offset = len(MAGIC) + 4 + header_length
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self._columns:
+            spec = self.header["columns"][name]
+            if spec["length"] == 0:
+                self._columns[name] = np.empty(0, dtype=spec["dtype"])
+            else:
+                self._columns[name] = np.memmap(
+                    self.path, dtype=spec["dtype"], mode="r",
+                    offset=self._data_offset + spec["offset"], shape=(spec["length"],)
+                )
+        return self._columns[name]
+
+    def __len__(self):
+        return self.header["columns"]["word_start"]["length"]
+
+    def _label(self, vocabulary: str, code: int) -> Optional[str]:
+        # Files written before the sentiment vocabulary was stored used SENTIMENTS.
+        labels = self.header.get(vocabulary, SENTIMENTS if vocabulary == "sentiments" else [])
+        return None if code == MISSING_CODE else labels[code]
+
+    def _speaker(self, code: int) -> Optional[str]:
+        return self._label("speakers", code)
+
+    def _word_texts(self, first: int, last: int) -> List[str]:
+        offsets = np.asarray(self.column("word_text_offset")[first:last + 1], dtype=np.int64)
+        blob = self.column("word_text")[offsets[0]:offsets[-1]].tobytes()
+        offsets -= offsets[0]
+        return [blob[a:b].decode("utf-8") for a, b in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+    def word_range(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> range:
+        """
+        Indexes of the words overlapping [start_ms, end_ms).
+        """
+        starts, ends = self.column("word_start"), self.column("word_end")
+        first = 0 if start_ms is None else int(np.searchsorted(starts, start_ms, side="left"))
+        # A word that began just before start_ms may still be running.
+        while start_ms is not None and first > 0 and ends[first - 1] > start_ms:
+            first -= 1
+        last = len(starts) if end_ms is None else int(np.searchsorted(starts, end_ms, side="left"))
+        return range(first, max(first, last))
+
+    def words(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        indexes = self.word_range(start_ms, end_ms)
+        if not indexes:
+            return []
+        sl = slice(indexes.start, indexes.stop)
+        starts, ends = self.column("word_start")[sl], self.column("word_end")[sl]
+        speakers, confidences = self.column("word_speaker")[sl], self.column("word_confidence")[sl]
+        texts = self._word_texts(indexes.start, indexes.stop)
+        return [
+            {
+                "text": texts[j],
+                "start": int(starts[j]),
+                "end": int(ends[j]),
+                "speaker": self._speaker(int(speakers[j])),
+                "confidence": round(float(confidences[j]), 3),
+            }
+            for j in range(len(indexes))
+        ]
+
+    def utterances(self, speaker: Optional[str] = None,
+                   start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Utterances overlapping [start_ms, end_ms), optionally for one speaker.
+        Transcripts stored without utterances fall back to speaker turns.
+        """
+        word_speaker = self.column("word_speaker")
+        n_words = len(word_speaker)
+        if not n_words:
+            return []
+        firsts = np.asarray(self.column("utterance_first_word"), dtype=np.int64)
+        if not len(firsts):
+            firsts = np.concatenate(([0], np.flatnonzero(word_speaker[1:] != word_speaker[:-1]) + 1))
+        lasts = np.append(firsts[1:], n_words)
+
+        selected = np.ones(len(firsts), dtype=bool)
+        if speaker is not None:
+            if speaker not in self.header["speakers"]:
+                return []
+            selected &= word_speaker[firsts] == self.header["speakers"].index(speaker)
+        if start_ms is not None or end_ms is not None:
+            indexes = self.word_range(start_ms, end_ms)
+            selected &= (lasts > indexes.start) & (firsts < indexes.stop)
+
+        starts, ends = self.column("word_start"), self.column("word_end")
+        return [
+            {
+                "speaker": self._speaker(int(word_speaker[first])),
+                "start": int(starts[first]),
+                "end": int(ends[last - 1]),
+                "text": " ".join(self._word_texts(first, last)),
+            }
+            for first, last in zip(firsts[selected].tolist(), lasts[selected].tolist())
+        ]
+
+
+    def annotations(self, kind: str, start_ms: Optional[int] = None,
+                    end_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Sentiment results ("sentiment") or entities ("entity") overlapping
+        [start_ms, end_ms), with their text rebuilt from the words they span.
+        """
+        starts, ends = self.column(f"{kind}_start"), self.column(f"{kind}_end")
+        selected = np.ones(len(starts), dtype=bool)
+        if start_ms is not None:
+            selected &= ends > start_ms
+        if end_ms is not None:
+            selected &= starts < end_ms
+        word_starts = self.column("word_start")
+
+        results = []
+        for i in np.flatnonzero(selected).tolist():
+            first = int(np.searchsorted(word_starts, starts[i], side="left"))
+            last = int(np.searchsorted(word_starts, ends[i], side="left"))
+            item = {"text": " ".join(self._word_texts(first, last)) if last > first else "",
+                    "start": int(starts[i]), "end": int(ends[i])}
+            if kind == "sentiment":
+                item["sentiment"] = self._label("sentiments", int(self.column("sentiment")[i]))
+                item["speaker"] = self._speaker(int(self.column("sentiment_speaker")[i]))
+                item["confidence"] = round(float(self.column("sentiment_confidence")[i]), 3)
+            else:
+                item["entity_type"] = self._label("entity_types", int(self.column("entity_type")[i]))
+            results.append(item)
+        return results
+
+
+class TranscriptStore:
+    def __init__(self, directory: str = TRANSCRIPT_STORE_DIR):
+        self.directory = directory
+
+    def path(self, meeting_id: str) -> str:
+        if not MEETING_ID_PATTERN.match(meeting_id):
+            raise TranscriptNotFound(meeting_id)
+        return os.path.join(self.directory, f"{meeting_id}.tcol")
+
+    async def save(self, meeting_id: str, transcript: Dict[str, Any]) -> str:
+        path = self.path(meeting_id)
+        os.makedirs(self.directory, exist_ok=True)
+        await asyncio.to_thread(write_transcript_file, path, transcript)
+        return path
+
+    def open(self, meeting_id: str) -> ColumnarTranscript:
+        path = self.path(meeting_id)
+        if not os.path.exists(path):
+            raise TranscriptNotFound(meeting_id)
+        return ColumnarTranscript(path)
@@ -1,39 +1,254 @@
-import assemblyai as aai
+import asyncio
+import logging
 import os
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import aiofiles
+import httpx
 from dotenv import load_dotenv
-import json
+
+from audio_preprocess import AUDIO_PREPROCESS, TimeMap, decode_and_trim, encode_pcm, preprocess_audio, remap_timestamps
+from segmented_transcription import SEGMENTED_TRANSCRIPTION, transcribe_segmented
+from resilience import assemblyai_caller
 
 load_dotenv()
-aai.settings.api_key = os.getenv("ASSEMBLYAI_API_KEY")
 
-async def transcribe_audio(file_path: str) -> str:
-    if not aai.settings.api_key:
+logger = logging.getLogger(__name__)
+
+# Talks to the AssemblyAI REST API directly so uploads and status polling are
+# awaited instead of blocking the event loop. Point ASSEMBLYAI_BASE_URL at a
+# local fake server to exercise this without the real service;
+# tests/test_transcription.py runs it against an in-process fake.
+ASSEMBLYAI_API_KEY = os.getenv("ASSEMBLYAI_API_KEY")
+ASSEMBLYAI_BASE_URL = os.getenv("ASSEMBLYAI_BASE_URL", "https://api.assemblyai.com")
+ASSEMBLYAI_POLL_SECONDS = float(os.getenv("ASSEMBLYAI_POLL_SECONDS", "3"))
+ASSEMBLYAI_TIMEOUT_SECONDS = float(os.getenv("ASSEMBLYAI_TIMEOUT_SECONDS", "3600"))
+# Overall deadline, retries included, for one API request (uploads excepted).
+ASSEMBLYAI_REQUEST_DEADLINE_SECONDS = float(os.getenv("ASSEMBLYAI_REQUEST_DEADLINE_SECONDS", "60"))
+
+# When set, AssemblyAI calls this URL on completion and polling drops to a slow
+# safety-net interval. It should route to POST /webhooks/assemblyai.
+ASSEMBLYAI_WEBHOOK_URL = os.getenv("ASSEMBLYAI_WEBHOOK_URL")
+ASSEMBLYAI_WEBHOOK_SECRET = os.getenv("ASSEMBLYAI_WEBHOOK_SECRET")
+WEBHOOK_AUTH_HEADER = "X-Webhook-Secret"
+WEBHOOK_FALLBACK_POLL_SECONDS = 30.0
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+TRANSCRIPTION_CONFIG = {
+    "speaker_labels": True,
+    "sentiment_analysis": True,
+    "entity_detection": True,
+    "summarization": False
+}
+
+_http_client: Optional[httpx.AsyncClient] = None
+_webhook_events: Dict[str, asyncio.Event] = {}
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if not ASSEMBLYAI_API_KEY:
         raise ValueError("ASSEMBLYAI_API_KEY is not set in environment variables.")
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            base_url=ASSEMBLYAI_BASE_URL,
+            headers={"authorization": ASSEMBLYAI_API_KEY},
+            timeout=httpx.Timeout(60.0, connect=10.0)
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def _iter_file(file_path: str):
+    async with aiofiles.open(file_path, "rb") as f:
+        while chunk := await f.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+
+
+async def upload_stream(chunks: AsyncIterator[bytes]) -> str:
+    """
+    Streams media bytes to AssemblyAI as they arrive and returns the upload URL.
+    The stream is consumed as it is sent, so the upload is not retried.
+    """
+    async def attempt(timeout):
+        response = await _get_http_client().post("/v2/upload", content=chunks)
+        response.raise_for_status()
+        return response.json()["upload_url"]
+
+    return await assemblyai_caller.call(attempt, ASSEMBLYAI_TIMEOUT_SECONDS, retry=False)
+
+
+async def upload_media(chunks: AsyncIterator[bytes]) -> Tuple[str, Optional[TimeMap]]:
+    """
+    Uploads media, running the preprocessing stage first when AUDIO_PREPROCESS
+    is enabled. Returns the upload URL and the TimeMap needed to translate
+    transcript timestamps back to the original recording (None if untouched).
+    """
+    if not AUDIO_PREPROCESS:
+        return await upload_stream(chunks), None
+    prepared = await preprocess_audio(chunks)
+    return await upload_stream(_iter_bytes(prepared["audio"])), prepared["time_map"]
+
+
+async def _iter_bytes(data: bytes):
+    for offset in range(0, len(data), UPLOAD_CHUNK_SIZE):
+        yield data[offset:offset + UPLOAD_CHUNK_SIZE]
+
+
+async def upload_audio(file_path: str) -> Tuple[str, Optional[TimeMap]]:
+    """
+    Streams a local media file (preprocessed if enabled) to AssemblyAI.
+    """
+    return await upload_media(_iter_file(file_path))
+
+
+async def request_transcription(audio_url: str) -> str:
+    """
+    Queues a transcription job for already-uploaded media and returns its id.
+    """
+    payload = {"audio_url": audio_url, **TRANSCRIPTION_CONFIG}
+    if ASSEMBLYAI_WEBHOOK_URL:
+        payload["webhook_url"] = ASSEMBLYAI_WEBHOOK_URL
+        if ASSEMBLYAI_WEBHOOK_SECRET:
+            payload["webhook_auth_header_name"] = WEBHOOK_AUTH_HEADER
+            payload["webhook_auth_header_value"] = ASSEMBLYAI_WEBHOOK_SECRET
+
+    async def attempt(timeout):
+        response = await _get_http_client().post("/v2/transcript", json=payload, timeout=timeout)
+        response.raise_for_status()
+        return response.json()["id"]
+
+    return await assemblyai_caller.call(attempt, ASSEMBLYAI_REQUEST_DEADLINE_SECONDS)
+
+
+async def submit_transcription(file_path: str) -> Tuple[str, Optional[TimeMap]]:
+    """
+    Uploads the file and queues a transcription job. Returns the transcript id
+    and TimeMap immediately; use wait_for_transcription to collect the result
+    and remap_timestamps to restore original timings.
+    """
+    audio_url, time_map = await upload_audio(file_path)
+    transcript_id = await request_transcription(audio_url)
+    logger.info(f"Submitted transcription {transcript_id} for: {file_path}")
+    return transcript_id, time_map
+
+
+async def get_transcription(transcript_id: str) -> Dict[str, Any]:
+    async def attempt(timeout):
+        response = await _get_http_client().get(f"/v2/transcript/{transcript_id}", timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    return await assemblyai_caller.call(attempt, ASSEMBLYAI_REQUEST_DEADLINE_SECONDS)
+
+
+def notify_transcription_complete(transcript_id: str) -> bool:
+    """
+    Called from the webhook endpoint. Wakes any waiter for this transcript;
+    returns False if nobody in this process is waiting on it.
+    """
+    event = _webhook_events.get(transcript_id)
+    if event is None:
+        return False
+    event.set()
+    return True
+
+
+async def wait_for_transcription(transcript_id: str, timeout: float = None) -> Dict[str, Any]:
+    """
+    Awaits a submitted transcription and returns AssemblyAI's JSON response.
+    Wakes early on the completion webhook when one is configured, otherwise polls.
+    """
+    timeout = ASSEMBLYAI_TIMEOUT_SECONDS if timeout is None else timeout
+    poll_seconds = WEBHOOK_FALLBACK_POLL_SECONDS if ASSEMBLYAI_WEBHOOK_URL else ASSEMBLYAI_POLL_SECONDS
+    event = _webhook_events.setdefault(transcript_id, asyncio.Event())
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
 
     try:
-        config = aai.TranscriptionConfig(
-            speaker_labels=True,
-            sentiment_analysis=True,
-            entity_detection=True,
-            summarization=False
-        )
+        while True:
+            # Cleared before the status read, so a webhook that fires while
+            # the read is in flight still wakes the wait below.
+            event.clear()
+            transcript = await get_transcription(transcript_id)
+            status = transcript.get("status")
+
+            if status == "completed":
+                logger.info(f"Transcription {transcript_id} completed.")
+                return transcript
+            if status == "error":
+                raise Exception(f"AssemblyAI transcription failed: {transcript.get('error')}")
 
-        transcriber = aai.Transcriber(config=config)
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise TimeoutError(f"Transcription {transcript_id} did not finish within {timeout} seconds.")
 
-        print(f"Starting transcription for: {file_path}")
-        transcript = transcriber.transcribe(file_path)
-        print(f"Transcription status: {transcript.status}")
+            try:
+                await asyncio.wait_for(event.wait(), timeout=min(poll_seconds, remaining))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        _webhook_events.pop(transcript_id, None)
 
-        if transcript.status == aai.TranscriptStatus.error:
-            raise Exception(f"AssemblyAI transcription failed: {transcript.error}")
 
-        # Save full transcript with speaker/sentiment/entity info
-        detailed_path = file_path.replace(".mp3", "_detailed.json").replace(".wav", "_detailed.json")
-        with open(detailed_path, "w", encoding="utf-8") as f:
-            json.dump(transcript.json_response, f, indent=2)
+async def transcribe_audio_url(audio_url: str, time_map: Optional[TimeMap] = None) -> Dict[str, Any]:
+    """
+    Transcribes already-uploaded media and returns AssemblyAI's full response,
+    with timestamps in original-recording time.
+    """
+    try:
+        transcript_id = await request_transcription(audio_url)
+        logger.info(f"Submitted transcription {transcript_id} for uploaded media.")
+        return remap_timestamps(await wait_for_transcription(transcript_id), time_map)
+    except Exception as e:
+        logger.error(f"Error during AssemblyAI transcription: {e}")
+        raise
+
+
+async def prepare_media(chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+    """
+    First half of a transcription; consumes the upload. In segmented mode the
+    media is decoded (and trimmed if AUDIO_PREPROCESS) into memory, otherwise
+    it is uploaded as one file. Pass the result to transcribe_prepared.
+    """
+    if SEGMENTED_TRANSCRIPTION:
+        return await decode_and_trim(chunks, trim=AUDIO_PREPROCESS)
+    audio_url, time_map = await upload_media(chunks)
+    return {"audio_url": audio_url, "time_map": time_map}
+
+
+async def _transcribe_samples(samples) -> Dict[str, Any]:
+    audio_url = await upload_stream(_iter_bytes(await encode_pcm(samples)))
+    return await wait_for_transcription(await request_transcription(audio_url))
 
-        return transcript.text
 
+async def transcribe_prepared(prepared: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Transcribes prepared media and returns the full transcript, timed against
+    the original recording. Long recordings in segmented mode are split and
+    transcribed concurrently.
+    """
+    if "samples" not in prepared:
+        return await transcribe_audio_url(prepared["audio_url"], prepared["time_map"])
+    try:
+        transcript = await transcribe_segmented(prepared["samples"], _transcribe_samples)
     except Exception as e:
-        print(f"Error during AssemblyAI transcription: {e}")
+        logger.error(f"Error during segmented AssemblyAI transcription: {e}")
         raise
+    return remap_timestamps(transcript, prepared["time_map"])
+
+
+async def transcribe_file(file_path: str) -> Dict[str, Any]:
+    return await transcribe_prepared(await prepare_media(_iter_file(file_path)))
+
+
+async def transcribe_audio(file_path: str) -> str:
+    transcript = await transcribe_file(file_path)
+    return transcript.get("text") or ""